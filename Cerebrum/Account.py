@@ -1120,6 +1120,42 @@ class Account(AccountType, AccountHome, EntityName, EntityQuarantine,
         self.__in_db = True
         self.__updated = []
 
+    def _find_many_rows(self, entity_ids):
+        found = self.__super._find_many_rows(entity_ids)
+        if not found:
+            return found
+        binds = {'domain': int(self.const.account_namespace)}
+        result = {}
+        for row in self.query("""
+        SELECT ai.account_id, ai.owner_type, ai.owner_id, ai.np_type,
+               ai.creator_id, ai.expire_date, ai.description,
+               en.entity_name
+        FROM [:table schema=cerebrum name=account_info] ai
+        JOIN [:table schema=cerebrum name=entity_name] en
+          ON en.entity_id = ai.account_id AND en.value_domain = :domain
+        WHERE """ + argument_to_sql(list(found), 'ai.account_id', binds, int),
+                              binds):
+            rows = result[row['account_id']] = found[row['account_id']]
+            rows['account_info'] = row
+        return result
+
+    def _load_found(self, rows):
+        self.__super._load_found(rows)
+        row = rows['account_info']
+        self.owner_type = row['owner_type']
+        self.owner_id = row['owner_id']
+        self.np_type = row['np_type']
+        self.creator_id = row['creator_id']
+        self.expire_date = row['expire_date']
+        self.description = row['description']
+        self.account_name = row['entity_name']
+        try:
+            del self.__in_db
+        except AttributeError:
+            pass
+        self.__in_db = True
+        self.__updated = []
+
     def find_by_name(self, name, domain=None):
         if domain is None:
             domain = int(self.const.account_namespace)
@@ -1388,7 +1424,8 @@ class Account(AccountType, AccountHome, EntityName, EntityQuarantine,
                owner_type=None,
                expire_start='[:now]',
                expire_stop=None,
-               exclude_account_id=None):
+               exclude_account_id=None,
+               fetchall=True):
         """Retrieves a list of Accounts filtered by the given criterias.
         If no criteria is given, all non-expired accounts are returned.
 
@@ -1424,6 +1461,10 @@ class Account(AccountType, AccountHome, EntityName, EntityQuarantine,
         @param exclude_account_id: Filter out account(s) with given account_id.
         @type exclude_account_id: Integer, list, tuple, set
 
+        @param fetchall: If False, return an iterator over the results rather
+        than a list. See Database.query() for streaming large result sets.
+        @type fetchall: Boolean
+
         @return a list of tuples with the info (account_id,name,owner_id,
         owner_type,expire_date).
         """
@@ -1493,7 +1534,8 @@ class Account(AccountType, AccountHome, EntityName, EntityQuarantine,
                         ai.expire_date AS expire_date, ai.description AS
                         description,
                         ai.np_type AS np_type
-        FROM %s %s""" % (','.join(tables), where_str), binds)
+        FROM %s %s""" % (','.join(tables), where_str), binds,
+                          fetchall=fetchall)
 
     def __str__(self):
         if hasattr(self, 'account_name'):
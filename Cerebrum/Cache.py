@@ -47,11 +47,29 @@ cache holding data:
   >>> print len(c)
   51
 
+The eviction order is kept in an ordered dict, so that every lookup, update
+and eviction is O(1) regardless of the cache size.  Each cache counts its
+hits, misses and evictions:
+
+  >>> c.get_stats()
+  {'hits': 0, 'misses': 0, 'evictions': 50, 'size': 51}
+
 """
+import collections
 import time
 from threading import Lock
 
 
+if hasattr(collections.OrderedDict, 'move_to_end'):
+    def _move_to_end(registry, key):
+        registry.move_to_end(key)
+else:
+    def _move_to_end(registry, key):
+        # PY2: re-inserting a key in an OrderedDict is O(1)
+        del registry[key]
+        registry[key] = None
+
+
 class Cache(dict):
 
     """Constructor class for cache instances."""
@@ -65,79 +83,109 @@ class Cache(dict):
         # same arguments we received in this __new__() call.
         return dict.__new__(cache_class)
 
+    # Hooks for the mix-in classes.  These are implemented here rather than
+    # in cache_base, as cache_base comes *before* the mix-ins in the MRO.
+
+    def _on_get(self, key):
+        pass
+
+    def _on_set(self, key):
+        pass
+
+    def _on_remove(self, key):
+        pass
+
 
 class cache_base(Cache):  # noqa: N801
-    """Minimal base class of 'cache' types."""
+    """Minimal base class of 'cache' types.
+
+    The dict methods take the cache lock, and then call the _on_get(),
+    _on_set() and _on_remove() hooks of the mix-ins.  The mix-in classes
+    implement their behaviour by extending these hooks, which are always
+    called with the lock held.  Mix-ins that need to remove a key must use
+    _remove(), which does not try to take the lock.
+    """
 
     def __init__(self, mixins=(), **kwargs):
         self._lock = Lock()
         dict.__init__(self)
-        # if self._lock.acquire is called when we already have the
-        # lock, a deadlock occours.  A number of mix-ins for
-        # __setitem__ calls __delitem__.  These mixins must set
-        # self._dont_lock=True to prevent __delitem__ from trying to
-        # aquire the lock.
-        self._dont_lock = False
-        self.registry = []
+        # Keys in order of insertion (or use, see cache_mru).  The first
+        # key is the next to be evicted.
+        self.registry = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
         for cls in mixins:
             if hasattr(cls, 'setup'):
                 cls.setup(self, **kwargs)
 
     def __setitem__(self, key, value):
-        self._lock.acquire()
-        try:
+        with self._lock:
             if key not in self:
-                self.registry.insert(0, key)
-            return super(cache_base, self).__setitem__(key, value)
-        finally:
-            self._lock.release()
+                self.registry[key] = None
+            dict.__setitem__(self, key, value)
+            self._on_set(key)
 
     def __delitem__(self, key):
-        if not self._dont_lock:
-            self._lock.acquire()
-        did_lock = not self._dont_lock
-        try:
-            ret = super(cache_base, self).__delitem__(key)
-            self.registry.remove(key)
-            return ret
-        finally:
-            if did_lock:
-                self._lock.release()
+        with self._lock:
+            self._remove(key)
 
     def __getitem__(self, key):
-        self._lock.acquire()
-        try:
-            return super(cache_base, self).__getitem__(key)
-        finally:
-            self._lock.release()
+        with self._lock:
+            try:
+                value = dict.__getitem__(self, key)
+                self._on_get(key)
+            except KeyError:
+                self.misses += 1
+                raise
+            self.hits += 1
+            return value
+
+    def clear(self):
+        with self._lock:
+            for key in list(self.registry):
+                self._remove(key)
+
+    def _remove(self, key):
+        dict.__delitem__(self, key)
+        del self.registry[key]
+        self._on_remove(key)
+
+    def _evict(self, key):
+        self._remove(key)
+        self.evictions += 1
+
+    def get_stats(self):
+        """Get cache usage counters."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self),
+            }
 
 
 # Invariants:
-#  * self.registry must contain a single entry for `key` immediately
-#    before and immediately after executing the __setitem__ method of
-#    a mixin class.
-#  * self.registry must contain a single entry for `key` immediately
-#    before and immediately after executing the __delitem__ or
-#    __getitem__ methods of a mixin class with a `key` that is present
-#    in the cache.
+#  * self.registry must contain `key` immediately before and immediately
+#    after executing the _on_set method of a mixin class.
+#  * self.registry must contain `key` immediately before executing the
+#    _on_get method of a mixin class, and must not contain `key` when the
+#    _on_remove method is called.
+#  * Mixin hooks must call the super() hook *before* doing their own work,
+#    so that the registry order is settled before any evictions.
 
 
 class cache_mru(Cache):  # noqa: N801
     """Mixin class that gives a cache Most-Recently-Used behaviour."""
 
-    def __getitem__(self, key):
-        ret = super(cache_mru, self).__getitem__(key)
-        if self.registry[0] != key:
-            self.registry.remove(key)
-            self.registry.insert(0, key)
-        return ret
+    def _on_get(self, key):
+        super(cache_mru, self)._on_get(key)
+        _move_to_end(self.registry, key)
 
-    def __setitem__(self, key, value):
-        ret = super(cache_mru, self).__setitem__(key, value)
-        if self.registry[0] != key:
-            self.registry.remove(key)
-            self.registry.insert(0, key)
-        return ret
+    def _on_set(self, key):
+        super(cache_mru, self)._on_set(key)
+        _move_to_end(self.registry, key)
 
 
 class cache_slots(Cache):  # noqa: N801
@@ -146,14 +194,10 @@ class cache_slots(Cache):  # noqa: N801
     def setup(self, **kwargs):
         self.size = kwargs.get('size', 100)
 
-    def __setitem__(self, key, value):
-        ret = super(cache_slots, self).__setitem__(key, value)
+    def _on_set(self, key):
+        super(cache_slots, self)._on_set(key)
         while len(self.registry) > self.size:
-            stale_key = self.registry[-1]
-            self._dont_lock = True
-            self.__delitem__(stale_key)
-            self._dont_lock = False
-        return ret
+            self._evict(next(iter(self.registry)))
 
 
 class cache_timeout(Cache):  # noqa: N801
@@ -163,26 +207,19 @@ class cache_timeout(Cache):  # noqa: N801
         self.timestamps = {}
         self.timeout = kwargs.get('timeout', 60 * 5)
 
-    def __setitem__(self, key, value):
-        ret = super(cache_timeout, self).__setitem__(key, value)
+    def _on_set(self, key):
+        super(cache_timeout, self)._on_set(key)
         self.timestamps[key] = time.time()
-        return ret
 
-    def __delitem__(self, key, **kwargs):
-        self._dont_lock = True
-        ret = super(cache_timeout, self).__delitem__(key)
-        self._dont_lock = False
+    def _on_remove(self, key):
+        super(cache_timeout, self)._on_remove(key)
         del self.timestamps[key]
-        return ret
 
-    def __getitem__(self, key):
-        val = super(cache_timeout, self).__getitem__(key)
+    def _on_get(self, key):
+        super(cache_timeout, self)._on_get(key)
         if time.time() - self.timestamps[key] >= self.timeout:
-            self._dont_lock = True
-            self.__delitem__(key)
-            self._dont_lock = False
+            self._evict(key)
             raise KeyError("Timed out")
-        return val
 
 
 def memoize_function(function, cache_type=Cache, **kwargs):
@@ -194,11 +231,14 @@ def memoize_function(function, cache_type=Cache, **kwargs):
     cache = cache_type(**kwargs)
 
     def memoized(*rest):
-        if rest in cache:
+        try:
             return cache[rest]
+        except KeyError:
+            pass
 
         result = function(*rest)
         cache[rest] = result
         return result
 
+    memoized.cache = cache
     return memoized
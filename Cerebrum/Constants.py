@@ -478,6 +478,26 @@ class _CerebrumCode(DatabaseAccessor):
             self.str = None
             pass
 
+    @classmethod
+    def _fetch_registry_keys(cls, db):
+        """Fetch (key, code) for every row in the code table of this class.
+
+        This is used by :py:class:`ConstantRegistry` to look up the integer
+        code of all constants in a code table with a single query.  The
+        keys must match the keys given by :py:meth:`_get_registry_key`.
+        """
+        for row in db.query(
+                """
+                SELECT {0._lookup_code_column} AS code,
+                       {0._lookup_str_column} AS code_str
+                FROM {0._lookup_table}
+                """.format(cls)):
+            yield _uchlp(row['code_str']), int(row['code'])
+
+    def _get_registry_key(self):
+        """Key that identifies this constant in its code table."""
+        return _uchlp(self.str)
+
     def _pre_insert_check(self):
         try:
             # Attempt converting self into integer code value; this
@@ -554,6 +574,7 @@ class _CerebrumCode(DatabaseAccessor):
         DELETE FROM %s
         WHERE %s=:code""" % (self._lookup_table, self._lookup_code_column),
                          {'code': int(self)})
+        ConstantsBase.clear_registry()
 
 
 class _LanguageCode(_CerebrumCode):
@@ -779,6 +800,23 @@ class _PersonAffStatusCode(_CerebrumCode):
     def __str__(self):
         return u"{}/{}".format(self.affiliation, self.str)
 
+    @classmethod
+    def _fetch_registry_keys(cls, db):
+        for row in db.query(
+                """
+                SELECT s.{0._lookup_code_column} AS code,
+                       a.{1._lookup_str_column} AS affiliation,
+                       s.{0._lookup_str_column} AS code_str
+                FROM {0._lookup_table} s
+                JOIN {1._lookup_table} a
+                  ON a.{1._lookup_code_column} = s.affiliation
+                """.format(cls, _PersonAffiliationCode)):
+            yield ((_uchlp(row['affiliation']), _uchlp(row['code_str'])),
+                   int(row['code']))
+
+    def _get_registry_key(self):
+        return (six.text_type(self.affiliation), _uchlp(self.str))
+
     def _get_status(self):
         return self.str
     status_str = property(_get_status, None, None,
@@ -981,6 +1019,19 @@ class _ChangeTypeCode(_CerebrumCode):
     def __str__(self):
         return u"{}:{}".format(self.category, self.type)
 
+    @classmethod
+    def _fetch_registry_keys(cls, db):
+        for row in db.query(
+                """
+                SELECT {0._lookup_code_column} AS code, category, type
+                FROM {0._lookup_table}
+                """.format(cls)):
+            yield ((_uchlp(row['category']), _uchlp(row['type'])),
+                   int(row['code']))
+
+    def _get_registry_key(self):
+        return (_uchlp(self.category), _uchlp(self.type))
+
     def __int__(self):
         if self.int is None:
             try:
@@ -1185,8 +1236,109 @@ def format_cl_id_type(co, val):
     return _get_code(co.ChangeType, val)
 
 
+class ConstantRegistry(object):
+    """Indexed lookup of all the constants in a ConstantsBase class.
+
+    The string lookups are built from the constant definitions alone.  The
+    integer codes are resolved by :py:meth:`load`, which fetches each code
+    table with a single query, rather than one query per constant.
+    """
+
+    def __init__(self, constants):
+        self.constants = tuple(c for c in constants
+                               if isinstance(c, _CerebrumCode))
+        self.loaded = False
+        self.by_int = {}
+        # code_str -> tuple of constants, in attribute name order
+        self.by_str = {}
+        # (constant class, code_str) -> constant
+        self.by_type = {}
+        for const in self.constants:
+            strval = six.text_type(const)
+            self.by_str[strval] = self.by_str.get(strval, ()) + (const,)
+            self.by_type[(type(const), strval)] = const
+
+    def load(self, db):
+        """Look up the integer code of every constant in the registry.
+
+        Constants that are missing from the database are left as they are,
+        and can't be looked up by integer code.
+        """
+        tables = {}
+        by_int = {}
+        for const in self.constants:
+            cls = type(const)
+            fetch = cls._fetch_registry_keys
+            table_key = (cls._lookup_table, getattr(fetch, '__func__', fetch))
+            if table_key not in tables:
+                tables[table_key] = dict(fetch(db))
+            code = tables[table_key].get(const._get_registry_key())
+            if code is None:
+                continue
+            if const.int is None:
+                const.int = code
+            if '_cache' in cls.__dict__:
+                cls._cache.setdefault(const.int, const)
+            by_int.setdefault(const.int, const)
+        self.by_int = by_int
+        self.loaded = True
+        logger.debug('Loaded %d of %d constants from %d code tables',
+                     len(by_int), len(self.constants), len(tables))
+
+    def get_by_str(self, code_str, const_type=None):
+        """Find a constant by its string value.
+
+        :param code_str: the code_str to look up
+        :param const_type: a _CerebrumCode class or a tuple of classes
+
+        :return: a matching constant, or None
+        """
+        if isinstance(const_type, type):
+            const = self.by_type.get((const_type, code_str))
+            if const is not None:
+                return const
+        const = None
+        for candidate in self.by_str.get(code_str, ()):
+            if const_type is None or isinstance(candidate, const_type):
+                const = candidate
+        return const
+
+
 class ConstantsBase(DatabaseAccessor):
 
+    # Registries for each ConstantsBase subclass, see `_get_registry`
+    _registries = {}
+    _registry_lock = threading.RLock()
+
+    def _get_registry(self, load=True):
+        """Get the shared constant registry for this class.
+
+        :param bool load:
+          Ensure that the integer codes have been loaded from the database.
+
+        :rtype: ConstantRegistry
+        """
+        cls = type(self)
+        with ConstantsBase._registry_lock:
+            registry = ConstantsBase._registries.get(cls)
+            if registry is None:
+                registry = ConstantRegistry(getattr(self, name)
+                                            for name in dir(self))
+                ConstantsBase._registries[cls] = registry
+            if load and not registry.loaded:
+                registry.load(self._db)
+        return registry
+
+    @classmethod
+    def clear_registry(cls):
+        """Invalidate all constant registries.
+
+        This must be called if the code tables are changed, so that the
+        registries are re-loaded from the database on next use.
+        """
+        with ConstantsBase._registry_lock:
+            ConstantsBase._registries.clear()
+
     def __iterate_constants(self, const_type=None):
         """Iterate all of constants within this constants proxy object.
 
@@ -1206,8 +1358,7 @@ class ConstantsBase(DatabaseAccessor):
         if const_type is None:
             const_type = _CerebrumCode
 
-        for name in dir(self):
-            attribute = getattr(self, name)
+        for attribute in self._get_registry(load=False).constants:
             if isinstance(attribute, const_type):
                 yield attribute
 
@@ -1223,10 +1374,7 @@ class ConstantsBase(DatabaseAccessor):
           of which matches `code`. If no match is found, return None.
         """
 
-        for const_obj in self.__iterate_constants():
-            if int(const_obj) == code:
-                return const_obj
-        return None
+        return self._get_registry().by_int.get(code)
 
     def _get_dependency_order(self):
         # {dependency1: {class: [object1, ...]},
@@ -1314,7 +1462,10 @@ class ConstantsBase(DatabaseAccessor):
                     insert(cls, update)
             del order[root]
 
-        insert(None, update)
+        try:
+            insert(None, update)
+        finally:
+            self.clear_registry()
         if order:
             raise ValueError("Some code values have circular dependencies.")
         return stats
@@ -1342,7 +1493,7 @@ class ConstantsBase(DatabaseAccessor):
 
     def cache_constants(self):
         u""" Do a lookup on every constant, to cause caching of values. """
-        for const_obj in self.__iterate_constants(None):
+        for const_obj in self._get_registry().constants:
             int(const_obj)
 
     def human2constant(self, human_repr, const_type=None, _attr_lookup=True):
@@ -1394,9 +1545,7 @@ class ConstantsBase(DatabaseAccessor):
             # ok, that failed too, we can only compare stringified version of
             # all proper constants with the parameter...
             if obj is None:
-                for const_obj in self.__iterate_constants(const_type):
-                    if six.text_type(const_obj) == human_repr:
-                        obj = const_obj
+                obj = self._get_registry().get_by_str(human_repr, const_type)
             # assume it's a textual representation of the code int...
             if obj is None and human_repr.isdigit():
                 obj = self.map_const(int(human_repr))
@@ -48,6 +48,12 @@ class DatabaseAccessor(object):
     def execute(self, operation, *params, **kws):
         return self._db.execute(operation, *params, **kws)
 
+    def executemany(self, operation, seq_of_parameters):
+        return self._db.executemany(operation, seq_of_parameters)
+
+    def insert_many(self, table, columns, rows, **kws):
+        return self._db.insert_many(table, columns, rows, **kws)
+
     def query(self, query, *params, **kws):
         return self._db.query(query, *params, **kws)
 
@@ -57,6 +63,9 @@ class DatabaseAccessor(object):
     def nextval(self, seq_name):
         return self._db.nextval(seq_name)
 
+    def nextvals(self, seq_name, count):
+        return self._db.nextvals(seq_name, count)
+
     def currval(self, seq_name):
         return self._db.currval(seq_name)
 
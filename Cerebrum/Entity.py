@@ -94,7 +94,9 @@ class Entity(DatabaseAccessor):
                      # reason for why they really need to update it,
                      # let's keep it write-once.
                      'entity_id',
-                     'created_at',)
+                     'created_at',
+                     # Set on objects from find_many()
+                     '__read_only',)
     __write_attr__ = ('entity_type',)
     dontclear = ('const', 'clconst')
 
@@ -176,6 +178,9 @@ class Entity(DatabaseAccessor):
         If you want to populate instances with data found in the
         Cerebrum database, use the .find() method.
         """
+        if getattr(self, '_Entity__read_only', False):
+            raise Errors.ProgrammingError(
+                "write_db() called on read-only object from find_many()")
         if not self.__updated:
             return
         is_new = not self.__in_db
@@ -240,6 +245,105 @@ class Entity(DatabaseAccessor):
         self.__in_db = True
         self.__updated = []
 
+    # Number of entities to look up per round of queries in find_many()
+    find_many_chunk_size = 1000
+
+    def find_many(self, entity_ids):
+        """Get objects for multiple entities.
+
+        This is a bulk version of find().  Entities are looked up in chunks,
+        with a fixed number of queries per chunk, rather than with a handful
+        of queries per entity.
+
+        Each entity is returned as a new, read-only instance of this class
+        (write_db() raises ProgrammingError).  Entity ids that doesn't exist
+        are skipped.
+
+        If a class implements find() but not the bulk equivalents
+        _find_many_rows() and _load_found(), each entity is looked up with
+        find() instead.
+
+        :param entity_ids: entity ids to look up
+        :return: generator of entity objects, in the order of entity_ids
+        """
+        ids = []
+        seen = set()
+        for entity_id in entity_ids:
+            entity_id = int(entity_id)
+            if entity_id not in seen:
+                seen.add(entity_id)
+                ids.append(entity_id)
+
+        bulk = self._supports_find_many()
+        chunk_size = self.find_many_chunk_size
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            if bulk:
+                found = self._find_many_rows(chunk)
+            for entity_id in chunk:
+                obj = type(self)(self._db)
+                if bulk:
+                    if entity_id not in found:
+                        continue
+                    obj._load_found(found[entity_id])
+                else:
+                    try:
+                        obj.find(entity_id)
+                    except Errors.NotFoundError:
+                        continue
+                obj.__read_only = True
+                yield obj
+
+    def _supports_find_many(self):
+        """Check that all find() implementations have bulk equivalents."""
+        for cls in type(self).__mro__:
+            if ('find' in vars(cls) and
+                    not ('_find_many_rows' in vars(cls) and
+                         '_load_found' in vars(cls))):
+                return False
+        return True
+
+    def _find_many_rows(self, entity_ids):
+        """Fetch the find() data for multiple entities.
+
+        Subclasses that override find() should extend this method (and
+        _load_found()), by adding their own rows to the result, and removing
+        entities that are missing from their tables.
+
+        :param list entity_ids: entity ids to look up
+
+        :return dict:
+            entity_id -> dict of rows for that entity, e.g.
+            ``{1: {'entity_info': <row>}}``
+        """
+        if not entity_ids:
+            return {}
+        binds = {}
+        return dict(
+            (row['entity_id'], {'entity_info': row})
+            for row in self.query("""
+            SELECT entity_id, entity_type, created_at
+            FROM [:table schema=cerebrum name=entity_info]
+            WHERE """ + argument_to_sql(entity_ids, 'entity_id', binds, int),
+                                  binds))
+
+    def _load_found(self, rows):
+        """Associate the object with an entity, using _find_many_rows() data.
+
+        This is the find() equivalent for find_many(), and subclasses that
+        override find() should override this method in the same way.
+        """
+        row = rows['entity_info']
+        self.entity_id = row['entity_id']
+        self.entity_type = row['entity_type']
+        self.created_at = row['created_at']
+        try:
+            del self.__in_db
+        except AttributeError:
+            pass
+        self.__in_db = True
+        self.__updated = []
+
     def delete(self):
         """Completely remove an entity."""
         if self.entity_id is None:
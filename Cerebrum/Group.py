@@ -43,6 +43,13 @@ from Cerebrum.Utils import argument_to_sql, prepare_string
 Entity_class = Utils.Factory.get("Entity")
 
 
+def _to_id_set(value):
+    """Get a set of ints from an id or a sequence of ids."""
+    if isinstance(value, (tuple, set, frozenset, list)):
+        return set(int(x) for x in value)
+    return set((int(value),))
+
+
 @six.python_2_unicode_compatible
 class BaseGroup(EntityQuarantine, EntityExternalId,
                 EntityName, EntitySpread,
@@ -338,6 +345,46 @@ class BaseGroup(EntityQuarantine, EntityExternalId,
         self.__in_db = True
         self.__updated = []
 
+    def _find_many_rows(self, entity_ids):
+        found = self.__super._find_many_rows(entity_ids)
+        if not found:
+            return found
+        binds = {'value_domain': int(self.const.group_namespace)}
+        result = {}
+        for row in self.query(
+                """
+                  SELECT gi.group_id, gi.description, gi.visibility,
+                         gi.creator_id, gi.expire_date, en.entity_name,
+                         gi.group_type
+                  FROM [:table schema=cerebrum name=group_info] gi
+                  LEFT OUTER JOIN
+                       [:table schema=cerebrum name=entity_name] en
+                  ON
+                    gi.group_id = en.entity_id AND
+                    en.value_domain = :value_domain
+                  WHERE
+                """ + argument_to_sql(list(found), 'gi.group_id', binds, int),
+                binds):
+            rows = result[row['group_id']] = found[row['group_id']]
+            rows['group_info'] = row
+        return result
+
+    def _load_found(self, rows):
+        self.__super._load_found(rows)
+        row = rows['group_info']
+        self.description = row['description']
+        self.visibility = row['visibility']
+        self.creator_id = row['creator_id']
+        self.expire_date = row['expire_date']
+        self.group_name = row['entity_name']
+        self.group_type = row['group_type']
+        try:
+            del self.__in_db
+        except AttributeError:
+            pass
+        self.__in_db = True
+        self.__updated = []
+
     def find_by_name(self, name, domain=None):
         """Connect object to group having ``name`` in ``domain``."""
         if domain is None:
@@ -459,6 +506,175 @@ class BaseGroup(EntityQuarantine, EntityExternalId,
         self.execute(delete_stmt, binds)
         self._db.log_change(group_id, self.clconst.group_rem, member_id)
 
+    def sync_members(self, wanted_ids, member_type_hint=None):
+        """Set the direct members of this group.
+
+        Members that are not in L{wanted_ids} are removed, and missing
+        members are added.  The membership changes are applied with a few
+        set-based statements, rather than a couple of statements per member
+        (as with add_member/remove_member).
+
+        :param wanted_ids:
+            Ids of all entities that should be (direct) members of this group.
+
+        :param member_type_hint:
+            The entity type of all the wanted members, if known.  This saves
+            an entity type lookup of the added members.
+
+        :return tuple:
+            Returns two sets: the added and the removed member ids.
+        """
+        wanted = set(int(x) for x in wanted_ids)
+        rows = self.query("""
+          SELECT member_id
+          FROM [:table schema=cerebrum name=group_member]
+          WHERE group_id = :group_id""",
+                          {'group_id': self.entity_id})
+        current = set(int(row['member_id']) for row in rows)
+        to_add = wanted - current
+        to_remove = current - wanted
+
+        if member_type_hint is None:
+            member_types = self._get_member_types(to_add)
+        else:
+            member_types = dict.fromkeys(to_add, int(member_type_hint))
+
+        if to_remove:
+            self._remove_members(to_remove)
+        if member_types:
+            self._add_members(member_types)
+        return to_add, to_remove
+
+    def _get_member_types(self, member_ids):
+        """Look up the entity type of a set of (new) members.
+
+        :return dict: member id -> entity type
+        """
+        if not member_ids:
+            return {}
+        binds = {}
+        where = argument_to_sql(member_ids, 'entity_id', binds, int)
+        rows = self.query("""
+          SELECT entity_id, entity_type
+          FROM [:table schema=cerebrum name=entity_info]
+          WHERE """ + where,
+                          binds)
+        member_types = dict((int(row['entity_id']), int(row['entity_type']))
+                            for row in rows)
+        missing = set(member_ids) - set(member_types)
+        if missing:
+            raise Errors.NotFoundError(
+                "No entities with id %s" % ', '.join(
+                    six.text_type(x) for x in sorted(missing)))
+        return member_types
+
+    def _add_members(self, member_types):
+        """Add multiple members to this group.
+
+        :param dict member_types: member id -> entity type
+        """
+        self.insert_many(
+            '[:table schema=cerebrum name=group_member]',
+            ('group_id', 'member_type', 'member_id'),
+            (dict(group_id=self.entity_id,
+                  member_type=member_type,
+                  member_id=member_id)
+             for member_id, member_type in sorted(member_types.items())))
+        for member_id in sorted(member_types):
+            self._db.log_change(self.entity_id, self.clconst.group_add,
+                                member_id)
+
+    def _remove_members(self, member_ids):
+        """Remove multiple (existing) members from this group.
+
+        :param member_ids: member ids to remove
+        """
+        binds = {'group_id': self.entity_id}
+        self.execute("""
+          DELETE FROM [:table schema=cerebrum name=group_member]
+          WHERE group_id = :group_id AND """ +
+                     argument_to_sql(member_ids, 'member_id', binds, int),
+                     binds)
+        for member_id in sorted(member_ids):
+            self._db.log_change(self.entity_id, self.clconst.group_rem,
+                                member_id)
+
+    def _get_parent_group_ids(self, member_id):
+        """Get all groups where member_id is/are direct or indirect member(s).
+
+        This is used by :py:meth:`search` and :py:meth:`search_members` to
+        expand indirect memberships, and can be overridden by mixins that
+        provide faster ways to look up the transitive closure.
+
+        :type member_id: int or sequence thereof.
+        :param member_id:
+          We are looking for groups where L{member_id} is/are indirect
+          member(s).
+
+        :rtype: set (of group_ids (ints))
+        :return:
+          Set of group_ids where member_id is/are indirect members.
+        """
+        result = set()
+        # workset contains ids of the entities that are members. in each
+        # iteration we are looking for direct parents of whatever is in
+        # workset.
+        workset = _to_id_set(member_id)
+        while workset:
+            tmp = workset
+            workset = set()
+            for row in self.search(member_id=tmp,
+                                   indirect_members=False,
+                                   # We need to be *least* restrictive
+                                   # here. Final filtering will take care
+                                   # of 'expiredness'.
+                                   filter_expired=False):
+                group_id = int(row["group_id"])
+                if group_id in result:
+                    continue
+                result.add(group_id)
+                workset.add(group_id)
+        return result
+
+    def _get_subgroup_ids(self, group_id):
+        """Get group_id and all of its direct and indirect group members.
+
+        This is the complement of :py:meth:`_get_parent_group_ids`, and is
+        used to expand ``search_members(group_id=..., indirect_members=True)``.
+
+        :type group_id: int or sequence thereof.
+
+        :rtype: set (of group_ids (ints))
+        :return:
+          The given group_ids, and the ids of all groups that are
+          direct or indirect members of them.
+        """
+        result = _to_id_set(group_id)
+        if not result:
+            return result
+        binds = {'member_type': int(self.const.entity_group)}
+        # UNION (rather than UNION ALL) ensures that the recursion terminates
+        # on cyclic memberships.
+        for row in self.query(
+                """
+                  WITH RECURSIVE subgroups(group_id) AS (
+                    SELECT gm.member_id
+                    FROM [:table schema=cerebrum name=group_member] gm
+                    WHERE gm.member_type = :member_type AND {group_filter}
+                    UNION
+                    SELECT gm.member_id
+                    FROM [:table schema=cerebrum name=group_member] gm
+                    JOIN subgroups sg
+                      ON gm.group_id = sg.group_id
+                    WHERE gm.member_type = :member_type
+                  )
+                  SELECT group_id FROM subgroups
+                """.format(group_filter=argument_to_sql(
+                    result, 'gm.group_id', binds, int)),
+                binds):
+            result.add(int(row['group_id']))
+        return result
+
     def search(self,
                group_id=None,
                member_id=None,
@@ -617,45 +833,6 @@ class BaseGroup(EntityQuarantine, EntityExternalId,
                 'member_id and group_id cannot be used simultaneously'
             )
 
-        def search_transitive_closure(member_id):
-            """Return all groups where member_id is/are indirect member(s).
-
-            :type member_id: int or sequence thereof.
-            :param member_id:
-              We are looking for groups where L{member_id} is/are indirect
-              member(s).
-
-            :rtype: set (of group_ids (ints))
-            :result:
-              Set of group_ids where member_id is/are indirect members.
-            """
-
-            result = set()
-            if not isinstance(member_id, (tuple, set, list)):
-                member_id = (member_id,)
-
-            # workset contains ids of the entities that are members. in each
-            # iteration we are looking for direct parents of whatever is in
-            # workset.
-            workset = set(int(x) for x in member_id)
-            while workset:
-                tmp = workset
-                workset = set()
-                for row in self.search(member_id=tmp,
-                                       indirect_members=False,
-                                       # We need to be *least* restrictive
-                                       # here. Final filtering will take care
-                                       # of 'expiredness'.
-                                       filter_expired=False):
-                    group_id = int(row["group_id"])
-                    if group_id in result:
-                        continue
-                    result.add(group_id)
-                    if group_id not in workset:
-                        workset.add(group_id)
-
-            return result
-
         stmt = """
           SELECT DISTINCT
             gi.group_id AS group_id,
@@ -699,7 +876,7 @@ class BaseGroup(EntityQuarantine, EntityExternalId,
         if member_id is not None:
             if indirect_members:
                 # NB! This can be a very large group set.
-                group_ids = search_transitive_closure(member_id)
+                group_ids = self._get_parent_group_ids(member_id)
                 if not group_ids:
                     return []
 
@@ -911,34 +1088,7 @@ class BaseGroup(EntityQuarantine, EntityExternalId,
           unique member_ids must filter the result set.
         """
 
-        # first of all, a help function to help us look for recursive
-        # memberships...
-        def search_transitive_closure(start_id_set, searcher, field):
-            """Collect the transitive closure of L{ids} by using the search
-            strategy specified by L{searcher}.
-
-            L{searcher} is simply a tailored self.search()-call with
-            indirect_members=False.
-
-            L{field} is the key to extract from db-rows returned by the
-            L{searcher}. Occasionally we need group_id and other times
-            member_id. These are the two permissible values.
-            """
-            result = set()
-            if isinstance(start_id_set, (tuple, set, list)):
-                workset = set(start_id_set)
-            else:
-                workset = set((start_id_set,))
-
-            while workset:
-                new_set = set([x[field] for x in searcher(workset)])
-                result.update(workset)
-                workset = new_set.difference(result)
-
-            return result
-        # end search_transitive_closure
-
-        # ... then a slight sanity check. We cannot allow a combination of
+        # First, a slight sanity check. We cannot allow a combination of
         # group and member id filters combined with indirect_members (what
         # kind of meaning can be attached to specifying all three?)
         if indirect_members:
@@ -991,14 +1141,7 @@ class BaseGroup(EntityQuarantine, EntityExternalId,
                 # expand group_id to include all direct and indirect *group*
                 # members of the initial set of group ids. This way we get
                 # *all* indirect non-group members
-                group_id = search_transitive_closure(
-                    group_id,
-                    lambda ids: self.search_members(
-                        group_id=ids,
-                        indirect_members=False,
-                        member_type=self.const.entity_group,
-                        member_filter_expired=False),
-                    "member_id")
+                group_id = self._get_subgroup_ids(group_id)
                 indirect_members = False
 
             where.append(
@@ -1022,12 +1165,8 @@ class BaseGroup(EntityQuarantine, EntityExternalId,
                 # groups of the initial set of member ids. This way, we reach
                 # *all* parent groups starting from a given set of direct
                 # members.
-                member_id = search_transitive_closure(
-                    member_id,
-                    lambda ids: self.search(member_id=ids,
-                                            indirect_members=False,
-                                            filter_expired=False),
-                    "group_id")
+                member_id = (_to_id_set(member_id) |
+                             self._get_parent_group_ids(member_id))
                 indirect_members = False
 
             where.append(
@@ -33,7 +33,7 @@ from __future__ import unicode_literals
 import six
 
 from Cerebrum import Utils
-from Cerebrum.Utils import prepare_string
+from Cerebrum.Utils import argument_to_sql, prepare_string
 from Cerebrum import Errors
 from Cerebrum.Entity import EntityContactInfo
 from Cerebrum.Entity import EntityAddress
@@ -164,6 +164,28 @@ class OU(EntityContactInfo, EntityExternalId, EntityAddress,
         self.__in_db = True
         self.__updated = []
 
+    def _find_many_rows(self, entity_ids):
+        found = self.__super._find_many_rows(entity_ids)
+        if not found:
+            return found
+        binds = {}
+        return dict(
+            (row['ou_id'], found[row['ou_id']])
+            for row in self.query("""
+            SELECT ou_id
+            FROM [:table schema=cerebrum name=ou_info]
+            WHERE """ + argument_to_sql(list(found), 'ou_id', binds, int),
+                                  binds))
+
+    def _load_found(self, rows):
+        self.__super._load_found(rows)
+        try:
+            del self.__in_db
+        except AttributeError:
+            pass
+        self.__in_db = True
+        self.__updated = []
+
     def get_parent(self, perspective):
         return self.query_1("""
         SELECT parent_id
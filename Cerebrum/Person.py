@@ -23,6 +23,7 @@ Base class for Cerebrum person objects.
 from __future__ import unicode_literals
 
 import collections
+import itertools
 import numbers
 
 import six
@@ -49,6 +50,76 @@ class MissingSelfException(Exception):
 
 Entity_class = Utils.Factory.get("Entity")
 
+# Name variants that are cached (as source system system_cached)
+CACHED_NAME_VARIANTS = ('name_first', 'name_last', 'name_full')
+
+
+def compute_cached_names(names, lookup_order):
+    """Select the cached names of a person.
+
+    See Person._update_cached_names() for a description of the algorithm.
+
+    :param dict names:
+        Names by source system, e.g. ``{source: {'name_first': 'Ola'}}``
+    :param list lookup_order:
+        Source systems, in order of precedence
+
+    :return dict:
+        Maps each of the CACHED_NAME_VARIANTS to a name, or None
+    """
+    # The keys in this dict tells us which name variants should be
+    # kept in the cache.  The corresponding values will be set as
+    # we walk through the name data from the authoritative source
+    # systems.
+    cached_name = dict.fromkeys(CACHED_NAME_VARIANTS)
+    for source in lookup_order:
+        names_from_source = names.get(source, {})
+        if not names_from_source:
+            # This source system had no name data on this person.
+            continue
+        gen_full = None
+        if ('name_first' in names_from_source and
+                'name_last' in names_from_source):
+            if names_from_source['name_first'] == '':
+                gen_full = names_from_source['name_last']
+            else:
+                gen_full = (names_from_source['name_first'] + ' ' +
+                            names_from_source['name_last'])
+        if cached_name['name_full'] is None:
+            if 'name_full' in names_from_source:
+                cached_name['name_full'] = names_from_source['name_full']
+            elif gen_full:
+                cached_name['name_full'] = gen_full
+            else:
+                # None of the source systems this far have
+                # presented us with enough data to form a full
+                # name.
+                continue
+        # Here, we know that cached_name['name_full'] is set to
+        # the person's proper full name; if gen_full is set, we
+        # know the current source system has good values for first
+        # and last name, too.
+        if gen_full == cached_name['name_full']:
+            cached_name['name_first'] = names_from_source['name_first']
+            cached_name['name_last'] = names_from_source['name_last']
+        if None not in cached_name.values():
+            # All name variants in cached_name are present.
+            break
+    else:
+        # Couldn't find proper data for caching of all name
+        # variants.  If there is cacheable data for full name, our
+        # last, best hope for getting cached first- and last names
+        # is to chop the full name apart.
+        if cached_name['name_full'] is not None:
+            name_parts = cached_name['name_full'].split()
+            if len(name_parts) >= 2:
+                last_name = name_parts.pop()
+                if cached_name['name_last'] is None:
+                    cached_name['name_last'] = last_name
+                if cached_name['name_first'] is None:
+                    cached_name['name_first'] = " ".join(name_parts)
+    return cached_name
+
 
 @six.python_2_unicode_compatible
 class Person(EntityContactInfo, EntityExternalId, EntityAddress,
@@ -327,6 +398,37 @@ class Person(EntityContactInfo, EntityExternalId, EntityAddress,
         self.__in_db = True
         self.__updated = []
 
+    def _find_many_rows(self, entity_ids):
+        found = self.__super._find_many_rows(entity_ids)
+        if not found:
+            return found
+        binds = {}
+        result = {}
+        for row in self.query("""
+        SELECT person_id, export_id, birth_date, gender,
+               deceased_date, description
+        FROM [:table schema=cerebrum name=person_info]
+        WHERE """ + argument_to_sql(list(found), 'person_id', binds, int),
+                              binds):
+            rows = result[row['person_id']] = found[row['person_id']]
+            rows['person_info'] = row
+        return result
+
+    def _load_found(self, rows):
+        self.__super._load_found(rows)
+        row = rows['person_info']
+        self.export_id = row['export_id']
+        self.birth_date = row['birth_date']
+        self.gender = row['gender']
+        self.deceased_date = row['deceased_date']
+        self.description = row['description']
+        try:
+            del self.__in_db
+        except AttributeError:
+            pass
+        self.__in_db = True
+        self.__updated = []
+
     # FIXME: these find_* functions should be renamed list_*
     def find_persons_by_bdate(self, bdate):
         return self.query("""
@@ -464,77 +566,148 @@ class Person(EntityContactInfo, EntityExternalId, EntityAddress,
         explicit first name of "": a single-word full name is not
         trusted.
 
-        A ValueError is raised if no cacheworthy name variants are
-        found for the person."""
-
-        # The keys in this dict tells us which name variants should be
-        # kept in the cache.  The corresponding values will be set as
-        # we walk through the name data from the authoritative source
-        # systems.
-        cached_name = {
-            'name_first': None,
-            'name_last': None,
-            'name_full': None
-        }
-        for ss in cereconf.SYSTEM_LOOKUP_ORDER:
-            source = getattr(self.const, ss)
-            names = {}
-            for ntype in cached_name.keys():
-                try:
-                    names[ntype] = self.get_name(source,
-                                                 getattr(self.const, ntype))
-                except Errors.NotFoundError:
-                    continue
-            if not names:
-                # This source system had no name data on this person.
-                continue
-            gen_full = None
-            if 'name_first' in names and 'name_last' in names:
-                if names['name_first'] == '':
-                    gen_full = names['name_last']
-                else:
-                    gen_full = names['name_first'] + ' ' + names['name_last']
-            if cached_name['name_full'] is None:
-                if 'name_full' in names:
-                    cached_name['name_full'] = names['name_full']
-                elif gen_full:
-                    cached_name['name_full'] = gen_full
-                else:
-                    # None of the source systems this far have
-                    # presented us with enough data to form a full
-                    # name.
-                    continue
-            # Here, we know that cached_name['name_full'] is set to
-            # the person's proper full name; if gen_full is set, we
-            # know the current source system has good values for first
-            # and last name, too.
-            if gen_full == cached_name['name_full']:
-                cached_name['name_first'] = names['name_first']
-                cached_name['name_last'] = names['name_last']
-            if None not in cached_name.values():
-                # All name variants in cached_name are present; we're
-                # ready to start updating the database.
-                break
-        else:
-            # Couldn't find proper data for caching of all name
-            # variants.  If there is cacheable data for full name, our
-            # last, best hope for getting cached first- and last names
-            # is to chop the full name apart.
-            if cached_name['name_full'] is not None:
-                name_parts = cached_name['name_full'].split()
-                if len(name_parts) >= 2:
-                    last_name = name_parts.pop()
-                    if cached_name['name_last'] is None:
-                        cached_name['name_last'] = last_name
-                    if cached_name['name_first'] is None:
-                        cached_name['name_first'] = " ".join(name_parts)
+        All the names that are needed (including the current cached
+        names) are fetched in a single query, see compute_cached_names()."""
+        sources = self._get_name_lookup_order()
+        variants = dict((int(getattr(self.const, ntype)), ntype)
+                        for ntype in CACHED_NAME_VARIANTS)
+        names = collections.defaultdict(dict)
+        for row in self.get_names(
+                source_system=sources + [int(self.const.system_cached)],
+                variant=list(variants)):
+            names[int(row['source_system'])][
+                variants[int(row['name_variant'])]] = row['name']
+        cached_name = compute_cached_names(names, sources)
 
         # Update the cache if a name is found in a system referred to by
         # cereconf.SYSTEM_LOOKUP_ORDER
         if [n for n in cached_name if cached_name[n] is not None]:
+            current = names.get(int(self.const.system_cached), {})
+            sys_cache = self.const.system_cached
             for ntype, name in cached_name.items():
                 name_type = getattr(self.const, ntype)
-                self._set_cached_name(name_type, name)
+                if ntype not in current:
+                    if name is not None:
+                        self._set_name(sys_cache, name_type, name)
+                elif name is None:
+                    self._delete_name(sys_cache, name_type)
+                elif current[ntype] != name:
+                    self._update_name(sys_cache, name_type, name)
+
+    def _get_name_lookup_order(self):
+        """Source systems (ints) in cereconf.SYSTEM_LOOKUP_ORDER."""
+        return [int(getattr(self.const, ss))
+                for ss in cereconf.SYSTEM_LOOKUP_ORDER]
+
+    def recalculate_cached_names(self, person_ids=None, batch_size=1000):
+        """Re-compute the cached names of many persons.
+
+        This is a bulk version of _update_cached_names().  All relevant
+        person_name rows are streamed in person order, the cached names
+        are computed in memory, and only the cached names that changed are
+        written, in batches of `batch_size` persons.
+
+        :param person_ids: only update these persons (default: all)
+        :param int batch_size: max number of persons per batch of changes
+
+        :return set: ids of persons with changed cached names
+        """
+        sources = self._get_name_lookup_order()
+        sys_cache = int(self.const.system_cached)
+        variants = dict((int(getattr(self.const, ntype)), ntype)
+                        for ntype in CACHED_NAME_VARIANTS)
+        binds = {}
+        where = [
+            argument_to_sql(sources + [sys_cache], 'source_system', binds,
+                            int),
+            argument_to_sql(list(variants), 'name_variant', binds, int),
+        ]
+        if person_ids is not None:
+            where.append(argument_to_sql(person_ids, 'person_id', binds, int))
+        rows = self.query(
+            """
+              SELECT person_id, source_system, name_variant, name
+              FROM [:table schema=cerebrum name=person_name]
+              WHERE {}
+              ORDER BY person_id
+            """.format(' AND '.join(where)),
+            binds,
+            fetchall=False,
+            stream=True)
+
+        changed = set()
+        batch = []
+        for person_id, person_rows in itertools.groupby(
+                rows, key=lambda r: int(r['person_id'])):
+            names = collections.defaultdict(dict)
+            for row in person_rows:
+                names[int(row['source_system'])][
+                    variants[int(row['name_variant'])]] = row['name']
+            cached_name = compute_cached_names(names, sources)
+            if all(name is None for name in cached_name.values()):
+                continue
+            current = names.get(sys_cache, {})
+            changes = [(ntype, current.get(ntype), name)
+                       for ntype, name in sorted(cached_name.items())
+                       if current.get(ntype) != name]
+            if changes:
+                batch.append((person_id, changes))
+                changed.add(person_id)
+            if len(batch) >= batch_size:
+                self._write_cached_names(batch)
+                batch = []
+        if batch:
+            self._write_cached_names(batch)
+        return changed
+
+    def _write_cached_names(self, batch):
+        """Write changed cached names.
+
+        :param list batch:
+            (person_id, changes) tuples, where changes is a list of (name
+            variant, old name, new name) tuples.  A name is None if it
+            doesn't exist.
+        """
+        sys_cache = int(self.const.system_cached)
+        deletes = collections.defaultdict(list)
+        inserts = []
+        for person_id, changes in batch:
+            for ntype, old_name, new_name in changes:
+                variant = int(getattr(self.const, ntype))
+                if old_name is not None:
+                    deletes[variant].append(person_id)
+                if new_name is not None:
+                    inserts.append({'person_id': person_id,
+                                    'name_variant': variant,
+                                    'source_system': sys_cache,
+                                    'name': new_name})
+                if old_name is None:
+                    change_type = self.clconst.person_name_add
+                elif new_name is None:
+                    change_type = self.clconst.person_name_del
+                else:
+                    change_type = self.clconst.person_name_mod
+                params = {'src': sys_cache, 'name_variant': variant}
+                if new_name is not None:
+                    params['name'] = new_name
+                self._db.log_change(person_id, change_type, None,
+                                    change_params=params)
+
+        for variant, person_ids in deletes.items():
+            binds = {'source_system': sys_cache, 'name_variant': variant}
+            self.execute(
+                """
+                  DELETE FROM [:table schema=cerebrum name=person_name]
+                  WHERE source_system = :source_system AND
+                        name_variant = :name_variant AND
+                        {}
+                """.format(argument_to_sql(person_ids, 'person_id', binds,
+                                           int)),
+                binds)
+        self.insert_many(
+            '[:table schema=cerebrum name=person_name]',
+            ('person_id', 'name_variant', 'source_system', 'name'),
+            inserts)
 
     def list_person_name_codes(self):
         return self.query(
@@ -1200,8 +1373,12 @@ class Person(EntityContactInfo, EntityExternalId, EntityAddress,
         # print('DEBUG: ' + q)
         return self.query(q, binds)
 
-    def list_persons(self, person_id=None):
-        """Return all persons' person_id and birth_date."""
+    def list_persons(self, person_id=None, fetchall=True):
+        """Return all persons' person_id and birth_date.
+
+        :param fetchall:
+            If False, return an iterator over the results rather than a list.
+        """
         binds = dict()
         where = ''
         if person_id is not None:
@@ -1210,7 +1387,7 @@ class Person(EntityContactInfo, EntityExternalId, EntityAddress,
         return self.query("""
         SELECT person_id, birth_date, export_id
         FROM [:table schema=cerebrum name=person_info]
-        """ + where, binds)
+        """ + where, binds, fetchall=fetchall)
 
     def getdict_persons_names(self, source_system=None, name_types=None):
         if name_types is None:
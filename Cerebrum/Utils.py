@@ -452,6 +452,24 @@ def format_exception_context(etype, evalue, etraceback):
              repr(evalue)))
 
 
+class ValueSet(list):
+    """
+    A set of values for use in a set filter.
+
+    :func:`argument_to_sql` binds sequences of more than
+    :data:`SET_FILTER_BIND_LIMIT` values as a single ValueSet parameter in a
+    ``column = ANY(:param)`` expression.  Database drivers that support
+    arrays (i.e. psycopg2) binds the ValueSet as an array.  The postgres
+    driver may also stage large value sets in a temporary table (see
+    :meth:`Cerebrum.database.Database.expand_value_sets`).
+    """
+    __slots__ = ()
+
+
+# Sequences with more than this many values are bound as a ValueSet
+SET_FILTER_BIND_LIMIT = 8
+
+
 def argument_to_sql(argument,
                     sql_attr_name,
                     binds,
@@ -489,6 +507,14 @@ def argument_to_sql(argument,
         This way we avoid the possibility of SQL-injection for sequences of
         strings that we want to embed into the generated SQL.
 
+        Sequences with more than SET_FILTER_BIND_LIMIT values are bound as a
+        single ValueSet (array) parameter, e.g.::
+
+            (foo = ANY(:foo))
+
+        with ``binds['foo'] = ValueSet(map(transformation, argument))``.  This
+        keeps the statement text the same for any number of values.
+
     :type sql_attr_name: basestring
     :param sql_attr_name: Name of the column to match L{argument} to.
 
@@ -527,14 +553,20 @@ def argument_to_sql(argument,
             # Sequence with only one scalar, let's unpack and treat as scalar.
             # Has no real effect, but the SQL looks prettier.
             argument = argument[0]
-        # The binds approach is very slow when argument contains lots of
-        # entries, so then skip it. Also the odds for hitting the sql-query
-        # cache diminishes rapidly, which is what binds is trying to aid.
-        elif len(argument) > 8:
-            return '(%s %s (%s))' % (
-                sql_attr_name,
-                compare_set,
-                ', '.join(map(str, map(transformation, argument))))
+        # One bind per value is very slow when argument contains lots of
+        # entries, and the statement would change with every number of
+        # values.  Bind all the values as a single array instead.
+        elif len(argument) > SET_FILTER_BIND_LIMIT:
+            # Large sets used to be inlined without a bind, so callers may
+            # filter the same column more than once.
+            name = binds_name
+            suffix = 0
+            while name in binds:
+                suffix += 1
+                name = '%s_set%d' % (binds_name, suffix)
+            binds[name] = ValueSet(map(transformation, argument))
+            sql = '(%s = ANY(:%s))' % (sql_attr_name, name)
+            return '(NOT %s)' % (sql,) if negate else sql
         else:
             tmp = dict()
             for index, item in enumerate(argument):
@@ -40,6 +40,7 @@ from __future__ import (
     # TODO: unicode_literals,
 )
 
+import itertools
 import logging
 import os
 import sys
@@ -174,8 +175,7 @@ class Cursor(object):
 
     def __init__(self, db):
         self._db = db
-        real = db.driver_connection()
-        self._cursor = real.cursor()
+        self._cursor = self._make_driver_cursor(db.driver_connection())
         self._sql_cache = Cache.Cache(mixins=[Cache.cache_mru,
                                               Cache.cache_slots],
                                       size=100)
@@ -188,6 +188,10 @@ class Cursor(object):
         for exc_name in errors.API_EXCEPTION_NAMES:
             setattr(self, exc_name, getattr(db, exc_name))
 
+    def _make_driver_cursor(self, connection):
+        """Create the driver cursor object to wrap."""
+        return connection.cursor()
+
     @property
     def _translate(self):
         if not hasattr(self, '_translate_func'):
@@ -251,7 +255,8 @@ class Cursor(object):
                 parameters=parameters,
                 binds=binds):
             try:
-                return self._cursor.execute(sql, binds)
+                sql, binds = self._db.expand_value_sets(sql, binds)
+                return self._driver_execute(sql, binds)
             finally:
                 if self.description:
                     # Retrieve the column names involved in the query.
@@ -260,6 +265,10 @@ class Cursor(object):
                     # Not a row-returning query; clear column names.
                     self._row_fields = None
 
+    def _driver_execute(self, sql, binds):
+        """Execute a translated statement with the driver cursor."""
+        return self._cursor.execute(sql, binds)
+
     def executemany(self, operation, seq_of_parameters):
         """Do DB-API 2.0 executemany."""
         ret = None
@@ -307,7 +316,8 @@ class Cursor(object):
         """Return iterator over the current query's results."""
         return row_factory.iter_rows(self, self._row_fields)
 
-    def query(self, query, params=(), fetchall=True):
+    def query(self, query, params=(), fetchall=True, stream=None,
+              compact_rows=None):
         """
         Perform an SQL query, and return all rows it yields.
 
@@ -323,8 +333,25 @@ class Cursor(object):
            object, suitable for e.g. returning one row on demand per
            iteration in a for loop.  This approach can in some cases
            lead to much lower memory consumption.
+
+        If `stream' is true, the query is run with a server-side cursor
+        (see Database.stream_cursor()), and an iterator is returned, as if
+        `fetchall' was false.  If `stream' is None (the default), the
+        Database.stream_queries setting decides whether queries with a false
+        `fetchall' are streamed.
+
+        If `compact_rows' is true, rows are returned as compact, read-only
+        row objects (see row_factory.make_compact_row_class()).  If None (the
+        default), the row_factory configuration decides the row type.
         """
-        if not fetchall:
+        if stream is None:
+            stream = not fetchall and self._db.stream_queries
+        if stream:
+            # Rows are fetched from a server-side cursor in batches of
+            # Database.stream_itersize rows.
+            self = self._db.stream_cursor()
+            fetchall = False
+        elif not fetchall:
             # If the cursor to iterate over is used for other queries
             # before the iteration is finished, things won't work.
             # Hence, we generate a fresh cursor to use for this
@@ -338,9 +365,11 @@ class Cursor(object):
             return None
 
         if fetchall:
-            return row_factory.list_rows(self, self._row_fields)
+            return row_factory.list_rows(self, self._row_fields,
+                                         compact=compact_rows)
         else:
-            return row_factory.iter_rows(self, self._row_fields)
+            return row_factory.iter_rows(self, self._row_fields,
+                                         compact=compact_rows)
 
     def query_1(self, query, params=()):
         """
@@ -407,6 +436,94 @@ class Cursor(object):
         return Lock(cursor=self, table=table, mode=mode)
 
 
+class ServerSideCursor(Cursor):
+    """
+    Cursor that keeps the result set on the database server.
+
+    Rows are transferred in batches of `arraysize` rows as they are fetched,
+    rather than all at once when the query is executed.  This requires a
+    driver with support for named cursors (e.g. psycopg2).
+
+    The cursor can only be used for a single query, and is only valid within
+    the current transaction: commit() or rollback() during iteration will
+    invalidate it.
+    """
+
+    _names = itertools.count(1)
+
+    def __init__(self, db, itersize):
+        self._name = 'cerebrum_cursor_{:d}'.format(next(self._names))
+        super(ServerSideCursor, self).__init__(db)
+        self.arraysize = itersize
+        self._prefetched = []
+        self._description = None
+        self._exhausted = False
+
+    def _make_driver_cursor(self, connection):
+        return connection.cursor(self._name)
+
+    def _get_arraysize(self):
+        return self._cursor.arraysize
+
+    def _set_arraysize(self, size):
+        self._cursor.arraysize = size
+        # psycopg2 uses `itersize' when iterating over a named cursor
+        if hasattr(self._cursor, 'itersize'):
+            self._cursor.itersize = size
+    arraysize = property(_get_arraysize, _set_arraysize, None,
+                         "DB-API 2.0 read-write attribute 'arraysize'.")
+
+    def execute(self, operation, parameters=()):
+        ret = super(ServerSideCursor, self).execute(operation, parameters)
+        # Named cursors don't have a description until the first rows have
+        # been fetched, so we fetch the first batch right away.
+        self._prefetched = self._fetch(self.arraysize)
+        if self._description:
+            self._row_fields = [d[0].lower() for d in self._description]
+        return ret
+
+    def _fetch(self, size):
+        if self._exhausted:
+            return []
+        rows = self._cursor.fetchmany(size)
+        self._description = self._cursor.description
+        if len(rows) < size:
+            # Free up server-side resources as soon as possible
+            self.close()
+        return rows
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def fetchmany(self, size=None):
+        if size is None:
+            size = self.arraysize
+        rows = self._prefetched[:size]
+        del self._prefetched[:size]
+        if len(rows) < size:
+            rows.extend(self._fetch(size - len(rows)))
+        return rows
+
+    def fetchall(self):
+        rows = []
+        while True:
+            batch = self.fetchmany()
+            if not batch:
+                return rows
+            rows.extend(batch)
+
+    def close(self):
+        if not self._exhausted:
+            self._exhausted = True
+            return self._cursor.close()
+
+    def _get_description(self):
+        return self._description
+    description = property(_get_description, None, None,
+                           "DB-API 2.0 .read-only attribute 'description'.")
+
+
 def kickstart(module):
     """ Copy DBAPI 2.0 items from `module` to the decorated class.
 
@@ -474,6 +591,15 @@ class Database(object):
         'client_encoding') or 'UTF-8'
     # The default character set encoding to use.
 
+    stream_queries = False
+    # If true, queries with fetchall=False are run with a server-side cursor
+    # (see stream_cursor()), rather than a regular client-side cursor.  Scripts
+    # that iterate over large result sets can enable this for all queries by
+    # setting `db.stream_queries = True'.
+
+    stream_itersize = 2000
+    # Number of rows to transfer per round-trip when streaming query results.
+
     def __init__(self, do_connect=True, app_hint=None, *db_params, **db_kws):
         if self.__class__ is Database:
             raise NotImplementedError(
@@ -549,6 +675,16 @@ class Database(object):
         """
         return Cursor(self)
 
+    def stream_cursor(self):
+        """
+        Generate and return a fresh cursor for streaming query results.
+
+        The default implementation returns a regular cursor.  Drivers that
+        support server-side cursors should override this method, and return a
+        ServerSideCursor.
+        """
+        return self.cursor()
+
     #
     #   Methods corresponding to DB-API 2.0 cursor object methods.
     #
@@ -719,6 +855,96 @@ class Database(object):
         SELECT [:sequence schema=cerebrum name=%s op=set val=%d]""" %
                             (seq_name, int(val)))
 
+    def nextvals(self, seq_name, count):
+        """
+        Return a list of new values from sequence SEQ_NAME.
+
+        Drivers may override this to fetch all values in a single query.
+
+        @type seq_name : string
+        @param seq_name: The name of the sequence
+
+        @type count: int
+        @param count: Number of values to fetch
+
+        @rtype: list
+        @return: <count> new, ascending values from the sequence
+        """
+        return [int(self.nextval(seq_name)) for _ in range(int(count))]
+
+    def insert_many(self, table, columns, rows, chunk_size=500):
+        """
+        Insert rows using multi-row INSERT statements.
+
+        Each statement inserts up to <chunk_size> rows, which saves a
+        round-trip to the database for each row.
+
+        @type table: string
+        @param table: The table to insert into, e.g.
+            '[:table schema=cerebrum name=change_log]'
+
+        @type columns: sequence
+        @param columns: The column names to insert values into
+
+        @type rows: iterable
+        @param rows: Mappings with a value for each of the columns
+
+        @type chunk_size: int
+        @param chunk_size: Max number of rows to insert in one statement
+
+        @rtype: int
+        @return: Number of rows inserted
+        """
+        columns = tuple(columns)
+        count = 0
+        chunk = []
+
+        def flush():
+            binds = {}
+            values = []
+            for i, row in enumerate(chunk):
+                names = []
+                for col in columns:
+                    name = '{0}_{1:d}'.format(col, i)
+                    binds[name] = row[col]
+                    names.append(':' + name)
+                values.append('(' + ', '.join(names) + ')')
+            self.execute(
+                "INSERT INTO {table} ({columns}) VALUES {values}".format(
+                    table=table,
+                    columns=', '.join(columns),
+                    values=', '.join(values)),
+                binds)
+
+        for row in rows:
+            chunk.append(row)
+            count += 1
+            if len(chunk) >= chunk_size:
+                flush()
+                chunk = []
+        if chunk:
+            flush()
+        return count
+
+    def expand_value_sets(self, sql, binds):
+        """
+        Prepare ValueSet parameters for a translated statement.
+
+        Value sets (see :class:`Cerebrum.Utils.ValueSet`) are bound as arrays
+        in ``column = ANY(<param>)`` expressions.  Drivers may override this
+        to replace large value sets with e.g. a temporary table.
+
+        @type sql: string
+        @param sql: The translated statement
+
+        @type binds: dict
+        @param binds: The translated statement parameters
+
+        @rtype: tuple
+        @return: The statement and parameters to execute
+        """
+        return sql, binds
+
     def ping(self):
         """
         Check that communication with the database works.
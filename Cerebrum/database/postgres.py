@@ -19,7 +19,11 @@
 """
 PostgreSQL / PsycoPG2 DB functionality for the people
 """
+import collections
+import itertools
+import logging
 import os
+import re
 import sys
 import uuid
 
@@ -32,9 +36,10 @@ from Cerebrum.database import (
     Database,
     ENABLE_MXDB,
     OraPgLock,
+    ServerSideCursor,
     kickstart,
 )
-from Cerebrum.Utils import read_password
+from Cerebrum.Utils import ValueSet, read_password
 from Cerebrum.utils.funcwrap import deprecate
 from Cerebrum.utils.transliterate import to_ascii
 
@@ -42,6 +47,8 @@ from . import macros
 
 import cereconf
 
+logger = logging.getLogger(__name__)
+
 
 #
 # Postgres data type conversion
@@ -174,9 +181,151 @@ def _format_pg_app_name(progname=None):
     return fmt % progname
 
 
+# Placeholders in translated (pyformat) statements
+_pyformat_re = re.compile(r'%%|%\((\w+)\)s')
+
+# Statements that can be prepared
+_preparable_re = re.compile(r'^\s*(SELECT|INSERT|UPDATE|DELETE|WITH|VALUES)\b',
+                            re.IGNORECASE)
+
+
+def _to_positional(sql):
+    """
+    Convert a pyformat statement to use positional ($n) parameters.
+
+    :return tuple:
+        Returns the converted statement, and a list of parameter names in
+        positional order.
+    """
+    names = []
+
+    def repl(match):
+        name = match.group(1)
+        if name is None:
+            return '%'
+        if name not in names:
+            names.append(name)
+        return '$%d' % (names.index(name) + 1)
+
+    return _pyformat_re.sub(repl, sql), names
+
+
+class PreparedStatementCache(object):
+    """
+    Per-connection cache of server-side prepared statements.
+
+    Statements are identified by their translated SQL.  A statement is
+    prepared (PREPARE) the `threshold`-th time it is executed, and all later
+    executions of the statement will reuse the prepared plan (EXECUTE).  When
+    more than `size` statements are cached, the least recently used statement
+    is deallocated.
+
+    Statements that can't be prepared (e.g. if postgres can't determine the
+    parameter types, or the parameters are tuples for use with IN) are
+    remembered and executed as-is.
+
+    The `stats` attribute counts:
+
+    hits
+        executions that reused a prepared plan
+    misses
+        executions of statements that weren't prepared
+    prepared
+        statements prepared
+    failed
+        statements that couldn't be prepared
+    evicted
+        prepared statements that were deallocated
+    """
+
+    def __init__(self, size=100, threshold=5):
+        self.size = size
+        self.threshold = threshold
+        # sql -> (name, EXECUTE statement), or None if the statement can't be
+        # prepared
+        self._statements = collections.OrderedDict()
+        self._counts = collections.defaultdict(int)
+        self._names = itertools.count(1)
+        self.stats = collections.Counter()
+
+    def __len__(self):
+        return len(self._statements)
+
+    def clear(self):
+        """ Forget all statements (e.g. after the connection is closed). """
+        self._statements.clear()
+        self._counts.clear()
+
+    def execute(self, cursor, sql, binds):
+        """ Execute a statement, using a prepared plan if possible.
+
+        :param cursor: a psycopg2 cursor
+        :param sql: translated statement
+        :param binds: statement parameters
+        """
+        try:
+            prepared = self._statements.pop(sql)
+        except KeyError:
+            prepared = self._prepare(cursor, sql)
+        else:
+            self._statements[sql] = prepared
+
+        if prepared is None:
+            self.stats['misses'] += 1
+            return cursor.execute(sql, binds)
+        self.stats['hits'] += 1
+        return cursor.execute(prepared[1], binds)
+
+    def _prepare(self, cursor, sql):
+        """ Count an execution of `sql`, and prepare it if it is hot. """
+        self._counts[sql] += 1
+        if self._counts[sql] < self.threshold:
+            if len(self._counts) > self.size * 10:
+                # Don't let a long tail of one-off statements grow the counts
+                self._counts.clear()
+            return None
+        del self._counts[sql]
+
+        prepared = None
+        if _preparable_re.match(sql):
+            name = 'cerebrum_stmt_{:d}'.format(next(self._names))
+            positional, params = _to_positional(sql)
+            savepoint = get_pg_savepoint_id()
+            cursor.execute('SAVEPOINT ' + savepoint)
+            try:
+                cursor.execute('PREPARE {} AS {}'.format(name, positional))
+            except psycopg2.Error as e:
+                cursor.execute('ROLLBACK TO SAVEPOINT ' + savepoint)
+                self.stats['failed'] += 1
+                logger.debug('unable to prepare statement: %s', e)
+            else:
+                cursor.execute('RELEASE SAVEPOINT ' + savepoint)
+                self.stats['prepared'] += 1
+                statement = 'EXECUTE ' + name
+                if params:
+                    statement += ' ({})'.format(
+                        ', '.join('%({})s'.format(p) for p in params))
+                prepared = (name, statement)
+
+        self._statements[sql] = prepared
+        while len(self._statements) > self.size:
+            _, evicted = self._statements.popitem(last=False)
+            if evicted is not None:
+                cursor.execute('DEALLOCATE ' + evicted[0])
+                self.stats['evicted'] += 1
+        return prepared
+
+
 class PsycoPG2Cursor(Cursor):
     """
     """
+
+    def _driver_execute(self, sql, binds):
+        statements = self._db.prepared_statements
+        if statements is None:
+            return super(PsycoPG2Cursor, self)._driver_execute(sql, binds)
+        return statements.execute(self._cursor, sql, binds)
+
     def ping(self):
         """Check if the database is still reachable.
 
@@ -245,11 +394,43 @@ class PostgreSQLBase(Database):
         raise NotImplementedError(
             "Can't instantiate abstract class <PostgreSQLBase>.")
 
+    def nextvals(self, seq_name, count):
+        """ Return a list of new values from a sequence, in one query. """
+        count = int(count)
+        if count < 1:
+            return []
+        return sorted(
+            int(row['value'])
+            for row in self.query(
+                """
+                  SELECT [:sequence schema=cerebrum name={} op=next] AS value
+                  FROM generate_series(1, :count)
+                """.format(seq_name),
+                {'count': count}))
+
 
 @kickstart(psycopg2)
 class PsycoPG2(PostgreSQLBase):
     """PostgreSQL driver class using psycopg."""
 
+    prepare_threshold = cereconf.CEREBRUM_DATABASE_CONNECT_DATA.get(
+        'prepare_threshold')
+    # Prepare statements server-side after this many executions (see
+    # PreparedStatementCache).  If None, statements are never prepared.
+
+    prepared_cache_size = 100
+    # Max number of prepared statements per connection.
+
+    prepared_statements = None
+
+    value_set_table_threshold = cereconf.CEREBRUM_DATABASE_CONNECT_DATA.get(
+        'value_set_table_threshold', 10000)
+    # Value sets with at least this many values are staged in a temporary
+    # table (see expand_value_sets).  If None, value sets are always bound as
+    # arrays.
+
+    _value_set_tables = itertools.count(1)
+
     def connect(self,
                 user=None,
                 password=None,
@@ -300,9 +481,69 @@ class PsycoPG2(PostgreSQLBase):
         self.execute("SET CLIENT_ENCODING TO '%s'" % client_encoding)
         self.commit()
 
+        if self.prepare_threshold is not None:
+            self.prepared_statements = PreparedStatementCache(
+                size=self.prepared_cache_size,
+                threshold=int(self.prepare_threshold))
+
+    def close(self):
+        if self.prepared_statements is not None:
+            # Prepared statements are discarded with the session
+            self.prepared_statements.clear()
+        super(PsycoPG2, self).close()
+
     def cursor(self):
         return PsycoPG2Cursor(self)
 
+    def expand_value_sets(self, sql, binds):
+        """
+        Stage large value sets in temporary tables.
+
+        A ``column = ANY(<array>)`` expression is fine for a moderate number
+        of values, but the planner knows nothing about the array contents,
+        and older postgres versions does a linear search in the array for
+        each row.  Value sets with `value_set_table_threshold` or more values
+        are stored in an analyzed temporary table (dropped on commit), and
+        the expression is rewritten to ``column IN (SELECT value FROM
+        <table>)``, which allows the planner to use a proper (hash) join.
+        """
+        threshold = self.value_set_table_threshold
+        if threshold is None:
+            return sql, binds
+        for name, value in list(binds.items()):
+            if not isinstance(value, ValueSet) or len(value) < threshold:
+                continue
+            placeholder = '= ANY(%({})s)'.format(name)
+            if placeholder not in sql:
+                continue
+            table = self._stage_value_set(value)
+            sql = sql.replace(placeholder,
+                              'IN (SELECT value FROM {})'.format(table))
+            if '%({})s'.format(name) not in sql:
+                binds = dict(binds)
+                del binds[name]
+        return sql, binds
+
+    def _stage_value_set(self, values):
+        """ Copy values to a new temporary table. """
+        table = 'cerebrum_value_set_{:d}'.format(next(self._value_set_tables))
+        cursor = self.driver_connection().cursor()
+        try:
+            cursor.execute(
+                """
+                  CREATE TEMPORARY TABLE {} ON COMMIT DROP AS
+                  SELECT DISTINCT unnest(%(values)s) AS value
+                """.format(table),
+                {'values': list(values)})
+            cursor.execute('ANALYZE ' + table)
+        finally:
+            cursor.close()
+        logger.debug('staged %d values in %s', len(values), table)
+        return table
+
+    def stream_cursor(self):
+        return ServerSideCursor(self, itersize=self.stream_itersize)
+
     def ping(self):
         """psycopg2-specific version of ping.
 
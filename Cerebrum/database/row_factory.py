@@ -51,8 +51,22 @@ The behaviour of this module changes with the environment variable
   legacy py:mod:`Cerebrum.extlib.db_row` objects.
 - If set to ``CEREBRUM_RECORDS=1``, this module will use
   the new py:mod:`Cerebrum.extlib.records` objects.
+
+Compact rows
+------------
+Queries that return a lot of rows can use compact rows (see
+py:func:`.make_compact_row_class`) instead.  Compact rows are read-only
+tuples, with ``row['col']``, ``row.col`` and ``dict(row)`` support.  Compact
+rows can be selected:
+
+- per query, with ``Database.query(..., compact_rows=True)``
+- globally, with the environment variable ``CEREBRUM_COMPACT_ROWS=1``
 """
+import operator
 import os
+
+import six
+
 from Cerebrum.extlib import records
 
 
@@ -77,6 +91,115 @@ else:
     ROW_TYPES = (db_row.abstract_row,)
 
 
+# Compact row feature toggle.
+# If CEREBRUM_COMPACT_ROWS is set, queries return compact rows by default.
+ENABLE_COMPACT_ROWS = bool(int(os.environ.get('CEREBRUM_COMPACT_ROWS') or 0))
+
+
+class CompactRow(tuple):
+    """
+    Abstract base class for compact rows.
+
+    A compact row is a tuple of column values.  Subclasses are created by
+    py:func:`.make_compact_row_class`, and adds field names.
+    """
+
+    __slots__ = ()
+
+    # field name -> index (subclasses also map valid int indexes to themselves)
+    _field_index = {}
+    _fields = ()
+
+    def __getitem__(self, key):
+        try:
+            return tuple.__getitem__(self, self._field_index[key])
+        except (KeyError, TypeError):
+            if isinstance(key, six.string_types):
+                raise KeyError(key)
+        # negative indexes and slices
+        return tuple.__getitem__(self, key)
+
+    def __repr__(self):
+        return '<{} {}>'.format(
+            type(self).__name__,
+            ', '.join('{}={!r}'.format(k, v)
+                      for k, v in zip(self._fields, self)))
+
+    def keys(self):
+        """ list of column names. """
+        return list(self._fields)
+
+    def items(self):
+        """ list of (column name, value) pairs. """
+        return list(zip(self._fields, self))
+
+    def get(self, key, default=None):
+        if not isinstance(key, six.string_types):
+            return default
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def has_key(self, key):
+        return key in self._fields
+
+    def dict(self):
+        return dict(zip(self._fields, self))
+
+    def copy(self):
+        return self
+
+
+# Attributes that can't be used to access column values
+_reserved_names = frozenset(dir(CompactRow))
+
+# Cache of compact row classes, keyed by field names
+_compact_row_classes = {}
+_compact_row_cache_size = 256
+
+
+def make_compact_row_class(fields):
+    """
+    Get a compact row class for a given set of column names.
+
+    Column values are available as attributes, unless the column name clashes
+    with a tuple or CompactRow attribute (e.g. ``count``, ``keys``).  Row
+    classes are cached, as most queries are run more than once.
+
+    :type fields: sequence
+    :param fields: column names
+
+    :rtype: type
+    :returns: a CompactRow subclass
+    """
+    fields = tuple(fields or ())
+    try:
+        return _compact_row_classes[fields]
+    except KeyError:
+        pass
+
+    field_index = dict((i, i) for i in range(len(fields)))
+    cls_dict = {
+        '__slots__': (),
+        '_fields': fields,
+        '_field_index': field_index,
+    }
+    for i, name in enumerate(fields):
+        field_index.setdefault(name, i)
+        if name not in _reserved_names and name not in cls_dict:
+            cls_dict[name] = property(operator.itemgetter(i))
+    row_class = type(str('compact_row'), (CompactRow,), cls_dict)
+
+    if len(_compact_row_classes) >= _compact_row_cache_size:
+        _compact_row_classes.clear()
+    _compact_row_classes[fields] = row_class
+    return row_class
+
+
+ROW_TYPES = ROW_TYPES + (CompactRow,)
+
+
 class _DbRowIterator(object):
     """
     Legacy row iterator for db_row.
@@ -116,7 +239,7 @@ def _resultiter(cursor, size=None):
             yield result
 
 
-def iter_rows(cursor, fields):
+def iter_rows(cursor, fields, compact=None):
     """ Iterate over cursor results.
 
     Return value for ``Database.query(..., fetchall=False)``.  This function
@@ -125,6 +248,8 @@ def iter_rows(cursor, fields):
 
     :type cursor: Cerebrum.database.Cursor
     :type fields: tuple
+    :param compact:
+        Use compact rows.  Default: ``ENABLE_COMPACT_ROWS``
 
     :returns:
         Returns an iterator over cursor results.
@@ -133,8 +258,12 @@ def iter_rows(cursor, fields):
 
         - py:class:`._DbRowIterator`
         - py:class:`Cerebrum.extlib.records.RecordCollection`
+        - generator of py:class:`.CompactRow`
     """
-    if ENABLE_RECORDS:
+    if ENABLE_COMPACT_ROWS if compact is None else compact:
+        row_class = make_compact_row_class(fields)
+        return (row_class(row) for row in _resultiter(cursor))
+    elif ENABLE_RECORDS:
         data = _resultiter(cursor)
         row_gen = (records.Record(fields, row) for row in data)
         return records.RecordCollection(row_gen)
@@ -143,7 +272,7 @@ def iter_rows(cursor, fields):
         return _DbRowIterator(cursor, row_class)
 
 
-def list_rows(cursor, fields):
+def list_rows(cursor, fields, compact=None):
     """ Return all cursor results.
 
     Return value for ``Database.query(..., fetchall=True)``.  This function
@@ -152,6 +281,8 @@ def list_rows(cursor, fields):
 
     :type cursor: Cerebrum.database.Cursor
     :type fields: tuple
+    :param compact:
+        Use compact rows.  Default: ``ENABLE_COMPACT_ROWS``
 
     :rtype: list
     :returns:
@@ -161,9 +292,13 @@ def list_rows(cursor, fields):
 
         - py:class:`Cerebrum.extlib.db_row.row`
         - py:class:`Cerebrum.extlib.records.Record`
+        - py:class:`.CompactRow`
     """
     data = cursor.fetchall()
-    if ENABLE_RECORDS:
+    if ENABLE_COMPACT_ROWS if compact is None else compact:
+        row_class = make_compact_row_class(fields)
+        return [row_class(r) for r in data]
+    elif ENABLE_RECORDS:
         row_gen = (records.Record(fields, row) for row in data)
         return records.RecordCollection(row_gen).all()
     else:
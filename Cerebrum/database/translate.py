@@ -29,6 +29,7 @@ import logging
 import six
 
 from Cerebrum import Cache
+from Cerebrum.Utils import ValueSet
 from .lexer_sqlparse import _translate
 
 logger = logging.getLogger(__name__)
@@ -111,6 +112,10 @@ class Translator(object):
         for k in params:
             if isinstance(params[k], _CerebrumCode):
                 params[k] = int(params[k])
+            elif isinstance(params[k], ValueSet):
+                params[k] = ValueSet(
+                    int(v) if isinstance(v, _CerebrumCode) else v
+                    for v in params[k])
 
         if not isinstance(statement, six.text_type):
             statement = statement.decode('ascii')
@@ -66,6 +66,11 @@ AUTH_CRYPT_METHODS = ("MD5-crypt",)
 # passwords.
 PASSWORD_DICTIONARIES = ()
 
+# Full path filename to a compiled index of the PASSWORD_DICTIONARIES, or None.
+# If set, the dictionary check uses this index instead of the dictionary files.
+# The index is built by contrib/compile_password_dictionaries.py.
+PASSWORD_DICTIONARY_INDEX = None
+
 # List full path filenames to files containing words used to
 # produce passphrases
 PASSPHRASE_DICTIONARIES = ()
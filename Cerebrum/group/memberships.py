@@ -61,6 +61,10 @@ class GroupMemberships(DatabaseAccessor):
         :param max_recursion_depth: int
         :type max_recursion_depth: Maximum depth of iterations
 
+        If the Group class uses Cerebrum.modules.group_closure, memberships
+        are looked up in the closure table, and only the shortest depth of
+        each membership is included.
+
         :return: Group membership info for member_id.
         :rtype: iterable (yielding db-rows with group membership information)
         """
@@ -101,25 +105,45 @@ class GroupMemberships(DatabaseAccessor):
             where.append(
                 argument_to_sql(group_type, "gi.group_type", binds, int))
 
+        if getattr(Factory.get('Group'), 'has_membership_closure', False):
+            # Cerebrum.modules.group_closure is in use, look up all
+            # memberships in the closure table.
+            member_search = """
+            member_search(group_id, member_id, depth) AS (
+              SELECT
+                gm.group_id,
+                gm.member_id,
+                gm.min_depth as depth
+              FROM [:table schema=cerebrum name=group_member_closure] gm
+              WHERE
+                {member_where} AND
+                gm.min_depth <= :max_level
+            )
+            """
+        else:
+            member_search = """
+            RECURSIVE member_search(group_id, member_id, depth) AS (
+              SELECT
+                gm.group_id,
+                gm.member_id,
+                0 as depth
+              FROM [:table schema=cerebrum name=group_member] gm
+              WHERE
+                {member_where}
+              UNION ALL
+              SELECT
+                gm.group_id,
+                member_search.member_id,
+                depth + 1
+              FROM [:table schema=cerebrum name=group_member] gm
+              JOIN member_search
+              ON gm.member_id = member_search.group_id
+              WHERE depth < :max_level
+            )
+            """
+
         query_str = """
-        WITH RECURSIVE member_search(group_id, member_id, depth) AS (
-          SELECT
-            gm.group_id,
-            gm.member_id,
-            0 as depth
-          FROM [:table schema=cerebrum name=group_member] gm
-          WHERE
-            {member_where}
-          UNION ALL
-          SELECT
-            gm.group_id,
-            member_search.member_id,
-            depth + 1
-          FROM [:table schema=cerebrum name=group_member] gm
-          JOIN member_search
-          ON gm.member_id = member_search.group_id
-          WHERE depth < :max_level
-        )
+        WITH {member_search}
         SELECT DISTINCT
           {select}
         FROM member_search ms
@@ -134,7 +158,7 @@ class GroupMemberships(DatabaseAccessor):
         {extra_joins}
         WHERE {where}
         """.format(
-            member_where=member_where,
+            member_search=member_search.format(member_where=member_where),
             extra_joins='\n'.join(extra_joins) if extra_joins else '',
             select=', '.join(select),
             where=' AND '.join(where) if where else ''
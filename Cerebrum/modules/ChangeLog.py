@@ -151,15 +151,23 @@ class ChangeLog(Cerebrum.ChangeLog.ChangeLog):
         """
         super(ChangeLog, self).write_log()
 
-        for m in self.messages:
-            m['id'] = int(self.nextval('change_log_seq'))
-            self.execute("""
-            INSERT INTO [:table schema=cerebrum name=change_log]
-               (change_id, subject_entity, change_type_id, dest_entity,
-                change_params, change_by, change_program)
-            VALUES (:id, :subject_entity, :change_type_id,
-                    :destination_entity, :change_params, :change_by,
-                    :change_program)""", m)
+        # Allocate all change ids in one go, and insert the change entries in
+        # chunks, rather than doing two round-trips for each change.
+        change_ids = self.nextvals('change_log_seq', len(self.messages))
+        for m, change_id in zip(self.messages, change_ids):
+            m['id'] = change_id
+        self.insert_many(
+            '[:table schema=cerebrum name=change_log]',
+            ('change_id', 'subject_entity', 'change_type_id', 'dest_entity',
+             'change_params', 'change_by', 'change_program'),
+            (dict(change_id=m['id'],
+                  subject_entity=m['subject_entity'],
+                  change_type_id=m['change_type_id'],
+                  dest_entity=m['destination_entity'],
+                  change_params=m['change_params'],
+                  change_by=m['change_by'],
+                  change_program=m['change_program'])
+             for m in self.messages))
         self.messages = []
 
     def get_log_events(self, start_id=0, max_id=None, types=None,
@@ -2902,6 +2902,17 @@ class PersonEmailMixin(Person.Person):
             acc.find(row['account_id'])
             acc.update_email_addresses()
 
+    def recalculate_cached_names(self, *args, **kwargs):
+        changed = self.__super.recalculate_cached_names(*args, **kwargs)
+        if changed:
+            acc = Utils.Factory.get('Account')(self._db)
+            for row in acc.search(owner_id=changed,
+                                  owner_type=self.const.entity_person):
+                acc.clear()
+                acc.find(row['account_id'])
+                acc.update_email_addresses()
+        return changed
+
     def getdict_external_id2mailaddr(self, id_type):
         """Return dict mapping person_external_id to email for
         person_external_id type 'id_type'"""
@@ -24,9 +24,13 @@ This module implements the DBAL for mod_eventlog.
 """
 
 import Cerebrum.ChangeLog
+from Cerebrum.Utils import argument_to_sql
 from Cerebrum.modules.ChangeLog import _params_to_db
+from Cerebrum.modules.event.retry import (MAX_RETRY_DELAY,
+                                          RETRY_DELAY,
+                                          sql_retry_time)
 
-__version__ = '1.1'
+__version__ = '1.2'
 
 
 class EventLog(Cerebrum.ChangeLog.ChangeLog):
@@ -87,29 +91,44 @@ class EventLog(Cerebrum.ChangeLog.ChangeLog):
     def write_log(self):
         """ Commit new events to the event log. """
         super(EventLog, self).write_log()
-        # For each event to log..
+        if not self.events:
+            return
+
+        # Find out which systems should get each type of event..
+        binds = {}
+        where = argument_to_sql(
+            set(int(e['change_type_id']) for e in self.events),
+            'event_type', binds, int)
+        targets = dict()
+        for row in self.query(
+                """
+                  SELECT event_type, target_system
+                  FROM [:table schema=cerebrum name=event_to_target]
+                  WHERE {}
+                """.format(where), binds):
+            targets.setdefault(int(row['event_type']), []).append(
+                int(row['target_system']))
+
+        # ..create one event for each of them systems..
+        rows = []
         for e in self.events:
-            # ..find out which systems should get the event..
-            targets = self.query("""
-                SELECT target_system
-                FROM event_to_target
-                WHERE event_type = :change_type_id""", e)
-
-            # ..for each of them systems..
-            for t in targets:
-                # Store the target system
-                e.update({'target_sys': t['target_system']})
-                # ..fetch a new id for the event..
-                eid = int(self.nextval('event_log_seq'))
-                # ..store it for "simplicity"..
-                e.update({'eid': eid})
-                # ..and insert the event into the database..
-                self.execute("""
-                INSERT INTO [:table schema=cerebrum name=event_log]
-                   (event_id, event_type, target_system, subject_entity,
-                   dest_entity, change_params)
-                   VALUES (:eid, :change_type_id, :target_sys, :subject_entity,
-                   :destination_entity, :change_params)""", e)
+            for target_sys in targets.get(int(e['change_type_id']), ()):
+                rows.append({
+                    'event_type': int(e['change_type_id']),
+                    'target_system': target_sys,
+                    'subject_entity': e['subject_entity'],
+                    'dest_entity': e['destination_entity'],
+                    'change_params': e['change_params'],
+                })
+
+        # ..and insert the events into the database.
+        for row, eid in zip(rows, self.nextvals('event_log_seq', len(rows))):
+            row['event_id'] = eid
+        self.insert_many(
+            '[:table schema=cerebrum name=event_log]',
+            ('event_id', 'event_type', 'target_system', 'subject_entity',
+             'dest_entity', 'change_params'),
+            rows)
         self.events = []
 
     def remove_event(self, event_id, target_system=None):
@@ -189,14 +208,15 @@ class EventLog(Cerebrum.ChangeLog.ChangeLog):
         :param bool fetchall:
             If True, fetch all results. Else, return iterator.
 
+        Events that are waiting for a retry (see `release_event`) are never
+        included.  Consumers that take events for processing should use
+        `claim_events`, which is limited and skips locked rows.
+
         :return list: A list of unprocessed event_log rows
         """
-        where = 'target_system = :target_system'
+        where = ('target_system = :target_system'
+                 ' AND next_attempt_at <= [:now]')
         args = {'target_system': int(target_system)}
-        # TODO: Calculate failed_delay on the basis of the number of times
-        # previously tried, and a var. Then we can increase the time between
-        # each retry. That seems sensible.
-        # This would probably neccitate a function. Or do it higher up?
         if fail_limit:
             where += ' AND failed < :failed_limit'
             args['failed_limit'] = fail_limit
@@ -219,7 +239,9 @@ class EventLog(Cerebrum.ChangeLog.ChangeLog):
             SELECT * FROM event_log
             WHERE {}""".format(where), args, fetchall=fetchall)
 
-    def release_event(self, event_id, target_system=None, increment=True):
+    def release_event(self, event_id, target_system=None, increment=True,
+                      retry_delay=RETRY_DELAY,
+                      max_retry_delay=MAX_RETRY_DELAY):
         """Release a locked/taken event. Releases typically happens
         when an event fails processing.
 
@@ -229,26 +251,134 @@ class EventLog(Cerebrum.ChangeLog.ChangeLog):
             The target system to perform unlock on
 
         :param bool increment: Whether or not to increment the 'failed' field
-            in the database upon release.
+            in the database upon release.  If incremented, the next attempt is
+            postponed by `retry_delay` seconds, doubled for each previous
+            failure, up to `max_retry_delay` seconds.
 
         :rtype: int
         :return: The event id
         """
         params = {'event_id': int(event_id)}
+        if target_system:
+            params['target_system'] = int(target_system)
+        where = ' AND '.join(['{} = :{}'.format(k, k) for k in params])
         # We check if we should increment the failed column
         if increment:
-            inc = ', failed = failed + 1'
+            inc = ', failed = failed + 1, next_attempt_at = {}'.format(
+                sql_retry_time())
+            params.update({'retry_delay': int(retry_delay),
+                           'max_retry_delay': int(max_retry_delay)})
         else:
-            inc = ''
-        if target_system:
-            params['target_system'] = int(target_system)
+            inc = ', next_attempt_at = [:now]'
         self.query_1(
             """UPDATE event_log SET taken_time = NULL
-            {} WHERE {} RETURNING event_id""".format(
-                inc,
-                ' AND '.join(['{} = :{}'.format(k, k) for k in params])),
+            {} WHERE {} RETURNING event_id""".format(inc, where),
             params)
 
+    def claim_events(self, target_system, limit, fail_limit=None,
+                     failed_delay=RETRY_DELAY):
+        """Take the next `limit` due events for processing.
+
+        Events are selected and marked as taken in one statement.  Rows that
+        are locked by another transaction are skipped, so that multiple
+        consumers can claim events for a target system concurrently.
+
+        A claimed event is not due again until `failed_delay` seconds has
+        passed.  Unless the event is removed (or failed, see `fail_events`)
+        before that, it will be claimed again.
+
+        An event is not claimed if an older event for the same subject is
+        waiting for a retry.
+
+        :param int target_system: The target system to claim events from
+
+        :param int limit: The maximum number of events to claim
+
+        :param int fail_limit: Claim only events that have failed a number of
+            times lower than fail_limit.
+
+        :param int failed_delay: How long (in seconds) a claim is held.
+
+        :return list: The claimed event_log rows, sorted by event_id
+        """
+        binds = {'target_system': int(target_system), 'limit': int(limit)}
+        criteria = ['e.target_system = :target_system',
+                    'e.next_attempt_at <= [:now]']
+        waiting = ['p.target_system = e.target_system',
+                   'p.subject_entity = e.subject_entity',
+                   'p.event_id < e.event_id',
+                   'p.next_attempt_at > [:now]']
+        if fail_limit:
+            criteria.append('e.failed < :fail_limit')
+            waiting.append('p.failed < :fail_limit')
+            binds['fail_limit'] = int(fail_limit)
+        criteria.append(
+            'NOT EXISTS (SELECT 1 FROM [:table schema=cerebrum name=event_log]'
+            ' p WHERE {})'.format(' AND '.join(waiting)))
+
+        rows = self.query(
+            """UPDATE [:table schema=cerebrum name=event_log]
+            SET taken_time = [:now],
+                next_attempt_at = [:now] + interval '{delay:d}s'
+            WHERE event_id IN (
+              SELECT e.event_id
+              FROM [:table schema=cerebrum name=event_log] e
+              WHERE {where}
+              ORDER BY e.event_id
+              LIMIT :limit
+              FOR UPDATE SKIP LOCKED)
+            RETURNING *""".format(delay=int(failed_delay),
+                                  where=' AND '.join(criteria)),
+            binds)
+        return sorted(rows, key=lambda row: int(row['event_id']))
+
+    def fail_events(self, event_ids, fail_limit=None, retry_delay=RETRY_DELAY,
+                    max_retry_delay=MAX_RETRY_DELAY):
+        """Register a failed attempt for multiple taken events.
+
+        The events are released, and their next attempt is postponed by
+        `retry_delay` seconds, doubled for each previous failure.
+
+        :param event_ids: The events that failed
+
+        :param int fail_limit: Give up events that fail this many times
+
+        :param int retry_delay: Seconds to wait after the first failure
+
+        :param int max_retry_delay: Maximum number of seconds to wait
+        """
+        if not event_ids:
+            return
+        binds = {'retry_delay': int(retry_delay),
+                 'max_retry_delay': int(max_retry_delay)}
+        if fail_limit:
+            binds['fail_limit'] = int(fail_limit)
+        self.execute(
+            """UPDATE [:table schema=cerebrum name=event_log]
+            SET taken_time = NULL, failed = failed + 1, next_attempt_at = {}
+            WHERE {}""".format(
+                sql_retry_time(fail_limit),
+                argument_to_sql(event_ids, 'event_id', binds, int)),
+            binds)
+
+    def remove_events(self, event_ids):
+        """Remove multiple events from the eventlog.
+
+        :param event_ids: The (completed) events to remove
+
+        :rtype: int
+        :return: Number of removed events
+        """
+        if not event_ids:
+            return 0
+        binds = {}
+        self.execute(
+            """DELETE FROM [:table schema=cerebrum name=event_log]
+            WHERE {}""".format(
+                argument_to_sql(event_ids, 'event_id', binds, int)),
+            binds)
+        return self.rowcount
+
     ###
     # Utility functions
     ###
@@ -319,7 +449,7 @@ class EventLog(Cerebrum.ChangeLog.ChangeLog):
         :return: Affected event id
         """
         self.query_1(
-            """UPDATE event_log SET failed = 0
+            """UPDATE event_log SET failed = 0, next_attempt_at = [:now]
             WHERE event_id = :id RETURNING event_id""",
             {'id': int(event_id)})
 
@@ -333,8 +463,8 @@ class EventLog(Cerebrum.ChangeLog.ChangeLog):
         :return: Number of affected events
         """
         self.execute(
-            """UPDATE event_log SET failed = 0 WHERE target_system = :ts
-            AND failed > 0""",
+            """UPDATE event_log SET failed = 0, next_attempt_at = [:now]
+            WHERE target_system = :ts AND failed > 0""",
             {'ts': int(target_system)})
         return self.rowcount
 
@@ -35,7 +35,8 @@ from Cerebrum.Constants import _AuthoritativeSystemCode, _LanguageCode
 from Cerebrum.export.auth import AuthExporter
 from Cerebrum.Utils import Factory, make_timer
 from Cerebrum.QuarantineHandler import QuarantineHandler
-from Cerebrum.modules.LDIFutils import (attr_unique,
+from Cerebrum.modules.LDIFutils import (EntrySerializer,
+                                        attr_unique,
                                         entry_string,
                                         get_ldap_config,
                                         map_spreads,
@@ -878,6 +879,7 @@ class OrgLDIF(object):
         round_timer = make_timer(logger)
         rounds = 0
         exported = 0
+        serialize = EntrySerializer()
         for person_id, row in self.person_cache.iteritems():
             if rounds % 10000 == 0 and rounds != 0:
                 round_timer("...processed %d rows..." % rounds)
@@ -889,7 +891,7 @@ class OrgLDIF(object):
                                 person_id, repr(dn))
                 else:
                     self.used_DNs[dn] = True
-                    outfile.write(entry_string(dn, entry, False))
+                    outfile.write(serialize(dn, entry, False))
                     if self.aliases and alias_info:
                         self.write_person_alias(alias_outfile,
                                                 dn, entry, alias_info)
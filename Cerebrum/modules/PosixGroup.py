@@ -31,7 +31,7 @@ posix groups.
 """
 import cereconf
 
-from Cerebrum.Utils import Factory
+from Cerebrum.Utils import Factory, argument_to_sql
 from Cerebrum import Errors
 from .posix.mixins import PosixGroupMixin
 
@@ -144,6 +144,28 @@ class PosixGroup(Group_class):
         self.posix_gid = self._get_posix_gid()
         self.__in_db = True
 
+    def _find_many_rows(self, entity_ids):
+        found = super(PosixGroup, self)._find_many_rows(entity_ids)
+        if not found:
+            return found
+        binds = {}
+        result = {}
+        for row in self.query(
+                """
+                  SELECT group_id, posix_gid
+                  FROM [:table schema=cerebrum name=posix_group]
+                  WHERE
+                """ + argument_to_sql(list(found), 'group_id', binds, int),
+                binds):
+            rows = result[row['group_id']] = found[row['group_id']]
+            rows['posix_group'] = row
+        return result
+
+    def _load_found(self, rows):
+        super(PosixGroup, self)._load_found(rows)
+        self.posix_gid = rows['posix_group']['posix_gid']
+        self.__in_db = True
+
     def list_posix_groups(self):
         """Return group_id and posix_gid of all PosixGroups in database"""
         return self.query(
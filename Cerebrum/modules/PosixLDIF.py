@@ -31,6 +31,7 @@ from Cerebrum.modules import LDIFutils
 from Cerebrum.QuarantineHandler import QuarantineHandler
 from Cerebrum.Utils import Factory, auto_super, make_timer
 from Cerebrum.utils import transliterate
+from Cerebrum.utils.sorting import external_sort
 from Cerebrum import Errors
 from Cerebrum.modules.posix.UserExporter import HomedirResolver
 from Cerebrum.modules.posix.UserExporter import OwnerResolver
@@ -48,6 +49,9 @@ class PosixLDIF(object):
     """
     __metaclass__ = auto_super
 
+    # Max number of user entries to keep in memory while sorting by DN.
+    sort_chunk_size = 20000
+
     def __init__(self, db, logger, u_sprd=None, g_sprd=None, n_sprd=None,
                  fd=None):
         """ Initiate database and import modules.
@@ -119,6 +123,8 @@ class PosixLDIF(object):
         # Write the USER container object
         f.write(LDIFutils.container_entry_string('USER'))
 
+        serialize = LDIFutils.EntrySerializer()
+
         def generate_users():
             for row in self.posuser.list_posix_users(
                     spread=self.spread_d['user'],
@@ -128,15 +134,18 @@ class PosixLDIF(object):
                 if not dn:
                     logger.debug('no dn for account_id=%r', account_id)
                     continue
-                yield dn, entry
-
-        for dn, entry in sorted(generate_users(),
-                                key=operator.itemgetter(0)):
-            try:
-                f.write(LDIFutils.entry_string(dn, entry, False))
-            except Exception:
-                logger.error('Got error on dn=%r', dn)
-                raise
+                try:
+                    yield dn, serialize(dn, entry, False)
+                except Exception:
+                    logger.error('Got error on dn=%r', dn)
+                    raise
+
+        # Entries are sorted by DN in chunks, so that we don't have to keep
+        # every user entry in memory.
+        for dn, entry_string in external_sort(generate_users(),
+                                              key=operator.itemgetter(0),
+                                              chunk_size=self.sort_chunk_size):
+            f.write(entry_string)
         LDIFutils.end_ldif_outfile('USER', f, self.fd)
 
     @clock_time
@@ -211,18 +220,19 @@ class PosixLDIF(object):
                 spread=spread):
             self.group2users[row['group_id']].add(row['member_id'])
 
+        # Look up the group members of all nested groups in one go.
         children_groups = get_children_not_in_group2groups()
         extra_groups = children_groups.copy()
-        while children_groups:
-            for group_id in children_groups:
-                self.group2groups[group_id] = set()
+        for group_id in children_groups:
+            self.group2groups[group_id] = set()
+        if children_groups:
             for row in self.grp.search_members(
                     member_type=self.const.entity_group,
-                    group_id=children_groups):
+                    group_id=children_groups,
+                    indirect_members=True):
                 member_id = row['member_id']
                 self.group2groups[row['group_id']].add(member_id)
                 extra_groups.add(member_id)
-            children_groups = get_children_not_in_group2groups()
 
         if extra_groups:
             for row in self.grp.search_members(
@@ -336,9 +346,10 @@ class PosixLDIF(object):
         timer2 = make_timer(self.logger, 'Writing group objects...')
         f = LDIFutils.ldif_outfile('FILEGROUP', filename, self.fd)
         f.write(LDIFutils.container_entry_string('FILEGROUP'))
+        serialize = LDIFutils.EntrySerializer()
         for group_id, entry in self.filegroupcache.iteritems():
             dn = ','.join(('cn=' + entry['cn'], self.fgrp_dn))
-            f.write(LDIFutils.entry_string(dn, entry, False))
+            f.write(serialize(dn, entry, False))
         timer2('... done writing group objects')
         self.filegroupcache = None
         LDIFutils.end_ldif_outfile('FILEGROUP', f, self.fd)
@@ -408,9 +419,10 @@ class PosixLDIF(object):
         timer2 = make_timer(self.logger, 'Writing group objects...')
         f = LDIFutils.ldif_outfile('NETGROUP', filename, self.fd)
         f.write(LDIFutils.container_entry_string('NETGROUP'))
+        serialize = LDIFutils.EntrySerializer()
         for group_id, entry in self.netgroupcache.iteritems():
             dn = ','.join(('cn=' + entry['cn'], self.ngrp_dn))
-            f.write(LDIFutils.entry_string(dn, entry, False))
+            f.write(serialize(dn, entry, False))
         LDIFutils.end_ldif_outfile('NETGROUP', f, self.fd)
         timer2('... done writing group objects')
         self.netgroupcache = None
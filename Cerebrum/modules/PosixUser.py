@@ -203,6 +203,31 @@ class PosixUser(Account_class):
         self.__in_db = True
         self.__updated = []
 
+    def _find_many_rows(self, entity_ids):
+        found = self.__super._find_many_rows(entity_ids)
+        if not found:
+            return found
+        binds = {}
+        result = {}
+        for row in self.query("""
+        SELECT account_id, posix_uid, gid, gecos, shell
+        FROM [:table schema=cerebrum name=posix_user]
+        WHERE """ + argument_to_sql(list(found), 'account_id', binds, int),
+                              binds):
+            rows = result[row['account_id']] = found[row['account_id']]
+            rows['posix_user'] = row
+        return result
+
+    def _load_found(self, rows):
+        self.__super._load_found(rows)
+        row = rows['posix_user']
+        self.posix_uid = row['posix_uid']
+        self.gid_id = row['gid']
+        self.gecos = row['gecos']
+        self.shell = row['shell']
+        self.__in_db = True
+        self.__updated = []
+
     def find_by_uid(self, uid):
         """Find posix user by posix_uid"""
         account_id = self.query_1("""
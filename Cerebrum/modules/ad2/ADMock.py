@@ -27,6 +27,7 @@ This mock builds on L{ADclient}, and should be used the same way.
 from __future__ import with_statement
 
 import collections
+import re
 
 from Cerebrum.modules.ad2 import ADUtils
 from Cerebrum.modules.ad2.winrm import CommandTooLongException
@@ -39,6 +40,7 @@ getattr(cereconf, "No linter nag!", None)
 class ADclientMock(ADUtils.ADclient):
     def __init__(self, *args, **kwargs):
         self.logger = kwargs['logger']
+        self.dryrun = kwargs.get('dryrun', False)
         self.db = Factory.get('Database')()
         self.co = Factory.get('Constants')(self.db)
         self._cache = dict()
@@ -56,6 +58,50 @@ class ADclientMock(ADUtils.ADclient):
         with open(fname, 'w') as f:
             json.dump(self._cache, f)
 
+    # A batched script from ADclient.run_batch, and its statements
+    _batch_script = re.compile(
+        r"\$ErrorActionPreference = 'Stop';(?P<statements>.*)$")
+    _batch_statement = re.compile(
+        r" try \{ [^;].*?; Write-Output '(?P<marker>%s \d+)' \} catch "
+        r"\{ Write-Output \$_ \};" % ADUtils.ADclient._batch_ok_marker)
+
+    def execute_command(self, command, **kwargs):
+        """Pretend to run a command line. The command is used as CommandId.
+
+        The command has already been built by the real L{execute}, so it is
+        the command line that would have been sent to the server.
+
+        """
+        self.logger.debug("Mock would have ran %r", command)
+        return 'mock-shell', command
+
+    def wsman_receive(self, shellid, commandid=None, sequence=0):
+        """Pretend to get the output of a command. All commands succeed.
+
+        Statements in a batched script reports back that they succeeded, as
+        long as the statements are properly separated. A malformed script
+        fails as a parser error, like powershell would.
+
+        """
+        match = self._batch_script.search(commandid)
+        if not match:
+            return 'Done', 0, {}
+        statements = match.group('statements')
+        markers = []
+        pos = 0
+        while pos < len(statements):
+            statement = self._batch_statement.match(statements, pos)
+            if not statement:
+                return 'Done', 1, {'stderr': 'ParserError: %r' %
+                                   statements[pos:pos + 80]}
+            markers.append(statement.group('marker'))
+            pos = statement.end()
+        return 'Done', 0, {'stdout': '\n'.join(markers)}
+
+    def wsman_signal(self, shellid, commandid, signalcode='Terminate'):
+        """Pretend to signal the server."""
+        pass
+
     def start_list_objects(self, ou, attributes, object_class, names=[]):
         """Start to search for objects in AD, but do not retrieve the data yet.
 
@@ -122,17 +168,6 @@ class ADclientMock(ADUtils.ADclient):
         for key in self._cache:
             yield self._cache[key]
 
-    def disable_object(self, dn):
-        """Set an object as not enabled.
-
-        Note that this only affects accounts, it doesn't look like you can
-        disable other object types.
-
-        """
-        self.logger.info('Disabling object: %s', (dn,))
-        # TODO: Save state in cache.
-        return True
-
     def delete_object(self, dn):
         """Delete an object from AD.
 
@@ -501,43 +536,6 @@ class ADclientMock(ADUtils.ADclient):
         # TODO: Update cache
         return True
 
-    def enable_object(self, ad_id):
-        """Enable a given object in AD. The object must exist.
-
-        This only works for Accounts, as that's the only available command for
-        enabling objects in AD.
-
-        @type ad_id: string
-        @param ad_id: The Id for the object. Normally the DistinguishedName.
-
-        """
-        self.logger.info('Enabling object: %s', ad_id)
-        # TODO: Update state in cache.
-        return True
-
-    def set_password(self, ad_id, password, password_type='plaintext'):
-        """Send a new password for a given object.
-
-        This only works for Accounts.
-
-        :param ad_id: The Id for the object. Could be the SamAccountName,
-            DistinguishedName, SID, UUID and probably some other identifiers.
-
-        :param password: The new passord for the object. Must be in plaintext,
-            as that is how AD requires it to be, for now.
-        :type password: str
-
-        :param password_type: The password type (default: 'plaintext').
-                              Currently supported types:
-                              'password' - GPG encrypted plaintext-password
-                              'password-base64' - GPG encrypted base64-encoded
-                                                  password
-                              'plaintext' - unencrypted plaintext password
-        :type password_type: str
-        """
-        self.logger.info('Setting password for: %s', ad_id)
-        return True
-
     def get_chosen_domaincontroller(self, reset=False):
         """Fetch and cache a preferred Domain Controller (DC).
 
@@ -51,10 +51,15 @@ Some terms:
 
 """
 
+import collections
+import contextlib
+import sys
+import threading
 import time
 import uuid
 
 import adconf
+import six
 
 from Cerebrum import Entity, Errors
 from Cerebrum.modules import CLHandler, Email
@@ -72,6 +77,80 @@ from Cerebrum.modules.gpg.data import GpgData
 from Cerebrum.QuarantineHandler import QuarantineHandler
 
 
+class _ADListing(object):
+    """Fetch a list of objects from AD in a separate thread.
+
+    The objects are passed on in chunks through a bounded queue, so that they
+    can be processed while the listing is still running, and so that only
+    L{max_chunks} chunks are waiting in memory at a time.
+
+    The listing thread holds L{lock} while it reads from the AD client. Others
+    must hold the lock while they use the client, so that commands are never
+    sent to AD in parallel.
+
+    """
+    # How many chunks can wait in the queue before the listing is paused:
+    max_chunks = 4
+
+    def __init__(self, server, commandid, chunk_size):
+        self.server = server
+        self.commandid = commandid
+        self.chunk_size = max(1, chunk_size)
+        self.lock = threading.Lock()
+        self.seconds = None
+        self._queue = six.moves.queue.Queue(maxsize=self.max_chunks)
+        self._exc_info = None
+        self._thread = threading.Thread(target=self._fetch,
+                                        name='ad-listing')
+        self._thread.daemon = True
+
+    def _fetch(self):
+        start = time.time()
+        try:
+            with self.lock:
+                ad_objects = iter(
+                    self.server.get_list_objects(self.commandid))
+            chunk = []
+            while True:
+                with self.lock:
+                    ad_object = next(ad_objects, None)
+                if ad_object is None:
+                    break
+                chunk.append(ad_object)
+                if len(chunk) >= self.chunk_size:
+                    self._queue.put(chunk)
+                    chunk = []
+            if chunk:
+                self._queue.put(chunk)
+        except Exception:
+            self._exc_info = sys.exc_info()
+        finally:
+            self.seconds = time.time() - start
+            self._queue.put(None)
+
+    def start(self):
+        self._thread.start()
+
+    def iter_chunks(self):
+        """Get chunks of AD objects as they are listed.
+
+        Any error from the listing is re-raised when the chunks before it
+        have been consumed.
+
+        :rtype: generator
+        :return: The AD objects, as lists of up to L{chunk_size} objects.
+
+        """
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                break
+            yield chunk
+        self._thread.join()
+        if self._exc_info:
+            six.reraise(*self._exc_info)
+
+
 class BaseSync(object):
 
     """Class for the generic AD synchronisation functionality.
@@ -153,6 +232,12 @@ class BaseSync(object):
                              ('group_scope', 'global'),
                              ('ou_mappings', []),
                              ('script', {}),
+                             ('quicksync_coalesce', False),
+                             ('quicksync_batch_size', 50),
+                             ('quicksync_commit_events', 100),
+                             ('quicksync_commit_seconds', 30),
+                             ('fullsync_streaming', False),
+                             ('fullsync_chunk_size', 1000),
                              )
 
     # A mapping from the entity_type to the correct externalid_type. Note that
@@ -191,6 +276,8 @@ class BaseSync(object):
         # A mapping from AD-id to the entities. AD-id is per default
         # SamAccountName, but could be set otherwise in the config.
         self.adid2entity = dict()
+        # Time spent in each phase of the fullsync, in seconds:
+        self.phase_timings = collections.OrderedDict()
 
     @classmethod
     def get_class(cls, sync_type='', classes=None):
@@ -295,6 +382,24 @@ class BaseSync(object):
           the attributes as keys and the values is further config for the given
           attribute. The configuration is different per attribute.
 
+        - quicksync_coalesce (bool): If the quicksync should coalesce all
+          pending events per entity, and send commands to AD in batches. See
+          L{quicksync}. Defaults to False.
+
+        - quicksync_batch_size (int): Max number of commands in a batched
+          quicksync script. Defaults to 50.
+
+        - quicksync_commit_events, quicksync_commit_seconds (int): How often
+          the coalescing quicksync should commit the handled events. Defaults
+          to every 100 events or 30 seconds, whichever comes first.
+
+        - fullsync_streaming (bool): If the fullsync should fetch the AD
+          listing in parallel with the Cerebrum data, and process it in
+          chunks. See L{streaming_fullsync}. Defaults to False.
+
+        - fullsync_chunk_size (int): How many AD objects the streaming
+          fullsync processes per chunk. Defaults to 1000.
+
         @type config_args: dict
         @param config_args:
             Configuration data that should be set. Overrides any settings that
@@ -592,6 +697,22 @@ class BaseSync(object):
         self._ad_admin_messages = []
         self.logger.debug('Sending AD-admin messages done...')
 
+    @contextlib.contextmanager
+    def _timed_phase(self, name):
+        """Log the start of a phase of the sync, and record its duration."""
+        self.logger.debug("%s...", name)
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.phase_timings[name] = time.time() - start
+
+    def log_phase_timings(self):
+        """Log how long each phase of the last fullsync took."""
+        self.logger.info('Fullsync phase timings: %s', ', '.join(
+            '%s: %.1fs' % (name, seconds) for name, seconds in
+            self.phase_timings.items()))
+
     def fullsync(self):
         """Do the fullsync by comparing AD with Cerebrum and then update AD.
 
@@ -599,27 +720,70 @@ class BaseSync(object):
         calls instead of overriding all of this method, unless you of course
         want to do the fullsync completely different.
 
+        If the config option `fullsync_streaming` is set, the AD data is
+        fetched and processed by L{streaming_fullsync}.
+
         """
         self.logger.info("Fullsync started")
-        self.logger.debug("Pre-sync processing...")
-        self.pre_process()
-        ad_cmdid = self.start_fetch_ad_data()
-        self.logger.debug("Fetching cerebrum data...")
-        self.fetch_cerebrum_data()
-        self.logger.debug("Calculate AD values...")
-        self.calculate_ad_values()
-        self.logger.debug("Process AD data...")
-        self.process_ad_data(ad_cmdid)
-        self.logger.debug("Process entities not in AD...")
-        self.process_entities_not_in_ad()
-        self.logger.debug("Post-sync processing...")
-        self.post_process()
+        self.phase_timings = collections.OrderedDict()
+        if self.config['fullsync_streaming']:
+            self.streaming_fullsync()
+        else:
+            with self._timed_phase("Pre-sync processing"):
+                self.pre_process()
+            ad_cmdid = self.start_fetch_ad_data()
+            with self._timed_phase("Fetching cerebrum data"):
+                self.fetch_cerebrum_data()
+            with self._timed_phase("Calculate AD values"):
+                self.calculate_ad_values()
+            with self._timed_phase("Process AD data"):
+                self.process_ad_data(ad_cmdid)
+        with self._timed_phase("Process entities not in AD"):
+            self.process_entities_not_in_ad()
+        with self._timed_phase("Post-sync processing"):
+            self.post_process()
         self.logger.info('Fullsync done')
+        self.log_phase_timings()
         self.send_ad_admin_messages()
         # TODO: not sure if this is the place to put this, but we must close
         # down connections on the server side:
         self.server.close()
 
+    def streaming_fullsync(self):
+        """Fetch and process the AD data for a fullsync.
+
+        This is used by L{fullsync} if `fullsync_streaming` is set. The AD
+        listing is downloaded and parsed in a separate thread, while the data
+        from Cerebrum is fetched and calculated. The AD objects are then
+        processed in chunks of `fullsync_chunk_size`, as they are passed on
+        from the listing thread.
+
+        The AD client is shared with the listing thread through
+        L{_ADListing.lock}, so that commands are never sent to AD in
+        parallel.
+
+        """
+        with self._timed_phase("Pre-sync processing"):
+            self.pre_process()
+        ad_cmdid = self.start_fetch_ad_data()
+        listing = _ADListing(self.server, ad_cmdid,
+                             self.config['fullsync_chunk_size'])
+        listing.start()
+        with self._timed_phase("Fetching cerebrum data"):
+            self.fetch_cerebrum_data()
+        with self._timed_phase("Calculate AD values"):
+            self.calculate_ad_values()
+        with self._timed_phase("Process AD data"):
+            total = processed = 0
+            for chunk in listing.iter_chunks():
+                total += len(chunk)
+                with listing.lock:
+                    processed += self.process_ad_objects(chunk)
+                self.logger.debug("Processed %d AD objects", total)
+        self.phase_timings["Fetching AD data (parallel)"] = listing.seconds
+        self.logger.info("Processed %d of %d objects from AD",
+                         processed, total)
+
     def quicksync(self, changekey=None, change_ids=None):
         """Do a quicksync, by sending the latest changes to AD.
 
@@ -646,6 +810,9 @@ class BaseSync(object):
             The given IDs will be run no matter if they are considered finished
             by the L{CLHandler}.
 
+        If the config option `quicksync_coalesce` is set, the events are
+        processed by L{coalesced_quicksync} instead.
+
         """
         self.logger.info("Quicksync started")
         cl = CLHandler.CLHandler(self.db)
@@ -687,6 +854,9 @@ class BaseSync(object):
             raise Exception("Missing changekey or change_ids")
 
         stats = dict(seen=0, processed=0, skipped=0, failed=0)
+        if self.config['quicksync_coalesce']:
+            self.coalesced_quicksync(events, confirm, commit, too_old, stats)
+            events = ()
         for row in events:
             timestamp = int(row['tstamp'])
             handle_key = tuple((int(row['change_type_id']),
@@ -741,6 +911,119 @@ class BaseSync(object):
         self.logger.info("Quicksync done")
         self.send_ad_admin_messages()
 
+    def coalesce_key(self, row):
+        """Get a key that identifies equal events.
+
+        Events with the same key only needs to be processed once, and the
+        newest event is the one that gets processed. Subclasses could override
+        this, to coalesce different change types that leads to the same update
+        in AD.
+
+        @type row: dict of db-row
+        @param row: A change log event.
+
+        @rtype: tuple
+        """
+        return (int(row['change_type_id']), row['subject_entity'],
+                row['dest_entity'])
+
+    def coalesced_quicksync(self, events, confirm, commit, too_old, stats):
+        """Process all pending events, coalesced per entity.
+
+        This is used by L{quicksync} if `quicksync_coalesce` is set:
+
+        1. All pending events are collected and grouped per subject entity,
+           and by L{coalesce_key}. Only the newest event of each key gets
+           processed.
+        2. Commands to AD are queued, and sent in batched scripts of up to
+           `quicksync_batch_size` commands.
+        3. The events are confirmed when their commands have succeeded, and the
+           confirmations are committed every `quicksync_commit_events` events
+           or `quicksync_commit_seconds` seconds.
+
+        """
+        dryrun = self.config['dryrun']
+        subjects = collections.OrderedDict()
+        for row in events:
+            stats['seen'] += 1
+            if int(row['tstamp']) < too_old:
+                stats['skipped'] += 1
+                self.logger.info("Skipping too old change_id: %s",
+                                 row['change_id'])
+                confirm(row)
+                continue
+            # events are newest first, so the first event of each key is the
+            # one to process
+            subjects.setdefault(
+                row['subject_entity'], collections.OrderedDict()
+            ).setdefault(self.coalesce_key(row), []).append(row)
+        self.logger.debug("Coalesced %d events into %d entities",
+                          stats['seen'], len(subjects))
+
+        pending = []
+        state = {'uncommitted': 0, 'last_commit': time.time()}
+
+        def flush(force=False):
+            try:
+                failed = self.server.run_batch()
+            except Exception:
+                self.logger.error("Failed to run batched commands",
+                                  exc_info=1)
+                failed = set(key for key, rows in pending)
+            for key, rows in pending:
+                if key in failed:
+                    stats['failed'] += 1
+                    self.logger.warn("Failed to process change_id %s for"
+                                     " subject=%s", rows[0]['change_id'],
+                                     rows[0]['subject_entity'])
+                    continue
+                stats['processed'] += 1
+                stats['skipped'] += len(rows) - 1
+                for row in rows:
+                    confirm(row)
+                state['uncommitted'] += len(rows)
+            del pending[:]
+            if state['uncommitted'] and (
+                    force or
+                    state['uncommitted'] >=
+                    self.config['quicksync_commit_events'] or
+                    time.time() - state['last_commit'] >=
+                    self.config['quicksync_commit_seconds']):
+                commit(dryrun)
+                state['uncommitted'] = 0
+                state['last_commit'] = time.time()
+
+        self.server.start_batch()
+        try:
+            for subject, keys in subjects.items():
+                for key, rows in keys.items():
+                    row = rows[0]
+                    self.logger.debug(
+                        "Processing change_id %s (%s) for subject_entity: %s,"
+                        " coalesced with %d older events", row['change_id'],
+                        self.clconst.ChangeType(int(row['change_type_id'])),
+                        subject, len(rows) - 1)
+                    self.server.batch_tag = key
+                    try:
+                        if self.process_cl_event(row):
+                            pending.append((key, rows))
+                        else:
+                            stats['skipped'] += len(rows)
+                    except Exception:
+                        stats['failed'] += 1
+                        self.logger.error(
+                            "Failed to process cl_event %s for %s",
+                            row['change_id'], subject, exc_info=1)
+                if (self.server.batch_length >=
+                        self.config['quicksync_batch_size']):
+                    flush()
+            flush(force=True)
+        finally:
+            # Anything left in the batch was not confirmed, and will be
+            # retried by the next quicksync
+            self.server.stop_batch(discard=True)
+            self.server.batch_tag = None
+
     def process_cl_event(self, row):
         """Process a given ChangeLog event.
 
@@ -1070,9 +1353,21 @@ class BaseSync(object):
             For instance OUUnknownException if the given OU to search in does
             not exist.
 
+        """
+        return self.process_ad_objects(self.server.get_list_objects(commandid))
+
+    def process_ad_objects(self, ad_objects):
+        """Process objects from AD through L{process_ad_object}.
+
+        :type ad_objects: iterable
+        :param ad_objects: The objects from AD, as dicts of attributes.
+
+        :rtype: int
+        :return: The number of successfully processed objects.
+
         """
         i = 0
-        for ad_object in self.server.get_list_objects(commandid):
+        for ad_object in ad_objects:
             if i == 0:
                 self.logger.debug2("Retrieved %d attributes: %s",
                                    len(ad_object),
@@ -2700,6 +2995,20 @@ class UserSync(BaseSync):
         # Other change types handled by other classes:
         return super(UserSync, self).process_cl_event(row)
 
+    def coalesce_key(self, row):
+        """Coalesce all quarantine changes for an account.
+
+        All quarantine changes leads to the same update: The account is enabled
+        or disabled according to its current quarantines.
+
+        """
+        if row['change_type_id'] in (self.clconst.quarantine_add,
+                                     self.clconst.quarantine_del,
+                                     self.clconst.quarantine_mod,
+                                     self.clconst.quarantine_refresh):
+            return ('quarantine', row['subject_entity'])
+        return super(UserSync, self).coalesce_key(row)
+
 
 class GroupSync(BaseSync):
 
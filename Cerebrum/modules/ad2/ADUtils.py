@@ -256,6 +256,119 @@ class ADclient(PowershellClient):
         self.co = Factory.get('Constants')(self.db)
         self.connect()
 
+    # Commands that are queued for a batched run, as (tag, command) tuples.
+    # Only set while batching, see L{start_batch}.
+    _batch = None
+
+    # A tag for the commands that gets queued, e.g. the event that caused them
+    batch_tag = None
+
+    # Marker for commands that succeeded in a batched run
+    _batch_ok_marker = 'CEREBRUM-BATCH-OK'
+
+    def start_batch(self):
+        """Start queueing commands, to run them in a single script.
+
+        Only simple commands that don't return data are queued, i.e. enabling
+        and disabling objects, and setting passwords. Each queued command is
+        tagged with the current L{batch_tag}. The commands are executed by
+        L{run_batch}.
+
+        """
+        self._batch = []
+
+    @property
+    def batch_length(self):
+        """The number of queued commands."""
+        return len(self._batch or ())
+
+    def _run_command(self, cmd):
+        """Run a command that doesn't return data, or queue it if batching.
+
+        @rtype: bool
+        @return: If the command succeeded, or True if it was queued.
+
+        """
+        if self._batch is not None:
+            self._batch.append((self.batch_tag, cmd))
+            return True
+        out = self.run(cmd)
+        return not out.get('stderr')
+
+    def run_batch(self):
+        """Run all queued commands in as few scripts as possible.
+
+        Each command is wrapped in a try/catch statement, and reports back if
+        it succeeded. Newlines are removed before the script is sent, so the
+        statements are separated by explicit `;`. The commands are split into
+        several scripts if needed, to keep each script within
+        L{max_command_length}. If one of the commands exits its script, the
+        remaining commands in that script are considered failed.
+
+        Batching continues after the run, until L{stop_batch} is called.
+
+        @rtype: set
+        @return: The tags of the commands that failed.
+
+        """
+        batch, self._batch = self._batch or [], []
+        if not batch:
+            return set()
+        prefix = "$ErrorActionPreference = 'Stop';"
+        # The script gets joined with the setup code by a space
+        max_length = (self.max_command_length -
+                      len(self._get_setup_code()) - 1)
+        scripts = []
+        script, length = [], len(prefix)
+        for i, (tag, cmd) in enumerate(batch):
+            statement = (
+                "try { %s; Write-Output '%s %d' } catch "
+                "{ Write-Output $_ };" % (cmd.strip().rstrip(';'),
+                                          self._batch_ok_marker, i))
+            if len(prefix) + 1 + len(statement) > max_length:
+                self.logger.warn("Batched command too long, skipping: %r",
+                                 tag)
+                continue
+            if length + 1 + len(statement) > max_length:
+                scripts.append(script)
+                script, length = [], len(prefix)
+            script.append(statement)
+            length += 1 + len(statement)
+        if script:
+            scripts.append(script)
+
+        self.logger.debug("Running %d batched commands in %d scripts",
+                          len(batch), len(scripts))
+        marker = re.compile(r'%s (\d+)' % self._batch_ok_marker)
+        succeeded = set()
+        for script in scripts:
+            try:
+                out = self.run(' '.join([prefix] + script))
+            except CommandTooLongException as e:
+                self.logger.warn("Batched run too long: %s", e)
+                continue
+            except ExitCodeException as e:
+                self.logger.warn("Batched run failed: %s", e)
+                out = e.output or {}
+            succeeded.update(int(i) for i in
+                             marker.findall(out.get('stdout') or ''))
+        return set(tag for i, (tag, cmd) in enumerate(batch)
+                   if i not in succeeded)
+
+    def stop_batch(self, discard=False):
+        """Run any queued commands, and stop batching.
+
+        @type discard: bool
+        @param discard: Drop the queued commands instead of running them.
+
+        @rtype: set
+        @return: The tags of the commands that failed.
+
+        """
+        failed = set() if discard else self.run_batch()
+        self._batch = None
+        return failed
+
     def _split_domain_username(self, name):
         """Separate the domain and username from a full domain username.
 
@@ -448,11 +561,9 @@ class ADclient(PowershellClient):
         $cred = New-Object System.Management.Automation.PSCredential(%(ad_user)s, $pass);
         """
 
-    def execute(self, *args, **kwargs):
-        """Override the execute command with all the startup commands for AD.
-
-        """
-        setup = self._pre_execution_code % {
+    def _get_setup_code(self):
+        """Get L{_pre_execution_code} with our credentials filled in."""
+        return self._pre_execution_code % {
             'ad_user': self.escape_to_string(getattr(self,
                                                      'ad_account_username',
                                                      None)),
@@ -460,9 +571,15 @@ class ADclient(PowershellClient):
                                                      'ad_account_password',
                                                      None)),
                 }
+
+    def execute(self, *args, **kwargs):
+        """Override the execute command with all the startup commands for AD.
+
+        """
         self.logger.debug4('Executing powershell command: %r',
                            args)
-        return super(ADclient, self).execute(setup, *args, **kwargs)
+        return super(ADclient, self).execute(self._get_setup_code(), *args,
+                                             **kwargs)
 
     # Standard lines in powershell that we can't get rid of by powershell code.
     # Piping doesn't seem to work, at least in powershell 2.0.
@@ -624,9 +741,8 @@ class ADclient(PowershellClient):
         self.logger.info('Disabling object: %s', (dn,))
         if self.dryrun:
             return True
-        out = self.run(self._generate_ad_command('Disable-ADAccount',
-                                                 {'Identity': dn}))
-        return not out.get('stderr')
+        return self._run_command(
+            self._generate_ad_command('Disable-ADAccount', {'Identity': dn}))
 
     def delete_object(self, dn):
         """Delete an object from AD.
@@ -1424,8 +1540,7 @@ class ADclient(PowershellClient):
                                         {'Identity': ad_id})
         if self.dryrun:
             return True
-        out = self.run(cmd)
-        return not out.get('stderr')
+        return self._run_command(cmd)
 
     def set_password(self, ad_id, password, password_type='plainext'):
         """Send a new password for a given object.
@@ -1525,8 +1640,7 @@ class ADclient(PowershellClient):
             cmd = cmd.decode('utf-8')
         if self.dryrun:
             return True
-        out = self.run(cmd)
-        return not out.get('stderr')
+        return self._run_command(cmd)
 
     def set_domain_controller(self, server):
         """Override what DC server the AD commands are sent to.
@@ -1861,13 +1861,24 @@ class PowershellClient(WinRMClient):
     # are expecting x64, and the path might change in the future.
     exec_path = u'%SystemRoot%\\syswow64\\WindowsPowerShell\\v1.0\\powershell.exe'
 
-    def execute(self, *args, **kwargs):
-        """Send powershell commands to the server.
+    # Due to the command prompt string limitation, commands can not be longer
+    # than 8191 characters. We limit ourselves to 8000 for some extra
+    # breathing room.
+    # See https://support.microsoft.com/en-gb/help/830473/command-prompt-cmd-exe-command-line-string-limitation
+    # for more information
+    max_command_length = 8000
 
-        Fires up the proper powershell.exe with proper parameters.
+    def build_command(self, *args):
+        """Join powershell commands into the command line to execute.
 
-        Unfortunately, a new Shell must be create for each execution, due to
-        not getting blocked from the server.
+        Later versions of powershell just hangs at newlines, so they are
+        replaced by spaces. Statements must therefore be separated by `;`.
+
+        @rtype: unicode
+        @return: The command, as it will be passed to powershell.exe.
+
+        @raise CommandTooLongException:
+            If the command is longer than L{max_command_length}.
 
         """
 
@@ -1881,10 +1892,31 @@ class PowershellClient(WinRMClient):
                 return six.text_type(v)
 
         args = tuple((_convert(v) for v in args))
-        # Later versions of powershell just hangs at newlines, so need to
-        # remove them. TODO: This could create problems, we need to look at how
-        # we generate powershell commands!
+        # TODO: This could create problems, we need to look at how we generate
+        # powershell commands!
         command = u' '.join(args).replace(u'\n', u' ')
+        if len(command) > self.max_command_length:
+            raise CommandTooLongException('Too long command')
+        return command
+
+    def execute(self, *args, **kwargs):
+        """Send powershell commands to the server.
+
+        Fires up the proper powershell.exe with proper parameters.
+
+        Unfortunately, a new Shell must be create for each execution, due to
+        not getting blocked from the server.
+
+        """
+        return self.execute_command(self.build_command(*args), **kwargs)
+
+    def execute_command(self, command, **kwargs):
+        """Run a command line from L{build_command} with powershell.exe.
+
+        @rtype: tuple
+        @return: The (ShellId, CommandId) of the command.
+
+        """
         # Options for powershell:
         # -NonInteractive   To avoid waiting for stdin and deadlocks if a
         #                   prompt is popping up.
@@ -1894,16 +1926,6 @@ class PowershellClient(WinRMClient):
         # -NoProfile        Loading profile is not needed, at least for now. It
         #                   will probably only increase the startup time if not
         #                   set.
-
-        # Due to the command prompt string limitation, commands can not be
-        # longer than 8191 characters. We limit ourselves to 8000 for some
-        # extra breathing room.
-        # See https://support.microsoft.com/en-gb/help/830473/command-prompt-cmd-exe-command-line-string-limitation for more information
-        # for more information
-        #
-        if len(command) > 8000:
-            raise CommandTooLongException('Too long command')
-
         return super(PowershellClient, self).execute(
             self.exec_path,
             u'-NonInteractive -NoLogo -NoProfile -Command "%s"' % command,
@@ -192,6 +192,58 @@ def sql_insert(
     return binds['record_id']
 
 
+def sql_insert_many(db, records, chunk_size=500):
+    """
+    Insert multiple audit records, using multi-row inserts.
+
+    :param records:
+        dicts with sql_insert() arguments (change_type, operator_id,
+        entity_id, and optionally target_id, metadata, params, timestamp and
+        record_id)
+
+    :param int chunk_size: max number of records in each insert
+
+    :rtype: list
+    :returns: the record_id of each record
+    """
+    records = list(records)
+    new_ids = iter(db.nextvals('audit_log_seq',
+                               sum(1 for r in records
+                                   if not r.get('record_id'))))
+    record_ids = []
+    # rows without a timestamp gets the default timestamp from the database
+    rows = {True: [], False: []}
+    for record in records:
+        record_id = int(record.get('record_id') or next(new_ids))
+        record_ids.append(record_id)
+        row = {
+            'record_id': record_id,
+            'change_type': int(record['change_type']),
+            'operator': int(record['operator_id']),
+            'entity': int(record['entity_id']),
+            'target': (int(record['target_id'])
+                       if record.get('target_id') else None),
+            'metadata': (json.dumps(record['metadata'])
+                         if record.get('metadata') else None),
+            'params': (json.dumps(serialize_params(record['params']))
+                       if record.get('params') else None),
+        }
+        if record.get('timestamp'):
+            row['timestamp'] = record['timestamp']
+        rows['timestamp' in row].append(row)
+
+    for has_timestamp in (False, True):
+        if not rows[has_timestamp]:
+            continue
+        columns = ['record_id', 'change_type', 'operator', 'entity',
+                   'target', 'metadata', 'params']
+        if has_timestamp:
+            columns.append('timestamp')
+        db.insert_many('[:table schema=cerebrum name=audit_log]', columns,
+                       rows[has_timestamp], chunk_size=chunk_size)
+    return record_ids
+
+
 def sql_delete(
         db,
         change_types=None,
@@ -283,6 +335,21 @@ class AuditLogAccessor(DatabaseAccessor):
             timestamp=record.timestamp,
             record_id=record.record_id)
 
+    def append_many(self, records):
+        """ Append multiple records in batches. """
+        return sql_insert_many(
+            self._db,
+            ({
+                'change_type': record.change_type,
+                'operator_id': record.operator_id,
+                'entity_id': record.entity_id,
+                'target_id': record.target_id,
+                'metadata': record.metadata,
+                'params': record.params,
+                'timestamp': record.timestamp,
+                'record_id': record.record_id,
+            } for record in records))
+
     # def update(self, record):
     #     # TODO: assert DbAuditRecord instance?
     #     data = record.to_dict()
@@ -30,7 +30,7 @@ import Cerebrum.Errors
 from Cerebrum.ChangeLog import ChangeLog
 from Cerebrum.DatabaseAccessor import DatabaseAccessor
 from Cerebrum.Entity import Entity, EntityName
-from Cerebrum.Utils import Factory
+from Cerebrum.Utils import Factory, argument_to_sql
 from Cerebrum.modules.Email import EmailAddress, EmailDomain
 
 from .auditdb import AuditLogAccessor
@@ -40,6 +40,131 @@ from .record import AuditRecord
 logger = logging.getLogger(__name__)
 ENTITY_TYPE_NAMESPACE = getattr(cereconf, 'ENTITY_TYPE_NAMESPACE', dict())
 
+# Change types that invalidates cached entity info for the subject entity
+INVALIDATE_ENTITY_INFO = (
+    ('entity_name', None),
+    ('entity', 'delete'),
+)
+
+
+class EntityInfoCache(object):
+    """ Bounded cache of entity_id -> (entity_type, entity_name).
+
+    The entity info is used in audit record metadata.  The cache is meant to
+    live for a single transaction, and should be cleared on commit/rollback.
+    Pinned entities (i.e. the current operator) are kept when the cache is
+    cleared on commit, but can still be invalidated.  On rollback, pinned
+    entities are dropped as well, as they may have been changed in the
+    transaction.
+    """
+
+    def __init__(self, db, size=10000):
+        self._db = db
+        self.size = size
+        self.pinned = set()
+        self.hits = 0
+        self.misses = 0
+        self._cache = collections.OrderedDict()
+
+    @property
+    def const(self):
+        if not hasattr(self, '_const'):
+            self._const = Factory.get('Constants')(self._db)
+        return self._const
+
+    def __len__(self):
+        return len(self._cache)
+
+    def _get_namespace(self, entity_type):
+        namespace = ENTITY_TYPE_NAMESPACE.get(entity_type)
+        if namespace is None:
+            return None
+        try:
+            return int(self.const.ValueDomain(namespace))
+        except Cerebrum.Errors.NotFoundError:
+            return None
+
+    def _lookup(self, entity_ids):
+        """ Fetch type and name for entities in a single query. """
+        binds = {}
+        info = {}
+        names = collections.defaultdict(dict)
+        for row in self._db.query(
+                """
+                  SELECT ei.entity_id, ei.entity_type,
+                         en.value_domain, en.entity_name
+                  FROM [:table schema=cerebrum name=entity_info] ei
+                  LEFT JOIN [:table schema=cerebrum name=entity_name] en
+                    ON en.entity_id = ei.entity_id
+                  WHERE {}
+                """.format(argument_to_sql(entity_ids, 'ei.entity_id',
+                                           binds, int)),
+                binds):
+            e_id = int(row['entity_id'])
+            info[e_id] = six.text_type(
+                self.const.EntityType(row['entity_type']))
+            if row['value_domain'] is not None:
+                names[e_id][int(row['value_domain'])] = row['entity_name']
+        result = {}
+        for e_id in entity_ids:
+            if e_id not in info:
+                result[e_id] = (None, None)
+                continue
+            namespace = self._get_namespace(info[e_id])
+            result[e_id] = (info[e_id], names[e_id].get(namespace))
+        return result
+
+    def _store(self, e_id, value):
+        self._cache[e_id] = value
+        while len(self._cache) > self.size:
+            self._cache.popitem(last=False)
+
+    def warm(self, entity_ids, pin=False):
+        """ Pre-fetch info for the given entities. """
+        entity_ids = set(int(e_id) for e_id in entity_ids
+                         if e_id is not None)
+        missing = [e_id for e_id in entity_ids if e_id not in self._cache]
+        if missing:
+            for e_id, value in self._lookup(missing).items():
+                self._store(e_id, value)
+        if pin:
+            self.pinned.update(entity_ids)
+
+    def get(self, entity_id):
+        """
+        Get info on an entity.
+
+        :rtype: tuple
+        :returns: entity type and name (or None, None if it doesn't exist)
+        """
+        if entity_id is None:
+            return None, None
+        entity_id = int(entity_id)
+        try:
+            value = self._cache.pop(entity_id)
+            self.hits += 1
+        except KeyError:
+            value = self._lookup([entity_id])[entity_id]
+            self.misses += 1
+        self._store(entity_id, value)
+        return value
+
+    def invalidate(self, entity_id):
+        if entity_id is not None:
+            self._cache.pop(int(entity_id), None)
+
+    def clear(self, unpin=False):
+        """
+        Clear all cached info.
+
+        :param bool unpin: also clear and unpin pinned entities
+        """
+        if unpin:
+            self.pinned.clear()
+        for e_id in list(self._cache):
+            if e_id not in self.pinned:
+                del self._cache[e_id]
+
 
 class AuditLog(ChangeLog):
     # TODO: The ChangeLog design is kind of broken -- there is no actual
@@ -56,6 +181,7 @@ class AuditLog(ChangeLog):
         self.change_by = change_by
         self.change_program = change_program
         self.records = []
+        self.entity_info = EntityInfoCache(self)
 
     @property
     def initial_account_id(self):
@@ -94,7 +220,10 @@ class AuditLog(ChangeLog):
         elif not change_by:
             raise ValueError("No operator given, and no change_program set")
 
-        builder = AuditRecordBuilder(self)
+        if int(change_by) not in self.entity_info.pinned:
+            self.entity_info.warm([change_by], pin=True)
+
+        builder = AuditRecordBuilder(self, entity_info=self.entity_info)
         record = builder(
             subject_entity,
             change_type_id,
@@ -106,14 +235,14 @@ class AuditLog(ChangeLog):
 
     def write_log(self):
         super(AuditLog, self).write_log()
-        accessor = AuditLogAccessor(self)
-        for record in self.records:
-            accessor.append(record)
+        AuditLogAccessor(self).append_many(self.records)
         self.records = []
+        self.entity_info.clear()
 
     def clear_log(self):
         super(AuditLog, self).clear_log()
         self.records = []
+        self.entity_info.clear(unpin=True)
 
 
 class _ChangeTypeCallbacks(object):
@@ -141,6 +270,15 @@ class _ChangeTypeCallbacks(object):
 class AuditRecordBuilder(DatabaseAccessor):
     """ Helper function to build AuditRecord objects. """
 
+    def __init__(self, database, entity_info=None):
+        """
+        :param EntityInfoCache entity_info:
+            cache to use for entity type/name lookups.  If not given, every
+            lookup goes to the database.
+        """
+        super(AuditRecordBuilder, self).__init__(database)
+        self.entity_info = entity_info
+
     @property
     def const(self):
         if not hasattr(self, '_const'):
@@ -200,50 +338,23 @@ class AuditRecordBuilder(DatabaseAccessor):
         except Cerebrum.Errors.NotFoundError:
             return None
 
+    def _get_info(self, e_id):
+        if self.entity_info is not None:
+            return self.entity_info.get(e_id)
+        e_type = self._get_type(e_id)
+        return e_type, self._get_name(e_id, e_type)
+
     def build_meta(self, change_type, operator_id, entity_id,
                    target_id, change_program):
         """ Build default metadata from change_log arguments.
 
-        TODO: This is a hack -- the ChangeLog/CLDatabase API should be modified
-        so that:
-
-        1. It retains an Entity object for the current operator
-        2. log_change is given Entity objects rather than entity_id and
-        target_id
-
-        That way we would be able to fetch cached info on the entities
-        involved, rather than looking it up for every change.
+        Entity types and names are looked up in the `entity_info` cache, if
+        given.
         """
-        co = self.const
-
-        def get_type(e_id):
-            entity = Entity(self._db)
-            try:
-                entity.find(e_id)
-                return six.text_type(co.EntityType(entity.entity_type))
-            except Cerebrum.Errors.NotFoundError:
-                return None
-
-        def get_name(e_id, e_type):
-            namespace = ENTITY_TYPE_NAMESPACE.get(six.text_type(e_type))
-            if namespace is None:
-                return None
-            else:
-                namespace = co.ValueDomain(namespace)
-            entity = EntityName(self._db)
-            try:
-                entity.find(e_id)
-                return entity.get_name(namespace)
-            except Cerebrum.Errors.NotFoundError:
-                return None
-
         change = six.text_type(change_type)
-        operator_type = self._get_type(operator_id)
-        operator_name = self._get_name(operator_id, operator_type)
-        entity_type = self._get_type(entity_id)
-        entity_name = self._get_name(entity_id, entity_type)
-        target_type = self._get_type(target_id)
-        target_name = self._get_name(target_id, target_type)
+        operator_type, operator_name = self._get_info(operator_id)
+        entity_type, entity_name = self._get_info(entity_id)
+        target_type, target_name = self._get_info(target_id)
         if change_program is not None:
             change_program = six.text_type(change_program)
         return {
@@ -281,11 +392,20 @@ class AuditRecordBuilder(DatabaseAccessor):
                  change_program):
 
         change_type = self.get_change_type(change_type_id)
+        invalidate = self.entity_info is not None and (
+            (change_type.category, None) in INVALIDATE_ENTITY_INFO or
+            (change_type.category, change_type.type) in INVALIDATE_ENTITY_INFO)
+        if invalidate:
+            self.entity_info.invalidate(subject_entity)
         metadata = self.build_meta(change_type,
                                    change_by,
                                    subject_entity,
                                    destination_entity,
                                    change_program)
+        if invalidate:
+            # Changes may be logged before they are written (e.g.
+            # delete_entity_name), so we can't keep what we just looked up
+            self.entity_info.invalidate(subject_entity)
         params = self.build_params(change_type,
                                    subject_entity,
                                    destination_entity,
@@ -114,14 +114,14 @@ def meta_group_members(db, ou, ou_id, perspective, prefix, ou_id2sko):
                                       prefix).entity_id
 
 
-def update_members(gr, group_id, current_members, wanted_members):
-    """Make sure only the wanted members are in group 'group_id'"""
+def update_members(gr, group_id, wanted_members):
+    """Make sure only the wanted members are in group 'group_id'
+
+    :return tuple: the added and the removed member ids
+    """
     gr.clear()
     gr.find(group_id)
-    for member_id in wanted_members.difference(current_members):
-        gr.add_member(member_id)
-    for member_id in current_members.difference(wanted_members):
-        gr.remove_member(member_id)
+    return gr.sync_members(wanted_members)
 
 
 def update_memberships(gr, entity_id, current_memberships, wanted_memberships):
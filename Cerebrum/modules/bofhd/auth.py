@@ -225,6 +225,7 @@ from Cerebrum.Errors import NotFoundError
 from Cerebrum.group.GroupRoles import GroupRoles
 from Cerebrum.Utils import Factory, mark_update
 from Cerebrum.Utils import argument_to_sql
+from Cerebrum.modules.bofhd.auth_cache import permission_cache
 from Cerebrum.modules.bofhd.errors import PermissionDenied
 
 
@@ -246,6 +247,25 @@ class AuthConstants(Constants._CerebrumCode):
     _lookup_table = '[:table schema=cerebrum name=auth_op_code]'
 
 
+def _log_auth_change(db, change_type, subject_entity, change_params=None):
+    """Register a change to the auth tables.
+
+    The change is logged if `change_type` is a known change type (see
+    :class:`Cerebrum.modules.bofhd.bofhd_constants.CLConstants`), and the
+    shared permission cache is cleared.
+
+    :param str change_type: name of the change type constant
+    :param int subject_entity: the changed role entity, op set or op target
+    :param dict change_params: additional change params
+    """
+    clconst = Factory.get('CLConstants')(db)
+    change_type = getattr(clconst, change_type, None)
+    if change_type is not None:
+        db.log_change(subject_entity, change_type, None,
+                      change_params=change_params)
+    permission_cache.clear()
+
+
 class BofhdAuthOpSet(DatabaseAccessor):
     """Operation Set (OpSet) management.
 
@@ -341,6 +361,7 @@ class BofhdAuthOpSet(DatabaseAccessor):
             'name': self.name,
         }
         self.execute(stmt, binds)
+        _log_auth_change(self._db, 'bofhd_auth_opset_mod', self.op_set_id)
         del self.__in_db
         self.__in_db = True
         self.__updated = []
@@ -353,6 +374,7 @@ class BofhdAuthOpSet(DatabaseAccessor):
               WHERE op_set_id=:os_id
             """,
             {'os_id': self.op_set_id})
+        _log_auth_change(self._db, 'bofhd_auth_opset_mod', self.op_set_id)
         self.clear()
 
     def add_operation(self, op_code):
@@ -369,6 +391,7 @@ class BofhdAuthOpSet(DatabaseAccessor):
                 'op_id': op_id,
                 'op_set_id': self.op_set_id,
             })
+        _log_auth_change(self._db, 'bofhd_auth_opset_mod', self.op_set_id)
         return op_id
 
     def del_operation(self, op_code, op_id=None):
@@ -382,6 +405,7 @@ class BofhdAuthOpSet(DatabaseAccessor):
               WHERE op_code=:op_code AND op_set_id=:op_set_id
             """,
             {'op_code': int(op_code), 'op_set_id': self.op_set_id})
+        _log_auth_change(self._db, 'bofhd_auth_opset_mod', self.op_set_id)
 
     def add_op_attrs(self, op_id, attr):
         self.execute(
@@ -392,6 +416,7 @@ class BofhdAuthOpSet(DatabaseAccessor):
                 (:op_id, :attr)
             """,
             {'op_id': op_id, 'attr': attr})
+        _log_auth_change(self._db, 'bofhd_auth_opset_mod', self.op_set_id)
 
     def del_op_attrs(self, op_id, attr):
         self.execute(
@@ -400,6 +425,7 @@ class BofhdAuthOpSet(DatabaseAccessor):
               WHERE op_id=:op_id AND attr=:attr
             """,
             {'op_id': int(op_id), 'attr': attr})
+        _log_auth_change(self._db, 'bofhd_auth_opset_mod', self.op_set_id)
 
     def del_all_op_attrs(self, op_id):
         self.execute(
@@ -408,6 +434,7 @@ class BofhdAuthOpSet(DatabaseAccessor):
               WHERE op_id=:op_id
             """,
             {'op_id': int(op_id)})
+        _log_auth_change(self._db, 'bofhd_auth_opset_mod', self.op_set_id)
 
     def list(self):
         return self.query(
@@ -470,6 +497,8 @@ class BofhdAuthOpTarget(DatabaseAccessor):
               WHERE op_target_id=:id
             """,
             {'id': self.op_target_id})
+        _log_auth_change(self._db, 'bofhd_auth_target_mod',
+                         self.op_target_id)
         self.clear()
 
     def find(self, id):
@@ -527,6 +556,8 @@ class BofhdAuthOpTarget(DatabaseAccessor):
             'attr': self.attr,
         }
         self.execute(stmt, binds)
+        _log_auth_change(self._db, 'bofhd_auth_target_mod',
+                         self.op_target_id)
         del self.__in_db
         self.__in_db = True
         self.__updated = []
@@ -595,6 +626,7 @@ class BofhdAuthOpTarget(DatabaseAccessor):
                 ) AND
                 ot.entity_id IS NOT NULL
             """)
+        permission_cache.clear()
 
 
 class BofhdAuthRole(DatabaseAccessor):
@@ -626,6 +658,9 @@ class BofhdAuthRole(DatabaseAccessor):
                 'os_id': op_set_id,
                 't_id': op_target_id,
             })
+        _log_auth_change(self._db, 'bofhd_auth_role_add', entity_id,
+                         change_params={'op_set_id': op_set_id,
+                                        'op_target_id': op_target_id})
 
     def revoke_auth(self, entity_id, op_set_id, op_target_id):
         self.execute(
@@ -641,6 +676,9 @@ class BofhdAuthRole(DatabaseAccessor):
                 'os_id': op_set_id,
                 't_id': op_target_id,
             })
+        _log_auth_change(self._db, 'bofhd_auth_role_del', entity_id,
+                         change_params={'op_set_id': op_set_id,
+                                        'op_target_id': op_target_id})
 
     def list(self, entity_ids=None, op_set_id=None, op_target_id=None):
         """Return info about where entity_id has permissions.
@@ -728,6 +766,7 @@ class BofhdAuthRole(DatabaseAccessor):
                     ot.entity_id IS NOT NULL
                 )
             """)
+        permission_cache.clear()
 
 
 def _get_bofhd_auth_systems(const):
@@ -758,18 +797,10 @@ class BofhdAuth(DatabaseAccessor):
     def __init__(self, database):
         super(BofhdAuth, self).__init__(database)
         self.const = Factory.get('Constants')(database)
-        self._group_member_cache = Cache.Cache(
-                            mixins=[Cache.cache_timeout], timeout=60)
-        self._users_auth_entities_cache = Cache.Cache(
-                            mixins=[Cache.cache_timeout], timeout=60)
+        # Permission lookups are cached in the process-wide permission_cache
         group = Factory.get('Group')(self._db)
         group.find_by_name(cereconf.BOFHD_SUPERUSER_GROUP)
         self._superuser_group = group.entity_id
-        self._any_perm_cache = Cache.Cache(mixins=[Cache.cache_mru,
-                                                   Cache.cache_slots,
-                                                   Cache.cache_timeout],
-                                           size=500,
-                                           timeout=60*60)
         self._bofhd_auth_systems = tuple(_get_bofhd_auth_systems(self.const))
         self._group_roles = GroupRoles(database)
         self._group_expire_status_cache = Cache.Cache(
@@ -1967,9 +1998,9 @@ class BofhdAuth(DatabaseAccessor):
         :return: If the operator has been granted the operation *somewhere*.
         """
         # This is called numerous times when using "help", so we use a cache
-        key = "%i:%i" % (operator, operation)
+        key = (int(operator), int(operation))
         try:
-            return self._any_perm_cache[key]
+            return permission_cache.get(self._db, 'any_perm', key)
         except KeyError:
             sql = """
             SELECT 'foo' AS foo
@@ -1983,11 +2014,8 @@ class BofhdAuth(DatabaseAccessor):
                ar.entity_id IN (%s)""" % (", ".join(
                 ["%i" % x for x in self._get_users_auth_entities(operator)]))
             r = self.query(sql, {'operation': int(operation)})
-            if r:
-                self._any_perm_cache[key] = True
-            else:
-                self._any_perm_cache[key] = False
-        return self._any_perm_cache[key]
+            return permission_cache.set(self._db, 'any_perm', key,
+                                        bool(r))
 
     def _query_target_permissions(self, operator, operation, target_type,
                                   target_id, victim_id, operation_attr=None):
@@ -2122,7 +2150,22 @@ class BofhdAuth(DatabaseAccessor):
             - `operation_attr`: If `get_all_op_attrs` is True, the operation
               attribute is returned as well.
 
+            The result is cached in the shared permission cache.
         """
+        if target_id is None or isinstance(target_id, six.integer_types):
+            hashable_target = target_id
+        elif isinstance(target_id, (list, tuple, set)):
+            hashable_target = tuple(sorted(int(t) for t in target_id))
+        else:
+            hashable_target = int(target_id)
+        key = (int(operator), int(operation), target_type, hashable_target,
+               operation_attr, bool(get_all_op_attrs))
+        try:
+            return list(permission_cache.get(self._db, 'target_permissions',
+                                             key))
+        except KeyError:
+            pass
+
         tables = [
             """[:table schema=cerebrum name=auth_operation] ao
             JOIN [:table schema=cerebrum name=auth_operation_set] AS aos
@@ -2172,7 +2215,9 @@ class BofhdAuth(DatabaseAccessor):
         sql = "SELECT DISTINCT %s FROM %s WHERE %s" % (', '.join(select),
                                                        ' '.join(tables),
                                                        ' AND '.join(where))
-        return self.query(sql, binds)
+        rows = tuple(self.query(sql, binds))
+        permission_cache.set(self._db, 'target_permissions', key, rows)
+        return list(rows)
 
     def _has_access_to_entity_via_ou(self, operator, operation, entity,
                                      operation_attr=None):
@@ -2304,7 +2349,7 @@ class BofhdAuth(DatabaseAccessor):
         relevant for `auth_role` for the accounaccount. Only *direct*
         memberships are considered in our authorization model.
 
-        The memberships are cached.
+        The memberships are cached in the shared permission cache.
 
         :param int entity_id:
             The entity to fetch the auth related entities for. This is normally
@@ -2318,7 +2363,8 @@ class BofhdAuth(DatabaseAccessor):
         """
         entity_id = int(entity_id)
         try:
-            return self._users_auth_entities_cache[entity_id]
+            return list(permission_cache.get(self._db, 'auth_entities',
+                                             entity_id))
         except KeyError:
             pass
         group = Factory.get('Group')(self._db)
@@ -2339,7 +2385,8 @@ class BofhdAuth(DatabaseAccessor):
             ret.extend([int(x["group_id"])
                         for x in group.search(member_id=account.owner_id,
                                               indirect_members=False)])
-        self._users_auth_entities_cache[entity_id] = list(set(ret))
+        permission_cache.set(self._db, 'auth_entities', entity_id,
+                             tuple(set(ret)))
         return ret
 
     def _is_group_expired(self, groupname):
@@ -2368,16 +2415,16 @@ class BofhdAuth(DatabaseAccessor):
     def _get_group_members(self, groupname):
         """Get a group's *direct* members.
 
-        The memberships are cached for a while.
+        The memberships are cached in the shared permission cache.
 
         :param str groupname: The name of the group.
 
-        :rtype: list
-        :returns: A list of each member's `entity_id`.
+        :rtype: frozenset
+        :returns: Each member's `entity_id`.
         :raise Errors.NotFoundError: If the group doesn't exist.
         """
         try:
-            return self._group_member_cache[groupname]
+            return permission_cache.get(self._db, 'group_members', groupname)
         except KeyError:
             pass
         group = Factory.get('Group')(self._db)
@@ -2386,8 +2433,8 @@ class BofhdAuth(DatabaseAccessor):
                    group.search_members(group_id=group.entity_id,
                                         indirect_members=True,
                                         member_type=self.const.entity_account)]
-        self._group_member_cache[groupname] = list(set(members))
-        return members
+        return permission_cache.set(self._db, 'group_members', groupname,
+                                    frozenset(members))
 
     def _get_user_disk(self, account_id):
         if not getattr(cereconf, 'BOFHD_CHECK_DISK_SPREAD', None):
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Process-wide cache for bofhd permission lookups.
+
+BofhdAuth objects are short lived (bofhd creates new command objects for
+each request), so any per-object cache is rarely hit.  This module keeps a
+single :class:`PermissionCache` (:data:`permission_cache`) that is shared by
+all BofhdAuth objects (and all threads) in a process.
+
+Invalidation
+------------
+The cache is cleared whenever a relevant change shows up in the change log.
+The change log is polled at most every `poll_interval` seconds, by the
+request that happens to use the cache.  Relevant changes are group
+membership changes, account and group changes (owner, expire date, name),
+and changes to the bofhd auth tables (see
+:class:`Cerebrum.modules.bofhd.bofhd_constants.CLConstants`).
+
+Change ids are allocated before commit, so changes may appear in the change
+log out of order.  Each poll re-reads the last `lookback` change ids, and
+clears the cache if it finds a relevant change that it hasn't seen before.
+
+If the auth change types are not configured (in ``CLASS_CL_CONSTANTS``),
+changes to roles and op sets can't be detected, and the cache is cleared
+every `fallback_max_age` seconds instead.  In any case, the cache is cleared
+every `max_age` seconds.
+
+Transactions
+------------
+The cache is shared by all threads, and must only contain committed data.
+Lookups from a session with pending changes bypass the cache, and values
+looked up in a transaction that has written to the database are never cached.
+
+Sessions that commit or roll back changes that affect permissions should
+wrap the commit or rollback in :meth:`PermissionCache.clear_on_change`, so
+that the cache is cleared without waiting for the next poll.  BofhdAuth
+related classes also call :meth:`PermissionCache.clear` when they change the
+auth tables.
+"""
+import contextlib
+import logging
+import threading
+import time
+
+from Cerebrum import Cache
+from Cerebrum.Utils import Factory, argument_to_sql
+
+logger = logging.getLogger(__name__)
+
+# Change types that invalidates the cache, if they exist
+INVALIDATING_CHANGE_TYPES = (
+    'group_add',
+    'group_rem',
+    'group_mod',
+    'group_destroy',
+    'account_mod',
+    'account_destroy',
+    'entity_name_add',
+    'entity_name_mod',
+    'entity_name_del',
+)
+
+# Change types for changes to the bofhd auth tables
+AUTH_CHANGE_TYPES = (
+    'bofhd_auth_role_add',
+    'bofhd_auth_role_del',
+    'bofhd_auth_opset_mod',
+    'bofhd_auth_target_mod',
+)
+
+
+def _has_pending_changes(db):
+    """ Check if a database connection has unwritten change log entries. """
+    return bool(getattr(db, 'messages', None))
+
+
+def _in_write_transaction(db):
+    """ Check if a database connection has written to the database. """
+    if _has_pending_changes(db):
+        return True
+    # A transaction id is only assigned when the transaction writes
+    return db.query_1("SELECT txid_current_if_assigned()") is not None
+
+
+class PermissionCache(object):
+    """ Thread safe, process-wide cache of permission lookups.
+
+    The cache is a collection of named sub-caches (e.g. 'target_permissions'
+    or 'auth_entities'), each of which is a size limited
+    :class:`Cerebrum.Cache.Cache` of hashable keys to values.  Values must
+    never be modified by the caller.
+    """
+
+    # Seconds between each change_log poll
+    poll_interval = 10
+
+    # Number of change ids to re-read on each poll
+    lookback = 10000
+
+    # Max seconds between each cache clear
+    max_age = 60 * 60
+
+    # Max seconds between each cache clear if auth changes are not logged
+    fallback_max_age = 60
+
+    # Max number of values in each sub-cache
+    size = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._caches = {}
+        self._invalidations = 0
+        self._cleared_at = time.time()
+        self._last_poll = 0
+        self._last_change_id = None
+        self._seen_changes = set()
+        self._change_types = None
+
+    def _get_cache(self, name):
+        try:
+            return self._caches[name]
+        except KeyError:
+            return self._caches.setdefault(
+                name,
+                Cache.Cache(mixins=[Cache.cache_mru, Cache.cache_slots],
+                            size=self.size))
+
+    def get(self, db, name, key):
+        """ Look up a cached value.
+
+        :param db: a database connection, for polling the change log
+        :param str name: name of the sub-cache
+        :param key: key of the value
+
+        :raise KeyError:
+            if the value isn't cached, or if `db` has pending changes
+        """
+        if _has_pending_changes(db):
+            # The cache may not reflect changes in this transaction
+            raise KeyError(key)
+        self._refresh(db)
+        return self._get_cache(name)[key]
+
+    def set(self, db, name, key, value):
+        """ Cache a value.
+
+        The value is not cached if `db` has written to the database, as it
+        may depend on uncommitted changes.
+
+        :param db: the database connection that the value was looked up with
+
+        :return: the value
+        """
+        if not _in_write_transaction(db):
+            self._get_cache(name)[key] = value
+        return value
+
+    def clear(self):
+        """ Clear all cached values. """
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        if any(self._caches.values()):
+            logger.debug('clearing permission cache: %r', self.get_stats())
+        for cache in self._caches.values():
+            cache.clear()
+        self._invalidations += 1
+        self._cleared_at = time.time()
+
+    @contextlib.contextmanager
+    def clear_on_change(self, db):
+        """ Clear the cache after a commit or rollback that affects it.
+
+        >>> with permission_cache.clear_on_change(db):
+        ...     db.commit()
+
+        :param db: the database connection to commit or roll back
+        """
+        affected = False
+        if _has_pending_changes(db):
+            change_types = set(self._get_change_types(db)[0])
+            affected = any(m['change_type_id'] in change_types
+                           for m in db.messages)
+        try:
+            yield
+        finally:
+            if affected:
+                self.clear()
+
+    def get_stats(self):
+        """ Get hit/miss stats for each sub-cache.
+
+        :rtype: dict
+        :return: sub-cache name -> dict with hits, misses, hit_rate and size
+        """
+        stats = {}
+        for name, cache in self._caches.items():
+            stats[name] = cache_stats = cache.get_stats()
+            total = cache_stats['hits'] + cache_stats['misses']
+            cache_stats['hit_rate'] = (float(cache_stats['hits']) / total
+                                       if total else 0.0)
+        return stats
+
+    @property
+    def invalidations(self):
+        return self._invalidations
+
+    def _get_change_types(self, db):
+        """ Get change type codes that invalidates the cache.
+
+        :return tuple:
+            A list of change type codes, and a flag that indicates if changes
+            to the auth tables are logged.
+        """
+        if self._change_types is None:
+            clconst = Factory.get('CLConstants')(db)
+            codes = []
+            for name in INVALIDATING_CHANGE_TYPES:
+                if hasattr(clconst, name):
+                    codes.append(int(getattr(clconst, name)))
+            auth_changes = all(hasattr(clconst, name)
+                               for name in AUTH_CHANGE_TYPES)
+            if auth_changes:
+                codes.extend(int(getattr(clconst, name))
+                             for name in AUTH_CHANGE_TYPES)
+            else:
+                logger.info('bofhd auth changes are not logged, permission'
+                            ' cache will be cleared every %d seconds',
+                            self.fallback_max_age)
+            self._change_types = (tuple(codes), auth_changes)
+        return self._change_types
+
+    def _refresh(self, db):
+        """ Poll the change log, and clear the cache if needed. """
+        now = time.time()
+        if now - self._last_poll < self.poll_interval:
+            return
+        with self._lock:
+            if now - self._last_poll < self.poll_interval:
+                # another thread got here first
+                return
+            self._last_poll = now
+
+            change_types, auth_changes = self._get_change_types(db)
+            max_age = self.max_age if auth_changes else self.fallback_max_age
+            if now - self._cleared_at > max_age:
+                self._clear()
+
+            last_id = db.query_1(
+                """
+                  SELECT MAX(change_id)
+                  FROM [:table schema=cerebrum name=change_log]
+                """)
+            if last_id is None:
+                return
+            last_id = int(last_id)
+            binds = {'min_id': max(last_id - self.lookback, 0)}
+            changes = set()
+            if change_types:
+                changes.update(
+                    int(row['change_id']) for row in db.query(
+                        """
+                          SELECT change_id
+                          FROM [:table schema=cerebrum name=change_log]
+                          WHERE change_id > :min_id AND {}
+                        """.format(argument_to_sql(change_types,
+                                                   'change_type_id',
+                                                   binds, int)),
+                        binds))
+            if self._last_change_id is None or changes - self._seen_changes:
+                # Either a new change, or one that was committed after a
+                # change with a higher id.  We also don't know what happened
+                # before our first poll.
+                self._clear()
+            self._last_change_id = last_id
+            self._seen_changes = changes
+
+
+# The shared cache
+permission_cache = PermissionCache()
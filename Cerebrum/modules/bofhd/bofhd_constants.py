@@ -27,6 +27,36 @@ class _AuthRoleOpCode(Constants._CerebrumCode):
     _lookup_table = '[:table schema=cerebrum name=auth_op_code]'
 
 
+class CLConstants(Constants.CLConstants):
+    """ Change types for the bofhd auth tables.
+
+    These are used to invalidate the bofhd permission cache (see
+    py:mod:`Cerebrum.modules.bofhd.auth_cache`).
+    """
+
+    bofhd_auth_role_add = Constants._ChangeTypeCode(
+        'bofhd_auth_role', 'add',
+        'granted op set to %(subject)s',
+        ("op_set_id=%(int:op_set_id)s", "op_target_id=%(int:op_target_id)s"),
+    )
+
+    bofhd_auth_role_del = Constants._ChangeTypeCode(
+        'bofhd_auth_role', 'remove',
+        'revoked op set from %(subject)s',
+        ("op_set_id=%(int:op_set_id)s", "op_target_id=%(int:op_target_id)s"),
+    )
+
+    bofhd_auth_opset_mod = Constants._ChangeTypeCode(
+        'bofhd_auth_opset', 'modify',
+        'modified op set %(subject)s',
+    )
+
+    bofhd_auth_target_mod = Constants._ChangeTypeCode(
+        'bofhd_auth_target', 'modify',
+        'modified op target %(subject)s',
+    )
+
+
 class Constants(Constants.Constants):
 
     AuthRoleOp = _AuthRoleOpCode
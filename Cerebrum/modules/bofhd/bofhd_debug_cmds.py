@@ -34,6 +34,7 @@ import time
 from Cerebrum import Errors
 from Cerebrum.modules.bofhd.errors import CerebrumError
 from Cerebrum.modules.bofhd.auth import BofhdAuth
+from Cerebrum.modules.bofhd.auth_cache import permission_cache
 from Cerebrum.modules.bofhd.bofhd_core import BofhdCommandBase
 from Cerebrum.modules.bofhd import cmd_param
 
@@ -85,6 +86,8 @@ class BofhdExtension(BofhdCommandBase):
                     'Echo binary input, and return some binary output.'
                     ' NOTE: Input will probably not be binary/bytestring,'
                     ' since few clients implement this.',
+                'debug_auth_cache_stats':
+                    'Show hit rates for the shared permission cache',
             }
         }
 
@@ -241,3 +244,20 @@ class BofhdExtension(BofhdCommandBase):
             'repr': repr(bytestring),
             'bytes': bytearray(b'abcæøå'),
         }
+
+    #
+    # debug auth_cache_stats
+    #
+    all_commands['debug_auth_cache_stats'] = cmd_param.Command(
+        ("debug", "auth_cache_stats"),
+        fs=cmd_param.FormatSuggestion(
+            '%-20s %8d %8d %8.2f %8d',
+            ('name', 'hits', 'misses', 'hit_rate', 'size'),
+            hdr='%-20s %8s %8s %8s %8s' % ('Cache', 'Hits', 'Misses',
+                                           'Hit rate', 'Size'))
+    )
+
+    def debug_auth_cache_stats(self, operator):
+        """ Show permission cache stats. """
+        stats = permission_cache.get_stats()
+        return [dict(stats[name], name=name) for name in sorted(stats)]
@@ -94,6 +94,7 @@ from Cerebrum import (
 from Cerebrum.Utils import Factory
 from Cerebrum.modules import statsd
 from Cerebrum.modules.bofhd import protocol
+from Cerebrum.modules.bofhd.auth_cache import permission_cache
 from Cerebrum.modules.bofhd.errors import (
     CerebrumError,
     ServerRestartedError,
@@ -148,16 +149,20 @@ class BofhdRequestHandler(SimpleXMLRPCRequestHandler, object):
     def db_rollback(self):
         u""" Rolls back database transaction in `self.db`. """
         try:
-            return self.__db.rollback()
+            db = self.__db
         except AttributeError:
             return None
+        with permission_cache.clear_on_change(db):
+            return db.rollback()
 
     def db_commit(self):
         u""" Commits database transaction in `self.db`. """
         try:
-            return self.__db.commit()
+            db = self.__db
         except AttributeError:
             return None
+        with permission_cache.clear_on_change(db):
+            return db.commit()
 
     db = property(fget=db_get, fdel=db_close, doc=db_get.__doc__)
 
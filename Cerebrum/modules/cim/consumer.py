@@ -48,6 +48,8 @@ class CimConsumer(evhandlers.EventLogConsumer):
     def __init__(self, cim_config, cim_mock=False, **kwargs):
         self._config = cim_config
         self._mock = cim_mock
+        kwargs.setdefault('retry_delay',
+                          cim_config.eventcollector.failed_delay)
         super(CimConsumer, self).__init__(**kwargs)
 
     def handle_event(self, event):
@@ -37,6 +37,7 @@ from .processes import ProcessLoggingMixin
 from .processes import ProcessLoopMixin
 from .processes import ProcessQueueMixin
 from .processes import QueueListener
+from .retry import RETRY_DELAY
 
 
 class EventItem(object):
@@ -337,6 +338,16 @@ class EventLogConsumer(DBConsumer):
     The actual event handling is abstract (`handle_event`), and should be
     implemented in subclasses.
     """
+
+    def __init__(self, retry_delay=RETRY_DELAY, **kwargs):
+        """
+        :param int retry_delay:
+            Seconds to wait before retrying a failed event.  The delay is
+            doubled for each subsequent failure.
+        """
+        self.retry_delay = retry_delay
+        super(EventLogConsumer, self).__init__(**kwargs)
+
     def _lock_event(self, event_id):
         try:
             self.db.lock_event(event_id)
@@ -346,7 +357,7 @@ class EventLogConsumer(DBConsumer):
 
     def _release_event(self, event_id):
         try:
-            self.db.release_event(event_id)
+            self.db.release_event(event_id, retry_delay=self.retry_delay)
             return True
         except Errors.NotFoundError:
             return False
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Retry scheduling for event tables.
+
+Event tables (``event_log``, ``events``) keep a ``next_attempt_at`` timestamp
+that tells when an event is due for processing.  When an event fails, the next
+attempt is postponed with a truncated binary exponential backoff:
+
+>>> [retry_delay(n, 60, 3600) for n in range(1, 8)]
+[60, 120, 240, 480, 960, 1920, 3600]
+
+Events that have failed too many times get a NULL ``next_attempt_at``, and are
+never due again (unless their failed count is reset).
+"""
+from Cerebrum.utils.backoff import Backoff, Exponential, Factor, Truncate
+
+
+RETRY_DELAY = 20 * 60
+""" Seconds to wait before retrying a failed event (first failure). """
+
+MAX_RETRY_DELAY = 12 * 60 * 60
+""" Upper bound for the retry delay of events that keep failing. """
+
+
+def retry_delay(failed, delay=RETRY_DELAY, max_delay=MAX_RETRY_DELAY):
+    """
+    Get the retry delay after a given number of failed attempts.
+
+    :param int failed: number of failed attempts, including the last one
+    :param int delay: seconds to wait after the first failure
+    :param int max_delay: maximum number of seconds to wait
+
+    :rtype: int
+    """
+    get_backoff = Backoff(Exponential(2), Factor(delay), Truncate(max_delay))
+    return get_backoff(failed)
+
+
+def sql_retry_time(fail_limit=None):
+    """
+    Get an SQL expression for the next attempt after a failure.
+
+    The expression is meant for an ``UPDATE ... SET next_attempt_at = <expr>``
+    statement, and matches :func:`retry_delay` for the number of failed
+    attempts *after* the update.  It requires the binds ``retry_delay`` and
+    ``max_retry_delay`` (seconds), as well as ``fail_limit`` if given.
+
+    :param int fail_limit:
+        If given, events that reach this number of failed attempts get a NULL
+        next attempt.
+
+    :rtype: str
+    """
+    expr = ("[:now] + interval '1 second' * "
+            "LEAST(:retry_delay * power(2, failed), :max_retry_delay)")
+    if fail_limit:
+        expr = ("CASE WHEN failed + 1 >= :fail_limit THEN NULL "
+                "ELSE {} END".format(expr))
+    return expr
@@ -30,7 +30,7 @@ from .config import load_publisher_config
 from .config import load_formatter_config
 from .scim import EventScimFormatter
 
-__version__ = '1.0'
+__version__ = '1.1'
 
 
 # Hard coded value from the SQL NOTIFY trigger
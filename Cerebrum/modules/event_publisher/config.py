@@ -24,6 +24,7 @@ event_daemon:
  - event_publisher: {...}
  - event_formatter: {...}
  - event_daemon_collector: {...}
+ - event_daemon_batch: {...}
 
 """
 from Cerebrum.config.loader import read, read_config
@@ -68,6 +69,29 @@ class EventCollectorConfig(Configuration):
              'processesed be before we enqueue it'))
 
 
+class EventBatchConfig(Configuration):
+    """ Configuration of the batch publisher. """
+
+    batch_size = ConfigDescriptor(
+        Integer,
+        minval=1,
+        default=500,
+        doc='How many events each worker claims and publishes at a time')
+
+    poll_interval = ConfigDescriptor(
+        Integer,
+        minval=1,
+        default=10,
+        doc=('How long (seconds) to wait for new events after the event '
+             'table has been drained'))
+
+    metrics_interval = ConfigDescriptor(
+        Integer,
+        minval=1,
+        default=60,
+        doc='How often (in seconds) we report the number of pending events')
+
+
 class EventDaemonConfig(Configuration):
 
     event_publisher = ConfigDescriptor(
@@ -82,6 +106,10 @@ class EventDaemonConfig(Configuration):
         Namespace,
         config=EventCollectorConfig)
 
+    event_daemon_batch = ConfigDescriptor(
+        Namespace,
+        config=EventBatchConfig)
+
 
 def _load_partial_config(cls, root_name, filepath):
     """ Try to load a given config into a config class `cls`. """
@@ -23,6 +23,10 @@
 This consumer implementation takes any message published to the event_log, and
 re-publishes it using the specified AMQP client implementation/configuration.
 
+The `EventBatchPublisher` is an alternative to the queue based processes
+(`EventListener`, `EventCollector` and `EventConsumer`).  It claims, publishes
+and removes events in batches.
+
 """
 # import json
 import datetime
@@ -30,8 +34,14 @@ import time
 
 from Cerebrum import Errors
 from Cerebrum.Utils import Factory
+from Cerebrum.modules import statsd
 from Cerebrum.modules.event import evhandlers
 from Cerebrum.modules.event.errors import EventExecutionException
+from Cerebrum.modules.event.processes import (ProcessDBMixin,
+                                              ProcessLoggingMixin,
+                                              ProcessLoopMixin)
+from Cerebrum.modules.event.retry import RETRY_DELAY
+from Cerebrum.modules.statsd import config as statsd_config
 from Cerebrum.utils.funcwrap import memoize
 
 from .eventdb import EventsAccessor, from_row
@@ -40,11 +50,20 @@ from . import EVENT_CHANNEL, get_client, get_formatter
 
 class EventConsumer(evhandlers.DBConsumer):
 
-    def __init__(self, publisher_config, formatter_config, **kwargs):
+    def __init__(self, publisher_config, formatter_config,
+                 collector_config=None, **kwargs):
         self.publisher_config = publisher_config
         self.formatter_config = formatter_config
+        self.collector_config = collector_config
         super(EventConsumer, self).__init__(**kwargs)
 
+    @property
+    def retry_delay(self):
+        """ Seconds to wait before retrying a failed event. """
+        if self.collector_config is None:
+            return RETRY_DELAY
+        return self.collector_config['failed_delay']
+
     @property
     @memoize
     def event_db(self):
@@ -72,7 +91,8 @@ class EventConsumer(evhandlers.DBConsumer):
     def _release_event(self, identifier):
         """ release lock on the event. """
         try:
-            self.event_db.fail_count_inc(identifier)
+            self.event_db.fail_count_inc(identifier,
+                                         retry_delay=self.retry_delay)
             self.event_db.release_event(identifier)
             return True
         except Errors.NotFoundError:
@@ -155,3 +175,209 @@ class EventCollector(evhandlers.DBProducer):
                 break
 
             time.sleep(self.timeout)
+
+
+class EventBatchPublisher(ProcessDBMixin, ProcessLoopMixin,
+                          ProcessLoggingMixin):
+    """ Claim, publish and remove events in batches.
+
+    Each iteration of the process loop:
+
+    1. claims up to `batch_size` events in one statement,
+    2. formats the events,
+    3. publishes the messages using a single broker connection, and
+    4. removes the published events in one statement.
+
+    Events are partitioned between workers by subject_id, so that all events
+    for a given entity are published by the same worker, in event order.  If
+    an event fails, later events for the same subject are held back until the
+    failed event has been retried.
+
+    Throughput and the number of pending events are logged, and reported as
+    statsd metrics (prefix 'event_publisher').
+    """
+
+    def __init__(self, publisher_config, formatter_config, collector_config,
+                 batch_config, partition=0, num_partitions=1, **kwargs):
+        """
+        :param publisher_config: config for `get_client`
+        :param formatter_config: config for `get_formatter`
+        :param EventCollectorConfig collector_config: retry settings
+        :param EventBatchConfig batch_config: batch settings
+        :param int partition: the partition handled by this worker
+        :param int num_partitions: the total number of workers
+        """
+        self.publisher_config = publisher_config
+        self.formatter_config = formatter_config
+        self.collector_config = collector_config
+        self.batch_config = batch_config
+        self.partition = partition
+        self.num_partitions = num_partitions
+        self._last_report = None
+        super(EventBatchPublisher, self).__init__(**kwargs)
+
+    @property
+    @memoize
+    def event_db(self):
+        return EventsAccessor(self.db)
+
+    @property
+    @memoize
+    def publisher(self):
+        """ Message Queue client. """
+        return get_client(self.publisher_config)
+
+    @property
+    @memoize
+    def formatter(self):
+        return get_formatter(self.formatter_config)
+
+    @property
+    @memoize
+    def stats(self):
+        """ statsd client for metrics. """
+        try:
+            config = statsd_config.load_config()
+        except Exception as e:
+            self.logger.error("could not load statsd config (%r)", e)
+            config = statsd_config.StatsConfig()
+        return statsd.make_client(config, prefix='event_publisher')
+
+    def _format(self, rows):
+        """ Format claimed event rows.
+
+        :return tuple:
+            Returns a list of (event_id, routing_key, message) tuples, a list
+            of event ids that could not be formatted, and a list of event ids
+            that were held back.
+        """
+        messages, failed, skipped = [], [], []
+        failed_subjects = set()
+        for row in rows:
+            event_id = int(row['event_id'])
+            subject_id = int(row['subject_id'])
+            if subject_id in failed_subjects:
+                skipped.append(event_id)
+                continue
+            try:
+                event = from_row(row)
+                message = self.formatter(event)
+                routing_key = self.formatter.get_key(event.event_type,
+                                                     event.subject)
+            except Exception:
+                self.logger.warning('unable to format event_id=%d', event_id,
+                                    exc_info=True)
+                failed.append(event_id)
+                failed_subjects.add(subject_id)
+                continue
+            messages.append((event_id, routing_key, message))
+        return messages, failed, skipped
+
+    def _publish(self, messages):
+        """ Publish formatted messages, in order.
+
+        Publishing stops at the first message that fails.
+
+        :return list: the event ids of the published messages
+        """
+        published = []
+        if not messages:
+            return published
+        try:
+            with self.publisher as client:
+                for event_id, routing_key, message in messages:
+                    client.publish(routing_key, message)
+                    published.append(event_id)
+                    self.logger.debug('Message published (event_id=%d,'
+                                      ' msg jti=%s)', event_id,
+                                      message['jti'])
+        except Exception:
+            self.logger.warning('unable to publish event_id=%d',
+                                messages[len(published)][0], exc_info=True)
+        return published
+
+    def publish_batch(self):
+        """ Claim, publish and remove one batch of events.
+
+        :return int: the number of claimed events
+        """
+        start = time.time()
+        self.db.rollback()
+        rows = self.event_db.claim_events(
+            self.batch_config['batch_size'],
+            fail_limit=self.collector_config['failed_limit'],
+            failed_delay=self.collector_config['failed_delay'],
+            partition=self.partition,
+            num_partitions=self.num_partitions)
+        # The events must remain taken if we die while publishing
+        self.db.commit()
+        if not rows:
+            return 0
+
+        messages, failed, skipped = self._format(rows)
+        published = self._publish(messages)
+        if len(published) < len(messages):
+            # Publishing stops at the first failure - the remaining messages
+            # were never attempted, and are released without a failure.
+            failed.append(messages[len(published)][0])
+            skipped.extend(event_id for event_id, _, _
+                           in messages[len(published) + 1:])
+
+        self.event_db.delete_events(published)
+        self.event_db.fail_events(
+            failed,
+            fail_limit=self.collector_config['failed_limit'],
+            retry_delay=self.collector_config['failed_delay'])
+        self.event_db.release_events(skipped)
+        self.db.commit()
+
+        duration = time.time() - start
+        self.logger.info(
+            'Published %d of %d events in %.2fs (%.1f events/s),'
+            ' %d failed, %d held back',
+            len(published), len(rows), duration,
+            len(published) / duration if duration else 0,
+            len(failed), len(skipped))
+        with self.stats.pipeline() as stats:
+            stats.incr('published', len(published))
+            stats.incr('failed', len(failed))
+            stats.timing('batch', int(duration * 1000))
+        return len(rows)
+
+    def report_pending(self):
+        """ Report the number of pending events (queue depth). """
+        if self.partition != 0:
+            # The count covers all partitions
+            return
+        now = time.time()
+        if (self._last_report is not None and
+                now - self._last_report <
+                self.batch_config['metrics_interval']):
+            return
+        self._last_report = now
+        pending = self.event_db.count_unprocessed(
+            fail_limit=self.collector_config['failed_limit'])
+        self.db.rollback()
+        self.logger.info('%d events pending', pending)
+        self.stats.gauge('pending', pending)
+
+    def process(self):
+        start = time.time()
+        try:
+            claimed = self.publish_batch()
+            self.report_pending()
+        except Exception:
+            self.logger.error('unable to process events', exc_info=True)
+            self.db.rollback()
+            claimed = 0
+
+        if claimed >= self.batch_config['batch_size']:
+            # There are probably more events waiting
+            return
+
+        # Wait for poll_interval seconds, by sleeping in self.timeout
+        # intervals
+        while self.running:
+            if (time.time() - start) > self.batch_config['poll_interval']:
+                break
+            time.sleep(self.timeout)
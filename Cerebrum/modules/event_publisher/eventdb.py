@@ -24,9 +24,26 @@ import json
 import six
 
 from Cerebrum.DatabaseAccessor import DatabaseAccessor
+from Cerebrum.Utils import argument_to_sql
+from Cerebrum.modules.event.retry import (MAX_RETRY_DELAY,
+                                          RETRY_DELAY,
+                                          sql_retry_time)
 from .event import Event, EventType, EntityRef
 
 
+def _event_binds(event_type, subject_id, subject_type, subject_ident,
+                 schedule=None, data=None):
+    """ Get event table binds from `EventsAccessor.create_event` args. """
+    return {
+        'event_type': six.text_type(event_type),
+        'schedule': schedule,
+        'subject_id': int(subject_id),
+        'subject_ident': six.text_type(subject_ident),
+        'subject_type': six.text_type(subject_type),
+        'event_data': json.dumps(data),
+    }
+
+
 class EventsAccessor(DatabaseAccessor):
     """ Database access to the event tables. """
 
@@ -54,7 +71,9 @@ class EventsAccessor(DatabaseAccessor):
             Additional JSON-serializable data to bundle with this event.
 
         """
-        binds = dict()
+        binds = _event_binds(event_type, subject_id, subject_type,
+                             subject_ident, schedule=schedule, data=data)
+        binds['event_id'] = int(self.nextval('events_seq'))
         query = """
         INSERT INTO [:table schema=cerebrum name=events]
           (event_id, event_type, schedule,
@@ -66,16 +85,29 @@ class EventsAccessor(DatabaseAccessor):
            :event_data)
         RETURNING event_id
         """
+        return self.query_1(query, binds)
 
-        binds['event_id'] = int(self.nextval('events_seq'))
-        binds['event_type'] = six.text_type(event_type)
-        binds['schedule'] = schedule
-        binds['subject_id'] = int(subject_id)
-        binds['subject_ident'] = six.text_type(subject_ident)
-        binds['subject_type'] = six.text_type(subject_type)
-        binds['event_data'] = json.dumps(data)
+    def create_events(self, events):
+        """ Store multiple new events.
 
-        return self.query_1(query, binds)
+        Event ids are allocated, and the events are inserted, in bulk.
+
+        :param events:
+            A sequence of dicts, with keyword arguments to `create_event`.
+
+        :rtype: list
+        :return: the event ids of the new events
+        """
+        rows = [_event_binds(**e) for e in events]
+        event_ids = self.nextvals('events_seq', len(rows))
+        for row, event_id in zip(rows, event_ids):
+            row['event_id'] = event_id
+        self.insert_many(
+            '[:table schema=cerebrum name=events]',
+            ('event_id', 'event_type', 'schedule', 'subject_id',
+             'subject_ident', 'subject_type', 'event_data'),
+            rows)
+        return event_ids
 
     def get_event(self, event_id):
         return self.query_1(
@@ -137,13 +169,21 @@ class EventsAccessor(DatabaseAccessor):
         self.execute(
             """
             UPDATE [:table schema=cerebrum name=events]
-            SET taken_time = NULL
-            WHERE taken_time IS NOT NULL""")
+            SET taken_time = NULL,
+                next_attempt_at = [:now]
+            WHERE taken_time IS NOT NULL
+              AND next_attempt_at IS NOT NULL""")
 
-    def fail_count_inc(self, event_id):
+    def fail_count_inc(self, event_id, retry_delay=RETRY_DELAY,
+                       max_retry_delay=MAX_RETRY_DELAY):
         """ Increment the failed count on an event
 
+        The next attempt is postponed by `retry_delay` seconds, doubled for
+        each previous failure.
+
         :param int event_id: The event id
+        :param int retry_delay: seconds to wait after the first failure
+        :param int max_retry_delay: maximum number of seconds to wait
 
         :rtype: int
         :return: Affected event id
@@ -151,11 +191,14 @@ class EventsAccessor(DatabaseAccessor):
         self.query_1(
             """
             UPDATE [:table schema=cerebrum name=events]
-            SET failed = failed + 1
+            SET failed = failed + 1,
+                next_attempt_at = {}
             WHERE event_id = :event_id
             RETURNING event_id
-            """,
-            {'event_id': int(event_id)})
+            """.format(sql_retry_time()),
+            {'event_id': int(event_id),
+             'retry_delay': int(retry_delay),
+             'max_retry_delay': int(max_retry_delay)})
 
     def fail_count_reset(self, event_id):
         """Reset the failed count on an event
@@ -168,7 +211,8 @@ class EventsAccessor(DatabaseAccessor):
         return self.query_1(
             """
             UPDATE [:table schema=cerebrum name=events]
-            SET failed = 0
+            SET failed = 0,
+                next_attempt_at = [:now]
             WHERE event_id = :event_id
             RETURNING event_id
             """,
@@ -183,6 +227,9 @@ class EventsAccessor(DatabaseAccessor):
             fetchall=True):
         """ Collect events that has not been processed.
 
+        Events that are waiting for a retry (see `fail_count_inc`) are never
+        included.
+
         :param int fail_limit:
             Select only events that have failed a number of times lower than
             fail_limit. Default None.
@@ -208,7 +255,7 @@ class EventsAccessor(DatabaseAccessor):
         {where!s}
         """
         binds = dict()
-        criteria = list()
+        criteria = ['next_attempt_at <= [:now]']
 
         if fail_limit:
             criteria.append('failed < :failed_limit')
@@ -235,13 +282,175 @@ class EventsAccessor(DatabaseAccessor):
         if not include_taken:
             criteria.append('taken_time IS NULL')
 
-        where = "WHERE " + " AND ".join(criteria) if criteria else ""
+        where = "WHERE " + " AND ".join(criteria)
 
         return self.query(
             query_fmt.format(where=where),
             binds,
             fetchall=fetchall)
 
+    def claim_events(self, limit, fail_limit=None,
+                     failed_delay=RETRY_DELAY, partition=None,
+                     num_partitions=None):
+        """ Take the next `limit` due events for processing.
+
+        Events are selected and marked as taken in one statement.  Rows that
+        are locked by another transaction are skipped, so that multiple
+        workers can claim events concurrently.
+
+        A claimed event is not due again until `failed_delay` seconds has
+        passed.  Unless the event is removed (or failed, see `fail_events`)
+        before that, it will be claimed again.
+
+        An event is not claimed if an older event for the same subject is
+        waiting for a retry.  Events for the same subject are therefore
+        claimed in event_id order, even if some of them fail.
+
+        :param int limit:
+            The maximum number of events to claim.
+
+        :param int fail_limit:
+            Claim only events that have failed fewer than `fail_limit` times.
+
+        :param int failed_delay:
+            How long (in seconds) a claim is held.
+
+        :param int partition:
+            Claim only events where `subject_id % num_partitions` equals
+            `partition`.
+
+        :param int num_partitions:
+            The number of partitions (workers) in use.
+
+        :rtype: list
+        :return: the claimed rows, sorted by event_id
+        """
+        binds = {'limit': int(limit)}
+        criteria = ['e.next_attempt_at <= [:now]']
+        waiting = ['p.subject_id = e.subject_id',
+                   'p.event_id < e.event_id',
+                   'p.next_attempt_at > [:now]']
+
+        if fail_limit:
+            criteria.append('e.failed < :fail_limit')
+            waiting.append('p.failed < :fail_limit')
+            binds['fail_limit'] = int(fail_limit)
+
+        if num_partitions and num_partitions > 1:
+            criteria.append('mod(e.subject_id, :num_partitions) = :partition')
+            binds['num_partitions'] = int(num_partitions)
+            binds['partition'] = int(partition or 0)
+
+        criteria.append(
+            "NOT EXISTS (SELECT 1 FROM [:table schema=cerebrum name=events] p"
+            " WHERE {})".format(' AND '.join(waiting)))
+
+        query = """
+        UPDATE [:table schema=cerebrum name=events]
+        SET taken_time = [:now],
+            next_attempt_at = [:now] + interval '{delay:d}s'
+        WHERE event_id IN (
+          SELECT e.event_id
+          FROM [:table schema=cerebrum name=events] e
+          WHERE {where}
+          ORDER BY e.event_id
+          LIMIT :limit
+          FOR UPDATE SKIP LOCKED
+        )
+        RETURNING *
+        """.format(delay=int(failed_delay), where=' AND '.join(criteria))
+        return sorted(self.query(query, binds),
+                      key=lambda row: int(row['event_id']))
+
+    def delete_events(self, event_ids):
+        """ Remove multiple (completed) events.
+
+        :param event_ids: The events to remove.
+
+        :rtype: int
+        :return: the number of removed events
+        """
+        if not event_ids:
+            return 0
+        binds = dict()
+        return len(self.query(
+            """
+            DELETE FROM [:table schema=cerebrum name=events]
+            WHERE {}
+            RETURNING event_id
+            """.format(argument_to_sql(event_ids, 'event_id', binds, int)),
+            binds))
+
+    def fail_events(self, event_ids, fail_limit=None, retry_delay=RETRY_DELAY,
+                    max_retry_delay=MAX_RETRY_DELAY):
+        """ Register a failed attempt for multiple taken events.
+
+        The events are released, and their next attempt is postponed by
+        `retry_delay` seconds, doubled for each previous failure.
+
+        :param event_ids: The events that failed.
+        :param int fail_limit: give up events that fail this many times
+        :param int retry_delay: seconds to wait after the first failure
+        :param int max_retry_delay: maximum number of seconds to wait
+        """
+        if not event_ids:
+            return
+        binds = {
+            'retry_delay': int(retry_delay),
+            'max_retry_delay': int(max_retry_delay),
+        }
+        if fail_limit:
+            binds['fail_limit'] = int(fail_limit)
+        self.execute(
+            """
+            UPDATE [:table schema=cerebrum name=events]
+            SET taken_time = NULL,
+                failed = failed + 1,
+                next_attempt_at = {retry}
+            WHERE {where}
+            """.format(
+                retry=sql_retry_time(fail_limit),
+                where=argument_to_sql(event_ids, 'event_id', binds, int)),
+            binds)
+
+    def release_events(self, event_ids):
+        """ Release multiple taken events without registering a failure.
+
+        :param event_ids: The events to release.
+        """
+        if not event_ids:
+            return
+        binds = dict()
+        self.execute(
+            """
+            UPDATE [:table schema=cerebrum name=events]
+            SET taken_time = NULL,
+                next_attempt_at = [:now]
+            WHERE {}
+            """.format(argument_to_sql(event_ids, 'event_id', binds, int)),
+            binds)
+
+    def count_unprocessed(self, fail_limit=None):
+        """ Count events that has not been processed.
+
+        :param int fail_limit:
+            Count only events that have failed fewer than `fail_limit` times.
+
+        :rtype: int
+        """
+        binds = dict()
+        where = 'WHERE next_attempt_at IS NOT NULL'
+        if fail_limit:
+            where += ' AND failed < :fail_limit'
+            binds['fail_limit'] = int(fail_limit)
+        return int(self.query_1(
+            """
+            SELECT count(*)
+            FROM [:table schema=cerebrum name=events]
+            {}
+            """.format(where),
+            binds))
+
 
 def from_row(row):
     """ Initialize object from a dbrow-like dict. """
@@ -111,10 +111,8 @@ def change_type_to_event(db, change_type, subject_id, dest_id, params):
     return f(msg, change_type)
 
 
-def create_event(db, event_object):
-    """ Write an Event object to the database. """
-    events = EventsAccessor(db)
-
+def _event_to_args(event_object):
+    """ Get `EventsAccessor.create_event` arguments for an Event object. """
     event_data = dict()
     if event_object.attributes:
         event_data['attributes'] = list(event_object.attributes)
@@ -127,13 +125,27 @@ def create_event(db, event_object):
              'object_ident': o.ident, }
             for o in event_object.objects]
 
-    return events.create_event(
-        event_object.event_type.verb,
-        event_object.subject.entity_id,
-        event_object.subject.entity_type,
-        event_object.subject.ident,
-        schedule=event_object.scheduled,
-        data=event_data)
+    return {
+        'event_type': event_object.event_type.verb,
+        'subject_id': event_object.subject.entity_id,
+        'subject_type': event_object.subject.entity_type,
+        'subject_ident': event_object.subject.ident,
+        'schedule': event_object.scheduled,
+        'data': event_data,
+    }
+
+
+def create_event(db, event_object):
+    """ Write an Event object to the database. """
+    events = EventsAccessor(db)
+    return events.create_event(**_event_to_args(event_object))
+
+
+def create_events(db, event_objects):
+    """ Write multiple Event objects to the database. """
+    events = EventsAccessor(db)
+    return events.create_events(
+        [_event_to_args(e) for e in event_objects])
 
 
 class EventLog(ChangeLog):
@@ -186,8 +198,8 @@ class EventLog(ChangeLog):
         """ Commit new events to the event log. """
         super(EventLog, self).write_log()
 
-        for e in merge_events(self.__events):
-            create_event(self, e)
+        if self.__events:
+            create_events(self, merge_events(self.__events))
 
         self.__events = []
 
@@ -91,6 +91,9 @@ class GregImporter(object):
     # Map consent name to `Cerebrum.group.template.GroupTemplate`
     CONSENT_GROUPS = {}
 
+    # An optional, shared ExternalIdIndex for finding persons.
+    person_index = None
+
     mapper = GregMapper()
 
     def __init__(self, db, client):
@@ -132,7 +135,7 @@ class GregImporter(object):
 
     def get_person(self, greg_person):
         """ Find matching person from a Greg person dict. """
-        search = PersonMatcher(self.MATCH_ID_TYPES)
+        search = PersonMatcher(self.MATCH_ID_TYPES, index=self.person_index)
         criterias = tuple(self.mapper.get_person_ids(greg_person))
         if not criterias:
             raise ValueError('invalid person: no external_ids')
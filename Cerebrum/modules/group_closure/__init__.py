@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Materialized transitive closure of group memberships.
+
+This module keeps a flattened copy of the group_member table in
+``group_member_closure``, with one row for every direct and indirect
+membership.  Indirect membership lookups can then be answered with a single
+indexed query, rather than one query for each level of nesting.
+
+Configuration
+-------------
+The database module ``design/mod_group_closure.sql`` must be installed, and
+the group mixin must be added to CLASS_GROUP:
+
+::
+
+    CLASS_GROUP = (
+        ...
+        'Cerebrum.modules.group_closure.mixins/GroupClosureMixin',
+        'Cerebrum.Group/Group',
+    )
+
+The closure is maintained incrementally by the mixin.  Memberships that are
+changed without using the Group API (e.g. by SQL migrations) must be followed
+by a rebuild::
+
+    contrib/group-closure.py rebuild --commit
+
+The ``check`` command of the same script reports any rows that differ from
+the group_member table.
+"""
+
+# Database module version (see makedb.py)
+__version__ = '1.0'
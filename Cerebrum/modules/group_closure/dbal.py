@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Database access to the group_member_closure table.
+
+The closure is computed from group_member with a recursive query that only
+follows *group* members, and is limited to :py:data:`MAX_DEPTH` levels of
+nesting.  Incremental updates:
+
+Adding a membership (g, m)
+    Every ancestor of g (and g itself) gets every descendant of m (and m
+    itself) as a member, unless the new depth exceeds :py:data:`MAX_DEPTH`.
+    Existing rows keep the smallest depth.
+
+Removing a membership (g, m)
+    Only rows where the group is an ancestor of g and the member is a
+    descendant of m can be affected.  These rows are deleted, and then
+    re-computed from the remaining group_member rows.
+"""
+import logging
+
+from Cerebrum.DatabaseAccessor import DatabaseAccessor
+from Cerebrum.Utils import Factory, argument_to_sql
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of nested groups to follow when re-computing the closure.
+MAX_DEPTH = 20
+
+_closure_table = '[:table schema=cerebrum name=group_member_closure]'
+
+# Re-computes closure rows from group_member.  Roots must be a filter on
+# `gi.group_id`, and members a filter on `gm.member_id`.
+_computed_cte = """
+  WITH RECURSIVE subgroups(root_id, group_id, depth) AS (
+    SELECT gi.group_id, gi.group_id, 0
+    FROM [:table schema=cerebrum name=group_info] gi
+    WHERE {roots}
+    UNION
+    SELECT sg.root_id, gm.member_id, sg.depth + 1
+    FROM subgroups sg
+    JOIN [:table schema=cerebrum name=group_member] gm
+      ON gm.group_id = sg.group_id AND
+         gm.member_type = :group_type
+    WHERE sg.depth < :max_depth
+  ),
+  computed(group_id, member_id, member_type, min_depth) AS (
+    SELECT sg.root_id, gm.member_id, MIN(gm.member_type), MIN(sg.depth)
+    FROM subgroups sg
+    JOIN [:table schema=cerebrum name=group_member] gm
+      ON gm.group_id = sg.group_id
+    WHERE {members}
+    GROUP BY sg.root_id, gm.member_id
+  )
+"""
+
+
+class GroupClosure(DatabaseAccessor):
+    """ Access to the group_member_closure table. """
+
+    def __init__(self, database):
+        super(GroupClosure, self).__init__(database)
+        self.const = Factory.get('Constants')(database)
+
+    def _cte_binds(self):
+        return {
+            'group_type': int(self.const.entity_group),
+            'max_depth': MAX_DEPTH,
+        }
+
+    def search(self, group_id=None, member_id=None, member_type=None,
+               max_depth=None, fetchall=True):
+        """
+        Search for direct and indirect memberships.
+
+        :param group_id: only include memberships in these groups
+        :param member_id: only include memberships of these members
+        :param member_type: only include members of these entity types
+        :param int max_depth: only include memberships up to this depth
+
+        :returns:
+            rows with group_id, member_id, member_type and min_depth
+        """
+        binds = {}
+        where = []
+        if group_id is not None:
+            where.append(argument_to_sql(group_id, 'group_id', binds, int))
+        if member_id is not None:
+            where.append(argument_to_sql(member_id, 'member_id', binds, int))
+        if member_type is not None:
+            where.append(
+                argument_to_sql(member_type, 'member_type', binds, int))
+        if max_depth is not None:
+            where.append('min_depth <= :max_depth')
+            binds['max_depth'] = int(max_depth)
+        return self.query(
+            """
+              SELECT group_id, member_id, member_type, min_depth
+              FROM {table}
+              {where}
+            """.format(
+                table=_closure_table,
+                where=('WHERE ' + ' AND '.join(where)) if where else ''),
+            binds,
+            fetchall=fetchall)
+
+    def get_parent_group_ids(self, member_id):
+        """ Get all groups where member_id is/are direct or indirect members.
+
+        :rtype: set
+        """
+        return set(int(row['group_id'])
+                   for row in self.search(member_id=member_id))
+
+    def get_subgroup_ids(self, group_id):
+        """ Get all groups that are direct or indirect members of group_id.
+
+        :rtype: set
+        """
+        return set(int(row['member_id'])
+                   for row in self.search(group_id=group_id,
+                                          member_type=self.const.entity_group))
+
+    def add_membership(self, group_id, member_id):
+        """
+        Update the closure after adding a membership.
+
+        The membership must already exist in the group_member table.
+        """
+        binds = {
+            'group_id': int(group_id),
+            'member_id': int(member_id),
+            'max_depth': MAX_DEPTH,
+        }
+        self.execute(
+            """
+              INSERT INTO {table} AS gmc
+                (group_id, member_id, member_type, min_depth)
+              SELECT up.group_id, down.member_id,
+                     MIN(down.member_type), MIN(up.depth + down.depth)
+              FROM (
+                SELECT group_id, min_depth + 1 AS depth
+                FROM {table}
+                WHERE member_id = :group_id
+                UNION ALL
+                SELECT group_id, 0
+                FROM [:table schema=cerebrum name=group_member]
+                WHERE group_id = :group_id AND member_id = :member_id
+              ) up
+              CROSS JOIN (
+                SELECT member_id, member_type, min_depth + 1 AS depth
+                FROM {table}
+                WHERE group_id = :member_id
+                UNION ALL
+                SELECT member_id, member_type, 0
+                FROM [:table schema=cerebrum name=group_member]
+                WHERE group_id = :group_id AND member_id = :member_id
+              ) down
+              WHERE up.depth + down.depth <= :max_depth
+              GROUP BY up.group_id, down.member_id
+              ON CONFLICT (group_id, member_id) DO UPDATE
+                SET min_depth = LEAST(gmc.min_depth, EXCLUDED.min_depth)
+            """.format(table=_closure_table),
+            binds)
+
+    def remove_membership(self, group_id, member_id):
+        """
+        Update the closure after removing a membership.
+
+        The membership must already be removed from the group_member table.
+        """
+        group_id, member_id = int(group_id), int(member_id)
+        ancestors = self.get_parent_group_ids(group_id)
+        ancestors.add(group_id)
+        if member_id in ancestors:
+            # Cyclic memberships - the descendants of member_id may be
+            # removed from the closure by the refresh, and must be fetched
+            # up front.
+            descendants = set(int(row['member_id'])
+                              for row in self.search(group_id=member_id))
+            descendants.add(member_id)
+            self.refresh(ancestors, descendants)
+        else:
+            self.refresh(ancestors, (member_id,),
+                         descendants_of=member_id)
+
+    def remove_group(self, group_id):
+        """
+        Update the closure after removing all memberships of a group.
+        """
+        group_id = int(group_id)
+        ancestors = self.get_parent_group_ids(group_id)
+        ancestors.add(group_id)
+        descendants = set(int(row['member_id'])
+                          for row in self.search(group_id=group_id))
+        descendants.add(group_id)
+        self.refresh(ancestors, descendants)
+
+    def refresh(self, group_ids, member_ids, descendants_of=None):
+        """
+        Re-compute closure rows from the group_member table.
+
+        :param group_ids: groups to re-compute memberships for
+        :param member_ids: members to re-compute memberships for
+        :param int descendants_of:
+            also re-compute memberships for all (current) members of this
+            group
+        """
+        def member_filter(column, binds):
+            clauses = [argument_to_sql(member_ids, column, binds, int)]
+            if descendants_of is not None:
+                binds['descendants_of'] = int(descendants_of)
+                clauses.append(
+                    "{column} IN (SELECT member_id FROM {table}"
+                    " WHERE group_id = :descendants_of)".format(
+                        column=column,
+                        table=_closure_table))
+            return '(' + ' OR '.join(clauses) + ')'
+
+        group_ids = tuple(group_ids)
+        member_ids = tuple(member_ids)
+        if not group_ids or not member_ids:
+            return
+
+        # The descendants_of subquery must see the closure rows *before*
+        # they are deleted, so the new rows are computed first.
+        binds = self._cte_binds()
+        computed = self.query(
+            (_computed_cte + "SELECT * FROM computed").format(
+                roots=argument_to_sql(group_ids, 'gi.group_id', binds, int),
+                members=member_filter('gm.member_id', binds)),
+            binds)
+
+        binds = {}
+        self.execute(
+            """
+              DELETE FROM {table}
+              WHERE {groups} AND {members}
+            """.format(
+                table=_closure_table,
+                groups=argument_to_sql(group_ids, 'group_id', binds, int),
+                members=member_filter('member_id', binds)),
+            binds)
+        self.insert_many(
+            _closure_table,
+            ('group_id', 'member_id', 'member_type', 'min_depth'),
+            computed)
+        logger.debug('refreshed closure for %d groups, %d rows',
+                     len(group_ids), len(computed))
+
+    def rebuild(self):
+        """
+        Re-compute the entire closure from the group_member table.
+
+        :returns int: number of rows in the new closure
+        """
+        self.execute("DELETE FROM {table}".format(table=_closure_table))
+        self.execute(
+            (_computed_cte + """
+              INSERT INTO {table}
+                (group_id, member_id, member_type, min_depth)
+              SELECT group_id, member_id, member_type, min_depth
+              FROM computed
+            """).format(table=_closure_table, roots='1=1', members='1=1'),
+            self._cte_binds())
+        return int(self.query_1(
+            "SELECT COUNT(*) FROM {table}".format(table=_closure_table)))
+
+    def check(self):
+        """
+        Compare the closure table to the group_member table.
+
+        :returns:
+            rows with group_id, member_id, expected_depth and actual_depth
+            for every membership that is missing, superfluous or has the
+            wrong depth.  A missing depth value is None.
+        """
+        return self.query(
+            (_computed_cte + """
+              SELECT
+                COALESCE(c.group_id, gmc.group_id) AS group_id,
+                COALESCE(c.member_id, gmc.member_id) AS member_id,
+                c.min_depth AS expected_depth,
+                gmc.min_depth AS actual_depth
+              FROM computed c
+              FULL OUTER JOIN {table} gmc
+                ON gmc.group_id = c.group_id AND
+                   gmc.member_id = c.member_id
+              WHERE
+                c.group_id IS NULL OR
+                gmc.group_id IS NULL OR
+                c.min_depth != gmc.min_depth OR
+                c.member_type != gmc.member_type
+              ORDER BY group_id, member_id
+            """).format(table=_closure_table, roots='1=1', members='1=1'),
+            self._cte_binds())
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Mixins related to mod_group_closure.
+"""
+from Cerebrum.Group import Group
+from .dbal import GroupClosure
+
+
+class GroupClosureMixin(Group):
+    """
+    Group mixin that maintains, and uses, the group_member_closure table.
+    """
+
+    # Tells Cerebrum.group.memberships to use the closure table
+    has_membership_closure = True
+
+    def add_member(self, member_id):
+        super(GroupClosureMixin, self).add_member(member_id)
+        GroupClosure(self._db).add_membership(self.entity_id, member_id)
+
+    def remove_member_from_group(self, member_id, group_id):
+        super(GroupClosureMixin, self).remove_member_from_group(member_id,
+                                                                group_id)
+        GroupClosure(self._db).remove_membership(group_id, member_id)
+
+    def _add_members(self, member_types):
+        super(GroupClosureMixin, self)._add_members(member_types)
+        self._refresh_closure(member_types)
+
+    def _remove_members(self, member_ids):
+        super(GroupClosureMixin, self)._remove_members(member_ids)
+        self._refresh_closure(member_ids)
+
+    def _refresh_closure(self, member_ids):
+        # Only rows where the group is an ancestor of this group, and the
+        # member is one of the changed members or one of their descendants,
+        # can be affected (see .dbal).  The closure table isn't updated yet,
+        # and still has the ancestors and descendants from before the change.
+        closure = GroupClosure(self._db)
+        ancestors = closure.get_parent_group_ids(self.entity_id)
+        ancestors.add(self.entity_id)
+        members = set(int(x) for x in member_ids)
+        members.update(int(row['member_id'])
+                       for row in closure.search(group_id=members))
+        closure.refresh(ancestors, members)
+
+    def delete(self):
+        group_id = self.entity_id
+        super(GroupClosureMixin, self).delete()
+        GroupClosure(self._db).remove_group(group_id)
+
+    def _get_parent_group_ids(self, member_id):
+        return GroupClosure(self._db).get_parent_group_ids(member_id)
+
+    def _get_subgroup_ids(self, group_id):
+        ids = GroupClosure(self._db).get_subgroup_ids(group_id)
+        if isinstance(group_id, (tuple, set, frozenset, list)):
+            ids.update(int(x) for x in group_id)
+        else:
+            ids.add(int(group_id))
+        return ids
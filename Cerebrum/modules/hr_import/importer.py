@@ -62,6 +62,9 @@ class AbstractImport(object):
     # (e.g.  DFO_PID for DFO_SAP)
     MATCH_ID_TYPES = ()
 
+    # An optional, shared ExternalIdIndex for finding persons.
+    person_index = None
+
     def __init__(self, db, datasource, mapper, source_system):
         self.db = db
         self._datasource = datasource
@@ -85,7 +88,7 @@ class AbstractImport(object):
 
     def find_entity(self, hr_object):
         """ Find matching Cerebrum object for the given hr_object. """
-        search = PersonMatcher(self.MATCH_ID_TYPES)
+        search = PersonMatcher(self.MATCH_ID_TYPES, index=self.person_index)
         criterias = tuple(hr_object.ids)
         if not criterias:
             raise ValueError('invalid person: no external_ids')
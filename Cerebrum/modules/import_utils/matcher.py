@@ -50,28 +50,247 @@ Examples:
     # without match criterias
     find_person = PersonMatcher()
     person = find_person([('GREG_PID', '1'), ('NO_PASSNR', '3')])
+
+    # with a preloaded index of all person external ids
+    index = ExternalIdIndex('person')
+    find_person = PersonMatcher(['GREG_PID', 'DFO_PID'], index=index)
+    person = find_person([('GREG_PID', '1'), ('NO_PASSNR', '3')])
 """
 import logging
+import time
 
 import six
 
 from Cerebrum import Errors
+from Cerebrum.Entity import EntityExternalId
 from Cerebrum.Utils import Factory
 
 logger = logging.getLogger(__name__)
 
 
+class ExternalIdIndex(object):
+    """
+    In-memory index of external ids.
+
+    Maps (id_type, external_id) to entity_ids for all external ids of a given
+    entity type.  The index is loaded on first use, and is refreshed from the
+    change log at most every *max_age* seconds.  Only entities with changed
+    external ids are re-read on refresh.
+
+    The index uses its own database connection, so that it only ever sees
+    committed changes.  As change ids are allocated before commit, changes
+    may show up in the change log out of order - each refresh re-reads the
+    last *lookback* change ids, and updates entities with changes that
+    haven't been seen before.
+
+    A lookup may be up to *max_age* seconds out of date, or more if more
+    than *lookback* external id changes are committed out of order.  Index
+    hits are trusted by :class:`EntityMatcher`, so external ids that are
+    moved between entities should not be looked up within *max_age* seconds
+    of the change.
+    """
+
+    # Change types that may change the index
+    change_types = ('entity_ext_id_add', 'entity_ext_id_mod',
+                    'entity_ext_id_del')
+
+    # Max number of entities to re-read in one query
+    chunk_size = 1000
+
+    # Number of change ids to re-read on each refresh
+    lookback = 1000
+
+    def __init__(self, entity_type, id_types=None, max_age=60, db=None):
+        """
+        :param entity_type: entity type to index external ids for
+        :param id_types: only index these id types (default: all)
+        :param max_age: seconds between each refresh
+        :param db: database connection to use (default: a new connection)
+        """
+        self.entity_type = entity_type
+        self.id_types = tuple(id_types or ())
+        self.max_age = max_age
+        self._db = db
+        # (id_type, external_id) -> set of entity_ids
+        self._index = {}
+        # entity_id -> set of (id_type, external_id)
+        self._entity_keys = {}
+        # change_ids in the lookback window that are already applied
+        self._seen_changes = set()
+        self.last_change_id = None
+        self.last_refresh = None
+
+    def __repr__(self):
+        return '<{name}[{entity_type}] {count:d} ids>'.format(
+            name=type(self).__name__,
+            entity_type=six.text_type(self.entity_type),
+            count=len(self._index))
+
+    def __len__(self):
+        return len(self._index)
+
+    @property
+    def db(self):
+        """ The database connection of this index. """
+        if self._db is None:
+            self._db = Factory.get('Database')()
+        return self._db
+
+    def _search(self, db, entity_ids=None):
+        co = Factory.get('Constants')(db)
+        kwargs = {
+            'entity_type': co.get_constant(co.EntityType, self.entity_type),
+            'fetchall': False,
+        }
+        if self.id_types:
+            kwargs['id_type'] = [
+                co.get_constant(co.EntityExternalId, id_type)
+                for id_type in self.id_types]
+        if entity_ids is not None:
+            kwargs['entity_id'] = entity_ids
+        return EntityExternalId(db).search_external_ids(**kwargs)
+
+    def _get_last_change_id(self, db):
+        if not hasattr(db, 'get_last_changelog_id'):
+            # no change log, refresh() must reload everything
+            return None
+        try:
+            return int(db.get_last_changelog_id())
+        except Errors.NotFoundError:
+            return 0
+
+    def _load_rows(self, rows, entity_ids=None):
+        """
+        Replace external ids in the index.
+
+        :param rows: external id rows (entity_id, id_type, external_id)
+        :param entity_ids:
+            Replace the external ids of these entities, or all external ids if
+            None.
+        """
+        if entity_ids is None:
+            self._index.clear()
+            self._entity_keys.clear()
+        else:
+            for entity_id in entity_ids:
+                for key in self._entity_keys.pop(int(entity_id), ()):
+                    self._index[key].discard(int(entity_id))
+                    if not self._index[key]:
+                        del self._index[key]
+        for row in rows:
+            entity_id = int(row['entity_id'])
+            key = (int(row['id_type']), six.text_type(row['external_id']))
+            self._index.setdefault(key, set()).add(entity_id)
+            self._entity_keys.setdefault(entity_id, set()).add(key)
+
+    def _get_changes(self, db, last_change_id):
+        """
+        Get changes in the lookback window.
+
+        :return dict: change_id -> subject_entity
+        """
+        clconst = Factory.get('CLConstants')(db)
+        types = [getattr(clconst, t) for t in self.change_types]
+        return dict(
+            (int(row['change_id']), int(row['subject_entity']))
+            for row in db.get_log_events(
+                start_id=max(last_change_id - self.lookback, 0) + 1,
+                max_id=last_change_id,
+                types=types))
+
+    def load(self):
+        """ (Re-)load all external ids. """
+        start = time.time()
+        db = self.db
+        try:
+            self.last_change_id = self._get_last_change_id(db)
+            if self.last_change_id is not None:
+                # changes in the window are reflected in the search below
+                self._seen_changes = set(
+                    self._get_changes(db, self.last_change_id))
+            self._load_rows(self._search(db))
+        finally:
+            # end the transaction, so that we see new commits next time
+            db.rollback()
+        self.last_refresh = time.time()
+        logger.info('loaded %r in %.1f s', self, self.last_refresh - start)
+
+    def update_entities(self, db, entity_ids):
+        """ Re-read the external ids of some entities. """
+        entity_ids = sorted(set(int(e) for e in entity_ids))
+        for start in range(0, len(entity_ids), self.chunk_size):
+            chunk = entity_ids[start:start + self.chunk_size]
+            self._load_rows(self._search(db, entity_ids=chunk),
+                            entity_ids=chunk)
+
+    def refresh(self, force=False):
+        """
+        Update the index with changes from the change log.
+
+        The index is loaded if this is the first refresh, and fully reloaded
+        if the database has no change log.
+
+        :param force: refresh, even if the index is newer than max_age
+        """
+        if self.last_refresh is None:
+            return self.load()
+        if not force and time.time() - self.last_refresh < self.max_age:
+            return
+        if self.last_change_id is None:
+            return self.load()
+
+        db = self.db
+        try:
+            last_change_id = max(self._get_last_change_id(db),
+                                 self.last_change_id)
+            changes = self._get_changes(db, last_change_id)
+            entity_ids = set(entity_id
+                             for change_id, entity_id in changes.items()
+                             if change_id not in self._seen_changes)
+            self.update_entities(db, entity_ids)
+        finally:
+            db.rollback()
+        if entity_ids:
+            logger.debug('refreshed %r, %d changed entities',
+                         self, len(entity_ids))
+        self._seen_changes = set(changes)
+        self.last_change_id = last_change_id
+        self.last_refresh = time.time()
+
+    def find(self, id_pairs):
+        """
+        Look up external ids.
+
+        :param id_pairs: a sequence of (id_type, external_id) pairs
+
+        :return list:
+            A list of ((id_type, external_id), entity_id) tuples for all
+            entities that matches any of the id_pairs.
+        """
+        found = []
+        for id_type, value in id_pairs:
+            key = (int(id_type), six.text_type(value))
+            for entity_id in sorted(self._index.get(key, ())):
+                found.append((key, entity_id))
+        return found
+
+
 class EntityMatcher(object):
     """ Generic entity matcher for imports.  """
 
     factory_type = 'Entity'
 
-    def __init__(self, match_types=None):
+    def __init__(self, match_types=None, index=None):
         """
         :param match:
             sequence of id_types to use with matching.
+
+        :param index:
+            an ExternalIdIndex to look up external ids in, instead of
+            querying the database for each lookup.
         """
         self.match_types = tuple(match_types or ())
+        self.index = index
 
     @property
     def type(self):
@@ -89,6 +308,15 @@ class EntityMatcher(object):
         id_pairs = tuple((get_id_type(t), v) for t, v in criterias)
         pretty_types = tuple(sorted([six.text_type(t[0]) for t in id_pairs]))
 
+        if self.index is not None:
+            found = self._find_in_index(dbobj, id_pairs)
+            if found:
+                logger.debug('found %s entity_id=%d from %s (index)',
+                             self.type, dbobj.entity_id, pretty_types)
+                return dbobj
+            # Entities may have been added since the last refresh, so we
+            # still need to check the database
+
         try:
             dbobj.find_by_external_ids(*id_pairs)
             logger.debug('found %s entity_id=%d from %s',
@@ -100,6 +328,37 @@ class EntityMatcher(object):
             logger.debug('multiple %s matches for %s', self.type, pretty_types)
             raise
 
+    def _find_in_index(self, dbobj, id_pairs):
+        """
+        Find a unique entity in the index, and bind dbobj to it.
+
+        A unique index hit is trusted without checking the external ids in
+        the database.  The hit may be out of date by up to ``index.max_age``
+        seconds: an external id that has moved to another entity within that
+        time is still found on the old entity.
+
+        :returns bool:
+            True if dbobj was bound to a matching entity, False if the
+            database must be checked.
+        """
+        self.index.refresh()
+        candidates = set(entity_id
+                         for _, entity_id in self.index.find(id_pairs))
+        if len(candidates) != 1:
+            # No hits, or multiple hits - which are left for the database
+            # lookup to report, as the index may be out of date.
+            return False
+        entity_id = candidates.pop()
+        try:
+            dbobj.find(entity_id)
+        except Errors.NotFoundError:
+            # The entity has been removed since the last refresh
+            logger.debug('index hit for missing %s entity_id=%d',
+                         self.type, entity_id)
+            dbobj.clear()
+            return False
+        return True
+
     def __call__(self, db, s_terms, required=False):
         """ Find an entity by provided search terms.
 
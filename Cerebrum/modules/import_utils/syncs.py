@@ -22,6 +22,13 @@ Common utils for updating entity info from a given source system.
 
 This module generally consists of classes that implements affect + populate
 logic for all data types (including those that are missing this)
+
+Each sync is a callable that updates one entity.  All syncs also have a bulk
+version, ``sync_many()``, which takes a batch of (entity, source values)
+pairs.  The key/value syncs and the affiliation sync fetch the current values
+for the whole batch at once, and only write changes.  Entities with invalid
+source values are skipped, and reported back to the caller, just as
+``__call__()`` would fail for that entity only.
 """
 from __future__ import (
     absolute_import,
@@ -30,13 +37,15 @@ from __future__ import (
     unicode_literals,
 )
 import abc
+import collections
 import logging
 
 import six
 
 from Cerebrum import Constants
+from Cerebrum import Entity
 from Cerebrum import Errors
-from Cerebrum.Utils import Factory
+from Cerebrum.Utils import Factory, argument_to_sql
 
 logger = logging.getLogger(__name__)
 
@@ -78,16 +87,27 @@ class _BaseSync(six.with_metaclass(abc.ABCMeta)):
 
     - set a <subclass>.name
     - __call__(entity, values) -> update entity to values
+
+    Subclasses may implement:
+
+    - _sync_batch(items) -> update a batch of entities
     """
 
     # Human readable name of this sync, for log messages and errors
     name = None
 
+    # Max number of entities to update at a time in sync_many()
+    batch_size = 1000
+
+    # Errors that are caused by invalid source values for a single entity
+    item_errors = (LookupError, ValueError, Errors.NotFoundError)
+
     def __init__(self, db):
         if not type(self).name:
             raise NotImplementedError('abstract sync (no name)')
         self.db = db
         self.const = Factory.get('Constants')(db)
+        self.clconst = Factory.get('CLConstants')(db)
 
     def __repr__(self):
         return '<{name}>'.format(name=type(self).__name__)
@@ -96,6 +116,60 @@ class _BaseSync(six.with_metaclass(abc.ABCMeta)):
     def __call__(self, entity, source_values):
         pass
 
+    def sync_many(self, items):
+        """ Sync multiple entities.
+
+        Source values are checked for each entity before its changes are
+        written.  Entities with invalid source values (i.e. values that would
+        make ``__call__()`` fail with one of the ``item_errors``) are skipped,
+        and nothing is written for them.
+
+        :param items:
+            A sequence of (entity, source_values) pairs, where source_values
+            is what would be given to ``__call__()`` for the entity.
+
+        :returns tuple:
+            A map of entity_id -> the ``__call__()`` result for each synced
+            entity, and a map of entity_id -> error for each skipped entity.
+        """
+        items = list(items)
+        seen = set()
+        for entity, _ in items:
+            entity_id = int(entity.entity_id)
+            if entity_id in seen:
+                raise ValueError('duplicate entity_id in %s batch: %d'
+                                 % (self.name, entity_id))
+            seen.add(entity_id)
+
+        results = {}
+        errors = {}
+        for start in range(0, len(items), self.batch_size):
+            batch_results, batch_errors = self._sync_batch(
+                items[start:start + self.batch_size])
+            results.update(batch_results)
+            errors.update(batch_errors)
+        for entity_id in sorted(errors):
+            logger.warning('skipped %s sync for entity_id=%d: %s',
+                           self.name, entity_id, errors[entity_id])
+        return results, errors
+
+    def _sync_batch(self, items):
+        """ Sync a batch of entities.
+
+        Syncs one entity at a time - subclasses should override this with
+        set-based updates.
+
+        :returns tuple: results and errors, as in ``sync_many()``
+        """
+        results = {}
+        errors = {}
+        for entity, values in items:
+            try:
+                results[int(entity.entity_id)] = self(entity, values)
+            except self.item_errors as e:
+                errors[int(entity.entity_id)] = e
+        return results, errors
+
 
 class _SourceSystemSync(_BaseSync):
     """ Abstract sync with source_system. """
@@ -123,6 +197,11 @@ class _KeyValueSync(_SourceSystemSync):
     - set a <subclass>.name and a <subclass>.type_cls
     - fetch_current() -> get (current key, current value) pairs from entity
     - apply_changes() -> update database with entity changes
+
+    Subclasses should implement, for set-based updates in sync_many():
+
+    - fetch_current_many() -> get current pairs for multiple entities
+    - apply_changes_many() -> update database with changes to many entities
     """
     # A constant type (or attribute to fetch from Factory.get('Constants'))
     type_cls = None
@@ -164,6 +243,25 @@ class _KeyValueSync(_SourceSystemSync):
         """
         pass
 
+    def fetch_current_many(self, entities):
+        """ Fetch all current key/value pairs for multiple entities.
+
+        :param entities: entities to fetch current values for
+        :returns dict: a map of entity_id -> list of (int-code, value) pairs
+        """
+        return dict((int(entity.entity_id), list(self.fetch_current(entity)))
+                    for entity in entities)
+
+    def apply_changes_many(self, changes):
+        """ Apply changes to multiple entities.
+
+        :param changes:
+            A sequence of (entity, values, to_add, to_update, to_remove)
+            tuples, as given to ``apply_changes()``.
+        """
+        for entity, values, to_add, to_update, to_remove in changes:
+            self.apply_changes(entity, values, to_add, to_update, to_remove)
+
     def __call__(self, entity, pairs):
         """ Sync entity with key/value pairs.
 
@@ -176,7 +274,44 @@ class _KeyValueSync(_SourceSystemSync):
             The sequence should be the current values from a given source
             system.
         """
-        entity_id = int(entity.entity_id)
+        values, to_add, to_update, to_remove = self._get_changes(
+            int(entity.entity_id), pairs, self.fetch_current(entity))
+        self.apply_changes(entity, values, to_add, to_update, to_remove)
+        return (to_add, to_update, to_remove)
+
+    def _sync_batch(self, items):
+        if not items:
+            return {}, {}
+        current = self.fetch_current_many(entity for entity, _ in items)
+        results = {}
+        errors = {}
+        changes = []
+        for entity, pairs in items:
+            entity_id = int(entity.entity_id)
+            try:
+                values, to_add, to_update, to_remove = self._get_changes(
+                    entity_id, pairs, current.get(entity_id, ()))
+            except self.item_errors as e:
+                errors[entity_id] = e
+                continue
+            results[entity_id] = (to_add, to_update, to_remove)
+            if to_add or to_update or to_remove:
+                changes.append((entity, values, to_add, to_update, to_remove))
+        if changes:
+            self.apply_changes_many(changes)
+        return results, errors
+
+    def _get_changes(self, entity_id, pairs, current):
+        """ Compare new and current key/value pairs for an entity.
+
+        :param int entity_id: the entity to compare values for
+        :param pairs: new (CerebrumCode, value) pairs
+        :param current: current (int-code, value) pairs
+
+        :returns tuple:
+            A map of (type -> value) for all new values, and the sets of
+            types to add, update and remove.
+        """
         debug_log.debug('%s(%d, %s)', repr(self), entity_id, repr(pairs))
 
         new_pairs = set((self.get_type(key), value) for key, value in pairs)
@@ -196,7 +331,7 @@ class _KeyValueSync(_SourceSystemSync):
                                     pretty_const(self.affect_types)))
 
         curr_pairs = set((self.get_type(k), v)
-                         for k, v in self.fetch_current(entity)
+                         for k, v in current
                          if self.affect_types is None
                          or k in self.affect_types)
         curr_types = set(t[0] for t in curr_pairs)
@@ -210,9 +345,30 @@ class _KeyValueSync(_SourceSystemSync):
                     pretty_const(to_add), pretty_const(to_update),
                     pretty_const(to_remove))
 
-        self.apply_changes(entity, dict(new_pairs),
-                           to_add, to_update, to_remove)
-        return (to_add, to_update, to_remove)
+        return dict(new_pairs), to_add, to_update, to_remove
+
+    def _delete_many(self, table, type_column, deletes):
+        """ Delete rows for this source system, one statement per type.
+
+        :param table: table name
+        :param type_column: the column with the CerebrumCode value
+        :param deletes: a map of type -> entity ids to delete rows for
+        """
+        for value_type, entity_ids in deletes.items():
+            binds = {'source_system': int(self.source_system),
+                     'value_type': int(value_type)}
+            self.db.execute(
+                """
+                  DELETE FROM [:table schema=cerebrum name={table}]
+                  WHERE source_system = :source_system
+                    AND {type_column} = :value_type
+                    AND {entity_ids}
+                """.format(
+                    table=table,
+                    type_column=type_column,
+                    entity_ids=argument_to_sql(entity_ids, 'entity_id',
+                                               binds, int)),
+                binds)
 
 
 class PersonNameSync(_KeyValueSync):
@@ -233,6 +389,19 @@ class PersonNameSync(_KeyValueSync):
         for row in entity.get_names(source_system=self.source_system):
             yield (row['name_variant'], row['name'])
 
+    def fetch_current_many(self, entities):
+        person_ids = [int(entity.entity_id) for entity in entities]
+        current = dict((person_id, []) for person_id in person_ids)
+        pe = Factory.get('Person')(self.db)
+        for row in pe.search_person_names(person_id=person_ids,
+                                          source_system=self.source_system):
+            current[row['person_id']].append((row['name_variant'],
+                                              row['name']))
+        return current
+
+    # Name changes are still written with write_db() for each person, as
+    # write_db() also updates the cached names.
+
     def apply_changes(self, entity, values, to_add, to_update, to_remove):
         changes = (to_add | to_remove | to_update)
         if not changes:
@@ -254,6 +423,70 @@ class ExternalIdSync(_KeyValueSync):
         for row in entity.get_external_id(source_system=self.source_system):
             yield (row['id_type'], row['external_id'])
 
+    def fetch_current_many(self, entities):
+        entity_ids = [int(entity.entity_id) for entity in entities]
+        current = dict((entity_id, []) for entity_id in entity_ids)
+        en = Entity.EntityExternalId(self.db)
+        for row in en.search_external_ids(source_system=self.source_system,
+                                          entity_id=entity_ids):
+            current[row['entity_id']].append((row['id_type'],
+                                              row['external_id']))
+        return current
+
+    def apply_changes_many(self, changes):
+        source = int(self.source_system)
+        deletes = collections.defaultdict(list)
+        inserts = []
+        for entity, values, to_add, to_update, to_remove in changes:
+            entity_id = int(entity.entity_id)
+            for id_type in to_remove:
+                deletes[id_type].append(entity_id)
+            for id_type in to_add:
+                inserts.append({
+                    'entity_id': entity_id,
+                    'entity_type': int(entity.entity_type),
+                    'id_type': int(id_type),
+                    'source_system': source,
+                    'external_id': six.text_type(values[id_type]),
+                })
+            for id_type in to_update:
+                self.db.execute(
+                    """
+                      UPDATE [:table schema=cerebrum name=entity_external_id]
+                      SET external_id = :external_id
+                      WHERE entity_id = :entity_id
+                        AND id_type = :id_type
+                        AND source_system = :source_system
+                    """,
+                    {'entity_id': entity_id,
+                     'id_type': int(id_type),
+                     'source_system': source,
+                     'external_id': six.text_type(values[id_type])})
+                self.db.log_change(
+                    entity_id, self.clconst.entity_ext_id_mod, None,
+                    change_params={'id_type': int(id_type),
+                                   'src': source,
+                                   'value': six.text_type(values[id_type])})
+
+        self._delete_many('entity_external_id', 'id_type', deletes)
+        for id_type, entity_ids in deletes.items():
+            for entity_id in entity_ids:
+                self.db.log_change(
+                    entity_id, self.clconst.entity_ext_id_del, None,
+                    change_params={'id_type': int(id_type), 'src': source})
+
+        self.db.insert_many(
+            '[:table schema=cerebrum name=entity_external_id]',
+            ('entity_id', 'entity_type', 'id_type', 'source_system',
+             'external_id'),
+            inserts)
+        for row in inserts:
+            self.db.log_change(
+                row['entity_id'], self.clconst.entity_ext_id_add, None,
+                change_params={'id_type': row['id_type'],
+                               'src': source,
+                               'value': row['external_id']})
+
     def apply_changes(self, entity, values, to_add, to_update, to_remove):
         changes = (to_add | to_remove | to_update)
         if not changes:
@@ -279,6 +512,54 @@ class ContactInfoSync(_KeyValueSync):
         for row in entity.get_contact_info(source=self.source_system):
             yield (row['contact_type'], row['contact_value'])
 
+    def fetch_current_many(self, entities):
+        entity_ids = [int(entity.entity_id) for entity in entities]
+        current = dict((entity_id, []) for entity_id in entity_ids)
+        en = Entity.EntityContactInfo(self.db)
+        for row in en.list_contact_info(entity_id=entity_ids,
+                                        source_system=self.source_system):
+            current[row['entity_id']].append((row['contact_type'],
+                                              row['contact_value']))
+        return current
+
+    def apply_changes_many(self, changes):
+        source = int(self.source_system)
+        deletes = collections.defaultdict(list)
+        inserts = []
+        for entity, values, to_add, to_update, to_remove in changes:
+            entity_id = int(entity.entity_id)
+            for ctype in (to_remove | to_update):
+                deletes[ctype].append(entity_id)
+            for ctype in (to_update | to_add):
+                inserts.append({
+                    'entity_id': entity_id,
+                    'source_system': source,
+                    'contact_type': int(ctype),
+                    'contact_pref': 1,
+                    'contact_value': values[ctype],
+                    'description': None,
+                    'contact_alias': None,
+                })
+
+        self._delete_many('entity_contact_info', 'contact_type', deletes)
+        for ctype, entity_ids in deletes.items():
+            for entity_id in entity_ids:
+                self.db.log_change(
+                    entity_id, self.clconst.entity_cinfo_del, None,
+                    change_params={'type': int(ctype), 'src': source})
+
+        self.db.insert_many(
+            '[:table schema=cerebrum name=entity_contact_info]',
+            ('entity_id', 'source_system', 'contact_type', 'contact_pref',
+             'contact_value', 'description', 'contact_alias'),
+            inserts)
+        for row in inserts:
+            self.db.log_change(
+                row['entity_id'], self.clconst.entity_cinfo_add, None,
+                change_params={'type': row['contact_type'],
+                               'value': row['contact_value'],
+                               'src': source})
+
     def apply_changes(self, entity, values, to_add, to_update, to_remove):
         changes = (to_add | to_remove | to_update)
         if not changes:
@@ -317,10 +598,7 @@ class AffiliationSync(_SourceSystemSync):
 
         new_affiliations = set()
         for aff_value, ou_id in aff_tuples:
-            aff, status = self.const.get_affiliation(aff_value)
-            if status is None:
-                raise ValueError('invalid affiliation/status: '
-                                 + repr(aff_value))
+            aff, status = self._get_affiliation(aff_value)
 
             try:
                 ou = Factory.get('OU')(self.db)
@@ -364,6 +642,133 @@ class AffiliationSync(_SourceSystemSync):
 
         return (to_add, to_update, to_remove)
 
+    def _get_affiliation(self, aff_value):
+        aff, status = self.const.get_affiliation(aff_value)
+        if status is None:
+            raise ValueError('invalid affiliation/status: ' + repr(aff_value))
+        return aff, status
+
+    def _sync_batch(self, items):
+        """
+        Update affiliations for a batch of persons.
+
+        Affiliations are validated and fetched for the whole batch at once.
+        Unchanged affiliations are renewed with a single statement, while
+        new, changed and removed affiliations are updated one by one, as in
+        ``__call__()``.
+        """
+        new_affs = {}
+        errors = {}
+        for person_obj, aff_tuples in items:
+            person_id = int(person_obj.entity_id)
+            debug_log.debug('%s(%d, %s)', repr(self), person_id,
+                            repr(aff_tuples))
+            try:
+                new_affs[person_id] = self._parse_affiliations(aff_tuples)
+            except self.item_errors as e:
+                errors[person_id] = e
+                continue
+            logger.debug('%s(%d, <%s>)', repr(self), person_id,
+                         pretty_const(tuple(t[2]
+                                            for t in new_affs[person_id])))
+
+        ou_ids = set(t[0] for affs in new_affs.values() for t in affs)
+        ou = Factory.get('OU')(self.db)
+        missing_ous = ou_ids - set(int(o.entity_id)
+                                   for o in ou.find_many(ou_ids))
+        for person_id in list(new_affs):
+            missing = missing_ous & set(t[0] for t in new_affs[person_id])
+            if missing:
+                errors[person_id] = ValueError('invalid ou_id: ' +
+                                               repr(min(missing)))
+                del new_affs[person_id]
+        items = [(person_obj, aff_tuples)
+                 for person_obj, aff_tuples in items
+                 if int(person_obj.entity_id) in new_affs]
+        if not items:
+            return {}, errors
+
+        current = dict((person_id, {}) for person_id in new_affs)
+        pe = Factory.get('Person')(self.db)
+        for row in pe.list_affiliations(person_id=list(new_affs),
+                                        source_system=self.source_system):
+            key = (int(row['ou_id']),
+                   self.const.PersonAffiliation(row['affiliation']),
+                   self.const.PersonAffStatus(row['status']))
+            current[row['person_id']][key] = row
+
+        results = {}
+        to_renew = []
+        for person_obj, _ in items:
+            person_id = int(person_obj.entity_id)
+            new_affiliations = new_affs[person_id]
+            curr_affiliations = set(current[person_id])
+
+            to_add = new_affiliations - curr_affiliations
+            to_update = new_affiliations & curr_affiliations
+            to_remove = curr_affiliations - new_affiliations
+            results[person_id] = (to_add, to_update, to_remove)
+
+            for ou_id, aff, status in to_remove:
+                person_obj.delete_affiliation(ou_id, aff, self.source_system)
+                logger.info('removed affiliation for person_id=%d: %s @ '
+                            'ou_id=%d', person_id, status, ou_id)
+
+            for ou_id, aff, status in new_affiliations:
+                row = current[person_id].get((ou_id, aff, status))
+                if (row is not None and row['deleted_date'] is None and
+                        row['precedence']):
+                    # add_affiliation() would only update last_date
+                    to_renew.append((person_id, ou_id, aff))
+                else:
+                    person_obj.add_affiliation(ou_id, aff, self.source_system,
+                                               status)
+                if (ou_id, aff, status) in to_add:
+                    logger.info('added affiliation for person_id=%d: %s @ '
+                                'ou_id=%d', person_id, status, ou_id)
+                else:
+                    logger.info('renewed affiliation for person_id=%d: %s @ '
+                                'ou_id=%d', person_id, status, ou_id)
+
+        self._renew_affiliations(to_renew)
+        return results, errors
+
+    def _parse_affiliations(self, aff_tuples):
+        """ Get a set of (ou_id, aff, status) from (aff_status, ou_id). """
+        affiliations = set()
+        for aff_value, ou_id in aff_tuples:
+            aff, status = self._get_affiliation(aff_value)
+            try:
+                ou_id = int(ou_id)
+            except (TypeError, ValueError):
+                raise ValueError('invalid ou_id: ' + repr(ou_id))
+            affiliations.add((ou_id, aff, status))
+        return affiliations
+
+    def _renew_affiliations(self, affiliations, chunk_size=500):
+        """
+        Set last_date for unchanged affiliations.
+
+        :param affiliations: a sequence of (person_id, ou_id, aff) tuples
+        """
+        for start in range(0, len(affiliations), chunk_size):
+            binds = {'source_system': int(self.source_system)}
+            keys = []
+            for i, (person_id, ou_id, aff) in enumerate(
+                    affiliations[start:start + chunk_size]):
+                binds.update({'p_id_%d' % i: int(person_id),
+                              'ou_id_%d' % i: int(ou_id),
+                              'aff_%d' % i: int(aff)})
+                keys.append('(:p_id_{0}, :ou_id_{0}, :aff_{0})'.format(i))
+            self.db.execute(
+                """
+                UPDATE [:table schema=cerebrum name=person_affiliation_source]
+                SET last_date = [:now]
+                WHERE source_system = :source_system
+                  AND (person_id, ou_id, affiliation) IN ({keys})
+                """.format(keys=', '.join(keys)),
+                binds)
+
 
 class AddressSync(_KeyValueSync):
     """
@@ -403,11 +808,70 @@ class AddressSync(_KeyValueSync):
         )
         return super(AddressSync, self).__call__(entity, pairs)
 
+    def _sync_batch(self, items):
+        normalized = []
+        errors = {}
+        for entity, pairs in items:
+            try:
+                normalized.append(
+                    (entity,
+                     tuple((addr_type, self.__normalize_addr(addr_value))
+                           for addr_type, addr_value in pairs)))
+            except self.item_errors as e:
+                errors[int(entity.entity_id)] = e
+        results, batch_errors = super(AddressSync, self)._sync_batch(
+            normalized)
+        errors.update(batch_errors)
+        return results, errors
+
     def fetch_current(self, entity):
         for row in entity.get_entity_address(source=self.source_system):
             addr_t = self.__normalize_addr(dict(row))
             yield (row['address_type'], addr_t)
 
+    def fetch_current_many(self, entities):
+        entity_ids = [int(entity.entity_id) for entity in entities]
+        current = dict((entity_id, []) for entity_id in entity_ids)
+        en = Entity.EntityAddress(self.db)
+        for row in en.list_entity_addresses(source_system=self.source_system,
+                                            entity_id=entity_ids):
+            current[row['entity_id']].append(
+                (row['address_type'], self.__normalize_addr(dict(row))))
+        return current
+
+    def apply_changes_many(self, changes):
+        deletes = collections.defaultdict(list)
+        inserts = []
+        for entity, values, to_add, to_update, to_remove in changes:
+            entity_id = int(entity.entity_id)
+            for address_type in (to_remove | to_update):
+                deletes[address_type].append(entity_id)
+            for address_type in (to_update | to_add):
+                row = dict(values[address_type])
+                if row['country'] is not None:
+                    row['country'] = int(row['country'])
+                row.update({
+                    'entity_id': entity_id,
+                    'source_system': int(self.source_system),
+                    'address_type': int(address_type),
+                })
+                inserts.append(row)
+
+        self._delete_many('entity_address', 'address_type', deletes)
+        for entity_ids in deletes.values():
+            for entity_id in entity_ids:
+                self.db.log_change(entity_id, self.clconst.entity_addr_del,
+                                   None)
+
+        self.db.insert_many(
+            '[:table schema=cerebrum name=entity_address]',
+            ('entity_id', 'source_system', 'address_type', 'address_text',
+             'p_o_box', 'postal_number', 'city', 'country'),
+            inserts)
+        for row in inserts:
+            self.db.log_change(row['entity_id'], self.clconst.entity_addr_add,
+                               None)
+
     def apply_changes(self, entity, values, to_add, to_update, to_remove):
         changes = (to_add | to_remove | to_update)
         if not changes:
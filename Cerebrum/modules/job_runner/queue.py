@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-# Copyright 2018-2021 University of Oslo, Norway
+# Copyright 2018-2026 University of Oslo, Norway
 #
 # This file is part of Cerebrum.
 #
@@ -18,6 +18,7 @@
 # along with Cerebrum; if not, write to the Free Software Foundation,
 # Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
 """ Job Runner queue. """
+import collections
 import logging
 import os
 import signal
@@ -25,6 +26,7 @@ import time
 
 from Cerebrum import Errors
 from .job_config import reload_job_config
+from .scheduler import JobGraph
 
 
 current_time = time.time()
@@ -32,7 +34,10 @@ logger = logging.getLogger(__name__)
 
 
 class DbQueueHandler(object):
-    """ Database module that tracks last_run time. """
+    """ Database module that tracks last_run time and job run times. """
+
+    # Weight of the latest run in the average run time
+    runtime_weight = 0.3
 
     def __init__(self, db):
         self.db = db
@@ -88,6 +93,61 @@ class DbQueueHandler(object):
 
         self.db.commit()
 
+    def get_runtimes(self):
+        """ Get the average run time for all jobs.
+
+        :return dict:
+            Return a dictionary that maps job names/ids to average run time
+            (in seconds).
+        """
+        return dict(
+            (r['id'], float(r['avg_duration']))
+            for r in self.db.query(
+                """
+                SELECT id, avg_duration
+                FROM [:table schema=cerebrum name=job_runtime]
+                """))
+
+    def update_runtime(self, job, duration):
+        """ Add a run time to the run time statistics for a job.
+
+        :param str job:
+            The job id/title.
+        :param float duration:
+            The run time of the job, in seconds.
+
+        :return float:
+            The new average run time for the job.
+        """
+        try:
+            row = self.db.query_1(
+                """
+                SELECT runs, avg_duration
+                FROM [:table schema=cerebrum name=job_runtime]
+                WHERE id=:id""",
+                {'id': job})
+        except Errors.NotFoundError:
+            avg = duration
+            self.db.execute(
+                """
+                INSERT INTO [:table schema=cerebrum name=job_runtime]
+                (id, runs, avg_duration, last_duration)
+                VALUES (:id, 1, :duration, :duration)""",
+                {'id': job, 'duration': duration})
+        else:
+            avg = (self.runtime_weight * duration +
+                   (1 - self.runtime_weight) * float(row['avg_duration']))
+            self.db.execute(
+                """UPDATE [:table schema=cerebrum name=job_runtime]
+                SET runs=:runs, avg_duration=:avg, last_duration=:duration
+                WHERE id=:id""",
+                {'id': job, 'runs': int(row['runs']) + 1, 'avg': avg,
+                 'duration': duration})
+        self.logger.debug("update_runtime(%r, %r), avg=%r",
+                          job, duration, avg)
+        self.db.commit()
+        return avg
+
 
 class JobQueue(object):
     """Handles the job-queuing in job_runner.
@@ -97,6 +157,10 @@ class JobQueue(object):
     for the job exists in the queue.  This check is done recursively.
     Note that the order of pre/post entries for job does not indicate
     a dependency.
+
+    The ready-to-run queue is ordered by the critical path of each job (see
+    :class:`.scheduler.JobGraph`), using the run time statistics from
+    previous runs.
     """
 
     def __init__(self, job_module, db, debug_time=0):
@@ -117,6 +181,9 @@ class JobQueue(object):
         self._known_jobs = {}
         self._run_queue = []
         self._running_jobs = []
+        self._running_names = collections.Counter()
+        self._graph = JobGraph({})
+        self._runtimes = {}
         self._last_run = {}
         self._started_at = {}
         self._last_duration = {}  # For statistics in --status
@@ -148,6 +215,9 @@ class JobQueue(object):
         for k, v in self.db_qh.get_last_run().items():
             self._last_run[k] = v
 
+        self._runtimes.update(self.db_qh.get_runtimes())
+        self._graph = JobGraph(self._known_jobs, self._runtimes)
+
     def get_known_job(self, job_name):
         return self._known_jobs[job_name]
 
@@ -173,8 +243,13 @@ class JobQueue(object):
             self._last_run[job_name] = 0
         self._last_duration[job_name] = 0
 
-    def has_queued_prerequisite(self, job_name, depth=0):
-        """Recursively check if job_name has a pre-requisite in run_queue."""
+    def has_queued_prerequisite(self, job_name):
+        """Check if job_name has a pre-requisite in run_queue.
+
+        A job has a pre-requisite if any of its pre-jobs (or their pre/post
+        jobs, recursively) are queued or running, or if a queued or running
+        job has it as a post-job.
+        """
 
         # TBD: if a multi_ok=1 job has pre/post dependencies, it could
         # be delayed so that the same job is executed several times,
@@ -182,33 +257,8 @@ class JobQueue(object):
         #     ['generate_group', 'convert_ypmap', 'generate_passwd',
         #     'convert_ypmap']
         # Is this a problem.  If so, how do we handle it?
-
-        # If a pre or post job of the main job is in the queue
-        if depth > 0 and job_name in self._run_queue:
-            return True
-        # Job is currently running
-        if job_name in [x[0] for x in self._running_jobs]:
-            return True
-        # Check any pre jobs for queue existence
-        for tmp_name in self._known_jobs[job_name].pre:
-            if self.has_queued_prerequisite(tmp_name, depth+1):
-                return True
-        # Check any post-jobs (except at depth=0, where the post-jobs
-        # should be executed after us)
-        if depth > 0:
-            for tmp_name in self._known_jobs[job_name].post:
-                if self.has_queued_prerequisite(tmp_name, depth+1):
-                    return True
-        else:
-            # Check if any jobs in the queue has the main-job as a post-job.
-            for tmp_name in self._run_queue:
-                if job_name in self._known_jobs[tmp_name].post:
-                    return True
-            # any running jobs which has main-job as post-job
-            for tmp_name in [x[0] for x in self._running_jobs]:
-                if job_name in self._known_jobs[tmp_name].post:
-                    return True
-        return False
+        return self._graph.is_blocked(job_name, self._run_queue,
+                                      self._running_names)
 
     def get_running_jobs(self):
         return [
@@ -231,6 +281,7 @@ class JobQueue(object):
 
     def job_started(self, job_name, pid, force=False):
         self._running_jobs.append((job_name, pid))
+        self._running_names[job_name] += 1
         self._started_at[job_name] = time.time()
         if force:
             self._forced_run_queue.remove(job_name)
@@ -250,6 +301,9 @@ class JobQueue(object):
         curr_ts = time.time()
         if pid is not None:
             self._running_jobs.remove((job_name, pid))
+            self._running_names[job_name] -= 1
+            if self._running_names[job_name] < 1:
+                del self._running_names[job_name]
 
         self._last_status[job_name] = msg or 'ok'
 
@@ -279,6 +333,8 @@ class JobQueue(object):
                 or (self._known_jobs[job_name].call
                     and self._known_jobs[job_name].call.wait)):
             self._last_run[job_name] = curr_ts
+            if ok and pid is not None and job_name in self._started_at:
+                self._update_runtime(job_name, self._last_duration[job_name])
             self.db_qh.update_last_run(job_name, self._last_run[job_name])
         else:
             # This means that an assertRunning job has terminated.
@@ -286,6 +342,35 @@ class JobQueue(object):
             # restart the job.
             pass
 
+    def _update_runtime(self, job_name, duration):
+        """ Update the run time statistics for a job. """
+        avg = self.db_qh.update_runtime(job_name, duration)
+        self._runtimes[job_name] = avg
+        self._graph.set_runtime(job_name, avg)
+
+    def get_runtime(self, job_name):
+        """ Get the expected run time of a job, in seconds. """
+        return self._graph.runtime(job_name)
+
+    def get_priority(self, job_name):
+        """ Get the critical path length of a job, in seconds. """
+        return self._graph.priority(job_name)
+
+    def predict_schedule(self, max_parallel):
+        """ Predict when the running and queued jobs will start and finish.
+
+        :param int max_parallel: max number of running jobs
+
+        :return list:
+            A list of dicts with name, start, end and priority.  Jobs that
+            can't be scheduled has no start or end time.
+        """
+        now = time.time()
+        running = [(name, self._started_at.get(name, now))
+                   for name, pid in self._running_jobs]
+        return self._graph.predict(self._run_queue, running, now,
+                                   max_parallel)
+
     def get_forced_run_queue(self):
         return self._forced_run_queue
 
@@ -331,6 +416,7 @@ class JobQueue(object):
                     continue
 
             min_delta = min(next_delta, min_delta)
+        self._graph.sort_queue(queue)
         self.logger.debug("Delta=%i, a=%i/%i Queue: %s",
                           min_delta, append, len(self._run_queue), repr(queue))
         self._run_queue = queue
@@ -364,7 +450,7 @@ class JobQueue(object):
             return
 
         # TODO: What if job.multi_ok? Should it not be added then?
-        if job_name in (x[0] for x in self._running_jobs):
+        if job_name in self._running_names:
             logger.debug('job=%r is currently running', job_name)
             return
 
@@ -388,18 +474,11 @@ class JobQueue(object):
         Returns True if there are any such jobs, False otherwise
 
         """
-        this_job = self._known_jobs[job_name]
-        for potential_anti_job in [x[0] for x in self._running_jobs]:
-            if potential_anti_job in this_job.nonconcurrent:
-                # It's confirmed that there's at least one running job
-                # that conflicts
-                return True
-        return False
+        return self._graph.has_conflict(job_name, self._running_names)
 
     def is_running(self, job_name):
         """ Check if job is currently running. """
-        running = set(tup[0] for tup in self._running_jobs)
-        return job_name in running
+        return job_name in self._running_names
 
     def last_started_at(self, job_name):
         """
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2026 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+""" Job Runner dependency graph and scheduling priorities.
+
+The :class:`JobGraph` is built from the job config whenever the config is
+(re-)loaded, and pre-computes:
+
+blockers
+    The jobs that prevents a queued job from starting, if they are queued or
+    running.  These are the same jobs that
+    ``JobQueue.has_queued_prerequisite()`` used to search for recursively.
+
+critical path
+    The expected time from when a job starts, until all jobs that must run
+    after it are done (i.e. the job's own run time, and the longest chain of
+    post-jobs and dependent jobs).  Ready jobs with the longest critical path
+    are started first.
+"""
+import collections
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _waits(job):
+    """ Check if a job occupies a job slot while running. """
+    return bool(job is not None and job.call and job.call.wait)
+
+
+class JobGraph(object):
+    """ Pre-computed job dependencies and priorities. """
+
+    # Expected run time (seconds) for jobs without runtime history
+    default_runtime = 60
+
+    def __init__(self, jobs, runtimes=None):
+        """
+        :param dict jobs: job name -> Action
+        :param dict runtimes: job name -> average run time (seconds)
+        """
+        self.jobs = jobs
+        self.runtimes = dict(runtimes or {})
+        self._priority = {}
+
+        # name -> jobs that has name as a post-job
+        self._post_of = collections.defaultdict(set)
+        # name -> jobs that must run after name
+        self._after = collections.defaultdict(set)
+        for name, job in jobs.items():
+            for post in job.post:
+                self._post_of[post].add(name)
+                self._after[name].add(post)
+            for pre in job.pre:
+                self._after[pre].add(name)
+
+        self._queued_blockers = {}
+        self._running_blockers = {}
+        for name in jobs:
+            blockers = self._find_blockers(name)
+            self._queued_blockers[name] = blockers
+            self._running_blockers[name] = blockers | frozenset((name,))
+
+        self._nonconcurrent = dict(
+            (name, frozenset(job.nonconcurrent or ()))
+            for name, job in jobs.items())
+
+    def _find_blockers(self, name):
+        """ Find all jobs that blocks a queued job.
+
+        This is all jobs that can be reached through the pre-jobs of `name`,
+        following both pre- and post-jobs, and all jobs that has `name` as a
+        post-job.
+        """
+        found = set()
+        stack = list(self.jobs[name].pre)
+        while stack:
+            other = stack.pop()
+            if other in found:
+                continue
+            found.add(other)
+            job = self.jobs.get(other)
+            if job is not None:
+                stack.extend(job.pre)
+                stack.extend(job.post)
+        found.update(self._post_of[name])
+        return frozenset(found)
+
+    def is_blocked(self, name, queued, running):
+        """ Check if a job has a queued or running prerequisite.
+
+        :param name: the job to check
+        :param set queued: names of queued jobs
+        :param set running: names of running jobs
+        """
+        return (not self._queued_blockers[name].isdisjoint(queued) or
+                not self._running_blockers[name].isdisjoint(running))
+
+    def has_conflict(self, name, running):
+        """ Check if a nonconcurrent job is running. """
+        return not self._nonconcurrent[name].isdisjoint(running)
+
+    def runtime(self, name):
+        """ Expected run time of a job, in seconds. """
+        if not _waits(self.jobs.get(name)):
+            return 0
+        return self.runtimes.get(name, self.default_runtime)
+
+    def set_runtime(self, name, runtime):
+        """ Update the expected run time of a job. """
+        self.runtimes[name] = runtime
+        self._priority.clear()
+
+    def priority(self, name):
+        """ Get the critical path length of a job, in seconds. """
+        if name not in self._priority:
+            self._critical_path(name, set())
+        return self._priority[name]
+
+    def _critical_path(self, name, visiting):
+        if name in self._priority:
+            return self._priority[name]
+        if name in visiting:
+            # dependency cycle
+            return 0
+        visiting.add(name)
+        longest = max([self._critical_path(other, visiting)
+                       for other in self._after[name]] or [0])
+        visiting.discard(name)
+        self._priority[name] = self.runtime(name) + longest
+        return self._priority[name]
+
+    def sort_queue(self, queue):
+        """ Sort a job queue by priority (stable, longest path first). """
+        queue.sort(key=self.priority, reverse=True)
+
+    def predict(self, queue, running, now, max_parallel):
+        """ Predict when queued jobs will start and finish.
+
+        This simulates the job runner, using the expected run time of each
+        job.  Jobs that are blocked forever (or unknown) gets no start time.
+
+        :param list queue: names of queued jobs, in priority order
+        :param list running: (name, started_at) tuples for running jobs
+        :param float now: current time
+        :param int max_parallel: max number of running jobs
+
+        :return list:
+            A list of dicts with name, start, end and priority, in order of
+            predicted start.
+        """
+        schedule = []
+        active = []
+        for name, started in running:
+            end = max(now, started + self.runtime(name))
+            active.append((name, end))
+            schedule.append({'name': name, 'start': started, 'end': end,
+                             'priority': self.priority(name)})
+
+        pending = [name for name in queue if name in self.jobs]
+        t = now
+        while pending:
+            for name in list(pending):
+                names = set(n for n, _ in active)
+                slots = sum(1 for n in names if _waits(self.jobs.get(n)))
+                if (self.is_blocked(name, set(pending), names) or
+                        self.has_conflict(name, names) or
+                        (_waits(self.jobs[name]) and slots >= max_parallel)):
+                    continue
+                pending.remove(name)
+                end = t + self.runtime(name)
+                active.append((name, end))
+                schedule.append({'name': name, 'start': t, 'end': end,
+                                 'priority': self.priority(name)})
+            if not active:
+                break
+            t = min(finish for _, finish in active)
+            active = [(n, finish) for n, finish in active if finish > t]
+
+        for name in pending:
+            schedule.append({'name': name, 'start': None, 'end': None,
+                             'priority': self.priority(name)})
+        return schedule
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-# Copyright 2018-2021 University of Oslo, Norway
+# Copyright 2018-2026 University of Oslo, Norway
 #
 # This file is part of Cerebrum.
 #
@@ -269,6 +269,21 @@ class SocketProtocol(object):
         ret += 'Ready jobs: \n  %s\n' % "\n  ".join(
             (text_type(x) for x in queue.get_run_queue()))
 
+        max_parallel = cereconf.JOB_RUNNER_MAX_PARALELL_JOBS
+        ret += '\n%-35s %s\n' % (
+            'Predicted schedule (%d parallel)' % max_parallel,
+            '  Start     End       Critical path')
+        for item in queue.predict_schedule(max_parallel):
+            if item['start'] is None:
+                times = '%-8s  %-8s' % ('blocked', '')
+            else:
+                times = '%s  %s' % (fmt_time(item['start']),
+                                    fmt_time(item['end']))
+            ret += "  %-35s %s  %s\n" % (
+                item['name'], times,
+                fmt_time(item['priority'], local=False))
+        ret += '\n'
+
         ret += 'Threads: \n  %s' % "\n  ".join(
             (repr(x) for x in threading.enumerate()))
 
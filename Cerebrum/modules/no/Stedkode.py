@@ -36,7 +36,7 @@ import six
 import cereconf
 from Cerebrum.Errors import CerebrumError
 from Cerebrum.OU import OU
-from Cerebrum.Utils import Factory
+from Cerebrum.Utils import Factory, argument_to_sql
 
 
 __version__ = "1.1"
@@ -171,6 +171,35 @@ class Stedkode(OU):
         self.__in_db = True
         self.__updated = []
 
+    def _find_many_rows(self, entity_ids):
+        found = self.__super._find_many_rows(entity_ids)
+        if not found:
+            return found
+        binds = {}
+        result = {}
+        for row in self.query("""
+        SELECT ou_id, landkode, institusjon, fakultet, institutt, avdeling
+        FROM [:table schema=cerebrum name=stedkode]
+        WHERE """ + argument_to_sql(list(found), 'ou_id', binds, int), binds):
+            rows = result[row['ou_id']] = found[row['ou_id']]
+            rows['stedkode'] = row
+        return result
+
+    def _load_found(self, rows):
+        self.__super._load_found(rows)
+        row = rows['stedkode']
+        self.landkode = row['landkode']
+        self.institusjon = row['institusjon']
+        self.fakultet = row['fakultet']
+        self.institutt = row['institutt']
+        self.avdeling = row['avdeling']
+        try:
+            del self.__in_db
+        except AttributeError:
+            pass
+        self.__in_db = True
+        self.__updated = []
+
     def find_stedkode(self, fakultet, institutt, avdeling, institusjon,
                       landkode=0):
         if institusjon is None:   # Temporary to trap old code
@@ -89,6 +89,8 @@ class ExchangeEventHandler(evhandlers.EventLogConsumer):
         self.randzone_unreserve_group = \
             self.config.selection_criteria.randzone_publishment_group
 
+        kwargs.setdefault('retry_delay',
+                          self.config.eventcollector.failed_delay)
         super(ExchangeEventHandler, self).__init__(**kwargs)
         self.logger.debug2("Started event handler class: %s" % self.__class__)
 
@@ -24,6 +24,8 @@ Cache utilities for exporting posix users.
 TODO: Maybe rename this module to user_caches or similar?
 """
 import logging
+import time
+from collections import defaultdict
 
 import six
 
@@ -32,11 +34,36 @@ from Cerebrum.Utils import Factory, make_timer
 logger = logging.getLogger(__name__)
 
 
+# Number of calls and total time spent in each function decorated by a
+# clock_time decorator, see get_clock_times()
+_clock_times = defaultdict(lambda: [0, 0.0])
+
+
+def get_clock_times():
+    """
+    Get time spent in functions decorated by clock_time.
+
+    Note that nested or overridden functions are included in the time of
+    their caller.
+
+    :rtype: dict
+    :return: function name -> (number of calls, total time in seconds)
+    """
+    return dict((name, tuple(value))
+                for name, value in _clock_times.items())
+
+
 def make_clock_time(logger_obj):
     def clock_time_decorator(func):
         def wrapper(*args, **kwargs):
             timer = make_timer(logger_obj, 'Starting %s...' % func.__name__)
-            result = func(*args, **kwargs)
+            start = time.time()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                stats = _clock_times[func.__name__]
+                stats[0] += 1
+                stats[1] += time.time() - start
             timer('... done %s' % func.__name__)
             return result
         return wrapper
@@ -45,6 +45,7 @@ import re
 import cereconf
 
 from .checker import pwchecker, PasswordChecker, l33t_speak
+from .dictionary_index import get_index
 
 
 def additional_words():
@@ -151,8 +152,38 @@ def is_word_in_dicts(dictionaries,
     return False
 
 
-def check_dict(dictionaries, baseword, file_encoding='utf-8'):
-    """Check if variations of `baseword' is in the dictionary."""
+def is_word_in_index(index, words):
+    """Check if one of the given words are in a compiled dictionary index.
+
+    This is the same check as L{is_word_in_dicts}, i.e. a word is found if it
+    is the start of any dictionary word.
+
+    :param DictionaryIndex index: A compiled dictionary index
+    :param list words: A list of similar words to try
+
+    :return bool: True if any word is found in the index.
+    """
+    for word in words:
+        if len(word) > 3 and index.has_prefix(word):
+            return True
+    return False
+
+
+def check_dict(dictionaries, baseword, file_encoding='utf-8', index=None):
+    """Check if variations of `baseword' is in the dictionary.
+
+    :param index:
+        A compiled dictionary index (see L{dictionary_index}).  If given, the
+        index is used instead of the dictionary files.
+    """
+    if index is None:
+        def in_dicts(words, file_encoding='utf-8'):
+            return is_word_in_dicts(dictionaries, words,
+                                    file_encoding=file_encoding)
+    else:
+        def in_dicts(words, file_encoding=None):
+            return is_word_in_index(index, words)
+
     baseword = baseword.lower()
     if re.search(r'^[a-z]', baseword):
         # Truncate common suffixes before searching dict.
@@ -172,18 +203,19 @@ def check_dict(dictionaries, baseword, file_encoding='utf-8'):
 
         check_for.append(baseword)
 
-        if is_word_in_dicts(dictionaries, check_for):
+        if in_dicts(check_for):
             return True
     else:
-        if is_word_in_dicts(dictionaries, [re.sub(r'^[^a-z]+', '', baseword)]):
+        if in_dicts([re.sub(r'^[^a-z]+', '', baseword)]):
             return True
     nshort = baseword.translate(l33t_speak)
-    if is_word_in_dicts(dictionaries, [nshort], file_encoding=file_encoding):
+    if in_dicts([nshort], file_encoding=file_encoding):
         return True
     return False
 
 
-def check_two_word_combinations(dictionaries, word, file_encoding='utf-8'):
+def check_two_word_combinations(dictionaries, word, file_encoding='utf-8',
+                                index=None):
     """Check for two word-combinations.
 
     This gets hairy. We look up everything that starts with the same first two
@@ -201,6 +233,9 @@ def check_two_word_combinations(dictionaries, word, file_encoding='utf-8'):
 
     TODO: This routine is as good as the perl version, but it could be
     smarter by detecting more types of two-word combination
+
+    If a compiled dictionary `index` is given, it is used instead of the
+    dictionary files.
     """
     if re.search(r'^.[a-zA-Z]', word):
         others = {}
@@ -216,6 +251,10 @@ def check_two_word_combinations(dictionaries, word, file_encoding='utf-8'):
         if re.search(r'^..[a-z]+$', word):
             others[cword[1:]] = 1
 
+        if index is not None:
+            return _two_word_combinations_in_index(index, word, npass, oneup,
+                                                   others)
+
         for fname in dictionaries:
             two = npass[:2]
             with io.open(fname, encoding=file_encoding) as f:
@@ -254,6 +293,33 @@ def check_two_word_combinations(dictionaries, word, file_encoding='utf-8'):
         return None
 
 
+def _two_word_combinations_in_index(index, word, npass, oneup, others):
+    """Look up two word-combinations in a compiled dictionary index.
+
+    This is the index variant of the dictionary lookups in
+    L{check_two_word_combinations}.  Rather than scanning all dictionary words
+    that starts with the same two letters as the password, we look up each
+    prefix of the password.
+    """
+    for i in range(2, len(npass) + 1):
+        if npass[:i] in index:
+            key = npass[i:]
+            if not re.search(r'\W', key):
+                if not (oneup and len(oneup) != len(key)):
+                    others[key] = 1
+
+    for key in others.keys():
+        line = index.first_from(key) or ''
+        if (line == key or (len(word) == 8 and
+                            re.search(r'^%s' % key, line))):
+            pre = npass[0:len(npass)-len(key)]
+            return (pre, line)
+        elif (len(key) == 1 and
+              re.search(r'^.[a-z]+.$', npass)):
+            return (line, key)
+    return None
+
+
 @pwchecker('dictionary')
 class CheckPasswordDictionary(PasswordChecker):
     """Check if password contains dictionary words."""
@@ -267,18 +333,27 @@ class CheckPasswordDictionary(PasswordChecker):
         """The dictionary files to check."""
         return getattr(cereconf, 'PASSWORD_DICTIONARIES', [])
 
+    @property
+    def password_dictionary_index(self):
+        """The compiled dictionary index, if configured and available."""
+        return get_index(getattr(cereconf, 'PASSWORD_DICTIONARY_INDEX', None))
+
     def check_password(self, password, account=None):
         """Check password against a dictionary."""
+        index = self.password_dictionary_index
+        err = None
         try:
             if check_dict(self.password_dictionaries,
                           password[0:8],
-                          file_encoding=self._file_encoding):
+                          file_encoding=self._file_encoding,
+                          index=index):
                 return [_('Password cannot contain dictionary words')]
 
             err = check_two_word_combinations(
                 self.password_dictionaries,
                 password[0:8],
-                file_encoding=self._file_encoding)
+                file_encoding=self._file_encoding,
+                index=index)
         except UnicodeDecodeError:
             pass
         if err and len(err) == 2:
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Compiled password dictionary index.
+
+The dictionary checks in :mod:`.dictionary` do a block-wise binary search in
+each of the plain text dictionary files, for each word variation they try.
+This module compiles all dictionaries into a single, sorted index of
+normalized words, that can be memory mapped and searched without any
+additional I/O.
+
+Index file format
+-----------------
+All integers are unsigned 32 bit, little endian.
+
+1. A header: a magic string (8 bytes) and the number of words (*n*).
+2. An offset table of *n* + 1 integers.  Word *i* is found between offset
+   *i* and *i* + 1 in the word data.
+3. The word data: all normalized words, utf-8 encoded and sorted by their
+   encoded value.
+
+Configuration
+-------------
+The index is built by ``contrib/compile_password_dictionaries.py``, and used
+by the dictionary check if ``cereconf.PASSWORD_DICTIONARY_INDEX`` is set.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import io
+import logging
+import mmap
+import os
+import re
+import struct
+
+from Cerebrum.utils.atomicfile import AtomicFileWriter
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'CRBPWDX1'
+
+_header = struct.Struct(str('<8sI'))
+_offset = struct.Struct(str('<I'))
+
+
+def normalize_word(word):
+    """
+    Normalize a dictionary word.
+
+    This is the same normalization that the dictionary checks use when
+    searching in plain text dictionaries: anything after a tab is dropped,
+    the word is lowercased, and any non-word characters are removed.
+
+    Note that non-ascii letters are always considered word characters (as in
+    Python 3).
+    """
+    word = word.split('\t', 1)[0].strip().lower()
+    return re.sub(r'[^\w\s]', '', word, flags=re.UNICODE)
+
+
+def read_dictionaries(dictionaries, file_encoding='utf-8'):
+    """
+    Read and normalize all words from a list of dictionary files.
+
+    :param dictionaries: dictionary filenames
+    :param file_encoding: encoding of the dictionary files
+
+    :rtype: set
+    :return: normalized words
+    """
+    words = set()
+    for fname in dictionaries:
+        with io.open(fname, encoding=file_encoding, errors='replace') as f:
+            for line in f:
+                word = normalize_word(line)
+                if word:
+                    words.add(word)
+    return words
+
+
+def write_index(words, filename):
+    """
+    Write a compiled index file.
+
+    :param words: normalized words
+    :param filename: index file to write (atomically)
+
+    :return int: number of words written
+    """
+    encoded = sorted(set(w.encode('utf-8') for w in words))
+    with AtomicFileWriter(filename, mode='wb', replace_equal=True) as f:
+        f.write(_header.pack(MAGIC, len(encoded)))
+        pos = 0
+        for word in encoded:
+            f.write(_offset.pack(pos))
+            pos += len(word)
+        f.write(_offset.pack(pos))
+        for word in encoded:
+            f.write(word)
+    return len(encoded)
+
+
+def build_index(dictionaries, filename, file_encoding='utf-8'):
+    """
+    Compile dictionary files into an index file.
+
+    :param dictionaries: dictionary filenames
+    :param filename: index file to write
+    :param file_encoding: encoding of the dictionary files
+
+    :return int: number of words in the index
+    """
+    words = read_dictionaries(dictionaries, file_encoding=file_encoding)
+    count = write_index(words, filename)
+    logger.info('Wrote %d words from %d dictionaries to %r',
+                count, len(dictionaries), filename)
+    return count
+
+
+class DictionaryIndex(object):
+    """
+    A memory mapped, compiled dictionary index.
+
+    Lookups are binary searches in the index, i.e. O(log n) comparisons of
+    utf-8 encoded strings.  All lookup keys must be normalized (see
+    :func:`normalize_word`).
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        with io.open(filename, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count = _header.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError('Invalid dictionary index: %r' % (filename,))
+        self._offsets = _header.size
+        self._data = self._offsets + (self._count + 1) * _offset.size
+
+    def __repr__(self):
+        return '<{0.__class__.__name__} {0.filename!r} ({1:d} words)>'.format(
+            self, len(self))
+
+    def __len__(self):
+        return self._count
+
+    def _get(self, i):
+        pos = self._offsets + i * _offset.size
+        start, = _offset.unpack_from(self._map, pos)
+        end, = _offset.unpack_from(self._map, pos + _offset.size)
+        return self._map[self._data + start:self._data + end]
+
+    def __getitem__(self, i):
+        if not 0 <= i < self._count:
+            raise IndexError('index out of range')
+        return self._get(i).decode('utf-8')
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._get(i).decode('utf-8')
+
+    def _bisect(self, key):
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._get(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def first_from(self, word):
+        """
+        Get the first word that is equal to or sorts after `word`.
+
+        :return: the word, or None if there are no such words
+        """
+        i = self._bisect(word.encode('utf-8'))
+        if i < self._count:
+            return self._get(i).decode('utf-8')
+        return None
+
+    def __contains__(self, word):
+        key = word.encode('utf-8')
+        i = self._bisect(key)
+        return i < self._count and self._get(i) == key
+
+    def has_prefix(self, prefix):
+        """ Check if any word in the index starts with `prefix`. """
+        key = prefix.encode('utf-8')
+        i = self._bisect(key)
+        return i < self._count and self._get(i).startswith(key)
+
+    def close(self):
+        self._map.close()
+
+
+_indexes = {}
+
+
+def get_index(filename):
+    """
+    Get a shared, memory mapped index.
+
+    The index is re-opened if the file has changed since it was last opened.
+
+    :param filename: index file, or None
+
+    :return DictionaryIndex:
+        The index, or None if no index is given, or if the index is missing.
+    """
+    if not filename:
+        return None
+    try:
+        mtime = os.stat(filename).st_mtime
+    except OSError:
+        if filename not in _indexes:
+            logger.warning('Missing dictionary index: %r', filename)
+            _indexes[filename] = (None, None)
+        return None
+    cached_mtime, index = _indexes.get(filename, (None, None))
+    if index is None or cached_mtime != mtime:
+        index = DictionaryIndex(filename)
+        _indexes[filename] = (mtime, index)
+    return index
@@ -53,12 +53,22 @@ from __future__ import (
 )
 
 import base64
+import collections
 import hashlib
+import hmac
+import logging
 import os
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+import six
 
 from Cerebrum.DatabaseAccessor import DatabaseAccessor
 from Cerebrum.utils import date_compat
 
+logger = logging.getLogger(__name__)
+
 __version__ = "1.1"
 
 pbkdf2_params = {
@@ -93,34 +103,145 @@ def encode_for_history(algo, rounds, salt, password, keylen):
     return "{}${}${}${}".format(hash_alg, rounds, stored_salt, key)
 
 
-def check_password_history(password, old_passwords, name):
-    # Only check the 5 newest passwords
-    for old_password in old_passwords[-5:]:
-        # check start to distinguish between old and new hash
-        if old_password.startswith("pbkdf2_sha512"):
-            # split hash, format alg$iterations$salt$key
-            password_parts = old_password.split('$')
-            iters = int(password_parts[1])
-            salt = base64.b64decode(password_parts[2])
-            # get params for the pbkdf2
-            algo = pbkdf2_params['algo']
-            keylen = pbkdf2_params['desired_key_len']
-            encoded_password = encode_for_history(algo, iters, salt, password,
-                                                  keylen)
-            if encoded_password in old_passwords:
-                return True
-        else:
-            encoded_password = old_encode_for_history(name, password)
-            if encoded_password == old_password:
+# A parsed pbkdf2 history hash
+Pbkdf2Hash = collections.namedtuple('Pbkdf2Hash',
+                                    ('algo', 'rounds', 'salt', 'key'))
+
+
+def parse_history_hash(value):
+    """ Parse a pbkdf2 password history hash.
+
+    :param str value: a hash from `encode_for_history`
+
+    :return Pbkdf2Hash:
+        The parsed hash, or None if the value is an old md5 hash.
+    """
+    if not value.startswith("pbkdf2_"):
+        return None
+    # split hash, format alg$iterations$salt$key
+    hash_alg, rounds, salt, key = value.split('$')
+    return Pbkdf2Hash(str(hash_alg[len("pbkdf2_"):]), int(rounds),
+                      base64.b64decode(salt), base64.b64decode(key))
+
+
+def _equals(a, b):
+    """ Constant time comparison of two hashes. """
+    if isinstance(a, six.text_type):
+        a = a.encode('utf-8')
+    if isinstance(b, six.text_type):
+        b = b.encode('utf-8')
+    return hmac.compare_digest(a, b)
+
+
+def _derive_key(args):
+    """ Derive a pbkdf2 key for a (password, Pbkdf2Hash) pair. """
+    password, parsed = args
+    return hashlib.pbkdf2_hmac(parsed.algo, password.encode('utf-8'),
+                               parsed.salt, parsed.rounds, len(parsed.key))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """ Get the shared worker pool for key derivations.
+
+    pbkdf2_hmac releases the GIL, so a thread pool lets us derive keys in
+    parallel without blocking other threads (e.g. other bofhd requests).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPool(PasswordHistoryChecker.workers)
+    return _pool
+
+
+class PasswordHistoryChecker(object):
+    """ Check password candidates against password history hashes.
+
+    Each history hash is parsed and decoded once, and all the key derivations
+    for a check are done in a shared worker pool.  Keys are compared with
+    a constant time comparison.
+
+    The time spent on the last check is available in `stats`.
+    """
+
+    # Number of worker threads in the shared pool
+    workers = 4
+
+    # Number of (newest) history hashes to check
+    limit = 5
+
+    def __init__(self, old_passwords, name, pool=None):
+        """
+        :param list old_passwords: history hashes, oldest first
+        :param str name: account name, for old md5 hashes
+        :param pool: a worker pool, or None to use the shared pool
+        """
+        self.name = name
+        self._pool = pool
+        self._hashes = []
+        self._legacy = []
+        for value in old_passwords[-self.limit:]:
+            parsed = parse_history_hash(value)
+            if parsed is None:
+                self._legacy.append(value)
+            else:
+                self._hashes.append(parsed)
+        self.stats = {}
+
+    def _check_legacy(self, variants):
+        for password in variants:
+            encoded = old_encode_for_history(self.name, password)
+            if any(_equals(encoded, old) for old in self._legacy):
                 return True
-    return False
+        return False
+
+    def check(self, variants):
+        """ Check if any of the password variants are in the history.
+
+        :param list variants: plaintext passwords
+
+        :return bool: True if any variant matches a history hash
+        """
+        start = time.time()
+        variants = list(collections.OrderedDict.fromkeys(variants))
+        tasks = [(password, parsed)
+                 for password in variants
+                 for parsed in self._hashes]
+        found = self._check_legacy(variants)
+        derivations = 0
+        if tasks and not found:
+            pool = self._pool or get_pool()
+            # Derive keys in chunks of `workers` keys, so that we can stop
+            # early without wasting too much work
+            for i in range(0, len(tasks), self.workers):
+                chunk = tasks[i:i + self.workers]
+                keys = pool.map(_derive_key, chunk)
+                derivations += len(chunk)
+                if any(_equals(key, parsed.key)
+                       for (password, parsed), key in zip(chunk, keys)):
+                    found = True
+                    break
+        self.stats = {
+            'variants': len(variants),
+            'hashes': len(self._hashes) + len(self._legacy),
+            'derivations': derivations,
+            'seconds': time.time() - start,
+        }
+        logger.debug('Password history check: %r', self.stats)
+        return found
+
+
+def check_password_history(password, old_passwords, name):
+    """ Check if a password is in the (5 newest) password history hashes. """
+    return PasswordHistoryChecker(old_passwords, name).check([password])
 
 
 def check_passwords_history(variants, old_passwords, name):
-    for variant in variants:
-        if check_password_history(variant, old_passwords, name):
-            return True
-    return False
+    """ Check if any of the password variants are in the password history. """
+    return PasswordHistoryChecker(old_passwords, name).check(variants)
 
 
 class ClearPasswordHistoryMixin(DatabaseAccessor):
@@ -201,13 +322,17 @@ class PasswordHistoryMixin(ClearPasswordHistoryMixin):
         for m in (-1, 0):
             for r in what_range(password[m]):
                 if m < 0:
-                    tmp = password[:m]+chr(r)
+                    tmp = password[:m]+six.unichr(r)
                 else:
-                    tmp = chr(r)+password[m+1:]
-                tmp = old_encode_for_history(name, tmp)
+                    tmp = six.unichr(r)+password[m+1:]
                 variants.append(tmp)
         old_passwords = [r['hash'] for r in ph.get_history(entity_id)]
-        return check_passwords_history(variants, old_passwords, name)
+        checker = PasswordHistoryChecker(old_passwords, name)
+        result = checker.check(variants)
+        logger.info('Checked %(variants)d password variants against'
+                    ' %(hashes)d history hashes (%(derivations)d derivations)'
+                    ' in %(seconds).3f s', checker.stats)
+        return result
 
     def _check_password_history(self, password):
         """
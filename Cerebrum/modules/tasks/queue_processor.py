@@ -65,6 +65,29 @@ Solutions:
 - Make some insane sub-transaction context object that mimics CLDatabase, and
   runs CLDatabase.commit()/rollback() on exit (without *actually* running
   commit/rollback).  This is probably the easiest solution.
+
+
+Parallel processing
+-------------------
+The py:class:`.ParallelQueueProcessor` processes tasks in a pool of worker
+processes, each with its own database connection.  Workers don't select tasks
+up front, but claim one task at a time:
+
+1. Pop the next task using ``FOR UPDATE SKIP LOCKED``, and replace it with a
+   *lease* (a copy of the task with a future nbf).  Commit.
+2. Handle the task.
+3. On success: release (remove) the lease.  On failure: replace the lease
+   with a retry-task.
+
+If a worker dies while handling a task, the lease is left in the queue, and
+the task will be retried when the lease expires.
+
+Tasks with the same (queue, sub, key) are never processed concurrently, and
+the number of concurrent tasks from a given sub-queue can be limited.
+
+In dryrun, claims are rolled back, and processed tasks stay in the queue.  Each
+processed task must then be excluded from later claims, so a dryrun processes
+at most py:attr:`.ParallelQueueProcessor.dryrun_limit` tasks.
 """
 from __future__ import (
     absolute_import,
@@ -72,7 +95,13 @@ from __future__ import (
     print_function,
     unicode_literals,
 )
+import datetime
 import logging
+import multiprocessing
+import os
+import time
+
+from six.moves import queue as _queue
 
 from Cerebrum import Errors
 from Cerebrum.Utils import Factory
@@ -88,6 +117,61 @@ def task_id(task):
     return '/'.join((task.queue, task.sub, task.key))
 
 
+class ProcessorStats(object):
+    """ Throughput and latency statistics for a queue processor. """
+
+    def __init__(self):
+        self.durations = []
+        self.failed = 0
+        self.started = time.time()
+
+    def add(self, duration, failed=False):
+        self.durations.append(duration)
+        if failed:
+            self.failed += 1
+
+    def update(self, other):
+        self.durations.extend(other.durations)
+        self.failed += other.failed
+
+    def get_summary(self):
+        """ Get a summary of the processed tasks. """
+        elapsed = time.time() - self.started
+        durations = sorted(self.durations)
+        count = len(durations)
+
+        def percentile(p):
+            return durations[min(count - 1, int(count * p))]
+
+        summary = {
+            'tasks': count,
+            'failed': self.failed,
+            'elapsed': elapsed,
+            'throughput': count / elapsed if elapsed else 0.0,
+        }
+        if count:
+            summary.update({
+                'latency_min': durations[0],
+                'latency_avg': sum(durations) / count,
+                'latency_p50': percentile(0.5),
+                'latency_p95': percentile(0.95),
+                'latency_max': durations[-1],
+            })
+        return summary
+
+    def log_summary(self):
+        summary = self.get_summary()
+        logger.info('processed %d tasks (%d failed) in %.1fs, %.2f tasks/s',
+                    summary['tasks'], summary['failed'], summary['elapsed'],
+                    summary['throughput'])
+        if summary['tasks']:
+            logger.info('task latency: min=%.3fs avg=%.3fs p50=%.3fs'
+                        ' p95=%.3fs max=%.3fs',
+                        summary['latency_min'], summary['latency_avg'],
+                        summary['latency_p50'], summary['latency_p95'],
+                        summary['latency_max'])
+
+
 class QueueProcessor(object):
     """ Processes tasks according to a QueueHandler. """
 
@@ -98,6 +182,7 @@ class QueueProcessor(object):
         self.limit = limit
         self._dryrun = dryrun
         self._conn = None
+        self.stats = ProcessorStats()
 
     @property
     def change_program(self):
@@ -149,6 +234,7 @@ class QueueProcessor(object):
 
         # Process the current taask
         logger.info('handling task %s', task_id(task))
+        started = time.time()
         try:
             with self.new_transaction() as db:
                 self.queue_handler.handle_task(db, task)
@@ -156,6 +242,7 @@ class QueueProcessor(object):
         except Exception as e:
             logger.warning('task %s failed', task_id(task), exc_info=True)
             task_failed = e
+        self.stats.add(time.time() - started, failed=bool(task_failed))
 
         # Re-insert the current task on error
         #
@@ -177,3 +264,274 @@ class QueueProcessor(object):
         stats = self.queue_handler.get_abandoned_counts(self.conn)
         self.conn.rollback()
         return stats
+
+
+class _SharedState(object):
+    """ State shared by the ParallelQueueProcessor workers. """
+
+    def __init__(self, manager):
+        self.lock = manager.Lock()
+        # sub -> number of tasks being processed
+        self.active = manager.dict()
+        # task_id -> (queue, sub, key) of tasks being processed
+        self.inflight = manager.dict()
+        # task_id -> (queue, sub, key) of tasks processed in dryrun
+        self.done = manager.dict()
+        self.claimed = manager.Value('i', 0)
+
+
+class _Conflict(Exception):
+    """ Claimed task can't be processed right now. """
+    pass
+
+
+class ParallelQueueProcessor(QueueProcessor):
+    """ Processes tasks concurrently according to a QueueHandler. """
+
+    # Seconds to wait before retrying when all available tasks are busy
+    poll_interval = 1.0
+
+    # Max number of tasks to process in dryrun
+    dryrun_limit = 1000
+
+    def __init__(self, queue_handler, workers=4, sub_limits=None,
+                 lease_time=datetime.timedelta(hours=1), **kwargs):
+        """
+        :param int workers: number of worker processes
+        :param dict sub_limits:
+            max number of concurrent tasks from a given sub-queue
+        :param datetime.timedelta lease_time:
+            how long a worker can hold a task before it is retried
+        """
+        super(ParallelQueueProcessor, self).__init__(queue_handler, **kwargs)
+        self.workers = workers
+        self.sub_limits = dict(sub_limits or {})
+        self.lease_time = lease_time
+
+    @property
+    def max_claims(self):
+        """ Max number of tasks to claim, or None if unlimited. """
+        if not self._dryrun:
+            return self.limit
+        if self.limit is None:
+            return self.dryrun_limit
+        return min(self.limit, self.dryrun_limit)
+
+    def _limit_reached(self, state):
+        # must be called with state.lock held
+        return (self.max_claims is not None
+                and state.claimed.value >= self.max_claims)
+
+    def _get_exclude(self, state):
+        with state.lock:
+            full = [sub for sub, limit in self.sub_limits.items()
+                    if state.active.get(sub, 0) >= limit]
+            busy = list(state.inflight.values())
+            if self._dryrun:
+                # in dryrun, claimed tasks are never removed from the queue
+                busy.extend(state.done.values())
+        return full, busy
+
+    def _reserve(self, state, task):
+        """ Register a claimed task as in-flight. """
+        with state.lock:
+            tid = task_id(task)
+            limit = self.sub_limits.get(task.sub)
+            if tid in state.inflight:
+                raise _Conflict('task %s is already in progress' % tid)
+            if limit is not None and state.active.get(task.sub, 0) >= limit:
+                raise _Conflict('sub-queue %s is at limit' % task.sub)
+            if self._limit_reached(state):
+                raise _Conflict('task limit reached')
+            state.inflight[tid] = (task.queue, task.sub, task.key)
+            state.active[task.sub] = state.active.get(task.sub, 0) + 1
+            state.claimed.value += 1
+
+    def _unreserve(self, state, task):
+        with state.lock:
+            tid = task_id(task)
+            del state.inflight[tid]
+            state.active[task.sub] -= 1
+            if self._dryrun:
+                state.done[tid] = (task.queue, task.sub, task.key)
+
+    def claim_task(self, state):
+        """
+        Claim the next available task.
+
+        :returns tuple: the task and its lease, or None if no task is available
+        """
+        exclude_subs, exclude_tasks = self._get_exclude(state)
+        lease_nbf = now() + self.lease_time
+        with self.new_transaction() as db:
+            try:
+                task, lease = TaskQueue(db).lease_next_task(
+                    lease_nbf,
+                    queues=self.queue_handler.queue,
+                    nbf=self.nbf_before,
+                    max_attempts=self.queue_handler.max_attempts,
+                    exclude_subs=exclude_subs or None,
+                    exclude_tasks=exclude_tasks or None)
+            except Errors.NotFoundError:
+                return None
+            # raises _Conflict, which rolls back the claim
+            self._reserve(state, task)
+        logger.debug('worker %d leased task %s until %s',
+                     os.getpid(), task_id(task), lease_nbf)
+        return task, lease
+
+    def process_leased_task(self, task, lease):
+        logger.info('handling task %s', task_id(task))
+        started = time.time()
+        try:
+            with self.new_transaction() as db:
+                self.queue_handler.handle_task(db, task)
+            task_failed = None
+        except Exception as e:
+            logger.warning('task %s failed', task_id(task), exc_info=True)
+            task_failed = e
+        self.stats.add(time.time() - started, failed=bool(task_failed))
+
+        with self.new_transaction() as db:
+            if task_failed:
+                retry_task = self.queue_handler.get_retry_task(task,
+                                                               task_failed)
+                logger.info('re-queueing %s (as %s)',
+                            task_id(task), task_id(retry_task))
+                if TaskQueue(db).push_task(retry_task):
+                    logger.info('queued retry-task %s at %s',
+                                task_id(task), retry_task.nbf)
+                if task_id(retry_task) != task_id(lease):
+                    TaskQueue(db).release_task(lease)
+            elif not TaskQueue(db).release_task(lease):
+                logger.info('task %s updated while processing, keeping it',
+                            task_id(task))
+
+    def _work(self, state, results):
+        # each worker needs its own database connection
+        self._conn = None
+        self.stats = ProcessorStats()
+        try:
+            while True:
+                try:
+                    claimed = self.claim_task(state)
+                except _Conflict as e:
+                    logger.debug('unable to claim task: %s', e)
+                    claimed = None
+                if claimed:
+                    try:
+                        self.process_leased_task(*claimed)
+                    finally:
+                        self._unreserve(state, claimed[0])
+                    continue
+                with state.lock:
+                    if self._limit_reached(state):
+                        break
+                    if not state.inflight:
+                        # nothing to do, and nothing in progress that might
+                        # free up more tasks
+                        break
+                time.sleep(self.poll_interval)
+        finally:
+            results.put((self.stats.durations, self.stats.failed))
+
+    def run(self):
+        """
+        Process tasks until the queue is empty (or *limit* is reached).
+
+        :rtype: ProcessorStats
+        """
+        logger.info('processing tasks with %d workers (nbf=%s, limit=%r,'
+                    ' sub-limits=%r)', self.workers, self.nbf_before,
+                    self.limit, self.sub_limits)
+        if self._dryrun and self.max_claims != self.limit:
+            logger.info('dryrun, processing at most %d tasks',
+                        self.max_claims)
+        manager = multiprocessing.Manager()
+        state = _SharedState(manager)
+        results = multiprocessing.Queue()
+        stats = ProcessorStats()
+
+        procs = [multiprocessing.Process(target=self._work,
+                                         args=(state, results),
+                                         name='worker-{:d}'.format(n))
+                 for n in range(self.workers)]
+        for proc in procs:
+            proc.start()
+
+        pending = len(procs)
+        while pending:
+            try:
+                durations, failed = results.get(timeout=self.poll_interval)
+            except _queue.Empty:
+                if not any(proc.is_alive() for proc in procs):
+                    break
+                continue
+            worker_stats = ProcessorStats()
+            worker_stats.durations, worker_stats.failed = durations, failed
+            stats.update(worker_stats)
+            pending -= 1
+
+        for proc in procs:
+            proc.join()
+            if proc.exitcode:
+                logger.error('worker %s exited with status %r',
+                             proc.name, proc.exitcode)
+        manager.shutdown()
+        self.stats = stats
+        return stats
+
+
+def _sub_limit(value):
+    sub, _, limit = value.rpartition(':')
+    return sub, int(limit)
+
+
+def add_worker_args(parser):
+    """ Add --workers and --sub-limit arguments to parser.
+
+    :param parser: argument parser or argument group
+    """
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=1,
+        help='Process tasks in %(metavar)s parallel worker processes'
+             ' (default: %(default)s)',
+        metavar='<n>',
+    )
+    parser.add_argument(
+        '--sub-limit',
+        dest='sub_limits',
+        action='append',
+        type=_sub_limit,
+        default=[],
+        help='Limit the number of workers that process tasks from a given'
+             ' sub-queue, e.g. "manual:1" (only used with --workers)',
+        metavar='<sub>:<n>',
+    )
+    return parser
+
+
+def run_processor(queue_handler, args, dryrun):
+    """
+    Process tasks with a QueueProcessor or ParallelQueueProcessor.
+
+    :param args: parsed arguments (see py:func:`.add_worker_args`)
+
+    :rtype: QueueProcessor
+    :returns: the processor, for collecting stats and abandoned tasks
+    """
+    if args.workers > 1:
+        proc = ParallelQueueProcessor(queue_handler,
+                                      workers=args.workers,
+                                      sub_limits=dict(args.sub_limits),
+                                      limit=args.limit,
+                                      dryrun=dryrun)
+        proc.run()
+    else:
+        proc = QueueProcessor(queue_handler, limit=args.limit, dryrun=dryrun)
+        for task in proc.select_tasks():
+            proc.process_task(task)
+    proc.stats.log_summary()
+    return proc
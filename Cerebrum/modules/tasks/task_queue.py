@@ -170,13 +170,50 @@ def sql_search(db, fetchall=True, limit=None, **selects):
         fetchall=fetchall)
 
 
-def sql_delete(db, limit=None, **selects):
+def _exclude(binds, subs=None, tasks=None):
+    """
+    Generate clauses and binds for excluding tasks from task_queue queries.
+
+    :param subs: exclude tasks in these sub-queues
+    :param tasks: exclude these (queue, sub, key) tuples
+
+    :rtype: list
+    :returns: a list of conditions (the binds dict is updated in place)
+    """
+    clauses = []
+    if subs:
+        names = []
+        for i, sub in enumerate(subs):
+            names.append(':x_sub{:d}'.format(i))
+            binds['x_sub{:d}'.format(i)] = six.text_type(sub)
+        clauses.append('sub NOT IN ({})'.format(', '.join(names)))
+    if tasks:
+        values = []
+        for i, (queue, sub, key) in enumerate(tasks):
+            values.append('(:x_q{0:d}, :x_s{0:d}, :x_k{0:d})'.format(i))
+            binds.update({
+                'x_q{:d}'.format(i): six.text_type(queue),
+                'x_s{:d}'.format(i): six.text_type(sub),
+                'x_k{:d}'.format(i): six.text_type(key),
+            })
+        clauses.append('(queue, sub, key) NOT IN ({})'.format(
+            ', '.join(values)))
+    return clauses
+
+
+def sql_delete(db, limit=None, skip_locked=False, exclude_subs=None,
+               exclude_tasks=None, **selects):
     """
     Delete tasks from the queue.
 
     See py:func:`._select` for search params.
 
     :param limit: upper limit of deleted items
+    :param skip_locked:
+        skip tasks that are locked by other transactions (i.e. tasks that are
+        currently being claimed by someone else)
+    :param exclude_subs: ignore tasks in these sub-queues
+    :param exclude_tasks: ignore these (queue, sub, key) tuples
 
     :returns: deleted item rows.
     """
@@ -188,10 +225,12 @@ def sql_delete(db, limit=None, **selects):
           {where}
           ORDER BY {order}
           {limit}
+          {lock}
       )
       RETURNING {fields}
     """
     clauses, binds = _select(**selects)
+    clauses.extend(_exclude(binds, subs=exclude_subs, tasks=exclude_tasks))
 
     if limit is None:
         limit_clause = ''
@@ -210,6 +249,7 @@ def sql_delete(db, limit=None, **selects):
             order=', '.join(DEFAULT_ORDER),
             fields=', '.join(DEFAULT_FIELDS),
             limit=limit_clause,
+            lock='FOR UPDATE SKIP LOCKED' if skip_locked else '',
         ),
         binds,
         fetchall=True)
@@ -241,16 +281,27 @@ def sql_pop(db, queue, sub, key):
     return item
 
 
-def sql_pop_next(db, queues=None, subs=None, nbf=None, max_attempts=None):
+def sql_pop_next(db, queues=None, subs=None, nbf=None, max_attempts=None,
+                 skip_locked=False, exclude_subs=None, exclude_tasks=None):
     """
     Pop next item from queue.
 
+    With ``skip_locked``, items that are being popped by concurrent
+    transactions are skipped, which makes it safe for multiple workers to pop
+    from the same queue without blocking each other.
+
+    See py:func:`.sql_delete` for ``skip_locked``, ``exclude_subs`` and
+    ``exclude_tasks``.
+
     :returns: the popped item row
 
     :raises NotFoundError: if no matching item exists.
     """
     rows = list(sql_delete(db, queues=queues, subs=subs, nbf_before=nbf,
-                           max_attempts=max_attempts, limit=1))
+                           max_attempts=max_attempts, limit=1,
+                           skip_locked=skip_locked,
+                           exclude_subs=exclude_subs,
+                           exclude_tasks=exclude_tasks))
     if len(rows) < 1:
         raise Cerebrum.Errors.NotFoundError(
             'task_queue pop: no items in %s, %s (nbf: %s, max_attempts: %s)'
@@ -267,6 +318,40 @@ def sql_pop_next(db, queues=None, subs=None, nbf=None, max_attempts=None):
     return item
 
 
+def sql_release(db, queue, sub, key, nbf, attempts, reason):
+    """
+    Remove a leased item from queue.
+
+    The item is only removed if it is unchanged, i.e. if it still has the
+    given *nbf*, *attempts* and *reason*.  If someone has pushed an update to
+    the item after it was leased, the updated item is kept.
+
+    :rtype: bool
+    :returns: True if the item was removed
+    """
+    stmt = """
+      DELETE FROM [:table schema=cerebrum name=task_queue]
+      WHERE
+        queue = :queue AND sub = :sub AND key = :key AND
+        nbf = :nbf AND attempts = :attempts AND {reason}
+      RETURNING key
+    """
+    binds = {
+        'queue': six.text_type(queue),
+        'sub': six.text_type(sub),
+        'key': six.text_type(key),
+        'nbf': nbf,
+        'attempts': int(attempts),
+    }
+    if reason is None:
+        reason_clause = 'reason IS NULL'
+    else:
+        reason_clause = 'reason = :reason'
+        binds['reason'] = reason
+    return bool(db.query(stmt.format(reason=reason_clause), binds,
+                         fetchall=True))
+
+
 def sql_get(db, queue, sub, key):
     """
     Get item from queue.
@@ -495,6 +580,35 @@ class TaskQueue(DatabaseAccessor):
     def pop_next_task(self, *args, **kwargs):
         return db_row_to_task(sql_pop_next(self._db, *args, **kwargs))
 
+    def lease_next_task(self, lease_nbf, **kwargs):
+        """
+        Pop the next task, and replace it with a lease.
+
+        The lease is a copy of the task, with a future *nbf*, and an
+        incremented attempts counter.  If the lease isn't released (i.e.
+        the task handler crashes), the task will be retried after
+        *lease_nbf*.
+
+        See py:func:`.sql_pop_next` for kwargs.
+
+        :returns tuple: the popped task, and its lease
+        """
+        task = self.pop_next_task(skip_locked=True, **kwargs)
+        lease = db_row_to_task(
+            _sql_insert(self._db, task.queue, task.sub, task.key,
+                        iat=task.iat,
+                        nbf=lease_nbf,
+                        attempts=(task.attempts or 0) + 1,
+                        reason=task.reason,
+                        payload=(task.payload.to_dict()
+                                 if task.payload else None)))
+        return task, lease
+
+    def release_task(self, lease):
+        """ Remove a leased task, unless it has been updated. """
+        return sql_release(self._db, lease.queue, lease.sub, lease.key,
+                           lease.nbf, lease.attempts, lease.reason)
+
     def search_tasks(self, **fields):
         for row in sql_search(self._db, **fields):
             yield db_row_to_task(row)
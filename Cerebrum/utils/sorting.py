@@ -18,6 +18,10 @@
 # along with Cerebrum; if not, write to the Free Software Foundation,
 # Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
 """ Utilities related to sorting or ordering sequences.  """
+import heapq
+import tempfile
+
+from six.moves import cPickle as pickle
 
 
 def make_priority_lookup(lookup_order, invert=False):
@@ -69,3 +73,72 @@ def make_priority_lookup(lookup_order, invert=False):
         return lut.get(value, default)
 
     return get_priority
+
+
+def _write_chunk(records, tmpdir):
+    """ Write sorted records to a temporary file. """
+    fd = tempfile.TemporaryFile(dir=tmpdir)
+    for record in sorted(records):
+        pickle.dump(record, fd, pickle.HIGHEST_PROTOCOL)
+    fd.seek(0)
+    return fd
+
+
+def _read_chunk(fd):
+    """ Read records from a file written by _write_chunk. """
+    while True:
+        try:
+            yield pickle.load(fd)
+        except EOFError:
+            return
+
+
+def external_sort(items, key=None, chunk_size=10000, tmpdir=None):
+    """
+    Sort items with bounded memory usage.
+
+    Items are sorted in chunks of at most `chunk_size` items, and each sorted
+    chunk is written to a temporary file.  The chunks are then merged.  If
+    all items fit in a single chunk, no temporary files are used.
+
+    Like `sorted`, the sort is stable.
+
+    :param items: An iterable of picklable items to sort
+    :param key: A function to extract a comparison key from each item
+    :param chunk_size: Max number of items to keep in memory
+    :param tmpdir: Where to put temporary files (default: tempfile default)
+
+    :returns: A generator that yields the sorted items
+
+    >>> list(external_sort([3, 1, 2], chunk_size=2))
+    [1, 2, 3]
+    """
+    if key is None:
+        def key(item):
+            return item
+
+    chunks = []
+    records = []
+    try:
+        # The item index makes the sort stable, and ensures that the items
+        # themselves are never compared.
+        for index, item in enumerate(items):
+            records.append((key(item), index, item))
+            if len(records) >= chunk_size:
+                chunks.append(_write_chunk(records, tmpdir))
+                records = []
+
+        if chunks:
+            if records:
+                chunks.append(_write_chunk(records, tmpdir))
+                records = []
+            merged = heapq.merge(*(_read_chunk(fd) for fd in chunks))
+        else:
+            records.sort()
+            merged = records
+
+        for _, _, item in merged:
+            yield item
+    finally:
+        for fd in chunks:
+            fd.close()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Compile password dictionaries into an index for the dictionary check.
+
+By default, all dictionaries in cereconf.PASSWORD_DICTIONARIES are compiled
+into cereconf.PASSWORD_DICTIONARY_INDEX.  The index should be re-built
+whenever the dictionaries change, e.g. after running
+generate_name_dictionary.py.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import argparse
+import logging
+
+import cereconf
+
+import Cerebrum.logutils
+import Cerebrum.logutils.options
+from Cerebrum.modules.pwcheck.dictionary_index import build_index
+
+
+logger = logging.getLogger(__name__)
+
+
+def main(inargs=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '-o', '--output',
+        default=getattr(cereconf, 'PASSWORD_DICTIONARY_INDEX', None),
+        help='Write index to %(metavar)s (default: %(default)s)',
+        metavar='FILE',
+    )
+    parser.add_argument(
+        '--encoding',
+        default='utf-8',
+        help='Dictionary file encoding (default: %(default)s)',
+    )
+    parser.add_argument(
+        'dictionaries',
+        nargs='*',
+        default=list(getattr(cereconf, 'PASSWORD_DICTIONARIES', ())),
+        help='Dictionary files (default: cereconf.PASSWORD_DICTIONARIES)',
+        metavar='DICTIONARY',
+    )
+    Cerebrum.logutils.options.install_subparser(parser)
+
+    args = parser.parse_args(inargs)
+    Cerebrum.logutils.autoconf("cronjob", args)
+
+    if not args.output:
+        parser.error('No output file given')
+    if not args.dictionaries:
+        parser.error('No dictionaries given')
+
+    logger.info('Start %s', parser.prog)
+    build_index(args.dictionaries, args.output, file_encoding=args.encoding)
+    logger.info('Done %s', parser.prog)
+
+
+if __name__ == '__main__':
+    main()
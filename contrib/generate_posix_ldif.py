@@ -40,6 +40,7 @@ from Cerebrum.Utils import Factory
 from Cerebrum.modules.LDIFutils import (ldif_outfile,
                                         end_ldif_outfile,
                                         container_entry_string)
+from Cerebrum.modules.posix.UserExporter import get_clock_times
 
 logger = logging.getLogger(__name__)
 
@@ -90,6 +91,11 @@ def main(inargs=None):
         action='store_true',
         dest='all',
         help='write everything as configured in cereconf')
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        default=False,
+        help='log time spent in each phase of the export')
 
     Cerebrum.logutils.options.install_subparser(parser)
     args = parser.parse_args(inargs)
@@ -131,6 +137,12 @@ def main(inargs=None):
     if fd:
         end_ldif_outfile('POSIX', fd)
 
+    if args.profile:
+        for name, (calls, seconds) in sorted(get_clock_times().items(),
+                                             key=lambda item: -item[1][1]):
+            logger.info('Profile: %s took %.2f seconds (%d calls)',
+                        name, seconds, calls)
+
     logger.info('End of script %s', parser.prog)
 
 
@@ -29,7 +29,11 @@ from Cerebrum.modules.greg.client import get_client
 from Cerebrum.modules.greg.importer import get_import_class
 from Cerebrum.modules.greg.tasks import GregImportTasks
 from Cerebrum.modules.import_utils import syncs
-from Cerebrum.modules.tasks.queue_processor import QueueProcessor
+from Cerebrum.modules.import_utils.matcher import ExternalIdIndex
+from Cerebrum.modules.tasks.queue_processor import (
+    add_worker_args,
+    run_processor,
+)
 from Cerebrum.utils.argutils import add_commit_args
 
 logger = logging.getLogger(__name__)
@@ -56,6 +60,13 @@ def main(inargs=None):
         help='Limit number of tasks to %(metavar)s (required in dryrun)',
         metavar='<n>',
     )
+    parser.add_argument(
+        '--id-index',
+        action='store_true',
+        help='Find persons in an in-memory index of external ids',
+    )
+
+    add_worker_args(parser.add_argument_group('Workers'))
 
     db_args = parser.add_argument_group('Database')
     add_commit_args(db_args)
@@ -73,14 +84,12 @@ def main(inargs=None):
     dryrun = not args.commit
     client = get_client(args.config)
     import_class = get_import_class()
+    if args.id_index:
+        import_class.person_index = ExternalIdIndex('person')
     queue_handler = GregImportTasks(client=client, import_class=import_class)
 
     # The QueueProcessor gets db and does commit/rollback according to dryrun
-    proc = QueueProcessor(queue_handler, limit=args.limit, dryrun=dryrun)
-
-    tasks = proc.select_tasks()
-    for task in tasks:
-        proc.process_task(task)
+    proc = run_processor(queue_handler, args, dryrun)
 
     # Check for tasks that we've given up on (i.e. over the
     # GregImportTasks.max_attempts threshold)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Rebuild or verify the group membership closure table.
+
+rebuild
+    Re-compute the entire group_member_closure table from group_member.
+
+check
+    Report memberships that are missing, superfluous or have the wrong depth
+    in the group_member_closure table.  Exits with status 1 if any errors are
+    found.
+
+See :py:mod:`Cerebrum.modules.group_closure` for details.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import argparse
+import logging
+import sys
+
+import Cerebrum.logutils
+import Cerebrum.logutils.options
+from Cerebrum.Utils import Factory
+from Cerebrum.modules.group_closure.dbal import GroupClosure
+from Cerebrum.utils.argutils import add_commit_args
+
+
+logger = logging.getLogger(__name__)
+
+
+def rebuild(db):
+    closure = GroupClosure(db)
+    count = closure.rebuild()
+    logger.info('Rebuilt closure with %d memberships', count)
+
+
+def check(db):
+    closure = GroupClosure(db)
+    errors = 0
+    for row in closure.check():
+        errors += 1
+        print('group_id={} member_id={} expected_depth={} actual_depth={}'
+              .format(row['group_id'], row['member_id'],
+                      row['expected_depth'], row['actual_depth']))
+    logger.info('Found %d errors in closure', errors)
+    return errors
+
+
+def main(inargs=None):
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=__doc__)
+    commands = parser.add_subparsers(dest='command')
+    rebuild_cmd = commands.add_parser(
+        'rebuild',
+        help='rebuild the closure table')
+    add_commit_args(rebuild_cmd)
+    commands.add_parser(
+        'check',
+        help='verify the closure table')
+    Cerebrum.logutils.options.install_subparser(parser)
+
+    args = parser.parse_args(inargs)
+    Cerebrum.logutils.autoconf('cronjob', args)
+
+    logger.info('Start %s', parser.prog)
+    db = Factory.get('Database')()
+
+    if args.command == 'rebuild':
+        rebuild(db)
+        if args.commit:
+            logger.info('Committing changes')
+            db.commit()
+        else:
+            logger.info('Rolling back changes')
+            db.rollback()
+        logger.info('Done %s', parser.prog)
+    else:
+        errors = check(db)
+        logger.info('Done %s', parser.prog)
+        if errors:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
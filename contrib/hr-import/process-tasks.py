@@ -26,7 +26,11 @@ import Cerebrum.logutils
 import Cerebrum.logutils.options
 import Cerebrum.Errors
 from Cerebrum.modules.hr_import.config import TaskImportConfig
-from Cerebrum.modules.tasks.queue_processor import QueueProcessor
+from Cerebrum.modules.import_utils.matcher import ExternalIdIndex
+from Cerebrum.modules.tasks.queue_processor import (
+    add_worker_args,
+    run_processor,
+)
 from Cerebrum.utils.argutils import add_commit_args
 from Cerebrum.utils.module import resolve
 
@@ -34,9 +38,11 @@ from Cerebrum.utils.module import resolve
 logger = logging.getLogger(__name__)
 
 
-def get_task_handler(config):
+def get_task_handler(config, id_index=False):
     import_cls = resolve(config.import_class)
     logger.info('import_cls: %s', config.import_class)
+    if id_index:
+        import_cls.person_index = ExternalIdIndex('person')
 
     task_cls = resolve(config.task_class)
     logger.info('task_cls: %s', config.task_class)
@@ -65,6 +71,13 @@ def main(inargs=None):
         help='Limit number of tasks to %(metavar)s (required in dryrun)',
         metavar='<n>',
     )
+    parser.add_argument(
+        '--id-index',
+        action='store_true',
+        help='Find persons in an in-memory index of external ids',
+    )
+
+    add_worker_args(parser.add_argument_group('Workers'))
 
     db_args = parser.add_argument_group('Database')
     add_commit_args(db_args)
@@ -80,13 +93,8 @@ def main(inargs=None):
     config = TaskImportConfig.from_file(args.config)
     dryrun = not args.commit
 
-    proc = QueueProcessor(get_task_handler(config),
-                          limit=args.limit,
-                          dryrun=dryrun)
-
-    tasks = proc.select_tasks()
-    for task in tasks:
-        proc.process_task(task)
+    proc = run_processor(get_task_handler(config, args.id_index), args,
+                         dryrun)
 
     # Check for tasks that we've given up on (i.e. over the
     # GregImportTasks.max_attempts threshold)
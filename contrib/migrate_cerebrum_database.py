@@ -63,7 +63,8 @@ targets = {
     'feide_service': ('feide_service_1_1',),
     'entity_expire': ('entity_expire_1_0',),
     'ephorte': ('ephorte_1_1', 'ephorte_1_2'),
-    'eventlog': ('eventlog_1_1', ),
+    'eventlog': ('eventlog_1_1', 'eventlog_1_2', ),
+    'events': ('events_1_1', ),
     'gpg': ('gpg_1_1',),
     'stedkode': ('stedkode_1_1', ),
     'posixuser': ('posixuser_1_0', 'posixuser_1_1', ),
@@ -75,7 +76,7 @@ targets = {
     'entity_trait': ('entity_trait_1_1',),
     'hostpolicy': ('hostpolicy_1_1',),
     'note': ('note_1_1', 'note_1_2'),
-    'job_runner': ('job_runner_1_1',),
+    'job_runner': ('job_runner_1_1', 'job_runner_1_2'),
 }
 
 # Global variables
@@ -1282,6 +1283,24 @@ def migrate_to_eventlog_1_1():
     db.commit()
 
 
+def migrate_to_eventlog_1_2():
+    assert_db_version("1.1", component='eventlog')
+    makedb('eventlog_1_2', 'pre')
+    meta = Metainfo.Metainfo(db)
+    meta.set_metainfo("sqlmodule_eventlog", "1.2")
+    print("Migration to eventlog 1.2 completed successfully")
+    db.commit()
+
+
+def migrate_to_events_1_1():
+    assert_db_version("1.0", component='events')
+    makedb('events_1_1', 'pre')
+    meta = Metainfo.Metainfo(db)
+    meta.set_metainfo("sqlmodule_events", "1.1")
+    print("Migration to events 1.1 completed successfully")
+    db.commit()
+
+
 def migrate_to_email_1_1():
     print("\ndone.")
     assert_db_version("1.0", component='email')
@@ -1941,6 +1960,15 @@ def migrate_to_job_runner_1_1():
     db.commit()
 
 
+def migrate_to_job_runner_1_2():
+    assert_db_version("1.1", component='job_runner')
+    makedb('job_runner_1_2', 'pre')
+    meta = Metainfo.Metainfo(db)
+    meta.set_metainfo("sqlmodule_job_runner", "1.2")
+    print("Migration to job_runner 1.2 completed successfully")
+    db.commit()
+
+
 def migrate_to_spread_expire_1_1():
     assert_db_version("1.0", component="spread_expire")
     makedb("spread_expire_1_1", "pre")
@@ -90,7 +90,6 @@ from Cerebrum.modules.automatic_group.structure import (
     meta_group_members,
     update_members,
     cache_stedkoder,
-    get_current_members,
     get_automatic_group_ids
 )
 from Cerebrum.utils.argutils import add_commit_args, get_constant
@@ -130,8 +129,7 @@ def process_meta_groups(db, ou, gr, prefix, meta_prefix, perspective,
 
     for group_id, wanted_members in six.iteritems(meta_groups):
         logger.info('Group: %s, needs members: %s', group_id, wanted_members)
-        current_members = set(get_current_members(gr, group_id))
-        update_members(gr, group_id, current_members, wanted_members)
+        update_members(gr, group_id, wanted_members)
 
     return meta_groups
 
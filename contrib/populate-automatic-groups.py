@@ -602,62 +602,29 @@ def populate_groups_from_rule(generator, row2groups, current_groups,
     logger.debug("... and <= %d members", count)
 
 
-def remove_members(group, member_sequence):
-    """Remove several members from a group.
-
-    This is just a convenience function.
+def log_member_changes(group, member_ids, counts, message):
+    """Log and count membership changes.
 
     :type group: Factory.get('Group') instance
     :param group:
-      Group from which the members are to be removed.
-
-    :type member_sequence: sequence
-    :param member_sequence:
-      A sequence with person_ids to remove from group.
-    """
-    global _members_removed
-    en = Factory.get("Entity")(database)
-    for entity_id in member_sequence:
-        en.clear()
-        group.remove_member(entity_id)
-        en.find(entity_id)
-        logger.info('Removing %s from group %s', en, group)
-        if en.entity_type in _members_removed:
-            _members_removed[en.entity_type] += 1
-        else:
-            _members_removed[en.entity_type] = 1
-
-    logger.debug("Removed %d members from group id=%s, name=%s",
-                 len(member_sequence), group.entity_id, group.group_name)
-
+      Group that the members were added to or removed from.
 
-def add_members(group, member_sequence):
-    """Add several members to a group.
+    :type member_ids: set
+    :param member_ids:
+      The entity_ids of the added or removed members.
 
-    This is just a convenience function.
+    :type counts: dict
+    :param counts:
+      Number of changes per entity type (updated).
 
-    :type group: Factory.get('Group') instance
-    :param group:
-      Group from which the members are to be removed.
-
-    :type member_sequence: sequence
-    :param member_sequence:
-      A sequence with person_ids who are to become members of L{group}.
+    :type message: str
+    :param message:
+      Log message, with placeholders for the member and the group.
     """
-    global _members_added
     en = Factory.get("Entity")(database)
-    for entity_id in member_sequence:
-        en.clear()
-        group.add_member(entity_id)
-        en.find(entity_id)
-        logger.info('Adding %s to group %s', en, group)
-        if en.entity_type in _members_added:
-            _members_added[en.entity_type] += 1
-        else:
-            _members_added[en.entity_type] = 1
-
-    logger.debug("Added %d members to group id=%s, name=%s",
-                 len(member_sequence), group.entity_id, group.group_name)
+    for member in en.find_many(sorted(member_ids)):
+        logger.info(message, member, group)
+        counts[member.entity_type] = counts.get(member.entity_type, 0) + 1
 
 
 def synchronise_spreads(group, spreads, omit_spreads):
@@ -751,20 +718,13 @@ def synchronise_groups(current_groups, new_groups, spreads,
 
         synchronise_spreads(group, spreads, omit_spreads)
 
-        # select just the entity_ids (we don't care about entity_type)
-        current_members = set(int(x["member_id"]) for x in
-                              group.search_members(group_id=group.entity_id))
         # now, sync the union members. sync'ing means making sure that the
         # members of group are exactly the ones in memberset.
-
-        # those that are not in 'group_members', should be added
-        to_add = new_members.difference(current_members)
-        add_members(group, to_add)
-
-        # those that are in 'group_members', but not in members_from_data,
-        # should be removed.
-        to_remove = current_members.difference(new_members)
-        remove_members(group, to_remove)
+        to_add, to_remove = group.sync_members(new_members)
+        log_member_changes(group, to_add, _members_added,
+                           'Adding %s to group %s')
+        log_member_changes(group, to_remove, _members_removed,
+                           'Removing %s from group %s')
 
         if gname not in current_groups:
             logger.debug("New group id=%s, name=%s", group_id, gname)
@@ -818,12 +778,11 @@ def empty_defunct_groups(groups_from_cerebrum):
 
         logger.info("Removing all members from group id=%s, name=%s",
                     group_id, group_name)
-        members = [x["member_id"] for x in
-                   group.search_members(group_id=group.entity_id)]
-        count = len(members)
-        remove_members(group, members)
+        _, members = group.sync_members(())
+        log_member_changes(group, members, _members_removed,
+                           'Removing %s from group %s')
         logger.info("Removed %d members from defunct group id=%s, name=%s",
-                    count, group_id, group_name)
+                    len(members), group_id, group_name)
 
 
 def delete_defunct_groups(groups):
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Re-compute the cached person names.
+
+The cached names (source system *Cached*) are normally updated whenever a
+person's names are written.  This script re-computes the cached names for all
+(or some) persons, e.g. after a change to cereconf.SYSTEM_LOOKUP_ORDER.
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import argparse
+import logging
+
+import Cerebrum.logutils
+import Cerebrum.logutils.options
+from Cerebrum.Utils import Factory
+from Cerebrum.utils.argutils import add_commit_args
+
+
+logger = logging.getLogger(__name__)
+
+
+def main(inargs=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '-p', '--person-id',
+        dest='person_ids',
+        type=int,
+        action='append',
+        help='Only update person %(metavar)s (default: all persons)',
+        metavar='ID',
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=1000,
+        help='Write changes for up to %(metavar)s persons at a time '
+             '(default: %(default)s)',
+        metavar='N',
+    )
+    add_commit_args(parser)
+    Cerebrum.logutils.options.install_subparser(parser)
+
+    args = parser.parse_args(inargs)
+    Cerebrum.logutils.autoconf("cronjob", args)
+
+    logger.info('Start %s', parser.prog)
+    db = Factory.get('Database')()
+    db.cl_init(change_program=parser.prog)
+    pe = Factory.get('Person')(db)
+
+    changed = pe.recalculate_cached_names(person_ids=args.person_ids,
+                                          batch_size=args.batch_size)
+    logger.info('Updated cached names for %d persons', len(changed))
+
+    if args.commit:
+        logger.info('Committing changes')
+        db.commit()
+    else:
+        logger.info('Rolling back changes')
+        db.rollback()
+    logger.info('Done %s', parser.prog)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+/* encoding: utf-8
+ *
+ * Copyright 2026 University of Oslo, Norway
+ *
+ * This file is part of Cerebrum.
+ *
+ * Cerebrum is free software; you can redistribute it and/or modify it
+ * under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 2 of the License, or
+ * (at your option) any later version.
+ *
+ * Cerebrum is distributed in the hope that it will be useful, but
+ * WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with Cerebrum; if not, write to the Free Software Foundation,
+ * Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+ */
+
+/**
+ * Add a next_attempt_at column, for claiming due events and retrying failed
+ * events with a backoff.
+ */
+category:pre;
+ALTER TABLE event_log ADD next_attempt_at TIMESTAMP DEFAULT [:now];
+
+/**
+ * Add an index for claiming due events.
+ */
+category:pre;
+CREATE INDEX event_log_next_attempt_idx
+  ON event_log(target_system, next_attempt_at)
+  WHERE next_attempt_at IS NOT NULL;
+
+/**
+ * Add an index for looking up earlier events for a subject.
+ */
+category:pre;
+CREATE INDEX event_log_subject_idx
+  ON event_log(target_system, subject_entity, event_id);
@@ -0,0 +1,37 @@
+/* encoding: utf-8
+ *
+ * Copyright 2026 University of Oslo, Norway
+ *
+ * This file is part of Cerebrum.
+ *
+ * Cerebrum is free software; you can redistribute it and/or modify it
+ * under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 2 of the License, or
+ * (at your option) any later version.
+ *
+ * Cerebrum is distributed in the hope that it will be useful, but
+ * WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with Cerebrum; if not, write to the Free Software Foundation,
+ * Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+ */
+
+/**
+ * Add a next_attempt_at column, for claiming due events and retrying failed
+ * events with a backoff.
+ */
+category:pre;
+ALTER TABLE events ADD next_attempt_at TIMESTAMP DEFAULT [:now];
+
+/**
+ * Add indexes for claiming due events in subject order.
+ */
+category:pre;
+CREATE INDEX events_next_attempt_idx ON events(next_attempt_at)
+  WHERE next_attempt_at IS NOT NULL;
+
+category:pre;
+CREATE INDEX events_subject_idx ON events(subject_id, event_id);
@@ -0,0 +1,45 @@
+/*
+ * Copyright 2026 University of Oslo, Norway
+ *
+ * This file is part of Cerebrum.
+ *
+ * Cerebrum is free software; you can redistribute it and/or modify it
+ * under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 2 of the License, or
+ * (at your option) any later version.
+ *
+ * Cerebrum is distributed in the hope that it will be useful, but
+ * WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with Cerebrum; if not, write to the Free Software Foundation,
+ * Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+ */
+
+/* SQL script for migrating mod_job_runner from 1.1 to 1.2
+ *
+ * Adds the job_runtime table, for job run time statistics.
+ */
+
+category:pre;
+CREATE TABLE job_runtime
+(
+  id
+    TEXT
+    CONSTRAINT job_runtime_pk PRIMARY KEY,
+
+  runs
+    NUMERIC(12,0)
+    NOT NULL
+    DEFAULT 0,
+
+  avg_duration
+    NUMERIC(12,3)
+    NOT NULL,
+
+  last_duration
+    NUMERIC(12,3)
+    NOT NULL
+);
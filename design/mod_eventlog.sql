@@ -1,6 +1,6 @@
 /* encoding: utf-8
  *
- * Copyright 2013-2019 University of Oslo, Norway
+ * Copyright 2013-2026 University of Oslo, Norway
  *
  * This file is part of Cerebrum.
  *
@@ -25,7 +25,7 @@ category:metainfo;
 name=eventlog;
 
 category:metainfo;
-version=1.1;
+version=1.2;
 
 
 category:drop;
@@ -120,11 +120,31 @@ CREATE TABLE event_log
     NUMERIC(12,0)
     DEFAULT 0,
 
+  /* When the event is due for processing.  Pushed forward when the event is
+   * claimed, and with an exponential backoff when the event fails.  NULL
+   * indicates that we've given up on the event. */
+  next_attempt_at
+    TIMESTAMP
+    DEFAULT [:now],
+
   change_params
     CHAR VARYING(4000)
 );
 
 
+/* Index of events that are (or will be) due for processing */
+category:main;
+CREATE INDEX event_log_next_attempt_idx
+  ON event_log(target_system, next_attempt_at)
+  WHERE next_attempt_at IS NOT NULL;
+
+
+/* Index for looking up earlier events for a subject */
+category:main;
+CREATE INDEX event_log_subject_idx
+  ON event_log(target_system, subject_entity, event_id);
+
+
 /*
  * We can't use dollar quoting in the function block, since Plex goes bananas
  * when it encounters dollars :( If Plex starts to behave, change this!
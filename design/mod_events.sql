@@ -1,6 +1,6 @@
 /* encoding: utf-8
  *
- * Copyright 2017-2019 University of Oslo, Norway
+ * Copyright 2017-2026 University of Oslo, Norway
  *
  * This file is part of Cerebrum.
  *
@@ -25,7 +25,7 @@ category:metainfo;
 name=events;
 
 category:metainfo;
-version=1.0;
+version=1.1;
 
 
 /* event_id sequence */
@@ -86,6 +86,13 @@ CREATE TABLE events
     NUMERIC(12,0)
     DEFAULT 0,
 
+  /* When the event is due for processing.  Pushed forward when the event is
+   * claimed, and with an exponential backoff when the event fails.  NULL
+   * indicates that we've given up on the event. */
+  next_attempt_at
+    TIMESTAMP
+    DEFAULT [:now],
+
   /* Additional (JSON-serialized) event data.
    * Contains info about:
    *  - audience (list of spread code_str)
@@ -98,6 +105,17 @@ CREATE TABLE events
 );
 
 
+/* Index of events that are (or will be) due for processing */
+category:main;
+CREATE INDEX events_next_attempt_idx ON events(next_attempt_at)
+  WHERE next_attempt_at IS NOT NULL;
+
+
+/* Index for looking up earlier events for a subject */
+category:main;
+CREATE INDEX events_subject_idx ON events(subject_id, event_id);
+
+
 /* trigger function
  * issues a NOTIFY event_publisher with the event_id of new rows from the events
  * table */
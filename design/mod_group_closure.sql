@@ -0,0 +1,85 @@
+/* encoding: utf-8
+ *
+ * Copyright 2026 University of Oslo, Norway
+ *
+ * This file is part of Cerebrum.
+ *
+ * Cerebrum is free software; you can redistribute it and/or modify it
+ * under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 2 of the License, or
+ * (at your option) any later version.
+ *
+ * Cerebrum is distributed in the hope that it will be useful, but
+ * WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with Cerebrum; if not, write to the Free Software Foundation,
+ * Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+ *
+ *
+ * Tables used by Cerebrum.modules.group_closure
+ *
+ * The group_member_closure table is a flattened copy of the group_member
+ * table, with one row for every direct *and* indirect membership.  It is
+ * maintained by the GroupClosureMixin, and can be rebuilt or verified with
+ * contrib/group-closure.py.
+ *
+ * Note: This database module uses postgres-only features.
+ */
+category:metainfo;
+name=group_closure;
+
+category:metainfo;
+version=1.0;
+
+
+/* TABLE group_member_closure
+ *
+ * group_id
+ *   A group with a direct or indirect member
+ *
+ * member_id
+ *   The member entity
+ *
+ * member_type
+ *   The entity_type of the member
+ *
+ * min_depth
+ *   Number of intermediate groups on the shortest path from group_id to
+ *   member_id.  Direct members have depth 0.
+ *
+ * There are no foreign keys in this table, as rows are removed *after* the
+ * group or membership they refer to.
+ */
+category:main;
+CREATE TABLE IF NOT EXISTS group_member_closure
+(
+  group_id
+    NUMERIC(12,0)
+    NOT NULL,
+
+  member_id
+    NUMERIC(12,0)
+    NOT NULL,
+
+  member_type
+    NUMERIC(6,0)
+    NOT NULL,
+
+  min_depth
+    INT
+    NOT NULL
+    CONSTRAINT group_member_closure_depth_chk
+      CHECK (min_depth >= 0),
+
+  CONSTRAINT group_member_closure_pk PRIMARY KEY (group_id, member_id)
+);
+
+category:main;
+CREATE INDEX IF NOT EXISTS group_member_closure_member_idx
+  ON group_member_closure(member_id, group_id);
+
+category:drop;
+DROP TABLE IF EXISTS group_member_closure;
@@ -1,6 +1,6 @@
 /* encoding: utf-8
  *
- * Copyright 2013-2019 University of Oslo, Norway
+ * Copyright 2013-2026 University of Oslo, Norway
  *
  * This file is part of Cerebrum.
  *
@@ -25,7 +25,7 @@ category:metainfo;
 name=job_runner;
 
 category:metainfo;
-version=1.1;
+version=1.2;
 
 
 category:main;
@@ -41,5 +41,43 @@ CREATE TABLE job_ran
 );
 
 
+/*  job_runtime
+ *
+ * Run time statistics for jobs, used to prioritize jobs in the job queue.
+ *
+ * id
+ *   The job id/name.
+ * runs
+ *   Number of completed runs.
+ * avg_duration
+ *   Moving average of the run time, in seconds.
+ * last_duration
+ *   Run time of the last completed run, in seconds.
+ */
+category:main;
+CREATE TABLE job_runtime
+(
+  id
+    TEXT
+    CONSTRAINT job_runtime_pk PRIMARY KEY,
+
+  runs
+    NUMERIC(12,0)
+    NOT NULL
+    DEFAULT 0,
+
+  avg_duration
+    NUMERIC(12,3)
+    NOT NULL,
+
+  last_duration
+    NUMERIC(12,3)
+    NOT NULL
+);
+
+
+category:drop;
+DROP TABLE job_runtime;
+
 category:drop;
 DROP TABLE job_ran;
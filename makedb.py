@@ -382,6 +382,7 @@ def check_schema_versions(db, strict=False):
         'consent': 'Cerebrum.modules.consent.Consent',
         'employment': 'Cerebrum.modules.no.PersonEmployment',
         'gpg': 'Cerebrum.modules.gpg',
+        'group_closure': 'Cerebrum.modules.group_closure',
         'task_queue': 'Cerebrum.modules.tasks',
     }
     meta = Metainfo.Metainfo(db)
@@ -80,6 +80,7 @@ def serve(config, num_workers, enable_listener, enable_collector):
             consumer.EventConsumer(
                 config.event_publisher,
                 config.event_formatter,
+                config.event_daemon_collector,
                 daemon=True,
                 queue=event_queue,
                 log_channel=daemon.log_channel,
@@ -111,6 +112,30 @@ def serve(config, num_workers, enable_listener, enable_collector):
     daemon.serve()
 
 
+def serve_batch(config, num_workers):
+
+    # Generic event processing daemon
+    daemon = utils.ProcessHandler(manager=Manager)
+
+    # The 'batch publishers'
+    # Each worker claims, publishes and removes batches of events from its own
+    # partition of the event table.
+    for i in range(0, num_workers):
+        daemon.add_process(
+            consumer.EventBatchPublisher(
+                config.event_publisher,
+                config.event_formatter,
+                config.event_daemon_collector,
+                config.event_daemon_batch,
+                partition=i,
+                num_partitions=num_workers,
+                daemon=True,
+                log_channel=daemon.log_channel,
+                running=daemon.run_trigger))
+
+    daemon.serve()
+
+
 def show_config(config):
     import pprint
     pprint.pprint(config.dump_dict())
@@ -150,6 +175,14 @@ def main(args=None):
                         default=True,
                         help='Disable event collectors')
 
+    parser.add_argument('--batch',
+                        dest='batch',
+                        action='store_true',
+                        default=False,
+                        help='Claim and publish events in batches, rather '
+                             'than one at a time (implies --no-listener '
+                             'and --no-collection)')
+
     parser.add_argument('--unlock-events',
                         dest='unlock_events',
                         action='store_true',
@@ -172,11 +205,14 @@ def main(args=None):
     with Pid():
         if args.unlock_events:
             unlock_all_events()
-        serve(
-            config,
-            int(args.num_workers),
-            args.listen_db,
-            args.collect_db)
+        if args.batch:
+            serve_batch(config, int(args.num_workers))
+        else:
+            serve(
+                config,
+                int(args.num_workers),
+                args.listen_db,
+                args.collect_db)
 
     logger.info('Event publisher stopped')
 
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Benchmark the ad2 quicksync.
+
+Replays a stream of synthetic quarantine and password events through
+BaseSync.quicksync, first with the default one-event-at-a-time processing,
+and then with `quicksync_coalesce` enabled.  Commands are built by the real
+ADclient, and sent to an ADMock.ADclientMock.  Each round-trip to AD and each
+commit is simulated with a fixed delay.
+
+The ad2 modules need a configured Cerebrum installation to import (i.e.
+`adconf`, and a database connection), but the benchmark itself doesn't use the
+database.
+"""
+from __future__ import print_function
+
+import argparse
+import logging
+import random
+import time
+
+from Cerebrum.logutils.loggers import CerebrumLogger
+from Cerebrum.modules.ad2 import ADMock, ADSync
+
+# ADclient logs at the custom debug levels
+CerebrumLogger.install()
+logger = logging.getLogger('bench_ad_quicksync')
+
+CHANGE_TYPES = ('quarantine_add', 'quarantine_del', 'quarantine_mod',
+                'account_password')
+
+
+class _ChangeType(object):
+
+    def __init__(self, name, code):
+        self.name = name
+        self.code = code
+
+    def __int__(self):
+        return self.code
+
+    def __eq__(self, other):
+        return int(self) == int(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return self.code
+
+    def __str__(self):
+        return self.name
+
+
+class _CLConstants(object):
+
+    def __init__(self):
+        self._by_code = {}
+        for code, name in enumerate(CHANGE_TYPES, 1):
+            setattr(self, name, _ChangeType(name, code))
+            self._by_code[code] = getattr(self, name)
+
+    def ChangeType(self, code):
+        return self._by_code[int(code)]
+
+
+class _Client(ADMock.ADclientMock):
+    """ AD mock with a simulated round-trip time. """
+
+    def __init__(self, latency):
+        self.logger = logger
+        self.dryrun = False
+        self.latency = latency
+        self.runs = 0
+
+    def run(self, *args, **kwargs):
+        self.runs += 1
+        time.sleep(self.latency)
+        return super(_Client, self).run(*args, **kwargs)
+
+
+class _CLHandler(object):
+    """ CLHandler replacement that serves a fixed list of events. """
+
+    events = ()
+    commit_cost = 0
+
+    def __init__(self, db):
+        pass
+
+    def get_events(self, key, types):
+        return list(self.events)
+
+    def confirm_event(self, row):
+        pass
+
+    def commit_confirmations(self):
+        time.sleep(self.commit_cost)
+
+
+class _Sync(ADSync.BaseSync):
+    """ A sync that only toggles quarantines and sets passwords. """
+
+    def __init__(self, client, coalesce, batch_size):
+        self.logger = logger
+        self.db = None
+        self.clconst = _CLConstants()
+        self.server = client
+        self._ad_admin_messages = []
+        self.config = {
+            'change_types': None,
+            'changes_too_old_seconds': 60 * 60 * 24,
+            'dryrun': False,
+            'quicksync_coalesce': coalesce,
+            'quicksync_batch_size': batch_size,
+            'quicksync_commit_events': 100,
+            'quicksync_commit_seconds': 30,
+        }
+
+    def process_cl_event(self, row):
+        change_type = self.clconst.ChangeType(row['change_type_id'])
+        ad_id = 'user%d' % row['subject_entity']
+        if change_type == self.clconst.account_password:
+            return self.server.set_password(ad_id, 'secret',
+                                            password_type='plaintext')
+        # The newest quarantine state wins
+        if row['subject_entity'] % 2:
+            return self.server.disable_object(ad_id)
+        return self.server.enable_object(ad_id)
+
+
+def make_events(count, subjects):
+    """ Make events, newest first (as returned by CLHandler.get_events). """
+    now = int(time.time())
+    events = []
+    for change_id in range(1, count + 1):
+        events.append({
+            'change_id': change_id,
+            'change_type_id': random.randint(1, len(CHANGE_TYPES)),
+            'subject_entity': random.randint(1, subjects),
+            'dest_entity': None,
+            'tstamp': now,
+        })
+    events.reverse()
+    return events
+
+
+def bench(name, events, latency, coalesce, batch_size):
+    client = _Client(latency)
+    sync = _Sync(client, coalesce, batch_size)
+    start = time.time()
+    sync.quicksync(changekey='bench')
+    elapsed = time.time() - start
+    print('{:<10} {:.3f} s, {:d} runs, {:.1f} events/s'.format(
+        name, elapsed, client.runs, len(events) / elapsed))
+
+
+def main(inargs=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '-n', '--count',
+        type=int,
+        default=2000,
+        help='number of events (default: %(default)s)')
+    parser.add_argument(
+        '--subjects',
+        type=int,
+        default=500,
+        help='number of distinct accounts (default: %(default)s)')
+    parser.add_argument(
+        '--latency',
+        type=float,
+        default=0.01,
+        help='seconds per AD round-trip (default: %(default)s)')
+    parser.add_argument(
+        '--commit-cost',
+        type=float,
+        default=0.005,
+        help='seconds per commit (default: %(default)s)')
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=50,
+        help='commands per batched script (default: %(default)s)')
+    args = parser.parse_args(inargs)
+
+    logging.basicConfig(level=logging.WARNING)
+    random.seed(0)
+    events = make_events(args.count, args.subjects)
+    _CLHandler.events = events
+    _CLHandler.commit_cost = args.commit_cost
+    ADSync.CLHandler.CLHandler = _CLHandler
+
+    bench('default', events, args.latency, False, args.batch_size)
+    bench('coalesced', events, args.latency, True, args.batch_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Benchmark LDIF entry serialization.
+
+Compares LDIFutils.entry_string() with LDIFutils.EntrySerializer on a
+synthetic person export, and reports entries/second for each.
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import gc
+import io
+import os
+import time
+
+from Cerebrum.modules import LDIFutils
+
+
+def make_entries(count):
+    """ Generate synthetic person entries. """
+    for n in range(count):
+        uid = 'user{:06d}'.format(n)
+        yield (
+            'uid={},cn=people,dc=example,dc=org'.format(uid),
+            {
+                'objectClass': ('top', 'person', 'organizationalPerson',
+                                'inetOrgPerson', 'eduPerson'),
+                'cn': ('Ola Nordmann {:d}'.format(n),),
+                'sn': ('Nordmann',),
+                'givenName': ('Ola',),
+                'mail': ('{}@example.org'.format(uid),),
+                'telephoneNumber': ['+47 22{:06d}'.format(n)],
+                'title': ('Førsteamanuensis',),
+                'eduPersonAffiliation': set(['employee', 'member']),
+                'userPassword': ('{crypt}*Invalid',),
+            })
+
+
+def run(name, write, entries):
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.time()
+        count = write(entries)
+        elapsed = time.time() - start
+    finally:
+        gc.enable()
+    print('{:<20} {:>8d} entries {:>8.2f} s {:>10.0f} entries/s'.format(
+        name, count, elapsed, count / elapsed))
+
+
+def main(inargs=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '-n', '--count',
+        type=int,
+        default=500000,
+        help='number of entries (default: %(default)s)')
+    args = parser.parse_args(inargs)
+
+    entries = list(make_entries(args.count))
+
+    with io.open(os.devnull, 'w', encoding='utf-8') as f:
+        def write_entry_string(entries):
+            for dn, attrs in entries:
+                f.write(LDIFutils.entry_string(dn, attrs))
+            return len(entries)
+
+        def write_serializer(entries):
+            serialize = LDIFutils.EntrySerializer()
+            count = 0
+            batch = []
+            for dn, attrs in entries:
+                batch.append(serialize(dn, attrs))
+                if len(batch) >= 1000:
+                    f.write(''.join(batch))
+                    count += len(batch)
+                    batch = []
+            f.write(''.join(batch))
+            return count + len(batch)
+
+        run('entry_string', write_entry_string, entries)
+        run('EntrySerializer', write_serializer, entries)
+
+
+if __name__ == '__main__':
+    main()
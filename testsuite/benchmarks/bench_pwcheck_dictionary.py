@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Benchmark the password dictionary check.
+
+Compares the dictionary checks (check_dict and check_two_word_combinations)
+on plain text dictionary files with the same checks on a compiled dictionary
+index.  Unless dictionary files are given, a dictionary of random words is
+generated.
+
+The candidate passwords are a mix of dictionary words with common suffixes,
+l33t speak, two-word combinations and random strings.
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import io
+import os
+import random
+import shutil
+import string
+import tempfile
+import time
+
+from Cerebrum.modules.pwcheck import dictionary
+from Cerebrum.modules.pwcheck import dictionary_index
+
+
+def make_words(count):
+    words = set()
+    while len(words) < count:
+        words.add(''.join(random.choice(string.ascii_lowercase)
+                          for _ in range(random.randint(3, 10))))
+    return sorted(words)
+
+
+def make_candidates(words, count):
+    candidates = []
+    for _ in range(count):
+        kind = random.randint(0, 3)
+        if kind == 0:
+            word = random.choice(words) + random.choice(('', 's', 'ing', '12'))
+        elif kind == 1:
+            word = random.choice(words).replace('e', '3').replace('o', '0')
+        elif kind == 2:
+            word = (random.choice(words).capitalize() +
+                    random.choice(words).capitalize())
+        else:
+            word = ''.join(random.choice(string.ascii_letters + string.digits)
+                           for _ in range(8))
+        candidates.append(word[:8])
+    return candidates
+
+
+def check(dictionaries, candidates, index=None):
+    found = 0
+    for password in candidates:
+        if (dictionary.check_dict(dictionaries, password, index=index) or
+                dictionary.check_two_word_combinations(dictionaries, password,
+                                                       index=index)):
+            found += 1
+    return found
+
+
+def timed(func, *args, **kwargs):
+    start = time.time()
+    result = func(*args, **kwargs)
+    elapsed = time.time() - start
+    return result, elapsed
+
+
+def main(inargs=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '-n', '--count',
+        type=int,
+        default=100,
+        help='number of candidate passwords (default: %(default)s)')
+    parser.add_argument(
+        '-w', '--words',
+        type=int,
+        default=20000,
+        help='number of generated dictionary words (default: %(default)s)')
+    parser.add_argument(
+        'dictionaries',
+        nargs='*',
+        help='use these (sorted) dictionaries instead of generated words')
+    args = parser.parse_args(inargs)
+
+    random.seed(0)
+    tmpdir = tempfile.mkdtemp()
+    try:
+        dictionaries = args.dictionaries
+        if dictionaries:
+            words = sorted(dictionary_index.read_dictionaries(dictionaries))
+        else:
+            words = make_words(args.words)
+            dictionaries = [os.path.join(tmpdir, 'words.txt')]
+            with io.open(dictionaries[0], 'w', encoding='utf-8') as f:
+                f.write('\n'.join(words) + '\n')
+        candidates = make_candidates(words, args.count)
+
+        filename = os.path.join(tmpdir, 'words.idx')
+        _, elapsed = timed(dictionary_index.build_index,
+                           dictionaries, filename)
+        print('build index: {:d} words in {:.3f} s'.format(len(words),
+                                                           elapsed))
+        index = dictionary_index.DictionaryIndex(filename)
+
+        for name, kwargs in (('files', {}), ('index', {'index': index})):
+            found, elapsed = timed(check, dictionaries, candidates, **kwargs)
+            print('{:<6} {:.3f} s, {:.3f} ms/password, {:d} rejected'.format(
+                name, elapsed, 1000 * elapsed / len(candidates), found))
+        index.close()
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
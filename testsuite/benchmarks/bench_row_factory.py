@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Benchmark database row objects.
+
+Compares Cerebrum.extlib.db_row rows with row_factory compact rows, and
+reports the time spent on building rows (including the row class), and on
+accessing column values by index, by name, as attributes and with dict().
+
+Attribute access is not measured for db_row, as it is deprecated and logs a
+backtrace for each new call site (which is several orders of magnitude
+slower).
+"""
+from __future__ import print_function
+
+import argparse
+import gc
+import time
+
+from Cerebrum.database import row_factory
+from Cerebrum.extlib import db_row
+
+FIELDS = ('account_id', 'name', 'owner_id', 'owner_type', 'expire_date',
+          'description', 'np_type')
+
+
+def make_data(count):
+    """ Generate synthetic account rows. """
+    return [(n, 'user{:06d}'.format(n), n + 1000000, 8, None, None, None)
+            for n in range(count)]
+
+
+def timed(func, *args):
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.time()
+        result = func(*args)
+        return result, time.time() - start
+    finally:
+        gc.enable()
+
+
+def bench(name, make_row_class, data, attrs=True):
+    def build(data):
+        row_class = make_row_class(FIELDS)
+        return [row_class(r) for r in data]
+
+    def by_index(rows):
+        for row in rows:
+            row[0], row[1], row[2]
+
+    def by_name(rows):
+        for row in rows:
+            row['account_id'], row['name'], row['owner_id']
+
+    def by_attr(rows):
+        for row in rows:
+            row.account_id, row.name, row.owner_id
+
+    def to_dict(rows):
+        for row in rows:
+            dict(row)
+
+    rows, elapsed = timed(build, data)
+    results = [('build', elapsed)]
+    tests = [('row[i]', by_index), ('row[key]', by_name)]
+    if attrs:
+        tests.append(('row.attr', by_attr))
+    tests.append(('dict(row)', to_dict))
+    for label, func in tests:
+        results.append((label, timed(func, rows)[1]))
+
+    print('{:<10} '.format(name) +
+          ' '.join('{}: {:.3f} s'.format(label, t) for label, t in results))
+
+
+def main(inargs=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '-n', '--count',
+        type=int,
+        default=500000,
+        help='number of rows (default: %(default)s)')
+    args = parser.parse_args(inargs)
+
+    data = make_data(args.count)
+    bench('db_row', db_row.make_row_class, data, attrs=False)
+    bench('compact', row_factory.make_compact_row_class, data)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Benchmark set filters (argument_to_sql with many values).
+
+Compares three ways of filtering entity_info on a set of entity ids:
+
+inline
+    the values inlined as literals in an ``entity_id IN (...)`` expression
+    (how argument_to_sql used to handle more than 8 values)
+array
+    the values bound as a single array, ``entity_id = ANY(:entity_id)``
+table
+    the values staged in a temporary table, ``entity_id IN (SELECT ...)``
+
+The benchmark needs a Cerebrum database, and only reads from it.
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import random
+import time
+
+from Cerebrum.Utils import Factory, argument_to_sql
+
+QUERY = """
+  SELECT count(*)
+  FROM [:table schema=cerebrum name=entity_info]
+  WHERE {}
+"""
+
+
+def make_ids(db, count):
+    ids = [int(r['entity_id']) for r in db.query(
+        """
+          SELECT entity_id
+          FROM [:table schema=cerebrum name=entity_info]
+        """)]
+    if len(ids) >= count:
+        return random.sample(ids, count)
+    top = max(ids or [0]) + 1
+    return ids + random.sample(range(top, top + 2 * count), count - len(ids))
+
+
+def query_inline(db, ids):
+    clause = 'entity_id IN ({})'.format(', '.join(str(i) for i in ids))
+    return db.query_1(QUERY.format(clause))
+
+
+def query_set(db, ids, threshold):
+    db.value_set_table_threshold = threshold
+    binds = {}
+    clause = argument_to_sql(ids, 'entity_id', binds, int)
+    return db.query_1(QUERY.format(clause), binds)
+
+
+def timed(func, *args):
+    start = time.time()
+    result = func(*args)
+    return result, time.time() - start
+
+
+def main(inargs=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '-s', '--sizes',
+        type=lambda v: [int(i) for i in v.split(',')],
+        default=[10, 1000, 100000],
+        help='comma separated filter sizes (default: 10,1000,100000)')
+    parser.add_argument(
+        '-r', '--repeat',
+        type=int,
+        default=5,
+        help='number of queries per size and method (default: %(default)s)')
+    args = parser.parse_args(inargs)
+
+    random.seed(0)
+    db = Factory.get('Database')()
+    methods = (
+        ('inline', query_inline),
+        ('array', lambda db, ids: query_set(db, ids, None)),
+        ('table', lambda db, ids: query_set(db, ids, 0)),
+    )
+    try:
+        for size in args.sizes:
+            ids = make_ids(db, size)
+            for name, func in methods:
+                total = 0
+                for _ in range(args.repeat):
+                    found, elapsed = timed(func, db, ids)
+                    total += elapsed
+                    # drops any temporary tables
+                    db.rollback()
+                print('{:>7d} {:<6} {:8.2f} ms/query, {:d} found'.format(
+                    size, name, 1000 * total / args.repeat, found))
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
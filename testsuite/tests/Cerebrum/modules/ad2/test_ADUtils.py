@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 University of Oslo, Norway
+#
+# This file is part of Cerebrum.
+#
+# Cerebrum is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# Cerebrum is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Cerebrum; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""
+Tests for batched commands in Cerebrum.modules.ad2.ADUtils.
+
+The commands are built by the real ADclient, and the resulting command lines
+are run by the ADMock.ADclientMock.
+"""
+from __future__ import unicode_literals
+
+import logging
+
+import pytest
+
+from Cerebrum.logutils.loggers import CerebrumLogger
+
+ADMock = pytest.importorskip('Cerebrum.modules.ad2.ADMock')
+
+
+class _Client(ADMock.ADclientMock):
+    """ AD mock that records command lines, and doesn't need a database. """
+
+    def __init__(self):
+        CerebrumLogger.install()
+        self.logger = logging.getLogger(__name__)
+        self.dryrun = False
+        self.exclude_password_patterns = []
+        self.commands = []
+
+    def execute_command(self, command, **kwargs):
+        self.commands.append(command)
+        return super(_Client, self).execute_command(command, **kwargs)
+
+
+@pytest.fixture
+def client():
+    return _Client()
+
+
+def test_run_command(client):
+    assert client.enable_object('CN=foo')
+    assert len(client.commands) == 1
+    assert 'Enable-ADAccount' in client.commands[0]
+
+
+def test_batch_queues_commands(client):
+    client.start_batch()
+    client.batch_tag = 1
+    assert client.enable_object('CN=foo')
+    client.batch_tag = 2
+    assert client.disable_object('CN=bar')
+    assert client.batch_length == 2
+    assert client.commands == []
+    assert client.stop_batch() == set()
+    assert len(client.commands) == 1
+
+
+def test_batch_statements_are_separated(client):
+    client.start_batch()
+    for tag in range(3):
+        client.batch_tag = tag
+        client.set_password('user%d' % tag, 'secret',
+                            password_type='plaintext')
+    assert client.run_batch() == set()
+    command = client.commands[0]
+    assert '\n' not in command
+    assert command.count("} catch { Write-Output $_ }; try {") == 2
+
+
+def test_batch_split_by_length(client):
+    client.start_batch()
+    for tag in range(50):
+        client.batch_tag = tag
+        client.set_password('user%d' % tag, 'secret',
+                            password_type='plaintext')
+    assert client.run_batch() == set()
+    assert len(client.commands) > 1
+    for command in client.commands:
+        assert len(command) <= client.max_command_length
+
+
+def test_batch_command_too_long(client):
+    client.start_batch()
+    client.batch_tag = 'long'
+    client.enable_object('x' * client.max_command_length)
+    client.batch_tag = 'short'
+    client.enable_object('CN=foo')
+    assert client.run_batch() == set(['long'])
+    assert len(client.commands) == 1
+
+
+def test_batch_failed_script(client, monkeypatch):
+    monkeypatch.setattr(client, 'wsman_receive',
+                        lambda *args: ('Done', 1, {'stderr': 'exit 1'}))
+    client.start_batch()
+    for tag in range(2):
+        client.batch_tag = tag
+        client.enable_object('CN=foo%d' % tag)
+    assert client.run_batch() == set([0, 1])
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for Cerebrum.modules.audit.auditdb
+"""
+from __future__ import unicode_literals
+
+import datetime
+import json
+
+from Cerebrum.modules.audit import auditdb
+
+
+class _Database(object):
+    """ Database mock that records inserts. """
+
+    def __init__(self):
+        self.next_id = 100
+        self.inserts = []
+
+    def nextvals(self, sequence, count):
+        assert sequence == 'audit_log_seq'
+        values = list(range(self.next_id, self.next_id + count))
+        self.next_id += count
+        return values
+
+    def insert_many(self, table, columns, rows, chunk_size=None):
+        self.inserts.append((list(columns), list(rows), chunk_size))
+
+
+def test_sql_insert_many():
+    db = _Database()
+    record_ids = auditdb.sql_insert_many(db, [
+        {'change_type': 1, 'operator_id': 2, 'entity_id': 3},
+        {'change_type': 4, 'operator_id': 5, 'entity_id': 6, 'target_id': 7,
+         'metadata': {'change': 'foo'}, 'params': {'bar': 'baz'},
+         'record_id': 42},
+        {'change_type': 1, 'operator_id': 2, 'entity_id': 8},
+    ], chunk_size=10)
+    assert record_ids == [100, 42, 101]
+    assert len(db.inserts) == 1
+    columns, rows, chunk_size = db.inserts[0]
+    assert chunk_size == 10
+    assert 'timestamp' not in columns
+    assert [row['record_id'] for row in rows] == [100, 42, 101]
+    assert rows[0]['target'] is None
+    assert rows[0]['metadata'] is None
+    assert rows[1]['target'] == 7
+    assert json.loads(rows[1]['metadata']) == {'change': 'foo'}
+    assert json.loads(rows[1]['params']) == {'bar': 'baz'}
+
+
+def test_sql_insert_many_timestamps():
+    db = _Database()
+    timestamp = datetime.datetime(2026, 1, 2, 3, 4, 5)
+    record_ids = auditdb.sql_insert_many(db, [
+        {'change_type': 1, 'operator_id': 2, 'entity_id': 3},
+        {'change_type': 1, 'operator_id': 2, 'entity_id': 4,
+         'params': {'date': datetime.date(2026, 1, 2)},
+         'timestamp': timestamp},
+    ])
+    assert record_ids == [100, 101]
+    # rows without a timestamp get the database default
+    (columns, rows, _), (ts_columns, ts_rows, _) = db.inserts
+    assert 'timestamp' not in columns
+    assert [row['entity'] for row in rows] == [3]
+    assert ts_columns[-1] == 'timestamp'
+    assert [row['entity'] for row in ts_rows] == [4]
+    assert ts_rows[0]['timestamp'] == timestamp
+    assert json.loads(ts_rows[0]['params']) == {
+        'date': auditdb.serialize_params(datetime.date(2026, 1, 2))}
+
+
+def test_sql_insert_many_empty():
+    db = _Database()
+    assert auditdb.sql_insert_many(db, []) == []
+    assert db.inserts == []
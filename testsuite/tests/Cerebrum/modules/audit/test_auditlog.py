@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the entity info cache in Cerebrum.modules.audit.auditlog
+"""
+from __future__ import unicode_literals
+
+import pytest
+
+auditlog = pytest.importorskip('Cerebrum.modules.audit.auditlog')
+
+
+class _Const(object):
+
+    def EntityType(self, value):  # noqa: N802
+        return value
+
+    def ValueDomain(self, value):  # noqa: N802
+        return 1
+
+
+class _Database(object):
+    """ Database mock with a fixed set of entity names. """
+
+    def __init__(self):
+        self.names = {1: 'foo', 2: 'bar', 3: 'baz'}
+        self.lookups = []
+
+    def query(self, sql, binds):
+        entity_ids = [v for k, v in sorted(binds.items())]
+        entity_ids = [e for v in entity_ids
+                      for e in (v if isinstance(v, (list, tuple)) else [v])]
+        self.lookups.append(sorted(entity_ids))
+        return [{'entity_id': e_id,
+                 'entity_type': 'account',
+                 'value_domain': 1,
+                 'entity_name': self.names[e_id]}
+                for e_id in entity_ids if e_id in self.names]
+
+
+@pytest.fixture(autouse=True)
+def _namespaces(monkeypatch):
+    monkeypatch.setattr(auditlog, 'ENTITY_TYPE_NAMESPACE',
+                        {'account': 'account_names'})
+
+
+@pytest.fixture
+def db():
+    return _Database()
+
+
+@pytest.fixture
+def cache(db):
+    cache = auditlog.EntityInfoCache(db, size=2)
+    cache._const = _Const()
+    return cache
+
+
+def test_get(cache, db):
+    assert cache.get(1) == ('account', 'foo')
+    assert cache.get(1) == ('account', 'foo')
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert db.lookups == [[1]]
+
+
+def test_get_missing(cache):
+    assert cache.get(4) == (None, None)
+    assert cache.get(None) == (None, None)
+
+
+def test_eviction(cache, db):
+    cache.get(1)
+    cache.get(2)
+    cache.get(1)
+    cache.get(3)
+    assert len(cache) == 2
+    # 2 was the least recently used entry
+    cache.get(1)
+    cache.get(2)
+    assert db.lookups == [[1], [2], [3], [2]]
+
+
+def test_warm(cache, db):
+    cache.warm([1, 2, None])
+    assert db.lookups == [[1, 2]]
+    assert cache.get(2) == ('account', 'bar')
+    assert cache.misses == 0
+
+
+def test_invalidate(cache, db):
+    cache.get(1)
+    db.names[1] = 'new'
+    cache.invalidate(1)
+    assert cache.get(1) == ('account', 'new')
+
+
+def test_clear_keeps_pinned(cache, db):
+    cache.warm([1], pin=True)
+    cache.get(2)
+    cache.clear()
+    assert len(cache) == 1
+    assert cache.get(1) == ('account', 'foo')
+    assert db.lookups == [[1], [2]]
+
+
+def test_invalidate_pinned(cache, db):
+    cache.warm([1], pin=True)
+    db.names[1] = 'new'
+    cache.invalidate(1)
+    assert cache.get(1) == ('account', 'new')
+
+
+def test_clear_unpin(cache, db):
+    cache.warm([1], pin=True)
+    db.names[1] = 'rolled back'
+    cache.clear(unpin=True)
+    assert len(cache) == 0
+    assert cache.pinned == set()
+
+
+class _ChangeType(object):
+    category = 'entity_name'
+    type = 'del'
+
+    def __str__(self):
+        return 'entity_name:del'
+
+
+class _Builder(auditlog.AuditRecordBuilder):
+
+    def __init__(self, entity_info):
+        self.entity_info = entity_info
+
+    def get_change_type(self, value):
+        return _ChangeType()
+
+    def build_params(self, *args):
+        return None
+
+
+def test_builder_invalidates_subject(cache, db):
+    builder = _Builder(cache)
+    cache.get(1)
+    db.names[1] = 'new'
+    # the name is deleted *after* the change is logged
+    record = builder(1, 123, None, None, 2, 'test')
+    assert record.metadata['entity_name'] == 'new'
+    db.names[1] = 'deleted'
+    assert cache.get(1) == ('account', 'deleted')
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for Cerebrum.modules.bofhd.auth_cache
+"""
+
+import pytest
+
+from Cerebrum.modules.bofhd import auth_cache
+
+
+class _Database(object):
+    """ Database mock with a fixed change_log and transaction state. """
+
+    def __init__(self):
+        self.last_id = None
+        self.changes = []
+        self.messages = []
+        self.txid = None
+        self.polls = 0
+
+    def query_1(self, sql, binds=None):
+        if 'txid_current_if_assigned' in sql:
+            return self.txid
+        self.polls += 1
+        return self.last_id
+
+    def query(self, sql, binds):
+        return [{'change_id': change_id} for change_id in self.changes
+                if change_id > binds['min_id']]
+
+
+@pytest.fixture
+def db():
+    return _Database()
+
+
+@pytest.fixture
+def cache():
+    cache = auth_cache.PermissionCache()
+    cache.poll_interval = 0
+    cache._change_types = ((1, 2), True)
+    return cache
+
+
+def test_get_miss(cache, db):
+    with pytest.raises(KeyError):
+        cache.get(db, 'foo', 1)
+    assert cache.get_stats()['foo']['misses'] == 1
+
+
+def test_get_hit(cache, db):
+    cache.set(db, 'foo', 1, 'bar')
+    assert cache.get(db, 'foo', 1) == 'bar'
+    assert cache.get_stats()['foo'] == {
+        'hits': 1,
+        'misses': 0,
+        'evictions': 0,
+        'hit_rate': 1.0,
+        'size': 1,
+    }
+
+
+def test_size(cache, db):
+    cache.size = 2
+    for key in range(3):
+        cache.set(db, 'foo', key, 'bar')
+    assert cache.get_stats()['foo']['size'] == 2
+    with pytest.raises(KeyError):
+        cache.get(db, 'foo', 0)
+
+
+def test_set_in_write_transaction(cache, db):
+    db.txid = 1234
+    assert cache.set(db, 'foo', 1, 'bar') == 'bar'
+    db.txid = None
+    with pytest.raises(KeyError):
+        cache.get(db, 'foo', 1)
+
+
+def test_get_with_pending_changes(cache, db):
+    cache.set(db, 'foo', 1, 'bar')
+    db.messages.append({'change_type_id': 3})
+    with pytest.raises(KeyError):
+        cache.get(db, 'foo', 1)
+    assert cache.set(db, 'foo', 1, 'baz') == 'baz'
+    db.messages = []
+    assert cache.get(db, 'foo', 1) == 'bar'
+
+
+def test_clear_on_change(cache, db):
+    cache.set(db, 'foo', 1, 'bar')
+    db.messages.append({'change_type_id': 3})
+    with cache.clear_on_change(db):
+        db.messages = []
+    assert cache.get(db, 'foo', 1) == 'bar'
+
+    db.messages.append({'change_type_id': 2})
+    with cache.clear_on_change(db):
+        db.messages = []
+    with pytest.raises(KeyError):
+        cache.get(db, 'foo', 1)
+
+
+def test_first_poll_clears(cache, db):
+    db.last_id = 10
+    cache.set(db, 'foo', 1, 'bar')
+    with pytest.raises(KeyError):
+        cache.get(db, 'foo', 1)
+
+
+def test_unrelated_change(cache, db):
+    db.last_id = 10
+    cache._refresh(db)
+    cache.set(db, 'foo', 1, 'bar')
+    db.last_id = 12
+    assert cache.get(db, 'foo', 1) == 'bar'
+
+
+def test_related_change_clears(cache, db):
+    db.last_id = 10
+    cache._refresh(db)
+    cache.set(db, 'foo', 1, 'bar')
+    db.last_id = 12
+    db.changes = [12]
+    with pytest.raises(KeyError):
+        cache.get(db, 'foo', 1)
+    assert cache.invalidations == 2
+
+
+def test_late_commit_clears(cache, db):
+    db.last_id = 10
+    db.changes = [8]
+    cache._refresh(db)
+    cache.set(db, 'foo', 1, 'bar')
+    db.last_id = 12
+    assert cache.get(db, 'foo', 1) == 'bar'
+    # change 9 was committed after change 12
+    db.changes = [8, 9]
+    with pytest.raises(KeyError):
+        cache.get(db, 'foo', 1)
+
+
+def test_poll_interval(cache, db):
+    cache.poll_interval = 60
+    cache._refresh(db)
+    cache._refresh(db)
+    assert db.polls == 1
+
+
+def test_max_age(cache, db):
+    db.last_id = 10
+    cache._refresh(db)
+    cache.set(db, 'foo', 1, 'bar')
+    cache._cleared_at -= cache.max_age + 1
+    with pytest.raises(KeyError):
+        cache.get(db, 'foo', 1)
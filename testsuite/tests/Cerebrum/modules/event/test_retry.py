@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for Cerebrum.modules.event.retry
+"""
+from Cerebrum.modules.event import retry
+
+
+def test_retry_delay():
+    assert [retry.retry_delay(n, 60, 3600) for n in range(1, 9)] == [
+        60, 120, 240, 480, 960, 1920, 3600, 3600]
+
+
+def test_retry_delay_default():
+    assert retry.retry_delay(1) == retry.RETRY_DELAY
+    assert retry.retry_delay(100) == retry.MAX_RETRY_DELAY
+
+
+def test_sql_retry_time():
+    expr = retry.sql_retry_time()
+    assert ':retry_delay' in expr
+    assert ':max_retry_delay' in expr
+    assert ':fail_limit' not in expr
+
+
+def test_sql_retry_time_fail_limit():
+    expr = retry.sql_retry_time(fail_limit=10)
+    assert expr.startswith('CASE WHEN failed + 1 >= :fail_limit THEN NULL')
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the batch pipeline in Cerebrum.modules.event_publisher.consumer
+"""
+import contextlib
+
+import pytest
+from six.moves.queue import Queue
+
+from Cerebrum.logutils.mp.channel import QueueChannel
+
+consumer = pytest.importorskip('Cerebrum.modules.event_publisher.consumer')
+
+
+class _EventDb(object):
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.claimed = None
+        self.deleted = self.failed = self.released = ()
+
+    def claim_events(self, limit, **kwargs):
+        self.claimed = dict(kwargs, limit=limit)
+        return self.rows
+
+    def delete_events(self, event_ids):
+        self.deleted = list(event_ids)
+
+    def fail_events(self, event_ids, **kwargs):
+        self.failed = list(event_ids)
+        self.fail_args = kwargs
+
+    def release_events(self, event_ids):
+        self.released = list(event_ids)
+
+
+class _Db(object):
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class _Formatter(object):
+
+    def __init__(self, bad_subjects=()):
+        self.bad_subjects = bad_subjects
+
+    def __call__(self, event):
+        if event.subject.entity_id in self.bad_subjects:
+            raise ValueError('bad subject')
+        return {'jti': event.subject.entity_id}
+
+    def get_key(self, event_type, subject):
+        return 'key'
+
+
+class _Client(object):
+
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.published = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def publish(self, routing_key, message):
+        if len(self.published) == self.fail_after:
+            raise RuntimeError('nack')
+        self.published.append(message)
+
+
+class _Stats(object):
+
+    def incr(self, *args):
+        pass
+
+    def timing(self, *args):
+        pass
+
+    @contextlib.contextmanager
+    def pipeline(self):
+        yield self
+
+
+class _Publisher(consumer.EventBatchPublisher):
+    db = event_db = publisher = formatter = stats = None
+
+
+def _row(event_id, subject_id):
+    return {
+        'event_id': event_id,
+        'event_type': 'modify',
+        'subject_id': subject_id,
+        'subject_type': 'account',
+        'subject_ident': 'foo',
+        'timestamp': None,
+        'schedule': None,
+        'event_data': None,
+    }
+
+
+def _make_publisher(rows, formatter=None, client=None):
+    proc = _Publisher(
+        None, None,
+        {'failed_limit': 10, 'failed_delay': 60},
+        {'batch_size': 100},
+        partition=1,
+        num_partitions=4,
+        log_channel=QueueChannel(Queue(), None))
+    proc.db = _Db()
+    proc.event_db = _EventDb(rows)
+    proc.formatter = formatter or _Formatter()
+    proc.publisher = client or _Client()
+    proc.stats = _Stats()
+    return proc
+
+
+def test_publish_batch():
+    proc = _make_publisher([_row(1, 10), _row(2, 11), _row(3, 10)])
+    assert proc.publish_batch() == 3
+    assert proc.event_db.claimed == {
+        'limit': 100,
+        'fail_limit': 10,
+        'failed_delay': 60,
+        'partition': 1,
+        'num_partitions': 4,
+    }
+    assert proc.publisher.published == [{'jti': 10}, {'jti': 11},
+                                        {'jti': 10}]
+    assert proc.event_db.deleted == [1, 2, 3]
+    assert proc.event_db.failed == []
+    assert proc.event_db.released == []
+
+
+def test_publish_empty_batch():
+    proc = _make_publisher([])
+    assert proc.publish_batch() == 0
+    assert proc.event_db.deleted == ()
+
+
+def test_format_error_holds_back_subject():
+    proc = _make_publisher([_row(1, 10), _row(2, 11), _row(3, 10)],
+                           formatter=_Formatter(bad_subjects=(10,)))
+    proc.publish_batch()
+    assert proc.event_db.deleted == [2]
+    assert proc.event_db.failed == [1]
+    assert proc.event_db.released == [3]
+
+
+def test_publish_error_releases_remaining():
+    proc = _make_publisher([_row(1, 10), _row(2, 11), _row(3, 12),
+                            _row(4, 13)],
+                           client=_Client(fail_after=1))
+    proc.publish_batch()
+    assert proc.event_db.deleted == [1]
+    assert proc.event_db.failed == [2]
+    assert proc.event_db.fail_args == {'fail_limit': 10, 'retry_delay': 60}
+    assert proc.event_db.released == [3, 4]
+
+
+def test_format_and_publish_error():
+    proc = _make_publisher([_row(1, 10), _row(2, 11), _row(3, 12),
+                            _row(4, 10)],
+                           formatter=_Formatter(bad_subjects=(10,)),
+                           client=_Client(fail_after=0))
+    proc.publish_batch()
+    assert proc.event_db.deleted == []
+    assert proc.event_db.failed == [1, 2]
+    assert proc.event_db.released == [4, 3]
+
+
+class _FailCountDb(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def fail_count_inc(self, event_id, **kwargs):
+        self.calls.append(('fail_count_inc', event_id, kwargs))
+
+    def release_event(self, event_id):
+        self.calls.append(('release_event', event_id))
+
+
+class _Consumer(consumer.EventConsumer):
+    event_db = None
+
+
+@pytest.mark.parametrize('collector_config, retry_delay', [
+    (None, consumer.RETRY_DELAY),
+    ({'failed_delay': 60}, 60),
+])
+def test_release_event_retry_delay(collector_config, retry_delay):
+    proc = _Consumer(None, None, collector_config,
+                     queue=Queue(),
+                     log_channel=QueueChannel(Queue(), None))
+    proc.event_db = _FailCountDb()
+    assert proc._release_event(3)
+    assert proc.event_db.calls == [
+        ('fail_count_inc', 3, {'retry_delay': retry_delay}),
+        ('release_event', 3),
+    ]
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the external id index in Cerebrum.modules.import_utils.matcher
+"""
+from __future__ import unicode_literals
+
+import time
+
+import pytest
+
+from Cerebrum import Errors
+from Cerebrum.modules.import_utils import matcher
+
+
+ROWS = [
+    {'entity_id': 1, 'id_type': 10, 'external_id': 'a'},
+    {'entity_id': 1, 'id_type': 11, 'external_id': '123'},
+    {'entity_id': 2, 'id_type': 10, 'external_id': 'b'},
+    {'entity_id': 3, 'id_type': 11, 'external_id': '123'},
+]
+
+
+class _Db(object):
+    """ A database without a change log. """
+
+    def __init__(self):
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class _ClDb(_Db):
+    """ A database with a change log. """
+
+    def __init__(self, last_change_id):
+        super(_ClDb, self).__init__()
+        self.last_change_id = last_change_id
+
+    def get_last_changelog_id(self):
+        return self.last_change_id
+
+
+@pytest.fixture
+def index():
+    index = matcher.ExternalIdIndex('person')
+    index._load_rows(ROWS)
+    return index
+
+
+def test_find(index):
+    assert index.find([(10, 'a')]) == [((10, 'a'), 1)]
+
+
+def test_find_converts_value(index):
+    assert index.find([(11, 123)]) == [((11, '123'), 1), ((11, '123'), 3)]
+
+
+def test_find_multiple(index):
+    found = index.find([(10, 'a'), (10, 'b')])
+    assert set(entity_id for _, entity_id in found) == set((1, 2))
+
+
+def test_find_missing(index):
+    assert index.find([(10, 'c'), (12, 'a')]) == []
+
+
+def test_len(index):
+    assert len(index) == 3
+
+
+def test_update_entity(index):
+    index._load_rows([{'entity_id': 1, 'id_type': 10, 'external_id': 'c'}],
+                     entity_ids=[1])
+    assert index.find([(10, 'a')]) == []
+    assert index.find([(11, '123')]) == [((11, '123'), 3)]
+    assert index.find([(10, 'c')]) == [((10, 'c'), 1)]
+
+
+def test_remove_entity(index):
+    index._load_rows([], entity_ids=[2, 4])
+    assert index.find([(10, 'b')]) == []
+    assert len(index) == 2
+
+
+def test_refresh_without_change_log(monkeypatch):
+    db = _Db()
+    index = matcher.ExternalIdIndex('person', db=db)
+    loads = []
+
+    def _search(db, entity_ids=None):
+        loads.append(entity_ids)
+        return ROWS[:1]
+
+    monkeypatch.setattr(index, '_search', _search)
+    index.refresh()
+    assert loads == [None]
+    assert len(index) == 1
+    assert db.rollbacks == 1
+
+    # not refreshed until max_age has passed
+    index.refresh()
+    assert loads == [None]
+
+    index.refresh(force=True)
+    assert loads == [None, None]
+
+
+def test_refresh_late_commit(monkeypatch):
+    db = _ClDb(10)
+    index = matcher.ExternalIdIndex('person', db=db)
+    index.lookback = 5
+    changes = {7: 1, 9: 2}
+    loads = []
+
+    def _search(db, entity_ids=None):
+        loads.append(entity_ids)
+        return [row for row in ROWS
+                if entity_ids is None or row['entity_id'] in entity_ids]
+
+    def _get_changes(db, last_change_id):
+        return dict((change_id, entity_id)
+                    for change_id, entity_id in changes.items()
+                    if last_change_id - index.lookback < change_id
+                    <= last_change_id)
+
+    monkeypatch.setattr(index, '_search', _search)
+    monkeypatch.setattr(index, '_get_changes', _get_changes)
+    index.refresh()
+    assert loads == [None]
+
+    # change 8 is committed after 9 and 10, change 11 is new
+    db.last_change_id = 11
+    changes.update({8: 3, 11: 1})
+    index.refresh(force=True)
+    assert loads == [None, [1, 3]]
+    assert db.rollbacks == 2
+
+    # nothing new
+    index.refresh(force=True)
+    assert loads == [None, [1, 3]]
+
+
+class _Entity(object):
+
+    entity_id = None
+
+    def __init__(self, entity_ids=(1, 2, 3)):
+        self.entity_ids = entity_ids
+
+    def clear(self):
+        self.entity_id = None
+
+    def find(self, entity_id):
+        if entity_id not in self.entity_ids:
+            raise Errors.NotFoundError()
+        self.entity_id = entity_id
+
+
+@pytest.fixture
+def find_in_index(index):
+    index.last_refresh = time.time()
+    return matcher.EntityMatcher(index=index)._find_in_index
+
+
+def test_find_in_index(find_in_index):
+    dbobj = _Entity()
+    assert find_in_index(dbobj, [(10, 'a')])
+    assert dbobj.entity_id == 1
+
+
+def test_find_in_index_partial(find_in_index):
+    # ids that aren't in the index don't prevent a unique hit
+    dbobj = _Entity()
+    assert find_in_index(dbobj, [(10, 'a'), (10, 'x')])
+    assert dbobj.entity_id == 1
+
+
+def test_find_in_index_miss(find_in_index):
+    dbobj = _Entity()
+    assert not find_in_index(dbobj, [(10, 'x')])
+    assert dbobj.entity_id is None
+
+
+def test_find_in_index_removed(find_in_index):
+    # the entity has been removed since the last refresh
+    dbobj = _Entity(entity_ids=(2, 3))
+    assert not find_in_index(dbobj, [(10, 'a')])
+    assert dbobj.entity_id is None
+
+
+def test_find_in_index_multiple(find_in_index):
+    dbobj = _Entity()
+    assert not find_in_index(dbobj, [(11, '123')])
+    assert dbobj.entity_id is None
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for Cerebrum.modules.pwcheck.dictionary_index
+"""
+from __future__ import unicode_literals
+
+import io
+
+import pytest
+
+from Cerebrum.modules.pwcheck import dictionary
+from Cerebrum.modules.pwcheck import dictionary_index
+
+
+WORDS = ['apple', 'banana', 'butter', 'camel', 'Flea', 'hello', "o'neil",
+         'sun', 'zebra\tstripes', 'ærlig']
+
+
+@pytest.fixture
+def dict_file(tmpdir):
+    filename = str(tmpdir.join('words.txt'))
+    words = sorted(dictionary_index.normalize_word(w) for w in WORDS)
+    with io.open(filename, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(words) + '\n')
+    return filename
+
+
+@pytest.fixture
+def index(tmpdir, dict_file):
+    filename = str(tmpdir.join('words.idx'))
+    dictionary_index.build_index([dict_file], filename)
+    index = dictionary_index.DictionaryIndex(filename)
+    yield index
+    index.close()
+
+
+def test_normalize_word():
+    assert dictionary_index.normalize_word(" O'Neil\tfoo\n") == 'oneil'
+
+
+def test_index_words(index):
+    assert len(index) == len(WORDS)
+    assert list(index) == sorted(
+        dictionary_index.normalize_word(w) for w in WORDS)
+
+
+def test_contains(index):
+    assert 'camel' in index
+    assert 'came' not in index
+    assert 'zzz' not in index
+
+
+def test_has_prefix(index):
+    assert index.has_prefix('came')
+    assert index.has_prefix('ærl')
+    assert not index.has_prefix('camels')
+
+
+def test_first_from(index):
+    assert index.first_from('c') == 'camel'
+    assert index.first_from('camel') == 'camel'
+    assert index.first_from('zz') == 'ærlig'
+    assert index.first_from('ø') is None
+
+
+def test_invalid_index(tmpdir):
+    filename = str(tmpdir.join('invalid.idx'))
+    with io.open(filename, 'wb') as f:
+        f.write(b'not an index')
+    with pytest.raises(ValueError):
+        dictionary_index.DictionaryIndex(filename)
+
+
+def test_get_index(tmpdir, dict_file):
+    filename = str(tmpdir.join('shared.idx'))
+    assert dictionary_index.get_index(None) is None
+    assert dictionary_index.get_index(filename) is None
+    dictionary_index.build_index([dict_file], filename)
+    index = dictionary_index.get_index(filename)
+    assert 'hello' in index
+    assert dictionary_index.get_index(filename) is index
+
+
+@pytest.mark.parametrize('password', ('hello', 'Butter12', 'h3ll0',
+                                      'x2-W', 'zcyX', 'apples', 'Cameling'))
+def test_check_dict(password, dict_file, index):
+    assert (dictionary.check_dict([dict_file], password, index=index) ==
+            dictionary.check_dict([dict_file], password))
+
+
+@pytest.mark.parametrize('password', ('CamelFle', 'camelsun', 'xcamelx',
+                                      'CamelAte', 'camelatE', 'zcyXabcd'))
+def test_check_two_word_combinations(password, dict_file, index):
+    assert (dictionary.check_two_word_combinations([dict_file], password,
+                                                   index=index) ==
+            dictionary.check_two_word_combinations([dict_file], password))
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the password history checks in Cerebrum.modules.pwcheck.history
+"""
+from __future__ import unicode_literals
+
+import pytest
+
+from Cerebrum.modules.pwcheck import history
+
+
+class _Pool(object):
+    """ Worker pool mock that runs tasks in the calling thread. """
+
+    def __init__(self):
+        self.tasks = 0
+
+    def map(self, func, tasks):
+        self.tasks += len(tasks)
+        return [func(t) for t in tasks]
+
+
+def _hash(password, salt=b'x' * 32):
+    return history.encode_for_history(str('sha512'), 10, salt, password, 32)
+
+
+@pytest.fixture
+def pool():
+    return _Pool()
+
+
+def test_parse_history_hash():
+    parsed = history.parse_history_hash(_hash('hunter2', salt=b'salt'))
+    assert parsed.algo == 'sha512'
+    assert parsed.rounds == 10
+    assert parsed.salt == b'salt'
+    assert len(parsed.key) == 32
+
+
+def test_parse_legacy_hash():
+    legacy = history.old_encode_for_history('foo', 'hunter2')
+    assert history.parse_history_hash(legacy.decode('ascii')) is None
+
+
+def test_check_match(pool):
+    checker = history.PasswordHistoryChecker([_hash('hunter2')], 'foo',
+                                             pool=pool)
+    assert checker.check(['hunter1', 'hunter2'])
+    assert checker.stats['derivations'] == 2
+
+
+def test_check_no_match(pool):
+    checker = history.PasswordHistoryChecker(
+        [_hash('hunter2'), _hash('hunter3')], 'foo', pool=pool)
+    assert not checker.check(['hunter1', 'hunter1', 'hunter4'])
+    assert checker.stats['variants'] == 2
+    assert checker.stats['hashes'] == 2
+    assert pool.tasks == 4
+
+
+def test_check_limit(pool):
+    old = [_hash('hunter2')] + [_hash('x%d' % i) for i in range(5)]
+    checker = history.PasswordHistoryChecker(old, 'foo', pool=pool)
+    assert not checker.check(['hunter2'])
+
+
+def test_check_legacy(pool):
+    legacy = history.old_encode_for_history('foo', 'hunter2')
+    checker = history.PasswordHistoryChecker([legacy.decode('ascii')], 'foo',
+                                             pool=pool)
+    assert checker.check(['hunter2'])
+    assert not checker.check(['hunter3'])
+    assert pool.tasks == 0
+
+
+def test_check_password_history():
+    # uses the shared worker pool
+    assert history.check_password_history('hunter2', [_hash('hunter2')],
+                                          'foo')
+    assert not history.check_passwords_history(['a', 'b'], [_hash('hunter2')],
+                                               'foo')
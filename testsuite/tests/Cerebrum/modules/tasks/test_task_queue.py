@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for Cerebrum.modules.tasks.task_queue and queue_processor
+"""
+
+import threading
+
+import pytest
+from six.moves.queue import Queue
+
+from Cerebrum.modules.tasks import queue_processor
+from Cerebrum.modules.tasks import task_queue
+
+
+def test_exclude_empty():
+    binds = {}
+    assert task_queue._exclude(binds) == []
+    assert binds == {}
+
+
+def test_exclude_subs():
+    binds = {}
+    clauses = task_queue._exclude(binds, subs=('manual', 'retry'))
+    assert clauses == ['sub NOT IN (:x_sub0, :x_sub1)']
+    assert binds == {'x_sub0': 'manual', 'x_sub1': 'retry'}
+
+
+def test_exclude_tasks():
+    binds = {}
+    clauses = task_queue._exclude(binds, tasks=[('q', '', 'a/b')])
+    assert clauses == ['(queue, sub, key) NOT IN ((:x_q0, :x_s0, :x_k0))']
+    assert binds == {'x_q0': 'q', 'x_s0': '', 'x_k0': 'a/b'}
+
+
+def test_sub_limit():
+    assert queue_processor._sub_limit('manual:2') == ('manual', 2)
+    assert queue_processor._sub_limit(':1') == ('', 1)
+    with pytest.raises(ValueError):
+        queue_processor._sub_limit('manual')
+
+
+def test_stats_summary():
+    stats = queue_processor.ProcessorStats()
+    for i in range(1, 21):
+        stats.add(float(i), failed=(i % 10 == 0))
+    summary = stats.get_summary()
+    assert summary['tasks'] == 20
+    assert summary['failed'] == 2
+    assert summary['latency_min'] == 1.0
+    assert summary['latency_max'] == 20.0
+    assert summary['latency_avg'] == 10.5
+    assert summary['latency_p50'] == 11.0
+    assert summary['latency_p95'] == 20.0
+
+
+def test_stats_update():
+    stats = queue_processor.ProcessorStats()
+    other = queue_processor.ProcessorStats()
+    other.add(1.0, failed=True)
+    stats.update(other)
+    assert stats.get_summary()['tasks'] == 1
+    assert stats.failed == 1
+
+
+class _QueryDb(object):
+    """ Database that records queries, and returns the given rows. """
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.queries = []
+
+    def query(self, stmt, binds, fetchall=True):
+        self.queries.append((stmt, binds))
+        return self.rows
+
+
+def test_release_reason():
+    db = _QueryDb(rows=[{'key': 'a'}])
+    assert task_queue.sql_release(db, 'q', '', 'a', 'nbf', 2, 'foo')
+    stmt, binds = db.queries[0]
+    assert 'attempts = :attempts AND reason = :reason' in stmt
+    assert binds['reason'] == 'foo'
+    assert binds['attempts'] == 2
+
+
+def test_release_null_reason():
+    db = _QueryDb()
+    assert not task_queue.sql_release(db, 'q', '', 'a', 'nbf', 1, None)
+    stmt, binds = db.queries[0]
+    assert 'reason IS NULL' in stmt
+    assert 'reason' not in binds
+
+
+class _TaskQueue(task_queue.TaskQueue):
+
+    def __init__(self, database):
+        self._db = database
+
+
+def test_lease_keeps_reason(monkeypatch):
+    inserted = {}
+
+    def _pop_next(db, **kwargs):
+        return {'queue': 'q', 'sub': '', 'key': 'a', 'nbf': 'old',
+                'attempts': 1, 'reason': 'foo'}
+
+    def _insert(db, queue, sub, key, **kwargs):
+        inserted.update(kwargs)
+        return dict(kwargs, queue=queue, sub=sub, key=key)
+
+    monkeypatch.setattr(task_queue, 'sql_pop_next', _pop_next)
+    monkeypatch.setattr(task_queue, '_sql_insert', _insert)
+    task, lease = _TaskQueue(_QueryDb()).lease_next_task('new')
+    assert (task.nbf, task.attempts, task.reason) == ('old', 1, 'foo')
+    assert (lease.nbf, lease.attempts, lease.reason) == ('new', 2, 'foo')
+
+
+class _Value(object):
+
+    def __init__(self, typecode, value):
+        self.value = value
+
+
+class _Manager(object):
+    """ In-process replacement for a multiprocessing manager. """
+    Lock = staticmethod(threading.Lock)
+    dict = dict
+    Value = _Value
+
+
+class _Task(object):
+
+    def __init__(self, sub, key):
+        self.queue = 'q'
+        self.sub = sub
+        self.key = key
+
+
+class _Processor(queue_processor.ParallelQueueProcessor):
+    """ Processor that claims tasks from a list, without a database. """
+
+    poll_interval = 0
+
+    def __init__(self, tasks, **kwargs):
+        super(_Processor, self).__init__(None, **kwargs)
+        self.tasks = list(tasks)
+        self.excluded = []
+        self.processed = []
+
+    def claim_task(self, state):
+        exclude_subs, exclude_tasks = self._get_exclude(state)
+        self.excluded.append(len(exclude_tasks))
+        for task in self.tasks:
+            if (task.sub not in exclude_subs and
+                    (task.queue, task.sub, task.key) not in exclude_tasks):
+                break
+        else:
+            return None
+        self._reserve(state, task)
+        if not self._dryrun:
+            self.tasks.remove(task)
+        return task, task
+
+    def process_leased_task(self, task, lease):
+        self.processed.append(task.key)
+
+
+def _run_worker(proc):
+    state = queue_processor._SharedState(_Manager())
+    results = Queue()
+    proc._work(state, results)
+    assert results.get_nowait() == ([], 0)
+    return state
+
+
+def test_parallel_work():
+    proc = _Processor([_Task('', 'a'), _Task('x', 'b'), _Task('', 'c')],
+                      dryrun=False)
+    state = _run_worker(proc)
+    assert proc.processed == ['a', 'b', 'c']
+    assert state.claimed.value == 3
+    assert dict(state.inflight) == {}
+    assert dict(state.active) == {'': 0, 'x': 0}
+
+
+def test_parallel_work_limit():
+    proc = _Processor([_Task('', 'a'), _Task('', 'b')], limit=1,
+                      dryrun=False)
+    _run_worker(proc)
+    assert proc.processed == ['a']
+
+
+def test_parallel_reserve_conflicts():
+    proc = _Processor([], sub_limits={'x': 1}, dryrun=False)
+    state = queue_processor._SharedState(_Manager())
+    proc._reserve(state, _Task('x', 'a'))
+    with pytest.raises(queue_processor._Conflict):
+        # sub-queue at limit
+        proc._reserve(state, _Task('x', 'b'))
+    proc._reserve(state, _Task('', 'a'))
+    with pytest.raises(queue_processor._Conflict):
+        # already in progress
+        proc._reserve(state, _Task('', 'a'))
+    exclude_subs, exclude_tasks = proc._get_exclude(state)
+    assert exclude_subs == ['x']
+    assert sorted(exclude_tasks) == [('q', '', 'a'), ('q', 'x', 'a')]
+
+
+def test_parallel_dryrun_limit():
+    proc = _Processor([_Task('', str(i)) for i in range(10)], dryrun=True)
+    proc.dryrun_limit = 4
+    state = _run_worker(proc)
+    assert proc.max_claims == 4
+    assert proc.processed == ['0', '1', '2', '3']
+    # processed tasks stay in the queue, and are excluded from later claims
+    assert proc.excluded == [0, 1, 2, 3, 4]
+    assert len(state.done) == 4
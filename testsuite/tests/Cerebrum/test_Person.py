@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the cached name selection in Cerebrum.Person
+"""
+from __future__ import unicode_literals
+
+from Cerebrum.Person import compute_cached_names
+
+SAP, FS, MANUAL = 1, 2, 3
+ORDER = [SAP, FS, MANUAL]
+
+
+def test_first_source_wins():
+    names = {
+        SAP: {'name_first': 'Ola', 'name_last': 'Nordmann'},
+        FS: {'name_first': 'Kari', 'name_last': 'Nordmann'},
+    }
+    assert compute_cached_names(names, ORDER) == {
+        'name_first': 'Ola',
+        'name_last': 'Nordmann',
+        'name_full': 'Ola Nordmann',
+    }
+
+
+def test_matching_first_and_last_name():
+    names = {
+        SAP: {'name_full': 'Ola Nordmann'},
+        FS: {'name_first': 'Ola', 'name_last': 'Nordmann'},
+    }
+    assert compute_cached_names(names, ORDER) == {
+        'name_first': 'Ola',
+        'name_last': 'Nordmann',
+        'name_full': 'Ola Nordmann',
+    }
+
+
+def test_split_full_name():
+    names = {
+        FS: {'name_full': 'Kari Mari Nordmann'},
+        MANUAL: {'name_first': 'Kari', 'name_last': 'Nordmann'},
+    }
+    assert compute_cached_names(names, ORDER) == {
+        'name_first': 'Kari Mari',
+        'name_last': 'Nordmann',
+        'name_full': 'Kari Mari Nordmann',
+    }
+
+
+def test_empty_first_name():
+    names = {MANUAL: {'name_first': '', 'name_last': 'Nordmann'}}
+    assert compute_cached_names(names, ORDER) == {
+        'name_first': '',
+        'name_last': 'Nordmann',
+        'name_full': 'Nordmann',
+    }
+
+
+def test_ignores_other_sources():
+    names = {4: {'name_first': 'Ola', 'name_last': 'Nordmann'}}
+    assert compute_cached_names(names, ORDER) == {
+        'name_first': None,
+        'name_last': None,
+        'name_full': None,
+    }
@@ -117,6 +117,7 @@ def constant_module(database):
         if (isinstance(item, (type, types.ClassType))
                 and issubclass(item, Constants._CerebrumCode)):
             item._cache = dict()
+    Constants.ConstantsBase.clear_registry()
     return Constants
 
 
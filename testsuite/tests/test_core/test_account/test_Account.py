@@ -152,6 +152,23 @@ def test_find_not_found(account_object):
         account_object.find(-10)
 
 
+def test_find_many(account_object, np_accounts, initial_group):
+    account_ids = [a['entity_id'] for a in np_accounts]
+    # unknown ids are skipped
+    found = list(account_object.find_many(account_ids + [-10]))
+    assert [a.entity_id for a in found] == account_ids
+    for account, account_dict in zip(found, np_accounts):
+        assert account.account_name == account_dict['account_name']
+        assert account.owner_id == initial_group.entity_id
+
+
+def test_find_many_read_only(account_object, account_dict):
+    account = next(account_object.find_many([account_dict['entity_id']]))
+    account.description = 'changed'
+    with pytest.raises(Errors.ProgrammingError):
+        account.write_db()
+
+
 def test_find_by_name(account_object, account_dict):
     account_id = account_dict['entity_id']
     account_name = account_dict['account_name']
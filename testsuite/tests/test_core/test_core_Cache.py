@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+""" Tests for Cerebrum.Cache """
+import pytest
+
+from Cerebrum import Cache
+
+
+def test_plain_cache():
+    c = Cache.Cache()
+    for x in range(10):
+        c[x] = x * 2
+    assert len(c) == 10
+    assert c[3] == 6
+    del c[3]
+    assert 3 not in c
+    assert list(c.registry) == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+
+
+def test_slots_evicts_oldest():
+    c = Cache.Cache(mixins=[Cache.cache_slots], size=50)
+    for x in range(100):
+        c[x] = x
+    assert len(c) == 50
+    assert sorted(c.keys()) == list(range(50, 100))
+    assert c.get_stats()['evictions'] == 50
+
+
+def test_slots_setup_resize():
+    c = Cache.Cache(mixins=[Cache.cache_slots], size=50)
+    for x in range(100):
+        c[x] = x
+    Cache.cache_slots.setup(c, size=60)
+    c[127] = 127
+    assert len(c) == 51
+
+
+@pytest.mark.parametrize(
+    'mixins',
+    [[Cache.cache_mru, Cache.cache_slots],
+     [Cache.cache_slots, Cache.cache_mru]])
+def test_mru_keeps_used(mixins):
+    c = Cache.Cache(mixins=mixins, size=3)
+    c['a'] = 1
+    c['b'] = 2
+    c['c'] = 3
+    assert c['a'] == 1
+    c['d'] = 4
+    assert sorted(c.keys()) == ['a', 'c', 'd']
+    c['c'] = 5
+    c['e'] = 6
+    assert sorted(c.keys()) == ['c', 'd', 'e']
+
+
+def test_timeout(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(Cache.time, 'time', lambda: now[0])
+    c = Cache.Cache(mixins=[Cache.cache_mru, Cache.cache_timeout],
+                    timeout=10)
+    c['a'] = 1
+    now[0] += 5
+    assert c['a'] == 1
+    now[0] += 5
+    with pytest.raises(KeyError):
+        c['a']
+    assert 'a' not in c
+    assert not c.registry
+    assert not c.timestamps
+
+
+def test_stats():
+    c = Cache.Cache(mixins=[Cache.cache_mru, Cache.cache_slots], size=2)
+    c['a'] = 1
+    c['b'] = 2
+    c['a']
+    c['a']
+    with pytest.raises(KeyError):
+        c['x']
+    c['c'] = 3
+    assert c.get_stats() == {
+        'hits': 2,
+        'misses': 1,
+        'evictions': 1,
+        'size': 2,
+    }
+
+
+def test_clear():
+    c = Cache.Cache(mixins=[Cache.cache_slots, Cache.cache_timeout], size=5)
+    for x in range(5):
+        c[x] = x
+    c.clear()
+    assert len(c) == 0
+    assert not c.registry
+    assert not c.timestamps
+
+
+def test_memoize_function():
+    calls = []
+
+    def double(x):
+        calls.append(x)
+        return x * 2
+
+    memoized = Cache.memoize_function(double,
+                                      mixins=[Cache.cache_slots], size=2)
+    assert memoized(2) == 4
+    assert memoized(2) == 4
+    assert calls == [2]
+    memoized(3)
+    memoized(4)
+    memoized(2)
+    assert calls == [2, 3, 4, 2]
+    assert memoized.cache.get_stats()['hits'] == 1
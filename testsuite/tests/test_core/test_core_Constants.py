@@ -216,6 +216,23 @@ def test_map_constants(constants, Language, EntityType):
     assert constants.map_const(fooval) == constants.lang_foo
 
 
+def test_map_constants_clear_registry(constants, Language):
+    constants.initialize(update=False, delete=False)
+    fooval = int(constants.lang_foo)
+    assert constants.map_const(fooval) == constants.lang_foo
+    constants.lang_foo.delete()
+    assert constants.map_const(fooval) is None
+
+
+def test_human2constant_registry(constants, Language, EntityType):
+    constants.initialize(update=False, delete=False)
+    registry = constants._get_registry()
+    assert registry.loaded
+    assert registry.get_by_str(str(constants.lang_bar), Language) == \
+        constants.lang_bar
+    assert registry.get_by_str(str(constants.lang_bar), EntityType) is None
+
+
 def test_init_insert(constants, Language, EntityType):
     clist = filter(
         lambda attr: isinstance(attr, (Language, EntityType)),
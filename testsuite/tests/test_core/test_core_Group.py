@@ -118,6 +118,14 @@ def test_find_error(gr):
         gr.clear()
 
 
+def test_find_many(gr, groups):
+    group_ids = [g['entity_id'] for g in groups]
+    found = list(gr.find_many(group_ids + [-10]))
+    assert [g.entity_id for g in found] == group_ids
+    assert ([g.group_name for g in found] ==
+            [g['group_name'] for g in groups])
+
+
 def test_find_by_name(gr, groups):
     if len(groups) < 1:
         pytest.skip('Test needs at least one group')
@@ -181,6 +189,34 @@ def test_add_remove_member(gr, groups):
             gr.remove_member(entry['entity_id'])
 
 
+def test_sync_members(gr, groups):
+    if len(groups) < 5:
+        pytest.skip('Test needs at least five groups')
+    member_ids = [entry['entity_id'] for entry in groups[1:5]]
+    gr.find_by_name(groups[0]['group_name'])
+    gr.add_member(member_ids[0])
+    gr.add_member(member_ids[1])
+
+    added, removed = gr.sync_members(member_ids[1:])
+    assert added == set(member_ids[2:])
+    assert removed == set(member_ids[:1])
+    assert not gr.has_member(member_ids[0])
+    for member_id in member_ids[1:]:
+        assert gr.has_member(member_id)
+
+    assert gr.sync_members(member_ids[1:]) == (set(), set())
+    assert gr.sync_members([], member_type_hint=gr.entity_type) == (
+        set(), set(member_ids[1:]))
+
+
+def test_sync_members_missing(gr, groups):
+    from Cerebrum.Errors import NotFoundError
+    gr.find_by_name(groups[0]['group_name'])
+    with pytest.raises(NotFoundError):
+        gr.sync_members([groups[1]['entity_id'], -1])
+    assert not gr.has_member(groups[1]['entity_id'])
+
+
 def test_search_id(gr, groups):
     if len(groups) < 2:
         pytest.skip('Test needs at least two groups')
@@ -167,6 +167,12 @@ def test_find_error(ou_object):
         ou_object.find(-1)
 
 
+def test_find_many(ou_object, basic_ous):
+    ou_ids = [e['entity_id'] for e in basic_ous]
+    found = list(ou_object.find_many(ou_ids + [-1]))
+    assert [ou.entity_id for ou in found] == ou_ids
+
+
 def test_get_parent(ou_object, ou_tree, perspective):
     if len(ou_tree) < 2:
         pytest.skip('Test needs at least two OUs')
@@ -227,3 +227,29 @@ def test_argument_to_sql_sequence():
         sql = Utils.argument_to_sql(seq_type(sequence), 'foo', binds)
         assert sql == '(foo IN (:foo0, :foo1, :foo2))'
         assert binds == {'foo0': 1, 'foo1': 2, 'foo2': 3}
+
+
+def test_argument_to_sql_value_set():
+    """ Utils.argument_to_sql with many values. """
+    binds = {}
+    sql = Utils.argument_to_sql(range(10), 'foo.bar', binds, str)
+    assert sql == '(foo.bar = ANY(:foo_bar))'
+    assert isinstance(binds['foo_bar'], Utils.ValueSet)
+    assert binds['foo_bar'] == [str(i) for i in range(10)]
+
+
+def test_argument_to_sql_value_set_negate():
+    """ Utils.argument_to_sql with many values, negated. """
+    binds = {}
+    sql = Utils.argument_to_sql(set(range(10)), 'foo', binds, negate=True)
+    assert sql == '(NOT (foo = ANY(:foo)))'
+    assert sorted(binds['foo']) == list(range(10))
+
+
+def test_argument_to_sql_value_set_twice():
+    """ Utils.argument_to_sql with many values for the same column. """
+    binds = {}
+    Utils.argument_to_sql(1, 'foo', binds)
+    sql = Utils.argument_to_sql(range(10), 'foo', binds)
+    assert sql == '(foo = ANY(:foo_set1))'
+    assert binds['foo'] == 1
@@ -328,3 +328,59 @@ def test_assert_utf8_unicode(db, table_text):
     base = u'blåbærsyltetøy'
     with pytest.raises(UnicodeError):
         db.execute(insert, {'x': base.encode('utf-8')})
+
+
+def test_insert_many(db, table_foo_xy):
+    """ Database.insert_many() inserts rows in chunks. """
+    rows = [{'x': i, 'y': None if i % 2 else -i} for i in range(7)]
+
+    count = db.insert_many(table_foo_xy.name, ('x', 'y'), rows,
+                           chunk_size=3)
+
+    assert count == len(rows)
+    result = db.query('select x, y from foo order by x')
+    assert [dict(r) for r in result] == rows
+
+
+def test_insert_many_empty(db, table_foo_xy):
+    """ Database.insert_many() without rows is a no-op. """
+    assert db.insert_many(table_foo_xy.name, ('x', 'y'), []) == 0
+    assert db.query_1('select count(*) from foo') == 0
+
+
+def test_nextvals(db):
+    """ Database.nextvals() gets a block of sequence values. """
+    db.execute('create sequence foo_seq')
+    first = int(db.nextval('foo_seq'))
+
+    values = db.nextvals('foo_seq', 5)
+
+    assert values == list(range(first + 1, first + 6))
+    assert int(db.nextval('foo_seq')) == first + 6
+    assert db.nextvals('foo_seq', 0) == []
+
+
+@pytest.mark.parametrize('count', (0, 3, 7, 10))
+def test_stream_query(db, table_foo_xy, count):
+    """ Database.query(stream=True) fetches rows in batches. """
+    rows = [{'x': i, 'y': -i} for i in range(count)]
+    db.insert_many(table_foo_xy.name, ('x', 'y'), rows)
+    db.stream_itersize = 3
+
+    result = db.query('select x, y from foo order by x', stream=True)
+
+    assert [dict(r) for r in result] == rows
+
+
+def test_stream_queries_setting(db, table_foo_xy):
+    """ Database.stream_queries streams all fetchall=False queries. """
+    rows = [{'x': i, 'y': -i} for i in range(5)]
+    db.insert_many(table_foo_xy.name, ('x', 'y'), rows)
+    db.stream_queries = True
+    db.stream_itersize = 2
+
+    result = db.query('select x, y from foo order by x', fetchall=False)
+    # The default cursor can be used while the stream is consumed
+    assert db.query_1('select count(*) from foo') == len(rows)
+
+    assert [dict(r) for r in result] == rows
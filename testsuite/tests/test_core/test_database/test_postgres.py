@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for Cerebrum.database.postgres
+"""
+
+import psycopg2
+import pytest
+
+from Cerebrum.Utils import ValueSet
+from Cerebrum.database import postgres
+
+
+class _Cursor(object):
+    """ psycopg2 cursor mock that records executed statements. """
+
+    def __init__(self, fail_prepare=False):
+        self.fail_prepare = fail_prepare
+        self.executed = []
+
+    def execute(self, sql, binds=None):
+        self.executed.append(sql)
+        if sql.startswith('PREPARE') and self.fail_prepare:
+            raise psycopg2.ProgrammingError('could not determine data type')
+
+    def close(self):
+        pass
+
+
+SELECT = 'SELECT * FROM foo WHERE x = %(x)s AND y = %(y)s OR z = %(x)s'
+
+
+def test_to_positional():
+    sql, names = postgres._to_positional(SELECT + " AND n LIKE 'a%%'")
+    assert sql == "SELECT * FROM foo WHERE x = $1 AND y = $2 OR z = $1 " \
+                  "AND n LIKE 'a%'"
+    assert names == ['x', 'y']
+
+
+def test_prepare_after_threshold():
+    cache = postgres.PreparedStatementCache(threshold=3)
+    cursor = _Cursor()
+    for _ in range(4):
+        cache.execute(cursor, SELECT, {'x': 1, 'y': 2})
+
+    assert cursor.executed[:2] == [SELECT, SELECT]
+    assert cursor.executed[3].startswith('PREPARE cerebrum_stmt_')
+    assert cursor.executed[-2:] == [
+        'EXECUTE {} (%(x)s, %(y)s)'.format(cursor.executed[3].split()[1])] * 2
+    assert cache.stats == {'misses': 2, 'prepared': 1, 'hits': 2}
+
+
+def test_prepare_failure():
+    cache = postgres.PreparedStatementCache(threshold=1)
+    cursor = _Cursor(fail_prepare=True)
+    cache.execute(cursor, SELECT, {})
+    cache.execute(cursor, SELECT, {})
+
+    assert cursor.executed[2].startswith('ROLLBACK TO SAVEPOINT')
+    assert cursor.executed[-2:] == [SELECT, SELECT]
+    assert cache.stats == {'failed': 1, 'misses': 2}
+
+
+@pytest.mark.parametrize('sql', ('SET CLIENT_ENCODING TO UTF8',
+                                 'LOCK TABLE foo IN EXCLUSIVE MODE'))
+def test_unpreparable(sql):
+    cache = postgres.PreparedStatementCache(threshold=1)
+    cursor = _Cursor()
+    cache.execute(cursor, sql, {})
+    assert cursor.executed == [sql]
+
+
+def test_lru_eviction():
+    cache = postgres.PreparedStatementCache(size=2, threshold=1)
+    cursor = _Cursor()
+    statements = ['SELECT {:d}'.format(i) for i in range(3)]
+    for sql in statements[:2] + statements[:1] + statements[2:]:
+        cache.execute(cursor, sql, {})
+
+    assert cursor.executed[-2].startswith('DEALLOCATE cerebrum_stmt_2')
+    assert len(cache) == 2
+    assert cache.stats['evicted'] == 1
+
+
+class _Connection(object):
+
+    def __init__(self):
+        self.cursors = []
+
+    def cursor(self):
+        self.cursors.append(_Cursor())
+        return self.cursors[-1]
+
+
+class _Database(postgres.PsycoPG2):
+
+    def __init__(self, threshold):
+        self.value_set_table_threshold = threshold
+        self._db = _Connection()
+
+
+VALUE_SET = 'SELECT * FROM foo WHERE (x = ANY(%(x)s)) AND y = %(y)s'
+
+
+def test_expand_value_sets():
+    db = _Database(threshold=3)
+    binds = {'x': ValueSet([1, 2, 3]), 'y': 2}
+    sql, new_binds = db.expand_value_sets(VALUE_SET, binds)
+
+    executed = db._db.cursors[0].executed
+    table = executed[0].split()[3]
+    assert executed[0].split()[:3] == ['CREATE', 'TEMPORARY', 'TABLE']
+    assert executed[1] == 'ANALYZE ' + table
+    assert sql == ('SELECT * FROM foo WHERE (x IN (SELECT value FROM {})) '
+                   'AND y = %(y)s').format(table)
+    assert new_binds == {'y': 2}
+
+
+def test_expand_value_sets_below_threshold():
+    db = _Database(threshold=4)
+    binds = {'x': ValueSet([1, 2, 3]), 'y': 2}
+    assert db.expand_value_sets(VALUE_SET, binds) == (VALUE_SET, binds)
+    assert db._db.cursors == []
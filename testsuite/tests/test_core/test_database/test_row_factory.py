@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for Cerebrum.database.row_factory
+"""
+
+import pytest
+
+from Cerebrum.database import row_factory
+
+
+FIELDS = ('entity_id', 'name', 'count')
+VALUES = (3, 'foo', 7)
+
+
+class _Cursor(object):
+    """ Minimal cursor with fetchmany/fetchall. """
+
+    arraysize = 2
+
+    def __init__(self, rows):
+        self._rows = list(rows)
+
+    def fetchmany(self, size=None):
+        size = size or self.arraysize
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+
+@pytest.fixture
+def row():
+    return row_factory.make_compact_row_class(FIELDS)(VALUES)
+
+
+def test_compact_row_class_cache():
+    cls = row_factory.make_compact_row_class(FIELDS)
+    assert row_factory.make_compact_row_class(list(FIELDS)) is cls
+    assert row_factory.make_compact_row_class(FIELDS[:2]) is not cls
+
+
+def test_compact_row_index(row):
+    assert row[0] == 3
+    assert row[-1] == 7
+    assert row[1:] == ('foo', 7)
+    assert tuple(row) == VALUES
+
+
+def test_compact_row_key(row):
+    assert row['entity_id'] == 3
+    assert row[u'name'] == 'foo'
+    with pytest.raises(KeyError):
+        row['missing']
+    with pytest.raises(IndexError):
+        row[3]
+
+
+def test_compact_row_attr(row):
+    assert row.entity_id == 3
+    assert row.name == 'foo'
+    # clashes with tuple.count
+    assert row.count(7) == 1
+    assert row['count'] == 7
+
+
+def test_compact_row_dict(row):
+    expected = dict(zip(FIELDS, VALUES))
+    assert dict(row) == expected
+    assert row.dict() == expected
+    assert row.keys() == list(FIELDS)
+    assert row.items() == list(zip(FIELDS, VALUES))
+
+
+def test_compact_row_get(row):
+    assert row.get('name') == 'foo'
+    assert row.get('missing', 1) == 1
+    assert row.get(0) is None
+    assert row.has_key('name')
+    assert not row.has_key('missing')
+
+
+def test_compact_row_read_only(row):
+    with pytest.raises(TypeError):
+        row['name'] = 'bar'
+    with pytest.raises(AttributeError):
+        row.name = 'bar'
+
+
+def test_compact_row_type(row):
+    assert isinstance(row, row_factory.ROW_TYPES)
+
+
+def test_list_rows_compact():
+    rows = row_factory.list_rows(_Cursor([VALUES, (4, 'bar', 0)]), FIELDS,
+                                 compact=True)
+    assert [r['name'] for r in rows] == ['foo', 'bar']
+    assert all(isinstance(r, row_factory.CompactRow) for r in rows)
+
+
+def test_iter_rows_compact():
+    data = [(i, str(i), 0) for i in range(5)]
+    rows = row_factory.iter_rows(_Cursor(data), FIELDS, compact=True)
+    assert [r.entity_id for r in rows] == list(range(5))
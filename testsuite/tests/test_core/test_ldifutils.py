@@ -81,3 +81,29 @@ def test_config_catch_cycle(nodes):
 )
 def test_ldap_attrs(attr, attrs):
     assert LDIFutils.expand_ldap_attrs(attr) == attrs
+
+
+serializer_entries = [
+    ('cn=foo,dc=example,dc=org', {'objectClass': ('top', 'person')}),
+    ('cn=foo,dc=example,dc=org', {'cn': ['bar', 'Foo'], 'sn': 'x'}),
+    ('uid=foo,dc=example,dc=org', {'uid': 'bar', 'gecos': None}),
+    ('uid=foo,dc=example,dc=org', {'userPassword': ('{crypt}*Locked',)}),
+    ('cn=blåbær,dc=example,dc=org', {'description': ' leading space'}),
+    (' cn=foo,dc=example,dc=org', {'memberUid': set(['b', 'a', 'c'])}),
+    ('cn=foo+sn=bar,dc=example,dc=org', {'mail': frozenset(['x@y'])}),
+]
+
+
+@pytest.mark.parametrize('dn,attrs', serializer_entries)
+@pytest.mark.parametrize('add_rdn', [True, False])
+def test_entry_serializer(dn, attrs, add_rdn):
+    serialize = LDIFutils.EntrySerializer()
+    expected = LDIFutils.entry_string(dn, attrs, add_rdn)
+    assert serialize(dn, attrs, add_rdn) == expected
+    # and again, with cached attribute info
+    assert serialize(dn, attrs, add_rdn) == expected
+
+
+def test_entry_serializer_base64_attrs():
+    serialize = LDIFutils.EntrySerializer(b64_attrs=('cn',))
+    assert serialize('cn=foo', {}) == 'dn: cn=foo\ncn:: Zm9v\n\n'
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+""" Tests for Cerebrum.utils.sorting """
+import operator
+
+import pytest
+
+from Cerebrum.utils.sorting import external_sort
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 10, 1000])
+def test_external_sort(chunk_size):
+    items = [5, 3, 9, 1, 1, 7, 2, 8, 0, 4]
+    assert list(external_sort(items, chunk_size=chunk_size)) == sorted(items)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 1000])
+def test_external_sort_stable(chunk_size):
+    items = [('b', 1), ('a', 2), ('b', 3), ('a', 4), ('c', 5), ('a', 6)]
+    key = operator.itemgetter(0)
+    result = list(external_sort(items, key=key, chunk_size=chunk_size))
+    assert result == sorted(items, key=key)
+
+
+def test_external_sort_uncomparable_items():
+    items = [('b', {'x': 1}), ('a', {'y': 2}), ('b', {'z': 3})]
+    key = operator.itemgetter(0)
+    result = list(external_sort(items, key=key, chunk_size=1))
+    assert result == sorted(items, key=key)
+
+
+def test_external_sort_empty():
+    assert list(external_sort([])) == []
+
+
+def test_external_sort_tmpdir(tmpdir):
+    items = list(range(20, 0, -1))
+    result = list(external_sort(items, chunk_size=5, tmpdir=str(tmpdir)))
+    assert result == sorted(items)
@@ -368,3 +368,40 @@ def test_move_object(user_sync, person, ad_accounts):
     # the correct location.
     #
     # assert
+
+
+
+class _ListingServer(object):
+    """ AD client that lists the given objects, then raises *error*. """
+
+    def __init__(self, ad_objects, error=None):
+        self.ad_objects = ad_objects
+        self.error = error
+
+    def get_list_objects(self, commandid):
+        for ad_object in self.ad_objects:
+            yield ad_object
+        if self.error:
+            raise self.error
+
+
+def test_ad_listing_chunks(adsync_mod):
+    ad_objects = [{'Name': str(i)} for i in range(20)]
+    listing = adsync_mod._ADListing(_ListingServer(ad_objects), 'cmd', 3)
+    listing.start()
+    chunks = list(listing.iter_chunks())
+    assert [len(chunk) for chunk in chunks] == [3] * 6 + [2]
+    assert sum(chunks, []) == ad_objects
+    assert listing.seconds is not None
+
+
+def test_ad_listing_error(adsync_mod):
+    server = _ListingServer([{'Name': 'a'}, {'Name': 'b'}],
+                            error=ADUtils.OUUnknownException('foo'))
+    listing = adsync_mod._ADListing(server, 'cmd', 1)
+    listing.start()
+    chunks = listing.iter_chunks()
+    assert next(chunks) == [{'Name': 'a'}]
+    assert next(chunks) == [{'Name': 'b'}]
+    with pytest.raises(ADUtils.OUUnknownException):
+        next(chunks)
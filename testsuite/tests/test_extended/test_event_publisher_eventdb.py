@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for event claims and retries in Cerebrum.modules.event_publisher.eventdb
+
+All timestamps are compared to ``[:now]``, which is fixed for the duration of
+the test transaction.
+"""
+from __future__ import unicode_literals
+
+import pytest
+
+from Cerebrum.modules.event_publisher.eventdb import EventsAccessor
+
+
+@pytest.fixture
+def event_db(database):
+    event_db = EventsAccessor(database)
+    # Only events created by the test should be due
+    event_db.execute("DELETE FROM [:table schema=cerebrum name=events]")
+    return event_db
+
+
+def create(event_db, subject_id):
+    return int(event_db.create_event('modify', subject_id, 'account',
+                                     'foo-%d' % subject_id))
+
+
+def get_state(event_db, event_id):
+    """ Get (failed, taken, seconds until next attempt) for an event. """
+    row = event_db.query_1(
+        """
+        SELECT failed,
+               taken_time IS NOT NULL AS taken,
+               extract(epoch FROM next_attempt_at - [:now]) AS wait
+        FROM [:table schema=cerebrum name=events]
+        WHERE event_id = :event_id
+        """,
+        {'event_id': event_id})
+    wait = None if row['wait'] is None else int(row['wait'])
+    return int(row['failed']), bool(row['taken']), wait
+
+
+def claimed_ids(event_db, **kwargs):
+    return [int(row['event_id'])
+            for row in event_db.claim_events(100, **kwargs)]
+
+
+def test_claim_lease(event_db):
+    event_ids = [create(event_db, 10), create(event_db, 11)]
+    assert claimed_ids(event_db, failed_delay=300) == event_ids
+    for event_id in event_ids:
+        assert get_state(event_db, event_id) == (0, True, 300)
+    # not due again until the lease expires
+    assert claimed_ids(event_db) == []
+
+
+def test_claim_partition(event_db):
+    event_ids = [create(event_db, subject_id) for subject_id in range(4)]
+    assert claimed_ids(event_db, partition=1, num_partitions=2) == [
+        event_ids[1], event_ids[3]]
+
+
+def test_claim_waits_for_older_subject_event(event_db):
+    first, second = create(event_db, 10), create(event_db, 10)
+    other = create(event_db, 11)
+    assert claimed_ids(event_db) == [first, second, other]
+    event_db.fail_events([first], retry_delay=60)
+    event_db.release_events([second, other])
+    # second must wait for the retry of first
+    assert claimed_ids(event_db) == [other]
+
+
+def test_fail_backoff(event_db):
+    event_id = create(event_db, 10)
+    waits = []
+    for _ in range(4):
+        event_db.fail_events([event_id], retry_delay=60, max_retry_delay=300)
+        waits.append(get_state(event_db, event_id))
+    assert waits == [(1, False, 60), (2, False, 120), (3, False, 240),
+                     (4, False, 300)]
+    assert claimed_ids(event_db) == []
+
+
+def test_fail_count_inc_backoff(event_db):
+    event_id = create(event_db, 10)
+    event_db.fail_count_inc(event_id, retry_delay=60)
+    event_db.fail_count_inc(event_id, retry_delay=60)
+    assert get_state(event_db, event_id) == (2, False, 120)
+
+
+def test_fail_limit(event_db):
+    event_id = create(event_db, 10)
+    event_db.fail_events([event_id], fail_limit=2, retry_delay=60)
+    assert get_state(event_db, event_id) == (1, False, 60)
+    event_db.fail_events([event_id], fail_limit=2, retry_delay=60)
+    assert get_state(event_db, event_id) == (2, False, None)
+    assert event_db.count_unprocessed() == 0
+
+
+def test_given_up_event_does_not_block_subject(event_db):
+    first, second = create(event_db, 10), create(event_db, 10)
+    event_db.fail_events([first], fail_limit=1)
+    assert claimed_ids(event_db, fail_limit=1) == [second]
+
+
+def test_reset(event_db):
+    event_id = create(event_db, 10)
+    event_db.fail_events([event_id], fail_limit=1)
+    assert claimed_ids(event_db) == []
+    event_db.fail_count_reset(event_id)
+    assert get_state(event_db, event_id) == (0, False, 0)
+    assert claimed_ids(event_db) == [event_id]
+
+
+def test_release_all(event_db):
+    claimed, given_up = create(event_db, 10), create(event_db, 11)
+    event_db.fail_events([given_up], fail_limit=1)
+    event_db.claim_events(100, failed_delay=300)
+    event_db.release_all()
+    assert get_state(event_db, claimed) == (0, False, 0)
+    assert get_state(event_db, given_up) == (1, False, None)
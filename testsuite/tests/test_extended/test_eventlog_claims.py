@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for event claims and retries in Cerebrum.modules.EventLog
+
+All timestamps are compared to ``[:now]``, which is fixed for the duration of
+the test transaction.
+"""
+from __future__ import unicode_literals
+
+import pytest
+
+TARGET_SYSTEM = 999001
+OTHER_SYSTEM = 999002
+
+
+@pytest.fixture
+def event_db(database):
+    if not hasattr(database, 'claim_events'):
+        pytest.skip('mod_eventlog not enabled')
+    for code in (TARGET_SYSTEM, OTHER_SYSTEM):
+        database.execute(
+            """
+            INSERT INTO [:table schema=cerebrum name=target_system_code]
+              (code, code_str, description)
+            VALUES (:code, :code_str, 'test')
+            """,
+            {'code': code, 'code_str': 'test-%d' % code})
+    return database
+
+
+def create(event_db, subject_id, target_system=TARGET_SYSTEM):
+    event_id = int(event_db.nextval('event_log_seq'))
+    event_db.execute(
+        """
+        INSERT INTO [:table schema=cerebrum name=event_log]
+          (event_id, target_system, subject_entity)
+        VALUES (:event_id, :target_system, :subject_entity)
+        """,
+        {'event_id': event_id,
+         'target_system': target_system,
+         'subject_entity': subject_id})
+    return event_id
+
+
+def get_state(event_db, event_id):
+    """ Get (failed, taken, seconds until next attempt) for an event. """
+    row = event_db.query_1(
+        """
+        SELECT failed,
+               taken_time IS NOT NULL AS taken,
+               extract(epoch FROM next_attempt_at - [:now]) AS wait
+        FROM [:table schema=cerebrum name=event_log]
+        WHERE event_id = :event_id
+        """,
+        {'event_id': event_id})
+    wait = None if row['wait'] is None else int(row['wait'])
+    return int(row['failed']), bool(row['taken']), wait
+
+
+def claimed_ids(event_db, limit=100, **kwargs):
+    return [int(row['event_id'])
+            for row in event_db.claim_events(TARGET_SYSTEM, limit, **kwargs)]
+
+
+def test_claim_lease(event_db):
+    event_ids = [create(event_db, 10), create(event_db, 11)]
+    assert claimed_ids(event_db, failed_delay=300) == event_ids
+    for event_id in event_ids:
+        assert get_state(event_db, event_id) == (0, True, 300)
+    # not due again until the lease expires
+    assert claimed_ids(event_db) == []
+
+
+def test_claim_limit(event_db):
+    event_ids = [create(event_db, subject_id) for subject_id in range(4)]
+    assert claimed_ids(event_db, limit=3) == event_ids[:3]
+    assert claimed_ids(event_db, limit=3) == event_ids[3:]
+
+
+def test_claim_target_system(event_db):
+    event_id = create(event_db, 10)
+    create(event_db, 11, target_system=OTHER_SYSTEM)
+    assert claimed_ids(event_db) == [event_id]
+
+
+def test_claim_waits_for_older_subject_event(event_db):
+    # a retry for the subject in another target system doesn't block
+    elsewhere = create(event_db, 11, target_system=OTHER_SYSTEM)
+    event_db.fail_events([elsewhere], retry_delay=60)
+    first, second = create(event_db, 10), create(event_db, 10)
+    other = create(event_db, 11)
+    assert claimed_ids(event_db) == [first, second, other]
+    event_db.fail_events([first], retry_delay=60)
+    event_db.release_event(second, increment=False)
+    event_db.release_event(other, increment=False)
+    # second must wait for the retry of first
+    assert claimed_ids(event_db) == [other]
+
+
+def test_fail_backoff(event_db):
+    event_id = create(event_db, 10)
+    waits = []
+    for _ in range(4):
+        event_db.fail_events([event_id], retry_delay=60, max_retry_delay=300)
+        waits.append(get_state(event_db, event_id))
+    assert waits == [(1, False, 60), (2, False, 120), (3, False, 240),
+                     (4, False, 300)]
+    assert claimed_ids(event_db) == []
+
+
+def test_fail_limit(event_db):
+    event_id = create(event_db, 10)
+    event_db.fail_events([event_id], fail_limit=2, retry_delay=60)
+    assert get_state(event_db, event_id) == (1, False, 60)
+    event_db.fail_events([event_id], fail_limit=2, retry_delay=60)
+    assert get_state(event_db, event_id) == (2, False, None)
+
+
+def test_given_up_event_does_not_block_subject(event_db):
+    first, second = create(event_db, 10), create(event_db, 10)
+    event_db.fail_events([first], fail_limit=1)
+    assert claimed_ids(event_db, fail_limit=1) == [second]
+
+
+def test_remove_events(event_db):
+    event_ids = [create(event_db, 10), create(event_db, 11)]
+    assert event_db.remove_events(claimed_ids(event_db)) == 2
+    assert event_db.remove_events(event_ids) == 0
+    assert event_db.remove_events([]) == 0
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Tests for Cerebrum.modules.group_closure. """
+from __future__ import unicode_literals
+
+import pytest
+
+from Cerebrum.testutils import datasource
+
+
+@pytest.fixture
+def database(database):
+    database.cl_init(change_program='test_group_closure')
+    return database
+
+
+@pytest.fixture
+def gr(database):
+    from Cerebrum.modules.group_closure.mixins import GroupClosureMixin
+    return GroupClosureMixin(database)
+
+
+@pytest.fixture
+def closure(database):
+    from Cerebrum.modules.group_closure.dbal import GroupClosure
+    return GroupClosure(database)
+
+
+@pytest.fixture
+def groups(gr, const, initial_account):
+    """ Ids of four new groups. """
+    group_ids = []
+    for entry in datasource.BasicGroupSource()(limit=4):
+        gr.populate(
+            creator_id=initial_account.entity_id,
+            visibility=const.group_visibility_all,
+            name=entry['group_name'],
+            description=entry['description'],
+            group_type=const.group_type_unknown,
+        )
+        gr.write_db()
+        group_ids.append(gr.entity_id)
+        gr.clear()
+    return group_ids
+
+
+def add_chain(gr, group_ids):
+    """ Make every group_ids[x+1] a member of group_ids[x]. """
+    for parent, child in zip(group_ids, group_ids[1:]):
+        gr.clear()
+        gr.find(parent)
+        gr.add_member(child)
+    gr.clear()
+
+
+def depths(closure, group_id):
+    return dict((int(row['member_id']), int(row['min_depth']))
+                for row in closure.search(group_id=group_id))
+
+
+def test_add_chain(gr, closure, groups):
+    add_chain(gr, groups)
+    assert depths(closure, groups[0]) == {
+        groups[1]: 0,
+        groups[2]: 1,
+        groups[3]: 2,
+    }
+    assert list(closure.check()) == []
+
+
+def test_shortcut_keeps_min_depth(gr, closure, groups):
+    add_chain(gr, groups)
+    gr.find(groups[0])
+    gr.add_member(groups[3])
+    assert depths(closure, groups[0])[groups[3]] == 0
+    gr.remove_member(groups[3])
+    assert depths(closure, groups[0])[groups[3]] == 2
+    assert list(closure.check()) == []
+
+
+def test_remove_membership(gr, closure, groups):
+    add_chain(gr, groups)
+    gr.find(groups[1])
+    gr.remove_member(groups[2])
+    assert depths(closure, groups[0]) == {groups[1]: 0}
+    assert depths(closure, groups[2]) == {groups[3]: 0}
+    assert list(closure.check()) == []
+
+
+def test_delete_group(gr, closure, groups):
+    add_chain(gr, groups)
+    gr.find(groups[1])
+    gr.delete()
+    assert depths(closure, groups[0]) == {}
+    assert list(closure.check()) == []
+
+
+def test_cyclic_membership(gr, closure, groups):
+    add_chain(gr, groups)
+    gr.find(groups[-1])
+    gr.add_member(groups[0])
+    gr.clear()
+    assert set(depths(closure, groups[0])) == set(groups)
+    gr.find(groups[-1])
+    gr.remove_member(groups[0])
+    assert list(closure.check()) == []
+
+
+def test_add_chain_max_depth(gr, closure, groups, monkeypatch):
+    from Cerebrum.modules.group_closure import dbal
+    monkeypatch.setattr(dbal, 'MAX_DEPTH', 1)
+    add_chain(gr, groups)
+    assert depths(closure, groups[0]) == {
+        groups[1]: 0,
+        groups[2]: 1,
+    }
+    assert list(closure.check()) == []
+
+
+def test_rebuild(gr, closure, groups):
+    add_chain(gr, groups)
+    closure.execute(
+        "DELETE FROM [:table schema=cerebrum name=group_member_closure]")
+    assert list(closure.check())
+    closure.rebuild()
+    assert list(closure.check()) == []
+
+
+def test_search_indirect(gr, groups):
+    add_chain(gr, groups)
+    result = set(int(row['group_id'])
+                 for row in gr.search(member_id=groups[-1],
+                                      indirect_members=True,
+                                      filter_expired=False))
+    assert result == set(groups[:-1])
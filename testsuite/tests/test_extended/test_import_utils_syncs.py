@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for sync_many() in Cerebrum.modules.import_utils.syncs.
+
+Each test syncs one person with ``__call__()`` and another person with
+``sync_many()``, and checks that both end up with the same values and the
+same change log entries.
+"""
+from __future__ import unicode_literals
+
+import pytest
+
+from Cerebrum.modules.import_utils import syncs
+from Cerebrum.testutils import datasource
+
+
+@pytest.fixture
+def database(database):
+    database.cl_init(change_program='test_import_utils_syncs')
+    return database
+
+
+@pytest.fixture
+def system(constant_module):
+    code = constant_module._AuthoritativeSystemCode('3a1e7c9f5b0d2e84',
+                                                    description='System')
+    code.insert()
+    return code
+
+
+@pytest.fixture
+def persons(database, factory, const):
+    """ Ids of two new persons. """
+    pe = factory.get('Person')(database)
+    person_ids = []
+    for entry in datasource.BasicPersonSource()(limit=2):
+        pe.populate(birth_date=entry['birth_date'],
+                    gender=const.gender_unknown)
+        pe.write_db()
+        person_ids.append(pe.entity_id)
+        pe.clear()
+    return person_ids
+
+
+def get_person(database, factory, person_id):
+    pe = factory.get('Person')(database)
+    pe.find(person_id)
+    return pe
+
+
+def get_changes(database, person_id, start):
+    """ Get change log entries for a person, since *start*. """
+    value = '%d' % person_id
+    return sorted(
+        (m['change_type_id'],
+         (m['change_params'] or '').replace(value, '<person>'))
+        for m in database.messages[start:]
+        if m['subject_entity'] == person_id)
+
+
+def check_sync(database, factory, persons, sync, get_values, setup=None):
+    """ Sync both persons, and compare the results.
+
+    :param get_values: callable that returns source values for a person_id
+    :param setup: callable that sets up the initial state for a person
+    """
+    if setup:
+        for person_id in persons:
+            setup(get_person(database, factory, person_id))
+    call_id, many_id = persons
+    start = len(database.messages)
+
+    call_result = sync(get_person(database, factory, call_id),
+                       get_values(call_id))
+    many_results, errors = sync.sync_many(
+        [(get_person(database, factory, many_id), get_values(many_id))])
+    assert errors == {}
+    assert many_results == {many_id: call_result}
+
+    def current(person_id):
+        pe = get_person(database, factory, person_id)
+        value = '%d' % person_id
+        return sorted((int(k), repr(v).replace(value, '<person>'))
+                      for k, v in sync.fetch_current(pe))
+
+    assert current(call_id) == current(many_id)
+    assert (get_changes(database, call_id, start) ==
+            get_changes(database, many_id, start))
+    return call_result
+
+
+@pytest.fixture
+def contact_types(constant_module):
+    codes = tuple(
+        constant_module._ContactInfoCode(code_str, description='contact')
+        for code_str in ('6d2bb0c1f5e3a74e', '0c5f7e2a9d1b3e86',
+                         'b7e4a1d0c9f2e653'))
+    for code in codes:
+        code.insert()
+    return codes
+
+
+def test_contact_info_sync(database, factory, persons, system,
+                           contact_types):
+    foo, bar, baz = contact_types
+
+    def setup(pe):
+        pe.add_contact_info(system, foo, '1')
+        pe.add_contact_info(system, bar, '2')
+
+    sync = syncs.ContactInfoSync(database, system)
+    to_add, to_update, to_remove = check_sync(
+        database, factory, persons, sync,
+        lambda person_id: [(bar, '3'), (baz, '4')],
+        setup=setup)
+    assert (to_add, to_update, to_remove) == ({baz}, {bar}, {foo})
+
+
+@pytest.fixture
+def id_types(constant_module, const):
+    codes = tuple(
+        constant_module._EntityExternalIdCode(code_str, const.entity_person,
+                                              description='external id')
+        for code_str in ('e1a07f3c5d9b2648', '4f8c2d6b0a1e9735',
+                         '9b3d5f1e7c0a4826'))
+    for code in codes:
+        code.insert()
+    return codes
+
+
+def test_external_id_sync(database, factory, persons, system, id_types):
+    foo, bar, baz = id_types
+
+    def setup(pe):
+        pe.affect_external_id(system, foo, bar)
+        pe.populate_external_id(system, foo, 'foo-%d' % pe.entity_id)
+        pe.populate_external_id(system, bar, 'bar-%d' % pe.entity_id)
+        pe.write_db()
+
+    sync = syncs.ExternalIdSync(database, system)
+    to_add, to_update, to_remove = check_sync(
+        database, factory, persons, sync,
+        lambda person_id: [(bar, 'new-bar-%d' % person_id),
+                           (baz, 'baz-%d' % person_id)],
+        setup=setup)
+    assert (to_add, to_update, to_remove) == ({baz}, {bar}, {foo})
+
+
+@pytest.fixture
+def address_types(constant_module):
+    codes = tuple(
+        constant_module._AddressCode(code_str, description='address')
+        for code_str in ('2c7e9a4f1b6d0358', 'd5a3f8b1e0c7294e',
+                         '7f0b2e6d9c4a1853'))
+    for code in codes:
+        code.insert()
+    return codes
+
+
+def test_address_sync(database, factory, persons, system, address_types):
+    foo, bar, baz = address_types
+
+    def setup(pe):
+        pe.add_entity_address(system, foo, address_text='Foo 1')
+        pe.add_entity_address(system, bar, address_text='Bar 1')
+
+    sync = syncs.AddressSync(database, system)
+    to_add, to_update, to_remove = check_sync(
+        database, factory, persons, sync,
+        lambda person_id: [(bar, {'address_text': 'Bar 2'}),
+                           (baz, {'address_text': 'Baz 1',
+                                  'postal_number': '0316',
+                                  'city': 'Oslo'})],
+        setup=setup)
+    assert (to_add, to_update, to_remove) == ({baz}, {bar}, {foo})
+
+
+def test_person_name_sync(database, factory, persons, system, const):
+    first, last = const.name_first, const.name_last
+
+    def setup(pe):
+        pe.affect_names(system, first, last)
+        pe.populate_name(first, 'Ola')
+        pe.populate_name(last, 'Nordmann')
+        pe.write_db()
+
+    sync = syncs.PersonNameSync(database, system,
+                                affect_types=(first, last))
+    to_add, to_update, to_remove = check_sync(
+        database, factory, persons, sync,
+        lambda person_id: [(first, 'Ola'), (last, 'Normann')],
+        setup=setup)
+    assert (to_add, to_update, to_remove) == (set(), {last}, set())
+
+
+@pytest.fixture
+def ous(database, factory):
+    """ Ids of four new OUs. """
+    ou = factory.get('OU')(database)
+    ou_ids = []
+    for _ in range(4):
+        ou.populate()
+        ou.write_db()
+        ou_ids.append(ou.entity_id)
+        ou.clear()
+    return ou_ids
+
+
+@pytest.fixture
+def aff_statuses(constant_module):
+    aff = constant_module._PersonAffiliationCode('8e2f4a6c0b1d3957',
+                                                 description='affiliation')
+    aff.insert()
+    statuses = tuple(
+        constant_module._PersonAffStatusCode(aff, status,
+                                             description='status')
+        for status in ('a1c3e5f7', 'b2d4f6a8'))
+    for status in statuses:
+        status.insert()
+    return statuses
+
+
+def test_affiliation_sync(database, factory, persons, system, ous,
+                          aff_statuses):
+    ou_renew, ou_change, ou_add, ou_remove = ous
+    status_a, status_b = aff_statuses
+    aff = status_a.affiliation
+
+    def setup(pe):
+        pe.add_affiliation(ou_renew, aff, system, status_a)
+        pe.add_affiliation(ou_change, aff, system, status_a)
+        pe.add_affiliation(ou_remove, aff, system, status_a)
+
+    sync = syncs.AffiliationSync(database, system)
+
+    def fetch_current(pe):
+        for row in pe.list_affiliations(person_id=pe.entity_id,
+                                        source_system=system):
+            yield (row['ou_id'], (row['status'], row['deleted_date']))
+
+    sync.fetch_current = fetch_current
+    to_add, to_update, to_remove = check_sync(
+        database, factory, persons, sync,
+        lambda person_id: [(status_a, ou_renew),
+                           (status_b, ou_change),
+                           (status_a, ou_add)],
+        setup=setup)
+    assert to_add == {(ou_change, aff, status_b), (ou_add, aff, status_a)}
+    assert to_update == {(ou_renew, aff, status_a)}
+    assert to_remove == {(ou_change, aff, status_a),
+                         (ou_remove, aff, status_a)}
+
+
+def test_sync_many_skips_invalid(database, factory, persons, system,
+                                 contact_types):
+    foo, bar, _ = contact_types
+    good_id, bad_id = persons
+    sync = syncs.ContactInfoSync(database, system,
+                                 affect_types=(foo, bar))
+    results, errors = sync.sync_many([
+        (get_person(database, factory, good_id), [(foo, '1')]),
+        (get_person(database, factory, bad_id), [(foo, '1'), (foo, '2')]),
+    ])
+    assert results == {good_id: ({foo}, set(), set())}
+    assert list(errors) == [bad_id]
+    assert isinstance(errors[bad_id], ValueError)
+    bad = get_person(database, factory, bad_id)
+    assert list(sync.fetch_current(bad)) == []
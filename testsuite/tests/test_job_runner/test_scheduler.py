@@ -0,0 +1,125 @@
+# encoding: utf-8
+""" Unit tests for Cerebrum.modules.job_runner.scheduler """
+
+import pytest
+
+from Cerebrum.modules.job_runner.job_actions import Action, CallableAction
+from Cerebrum.modules.job_runner.scheduler import JobGraph
+
+
+def _job(pre=None, post=None, nonconcurrent=(), call=True):
+    return Action(pre=pre, post=post, nonconcurrent=list(nonconcurrent),
+                  call=CallableAction() if call else None)
+
+
+@pytest.fixture
+def jobs():
+    # import_hr -> export_ldap -> ldap_post
+    #           -> export_ad
+    # (import_hr, export_ad) <- nightly (call-less)
+    return {
+        'import_hr': _job(),
+        'export_ldap': _job(pre=['import_hr'], post=['ldap_post']),
+        'ldap_post': _job(),
+        'export_ad': _job(pre=['import_hr'], nonconcurrent=['export_ldap']),
+        'nightly': _job(pre=['import_hr', 'export_ldap', 'export_ad'],
+                        call=False),
+        'other': _job(),
+    }
+
+
+@pytest.fixture
+def graph(jobs):
+    return JobGraph(jobs, runtimes={
+        'import_hr': 100,
+        'export_ldap': 10,
+        'ldap_post': 5,
+        'export_ad': 50,
+    })
+
+
+def test_pre_job_queued(graph):
+    assert graph.is_blocked('export_ldap', ['import_hr'], set())
+    assert not graph.is_blocked('export_ldap', ['other'], set())
+
+
+def test_pre_job_running(graph):
+    assert graph.is_blocked('export_ldap', [], set(['import_hr']))
+
+
+def test_self_running(graph):
+    assert graph.is_blocked('other', [], set(['other']))
+    assert not graph.is_blocked('other', ['other'], set())
+
+
+def test_post_of_queued(graph):
+    # export_ldap has ldap_post as a post-job
+    assert graph.is_blocked('ldap_post', ['export_ldap'], set())
+    assert graph.is_blocked('ldap_post', [], set(['export_ldap']))
+
+
+def test_recursive_post_of_pre(graph):
+    # export_ldap is a pre-job of nightly, and ldap_post is its post-job
+    assert graph.is_blocked('nightly', ['ldap_post'], set())
+
+
+def test_has_conflict(graph):
+    assert graph.has_conflict('export_ad', set(['export_ldap']))
+    assert not graph.has_conflict('export_ad', set(['import_hr']))
+
+
+def test_runtime(graph):
+    assert graph.runtime('import_hr') == 100
+    assert graph.runtime('other') == graph.default_runtime
+    assert graph.runtime('nightly') == 0
+
+
+def test_priority(graph):
+    assert graph.priority('ldap_post') == 5
+    assert graph.priority('export_ldap') == 15
+    assert graph.priority('export_ad') == 50
+    assert graph.priority('import_hr') == 150
+
+
+def test_set_runtime(graph):
+    graph.set_runtime('ldap_post', 100)
+    assert graph.priority('export_ldap') == 110
+    assert graph.priority('import_hr') == 210
+
+
+def test_sort_queue(graph):
+    queue = ['other', 'export_ldap', 'ldap_post', 'export_ad']
+    graph.sort_queue(queue)
+    assert queue == ['other', 'export_ad', 'export_ldap', 'ldap_post']
+
+
+def test_cycle():
+    graph = JobGraph({'a': _job(post=['b']), 'b': _job(post=['a'])})
+    assert graph.priority('a') == 2 * graph.default_runtime
+
+
+def test_predict(graph):
+    queue = ['export_ad', 'export_ldap', 'ldap_post', 'nightly']
+    schedule = dict((item['name'], item) for item in
+                    graph.predict(queue, [('import_hr', 0)], 50, 1))
+    assert schedule['import_hr']['end'] == 100
+    # longest critical path first
+    assert schedule['export_ad']['start'] == 100
+    assert schedule['export_ldap']['start'] == 150
+    assert schedule['ldap_post']['start'] == 160
+    assert schedule['nightly']['end'] == 165
+
+
+def test_predict_conflict(graph):
+    schedule = dict((item['name'], item) for item in
+                    graph.predict(['export_ad'], [('export_ldap', 0)], 0, 2))
+    assert schedule['export_ad']['start'] == 10
+
+
+def test_predict_blocked(graph):
+    schedule = graph.predict(['export_ldap', 'nosuchjob'], [], 0, 1)
+    assert [item['name'] for item in schedule] == ['export_ldap']
+
+    graph = JobGraph({'a': _job(pre=['b']), 'b': _job(post=['a'])})
+    schedule = graph.predict(['a'], [], 0, 1)
+    assert schedule[0]['start'] is None